@@ -13,6 +13,7 @@ from app.core.config import settings
 from app.db.models import User, Plan
 from app.core.enums import PlanName
 from app.core.security import create_access_token, encrypt_data, decrypt_data
+from app.core.principal_cache import invalidate_app_principals
 
 class UserAdmin(ModelView, model=User):
     category = "Управление"
@@ -55,6 +56,10 @@ class UserAdmin(ModelView, model=User):
         if data.get("encrypted_vk_token_clear"):
             model.encrypted_vk_token = encrypt_data(data["encrypted_vk_token_clear"])
 
+    async def after_model_change(self, data: dict, model: User, is_created: bool, request: Request):
+        # Тариф и флаги могли измениться - сбрасываем кэш авторизации
+        await invalidate_app_principals(request.app, model.id)
+
     @action(name="impersonate", label="👤 Войти как пользователь", add_in_detail=True, add_in_list=True)
     async def impersonate(self, request: Request, pks: list[int]) -> JSONResponse:
         if len(pks) != 1:
@@ -127,6 +132,7 @@ class UserAdmin(ModelView, model=User):
             successful_count += 1
         
         await session.commit()
+        await invalidate_app_principals(request.app, *[user.id for user in users])
 
         return JSONResponse(content={"message": f"Подписка продлена для {successful_count} пользователей."})
         
@@ -154,6 +160,7 @@ class UserAdmin(ModelView, model=User):
                     user.is_frozen = True
                 # --- КОНЕЦ ИСПРАВЛЕНИЯ ---
             await session.commit()
+            await invalidate_app_principals(request.app, *pks_int)
         return JSONResponse(content={"message": "Аккаунты помечены как удаленные."})
 
     @action(name="restore", label="♻️ Восстановить", confirmation_message="Восстановить доступ для пользователя?")
@@ -167,6 +174,7 @@ class UserAdmin(ModelView, model=User):
                 user.deleted_at=None
                 user.is_frozen=False
             await session.commit()
+            await invalidate_app_principals(request.app, *pks_int)
         return JSONResponse(content={"message": "Аккаунты восстановлены."})
 
     @action(name="toggle_freeze", label="🧊 Заморозить/Разморозить")
@@ -178,6 +186,7 @@ class UserAdmin(ModelView, model=User):
             for user in result.scalars().all():
                 user.is_frozen = not user.is_frozen
             await session.commit()
+            await invalidate_app_principals(request.app, *pks_int)
         return JSONResponse(content={"message": "Статус заморозки изменен."})
 
     @action(name="toggle_shadow_ban", label="👻 Теневой бан вкл/выкл")
@@ -189,4 +198,5 @@ class UserAdmin(ModelView, model=User):
             for user in result.scalars().all():
                 user.is_shadow_banned = not user.is_shadow_banned
             await session.commit()
+            await invalidate_app_principals(request.app, *pks_int)
         return JSONResponse(content={"message": "Статус теневого бана изменен."})
\ No newline at end of file
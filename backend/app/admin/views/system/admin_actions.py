@@ -2,6 +2,7 @@ from sqladmin import BaseView, expose
 from fastapi import Request
 from sqlalchemy import update
 from app.db.models import Automation, User
+from app.core.principal_cache import invalidate_app_principals
 
 class AdminActionsView(BaseView):
     name = "Экстренные Действия"
@@ -29,6 +30,7 @@ class AdminActionsView(BaseView):
                 await session.execute(update(Automation).values(is_active=False))
                 await session.execute(update(User).values(is_frozen=True))
                 await session.commit()
+                await invalidate_app_principals(request.app)
                 message = f"РЕЖИМ ПАНИКИ АКТИВИРОВАН: Отменено {aborted_count} задач, все автоматизации и пользователи заморожены."
             
             return self.templates.TemplateResponse("admin/actions.html", {"request": request, "message": message})
@@ -6,7 +6,7 @@ from fastapi import Depends, HTTPException, Request, Response, status, Query
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
-from sqlalchemy import select, and_ 
+from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -21,6 +21,7 @@ from app.core.security import decrypt_data
 from app.core.exceptions import UserActionException
 from app.core.enums import FeatureKey
 from app.core.plans import is_feature_available_for_plan
+from app.core.principal_cache import Principal, ProfileAccessDenied, load_principal
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/vk")
@@ -70,15 +71,11 @@ async def get_current_manager_user(
         raise credentials_exception
     return manager
 
-# --- ИСПРАВЛЕННАЯ ЛОГИКА ---
-async def get_current_active_profile(
-    payload: Dict[str, Any] = Depends(get_token_payload),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+async def resolve_principal(payload: Dict[str, Any], db: AsyncSession, request: Request | None = None) -> Principal:
     """
-    Определяет активный профиль на основе JWT токена.
-    Эта функция ДОВЕРЯЕТ содержимому токена, так как эндпоинт /switch-profile
-    уже проверил права доступа перед его выдачей.
+    Определяет активный профиль по JWT и проверяет, что менеджер все еще имеет
+    к нему доступ. Результат кэшируется (память процесса + Redis) и кладется
+    в request.state, поэтому middleware и зависимости одного запроса делят его.
     """
     manager_id_str = payload.get("sub")
     active_profile_id_str = payload.get("profile_id")
@@ -87,17 +84,53 @@ async def get_current_active_profile(
         raise credentials_exception
 
     # Если 'profile_id' в токене нет, значит, пользователь работает со своим профилем.
+    manager_id = int(manager_id_str)
     target_user_id = int(active_profile_id_str or manager_id_str)
 
-    # Просто загружаем нужный профиль из БД.
-    # Повторная проверка связи ManagedProfile здесь не нужна.
-    active_profile = await db.get(User, target_user_id)
+    cached = getattr(request.state, "principal", None) if request else None
+    if cached and cached.manager_id == manager_id and cached.id == target_user_id:
+        return cached
+
+    principal_cache = getattr(request.app.state, "principal_cache", None) if request else None
+    try:
+        if principal_cache:
+            principal = await principal_cache.get_or_load(request.app.state.redis_client, db, manager_id, target_user_id)
+        else:
+            principal = await load_principal(db, manager_id, target_user_id)
+    except ProfileAccessDenied:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Доступ к этому профилю запрещен.")
+
+    if not principal:
+        raise HTTPException(status_code=404, detail="Активный профиль не найден.")
+
+    if request:
+        request.state.principal = principal
+    return principal
+
+async def get_current_principal(
+    request: Request,
+    payload: Dict[str, Any] = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Легкая альтернатива get_current_active_profile для эндпоинтов, которым не нужна ORM-модель."""
+    return await resolve_principal(payload, db, request)
+
+async def get_current_active_profile(
+    payload: Dict[str, Any] = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db),
+    request: Request = None
+) -> User:
+    """
+    Возвращает ORM-модель активного профиля. Права доступа и статус берутся
+    из кэша принципала, из БД загружается только сама модель.
+    """
+    principal = await resolve_principal(payload, db, request)
+    active_profile = await db.get(User, principal.id)
     
     if not active_profile:
         raise HTTPException(status_code=404, detail="Активный профиль не найден.")
         
     return active_profile
-# --- КОНЕЦ ИСПРАВЛЕНИЯ ---
 
 
 async def get_current_user_from_ws(
@@ -156,6 +189,27 @@ async def check_etag(request: Request, response: Response, content: str | bytes)
     # Данные новые, устанавливаем заголовок для кэширования на клиенте
     response.headers["ETag"] = etag
 
+async def get_rows_version(db: AsyncSession, model, *where) -> tuple:
+    """
+    Дешевая "версия" набора строк: количество, max(id) и max(updated_at).
+    Меняется при любой вставке, изменении или удалении строк из набора.
+    """
+    stmt = select(func.count(model.id), func.max(model.id), func.max(model.updated_at)).where(*where)
+    return tuple((await db.execute(stmt)).one())
+
+def check_version_etag(request: Request, response: Response, *version_parts: Any):
+    """
+    Как check_etag, но ETag строится из версии данных, а не из тела ответа,
+    поэтому вызывается до загрузки и сериализации.
+    """
+    raw = "|".join(map(str, version_parts))
+    etag = f'W/"{hashlib.md5(raw.encode("utf-8")).hexdigest()}"'
+
+    if request.headers.get("if-none-match") == etag:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED)
+
+    response.headers["ETag"] = etag
+
 def check_feature_access(feature_key: FeatureKey):
     """
     Зависимость-декоратор для проверки доступа к функции по тарифу.
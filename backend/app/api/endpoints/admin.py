@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, case
 from typing import List
@@ -7,6 +7,7 @@ from app.db.session import get_db
 from app.db.models import User, TaskHistory
 from app.api.dependencies import get_current_active_profile
 from pydantic import BaseModel
+from app.core.cache_metrics import get_cache_stats
 
 router = APIRouter()
 
@@ -26,6 +27,19 @@ class PerformanceDataItem(BaseModel):
 class PerformanceDataResponse(BaseModel):
     data: List[PerformanceDataItem]
 
+class CacheStatsItem(BaseModel):
+    namespace: str
+    hits: int
+    stale: int
+    coalesced: int
+    misses: int
+    hit_ratio: float
+    # Сколько запросов к VK не понадобилось благодаря кэшу (пока только vk_public)
+    vk_calls_saved: int = 0
+
+class CacheStatsResponse(BaseModel):
+    data: List[CacheStatsItem]
+
 # --- Сам эндпоинт ---
 @router.get(
     "/dashboard/performance",
@@ -65,4 +79,27 @@ async def get_performance_data(db: AsyncSession = Depends(get_db)):
             "avg_duration": round(row.avg_duration, 2) if row.avg_duration else None
         })
 
-    return PerformanceDataResponse(data=performance_data)
\ No newline at end of file
+    return PerformanceDataResponse(data=performance_data)
+
+@router.get(
+    "/dashboard/cache",
+    response_model=CacheStatsResponse,
+    dependencies=[Depends(get_current_admin_user)]
+)
+async def get_cache_stats_data(request: Request):
+    stats = await get_cache_stats(request.app.state.redis_client)
+    cache_data = []
+    for namespace, events in sorted(stats.items()):
+        served = events.get("hit", 0) + events.get("stale", 0) + events.get("coalesced", 0)
+        total = served + events.get("miss", 0)
+        cache_data.append({
+            "namespace": namespace,
+            "hits": events.get("hit", 0),
+            "stale": events.get("stale", 0),
+            "coalesced": events.get("coalesced", 0),
+            "misses": events.get("miss", 0),
+            "hit_ratio": round(served / total * 100, 2) if total else 0,
+            "vk_calls_saved": events.get("calls_saved", 0),
+        })
+
+    return CacheStatsResponse(data=cache_data)
@@ -3,49 +3,60 @@
 import datetime
 from typing import List
 from arq import ArqRedis
-from fastapi import APIRouter, Depends, Query
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import User, ProfileMetric, FriendRequestLog, PostActivityHeatmap
+from app.db.models import User, ProfileMetric, FriendRequestLog, PostActivityHeatmap, FriendsSnapshot
 from app.api.dependencies import get_arq_pool, get_current_active_profile
 from app.db.session import get_db, get_read_db
 from app.api.schemas.analytics import (
     AudienceAnalyticsResponse, ProfileGrowthResponse, ProfileGrowthItem,
     ProfileSummaryResponse, FriendRequestConversionResponse, PostActivityHeatmapResponse,
-    ProfileSummaryData, PostActivityRecommendation, PostActivityRecommendationsResponse
+    ProfileSummaryData, PostActivityRecommendation, PostActivityRecommendationsResponse,
+    FriendsChurnItem, FriendsChurnResponse
 )
 from app.services.analytics_service import AnalyticsService
 from app.services.event_emitter import SystemLogEmitter 
+from app.core.response_cache import AUDIENCE_ANALYTICS, PROFILE_SUMMARY, get_cached_response
 
 router = APIRouter()
 
 
 @router.get("/audience", response_model=AudienceAnalyticsResponse)
-@cache(expire=21600) # Кэшируем на 6 часов
 async def get_audience_analytics(
+    request: Request,
     current_user: User = Depends(get_current_active_profile),
     db: AsyncSession = Depends(get_db)
 ):
-    emitter = SystemLogEmitter(task_name="analytics_endpoint") 
-    service = AnalyticsService(db=db, user=current_user, emitter=emitter)
-    try:
-        return await service.get_audience_distribution()
-    finally:
-        if service.vk_api:
-            await service.vk_api.close()
+    async def load():
+        emitter = SystemLogEmitter(task_name="analytics_endpoint") 
+        service = AnalyticsService(db=db, user=current_user, emitter=emitter)
+        try:
+            return (await service.get_audience_distribution()).model_dump(mode="json")
+        finally:
+            if service.vk_api:
+                await service.vk_api.close()
+
+    # Кэшируем на 6 часов
+    return await get_cached_response(request.app.state.redis_client, AUDIENCE_ANALYTICS, current_user.id, load, expire=21600)
 
 @router.get("/profile-summary", response_model=ProfileSummaryResponse)
-@cache(expire=3600) # Кэшируем на 1 час
 async def get_profile_summary(
+    request: Request,
     current_user: User = Depends(get_current_active_profile),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Возвращает текущие метрики профиля и динамику их изменения
-    за последний день и неделю.
+    за последний день и неделю. Кэшируется на 1 час.
     """
+    async def load():
+        return (await _build_profile_summary(current_user, db)).model_dump(mode="json")
+
+    return await get_cached_response(request.app.state.redis_client, PROFILE_SUMMARY, current_user.id, load, expire=3600)
+
+async def _build_profile_summary(current_user: User, db: AsyncSession) -> ProfileSummaryResponse:
     today = datetime.date.today()
     yesterday = today - datetime.timedelta(days=1)
     week_ago = today - datetime.timedelta(days=7)
@@ -134,6 +145,30 @@ async def get_profile_growth_analytics(
     return ProfileGrowthResponse(data=response_data)
 
 
+@router.get("/friends-churn", response_model=FriendsChurnResponse)
+async def get_friends_churn(
+    days: int = Query(30, ge=7, le=90),
+    current_user: User = Depends(get_current_active_profile),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Приток и отток друзей по дневным снимкам (services/friend_snapshots.py).
+    Снимки пишут задачи, которые и так запрашивают друзей, поэтому в днях без
+    таких задач точек нет - изменения попадают в следующий снимок.
+    """
+    start_date = datetime.date.today() - datetime.timedelta(days=days - 1)
+    stmt = (
+        select(
+            FriendsSnapshot.date, FriendsSnapshot.friends_count,
+            FriendsSnapshot.added_count, FriendsSnapshot.removed_count,
+        )
+        .where(FriendsSnapshot.user_id == current_user.id, FriendsSnapshot.date >= start_date)
+        .order_by(FriendsSnapshot.date)
+    )
+    result = await db.execute(stmt)
+    return FriendsChurnResponse(data=[FriendsChurnItem(**row._mapping) for row in result.all()])
+
+
 @router.get("/friend-request-conversion", response_model=FriendRequestConversionResponse)
 async def get_friend_request_conversion_stats(
     current_user: User = Depends(get_current_active_profile),
@@ -15,6 +15,7 @@ from app.core.config import settings
 from app.core.plans import get_limits_for_plan
 from app.core.enums import PlanName
 from app.api.dependencies import get_arq_pool, get_current_manager_user, limiter
+from app.core.principal_cache import invalidate_app_principals
 from app.db.models.task import TaskHistory
 
 router = APIRouter()
@@ -79,6 +80,7 @@ async def login_via_vk(
             if key in user_model_columns:
                 setattr(user, key, value)
     await db.commit()
+    await invalidate_app_principals(request.app, user.id)
     if is_new_user:
         demo_task_history = TaskHistory(
             user_id=user.id, task_name="Просмотр историй", status="PENDING",
@@ -112,6 +114,7 @@ class SwitchProfileRequest(BaseModel):
 
 @router.post("/switch-profile", response_model=EnrichedTokenResponse, summary="Переключиться на другой управляемый профиль")
 async def switch_profile(
+    request: Request,
     request_data: SwitchProfileRequest,
     manager: User = Depends(get_current_manager_user),
     db: AsyncSession = Depends(get_db)
@@ -132,6 +135,9 @@ async def switch_profile(
     if request_data.profile_id not in allowed_profile_ids:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Доступ к этому профилю запрещен.")
 
+    # Права на профили перечитываются из БД при первом запросе с новым токеном
+    await invalidate_app_principals(request.app, manager.id)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     token_data = {
         "sub": str(manager.id),
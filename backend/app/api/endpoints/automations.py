@@ -1,5 +1,6 @@
 # backend/app/api/endpoints/automations.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, UTC
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,7 +8,7 @@ from sqlalchemy.future import select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.db.session import get_db
 from app.db.models import User, Automation
-from app.api.dependencies import get_current_active_profile
+from app.api.dependencies import check_version_etag, get_current_active_profile, get_rows_version
 from app.core.config_loader import AUTOMATIONS_CONFIG
 from app.core.plans import is_feature_available_for_plan
 
@@ -27,20 +28,28 @@ class AutomationUpdateRequest(BaseModel):
 
 @router.get("", response_model=List[AutomationStatus])
 async def get_automations_status(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_profile),
     db: AsyncSession = Depends(get_db)
 ):
+    # Доступность считается по тарифу и глобальным настройкам из кэша - это дешево
+    availability = [
+        await is_feature_available_for_plan(current_user.plan.name_id, config_item.id, db=db, user=current_user)
+        for config_item in AUTOMATIONS_CONFIG
+    ]
+    rows_version = await get_rows_version(db, Automation, Automation.user_id == current_user.id)
+    check_version_etag(request, response, "automations", *rows_version, *availability)
+
     query = select(Automation).where(Automation.user_id == current_user.id)
     result = await db.execute(query)
     user_automations_db = {auto.automation_type: auto for auto in result.scalars().all()}
     
     response_list = []
-    for config_item in AUTOMATIONS_CONFIG:
+    for config_item, is_available in zip(AUTOMATIONS_CONFIG, availability):
         auto_type = config_item.id
         db_item = user_automations_db.get(auto_type)
         
-        is_available = await is_feature_available_for_plan(current_user.plan.name_id, auto_type, db=db, user=current_user)
-        
         response_list.append(AutomationStatus(
             automation_type=auto_type,
             is_active=db_item.is_active if db_item else False,
@@ -71,7 +80,9 @@ async def update_automation(
 
     values_to_set = {
         "is_active": request_data.is_active,
-        "settings": request_data.settings if request_data.settings is not None else config_item.default_settings or {}
+        "settings": request_data.settings if request_data.settings is not None else config_item.default_settings or {},
+        # ON CONFLICT DO UPDATE не применяет onupdate колонки
+        "updated_at": datetime.now(UTC),
     }
 
     stmt = pg_insert(Automation).values(
@@ -14,6 +14,7 @@ from app.db.models import User, Payment, Plan
 from app.api.dependencies import check_etag, get_current_active_profile
 from app.api.schemas.billing import CreatePaymentRequest, CreatePaymentResponse, AvailablePlansResponse, PlanDetail
 from app.core.config_loader import PLAN_CONFIG
+from app.core.principal_cache import invalidate_app_principals
 import structlog
 
 
@@ -159,4 +160,5 @@ async def payment_webhook(request: Request, db: AsyncSession = Depends(get_db)):
         payment.status = "succeeded"
         log.info("webhook.success", user_id=user.id, plan=new_plan.name_id, expires_at=user.plan_expires_at)
         await db.commit()
+        await invalidate_app_principals(request.app, user.id)
     return {"status": "ok"}
\ No newline at end of file
@@ -1,76 +1,228 @@
 # backend/app/api/endpoints/data.py
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import Literal
+from arq.connections import ArqRedis
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
-from app.api.dependencies import get_current_active_profile
+from app.api.dependencies import get_arq_pool, get_current_active_profile
+from app.db.models import TaskHistory, User
 from app.db.session import get_db
 from app.services.data_service import DataService
+from app.services.parsing_results import iter_result_csv, iter_result_jsonl, read_result_meta
+from app.tasks.parsing_tasks import (
+    CONVERSATION_EXPORT_KIND, CONVERSATION_EXPORT_TASK_NAME, MEMBER_SCAN_KIND, MEMBER_SCAN_TASK_NAME, PARSING_JOBS
+)
 from app.api.schemas.data import (
-    ParsingRequest, GroupMembersParsingRequest, UserWallParsingRequest,
-    TopUsersParsingRequest, TopUserResponse
+    ParsingRequest, GroupMembersParsingRequest, GroupMembersScanRequest, UserWallParsingRequest, ConversationExportRequest,
+    TopUsersParsingRequest, DiscussionContactsRequest, ResolveLinksRequest, ParsingJobResponse, ParsingResultResponse
 )
 
 router = APIRouter()
 
-@router.post("/parse/group-activity")
+
+async def _enqueue_parsing(
+    kind: str, request: BaseModel, user: User, db: AsyncSession, arq_pool: ArqRedis,
+    job_function: str = "parse_data_task", task_name: str | None = None
+) -> ParsingJobResponse:
+    """Создает запись истории и ставит парсинг в очередь; результат - по /data/results/{id}."""
+    task_name = task_name or PARSING_JOBS[kind][0]
+    task_history = TaskHistory(
+        user_id=user.id, task_name=task_name, status="PENDING",
+        parameters={"kind": kind, "request": request.model_dump(mode="json")},
+    )
+    db.add(task_history)
+    await db.flush()
+    job = await arq_pool.enqueue_job(job_function, task_history_id=task_history.id, _queue_name='low_priority')
+    task_history.arq_job_id = job.job_id
+    await db.commit()
+    return ParsingJobResponse(
+        message=f"Задача '{task_name}' добавлена в очередь.", task_history_id=task_history.id, task_id=job.job_id
+    )
+
+
+async def _reject_if_running(kind: str, key: str, value: int, user: User, db: AsyncSession):
+    """
+    409, если такая же выгрузка пользователя еще в очереди или выполняется:
+    они пишут в общий рабочий каталог (parsing_results.work_dir_lock).
+    """
+    running = await db.scalar(
+        select(TaskHistory.id).where(
+            TaskHistory.user_id == user.id,
+            TaskHistory.status.in_(("PENDING", "STARTED")),
+            TaskHistory.parameters["kind"].as_string() == kind,
+            TaskHistory.parameters["request"][key].as_integer() == value,
+        ).limit(1)
+    )
+    if running is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Эта выгрузка уже выполняется (задача {running}). Дождитесь ее завершения.",
+        )
+
+
+@router.post("/parse/group-activity", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def parse_group_activity(
     request: ParsingRequest,
     user=Depends(get_current_active_profile),
-    db=Depends(get_db)
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
 ):
     """Запускает парсинг активной аудитории сообщества."""
-    service = DataService(db=db, user=user, emitter=None) # Эмиттер не нужен для парсинга
-    results = await service.parse_active_group_audience(request.group_id, request.filters)
-    return results
+    return await _enqueue_parsing("group_activity", request, user, db, arq_pool)
 
 @router.get("/export/conversation/{peer_id}")
 async def export_conversation(
     peer_id: int,
+    compression: Literal["zstd"] | None = Query(None),
     user=Depends(get_current_active_profile),
     db=Depends(get_db)
 ):
-    """Скачивает историю переписки с указанным пользователем/чатом."""
+    """Скачивает историю переписки с указанным пользователем/чатом в JSON-lines."""
     service = DataService(db=db, user=user, emitter=None)
+
+    async def stream():
+        # Клиент VK закрывается и когда выгрузка дошла до конца, и когда загрузку прервали
+        try:
+            async for chunk in service.export_conversation_jsonl(peer_id, compression):
+                yield chunk
+        finally:
+            await service.close()
     
-    file_name = f"conversation_{peer_id}.json"
+    file_name = f"conversation_{peer_id}.jsonl" + (".zst" if compression else "")
     headers = {'Content-Disposition': f'attachment; filename="{file_name}"'}
     
     return StreamingResponse(
-        service.export_conversation_as_json(peer_id),
-        media_type="application/json",
+        stream(),
+        media_type="application/zstd" if compression else "application/x-ndjson",
         headers=headers
     )
 
+@router.post("/export/conversation", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def export_conversation_in_background(
+    request: ConversationExportRequest,
+    user=Depends(get_current_active_profile),
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
+):
+    """Запускает фоновую выгрузку диалога в файл; прерванная выгрузка продолжается при повторном запуске."""
+    await _reject_if_running(CONVERSATION_EXPORT_KIND, "peer_id", request.peer_id, user, db)
+    return await _enqueue_parsing(
+        CONVERSATION_EXPORT_KIND, request, user, db, arq_pool,
+        job_function="export_conversation_task", task_name=CONVERSATION_EXPORT_TASK_NAME,
+    )
+
 
-@router.post("/parse/group-members")
+@router.post("/parse/group-members", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def parse_group_members(
-    request: GroupMembersParsingRequest, # <-- Теперь это работает
+    request: GroupMembersParsingRequest,
     user=Depends(get_current_active_profile),
-    db=Depends(get_db)
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
 ):
     """Запускает парсинг подписчиков сообщества."""
-    service = DataService(db=db, user=user, emitter=None)
-    results = await service.parse_group_members(request.group_id, request.count)
-    return results
+    return await _enqueue_parsing("group_members", request, user, db, arq_pool)
 
-@router.post("/parse/user-wall")
+@router.post("/parse/group-members/full", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def scan_group_members(
+    request: GroupMembersScanRequest,
+    user=Depends(get_current_active_profile),
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
+):
+    """Запускает полную выгрузку подписчиков сообщества (без ограничения количества)."""
+    await _reject_if_running(MEMBER_SCAN_KIND, "group_id", request.group_id, user, db)
+    return await _enqueue_parsing(
+        MEMBER_SCAN_KIND, request, user, db, arq_pool,
+        job_function="scan_group_members_task", task_name=MEMBER_SCAN_TASK_NAME,
+    )
+
+@router.post("/parse/user-wall", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def parse_user_wall(
-    request: UserWallParsingRequest, # <-- И это тоже работает
+    request: UserWallParsingRequest,
     user=Depends(get_current_active_profile),
-    db=Depends(get_db)
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
 ):
     """Запускает парсинг стены пользователя."""
-    service = DataService(db=db, user=user, emitter=None)
-    results = await service.parse_user_wall(request.user_id, request.count)
-    return results
+    return await _enqueue_parsing("user_wall", request, user, db, arq_pool)
 
-@router.post("/parse/group-top-active", response_model=List[TopUserResponse])
+@router.post("/parse/group-top-active", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def parse_top_active_users(
     request: TopUsersParsingRequest,
     user=Depends(get_current_active_profile),
-    db=Depends(get_db)
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
 ):
     """Запускает парсинг самых активных пользователей сообщества."""
-    service = DataService(db=db, user=user, emitter=None)
-    results = await service.parse_top_active_users(request.group_id, request.posts_depth, request.top_n)
-    return results
\ No newline at end of file
+    return await _enqueue_parsing("group_top_active", request, user, db, arq_pool)
+
+
+@router.post("/parse/discussion-contacts", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def parse_discussion_contacts(
+    request: DiscussionContactsRequest,
+    user=Depends(get_current_active_profile),
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
+):
+    """Запускает парсинг авторов и упомянутых пользователей в обсуждениях сообщества."""
+    return await _enqueue_parsing("discussion_contacts", request, user, db, arq_pool)
+
+@router.post("/parse/resolve-links", response_model=ParsingJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resolve_links(
+    request: ResolveLinksRequest,
+    user=Depends(get_current_active_profile),
+    db=Depends(get_db),
+    arq_pool: ArqRedis = Depends(get_arq_pool)
+):
+    """Запускает определение ID пользователей и сообществ по списку ссылок VK."""
+    return await _enqueue_parsing("resolve_links", request, user, db, arq_pool)
+
+
+async def _get_parsing_history(task_history_id: int, user: User, db: AsyncSession) -> TaskHistory:
+    task_history = await db.get(TaskHistory, task_history_id)
+    if not task_history or task_history.user_id != user.id or "kind" not in (task_history.parameters or {}):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Результат парсинга не найден.")
+    return task_history
+
+@router.get("/results/{task_history_id}", response_model=ParsingResultResponse)
+async def get_parsing_result(
+    task_history_id: int,
+    user=Depends(get_current_active_profile),
+    db=Depends(get_db)
+):
+    """Статус парсинга и сведения о готовом результате."""
+    task_history = await _get_parsing_history(task_history_id, user, db)
+    meta = read_result_meta(user.id, task_history_id) or {}
+    return ParsingResultResponse(
+        task_history_id=task_history_id, status=task_history.status, result=task_history.result,
+        rows=meta.get("rows"), fields=meta.get("fields", []),
+    )
+
+@router.get("/results/{task_history_id}/download")
+async def download_parsing_result(
+    task_history_id: int,
+    format: Literal["jsonl", "csv"] = Query("jsonl"),
+    user=Depends(get_current_active_profile),
+    db=Depends(get_db)
+):
+    """Потоковая выгрузка результата парсинга в JSON-lines или CSV."""
+    await _get_parsing_history(task_history_id, user, db)
+    meta = read_result_meta(user.id, task_history_id)
+    if meta is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Результат еще не готов или уже удален.")
+
+    compressed = meta.get("format") == "jsonl.zst"
+    if compressed and format == "csv":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Сжатый результат доступен только в JSON-lines.")
+
+    file_name = f"parsing_{task_history_id}.{format}" + (".zst" if compressed else "")
+    headers = {'Content-Disposition': f'attachment; filename="{file_name}"'}
+    if compressed:
+        return StreamingResponse(iter_result_jsonl(user.id, task_history_id), media_type="application/zstd", headers=headers)
+    if format == "csv":
+        return StreamingResponse(
+            iter_result_csv(user.id, task_history_id, meta["fields"]), media_type="text/csv; charset=utf-8", headers=headers
+        )
+    return StreamingResponse(iter_result_jsonl(user.id, task_history_id), media_type="application/x-ndjson", headers=headers)
@@ -1,44 +1,45 @@
 # backend/app/api/endpoints/notifications.py
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update
 
 from app.db.session import get_db
 from app.db.models import User, Notification
-from app.api.dependencies import get_current_active_profile
+from app.api.dependencies import get_current_active_profile, get_current_principal
 from app.api.schemas.notifications import NotificationsResponse
+from app.core.principal_cache import Principal
+from app.api.pagination import apply_keyset, split_page
+from app.services.unread_counter import adjust_unread_counts, get_unread_count
 
 router = APIRouter()
 
 @router.get("", response_model=NotificationsResponse)
 async def get_notifications(
-    current_user: User = Depends(get_current_active_profile),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+    size: int = Query(50, ge=1, le=100)
 ):
-    """Возвращает последние 50 уведомлений и количество непрочитанных."""
+    """Возвращает страницу уведомлений (новые сверху) и количество непрочитанных."""
     
     # Запрос на получение уведомлений
-    query = (
-        select(Notification)
-        .where(Notification.user_id == current_user.id)
-        .order_by(Notification.created_at.desc())
-        .limit(50)
+    query = apply_keyset(
+        select(Notification).where(Notification.user_id == current_user.id),
+        Notification.created_at, Notification.id, cursor, size
     )
     result = await db.execute(query)
-    notifications = result.scalars().all()
+    notifications, next_cursor = split_page(result.scalars().all(), size)
 
-    # Запрос на подсчет непрочитанных
-    count_query = (
-        select(func.count(Notification.id))
-        .where(Notification.user_id == current_user.id, Notification.is_read == False)
-    )
-    count_result = await db.execute(count_query)
-    unread_count = count_result.scalar_one()
+    # Счетчик непрочитанных поддерживается в Redis (services/unread_counter.py)
+    unread_count = await get_unread_count(request.app.state.redis_client, db, current_user.id)
 
-    return NotificationsResponse(items=notifications, unread_count=unread_count)
+    return NotificationsResponse(items=notifications, unread_count=unread_count, next_cursor=next_cursor)
 
 @router.post("/read", status_code=status.HTTP_204_NO_CONTENT)
 async def mark_notifications_as_read(
+    request: Request,
     current_user: User = Depends(get_current_active_profile),
     db: AsyncSession = Depends(get_db)
 ):
@@ -48,5 +49,6 @@ async def mark_notifications_as_read(
         .where(Notification.user_id == current_user.id, Notification.is_read == False)
         .values(is_read=True)
     )
-    await db.execute(stmt)
-    await db.commit()
\ No newline at end of file
+    result = await db.execute(stmt)
+    await db.commit()
+    await adjust_unread_counts(request.app.state.redis_client, {current_user.id: -result.rowcount})
\ No newline at end of file
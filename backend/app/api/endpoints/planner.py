@@ -1,19 +1,21 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, date, time, timedelta
 from typing import List
-from croniter import croniter
 
 from app.db.session import get_read_db
 from app.db.models import User, ScheduledPost, Scenario, Automation
-from app.api.dependencies import get_current_active_profile
+from app.api.dependencies import check_version_etag, get_current_active_profile, get_rows_version
 from app.api.schemas.planner import PlannerEvent, MasterPlanResponse
+from app.services.schedule_expansion import expand_schedule, user_plan_cache
 
 router = APIRouter()
 
 @router.get("/master-plan", response_model=MasterPlanResponse)
 async def get_master_plan(
+    request: Request,
+    response: Response,
     start_date: date,
     end_date: date,
     current_user: User = Depends(get_current_active_profile),
@@ -23,10 +25,16 @@ async def get_master_plan(
     start_dt = datetime.combine(start_date, time.min)
     end_dt = datetime.combine(end_date, time.max)
 
+    posts_version = await get_rows_version(
+        db, ScheduledPost, ScheduledPost.user_id == current_user.id, ScheduledPost.publish_at.between(start_dt, end_dt)
+    )
+    scenarios_version = await get_rows_version(db, Scenario, Scenario.user_id == current_user.id)
+    check_version_etag(request, response, "master-plan", start_date, end_date, *posts_version, *scenarios_version)
+
     posts_stmt = select(ScheduledPost).where(
         ScheduledPost.user_id == current_user.id,
         ScheduledPost.publish_at.between(start_dt, end_dt)
-    )
+    ).order_by(ScheduledPost.publish_at)
     posts = (await db.execute(posts_stmt)).scalars().all()
     for post in posts:
         events.append(PlannerEvent(
@@ -34,18 +42,31 @@ async def get_master_plan(
             start_time=post.publish_at, status=post.status.value
         ))
 
-    scenarios_stmt = select(Scenario).where(Scenario.user_id == current_user.id, Scenario.is_active == True)
-    scenarios = (await db.execute(scenarios_stmt)).scalars().all()
-    for scenario in scenarios:
-        try:
-            it = croniter(scenario.schedule, start_dt)
-            while (next_run := it.get_next(datetime)) <= end_dt:
-                events.append(PlannerEvent(
+    # События сценариев зависят только от окна и расписаний: пока версия строк scenarios
+    # не изменилась, берем собранный ранее список, а разворот cron общий для всех пользователей
+    plan_key = (start_dt, end_dt, *scenarios_version)
+    scenario_events = user_plan_cache.get(current_user.id, plan_key)
+    if scenario_events is None:
+        scenario_events = []
+        scenarios_stmt = select(Scenario.id, Scenario.name, Scenario.schedule).where(
+            Scenario.user_id == current_user.id, Scenario.is_active == True
+        )
+        for scenario in (await db.execute(scenarios_stmt)).all():
+            try:
+                occurrences = expand_schedule(scenario.schedule, start_dt, end_dt)
+            except ValueError:
+                continue
+            scenario_events.extend(
+                PlannerEvent(
                     id=f"scenario_{scenario.id}_{next_run.timestamp()}", type="scenario",
                     title=f"Сценарий: {scenario.name}", start_time=next_run
-                ))
-        except:
-            continue
+                )
+                for next_run in occurrences
+            )
+        scenario_events.sort(key=lambda x: x.start_time)
+        user_plan_cache.put(current_user.id, plan_key, scenario_events)
+    # Обе части уже отсортированы, поэтому итоговая сортировка сводится к слиянию двух серий
+    events.extend(scenario_events)
 
     automations_stmt = select(Automation).where(Automation.user_id == current_user.id, Automation.is_active == True)
     automations = (await db.execute(automations_stmt)).scalars().all()
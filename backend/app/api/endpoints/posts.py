@@ -2,14 +2,14 @@
 import datetime
 import asyncio
 import aiohttp
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, Body
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, AsyncGenerator
 from arq.connections import ArqRedis
 
 from app.db.session import get_db
 from app.db.models import User, ScheduledPost
-from app.api.dependencies import get_current_active_profile, get_arq_pool
+from app.api.dependencies import check_version_etag, get_current_active_profile, get_arq_pool, get_rows_version
 # --- ИЗМЕНЕНИЕ: Добавляем новую схему ---
 from sqlalchemy import select # --- ДОБАВЛЕНО ---
 from app.db.models import User, ScheduledPost, Group # --- ДОБАВЛЕНО Group ---
@@ -198,6 +198,8 @@ async def schedule_batch_posts(
 
 @router.get("/schedule/calendar", response_model=List[PostRead])
 async def get_posts_for_calendar(
+    request: Request,
+    response: Response,
     start_date: datetime.date,
     end_date: datetime.date,
     current_user: User = Depends(get_current_active_profile),
@@ -210,13 +212,17 @@ async def get_posts_for_calendar(
     if (end_date - start_date).days > 90:
         raise HTTPException(status_code=400, detail="Диапазон дат не может превышать 90 дней.")
         
-    stmt = select(ScheduledPost).where(
+    range_filters = (
         ScheduledPost.user_id == current_user.id,
         ScheduledPost.publish_at.between(
             datetime.datetime.combine(start_date, datetime.time.min),
             datetime.datetime.combine(end_date, datetime.time.max)
-        )
-    ).order_by(ScheduledPost.publish_at)
+        ),
+    )
+    rows_version = await get_rows_version(db, ScheduledPost, *range_filters)
+    check_version_etag(request, response, "posts-calendar", start_date, end_date, *rows_version)
+
+    stmt = select(ScheduledPost).where(*range_filters).order_by(ScheduledPost.publish_at)
     
     result = await db.execute(stmt)
     return result.scalars().all()
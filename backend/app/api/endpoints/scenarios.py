@@ -2,15 +2,15 @@ import json
 from typing import List, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
-from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import distinct, func, select
 from sqlalchemy.orm import selectinload
 from croniter import croniter
 
 from app.db.session import get_db
 from app.db.models import User, Scenario, ScenarioStep, ScenarioStepType
-from app.api.dependencies import check_etag, get_current_active_profile
+from app.api.dependencies import check_version_etag, get_current_active_profile
+from app.services.schedule_expansion import user_plan_cache
 from app.api.schemas.scenarios import (
     Scenario as ScenarioSchema,
     ScenarioCreate,
@@ -193,6 +193,18 @@ async def get_user_scenarios(
     current_user: User = Depends(get_current_active_profile),
     db: AsyncSession = Depends(get_db),
 ):
+    # Шаги пересоздаются при каждом сохранении графа, поэтому их max(id) тоже входит в версию
+    version_stmt = (
+        select(
+            func.count(distinct(Scenario.id)), func.max(Scenario.id), func.max(Scenario.updated_at),
+            func.count(ScenarioStep.id), func.max(ScenarioStep.id),
+        )
+        .select_from(Scenario)
+        .outerjoin(ScenarioStep, ScenarioStep.scenario_id == Scenario.id)
+        .where(Scenario.user_id == current_user.id)
+    )
+    check_version_etag(request, response, "scenarios", *(await db.execute(version_stmt)).one())
+
     stmt = (
         select(Scenario)
         .where(Scenario.user_id == current_user.id)
@@ -200,14 +212,12 @@ async def get_user_scenarios(
     )
     result = await db.execute(stmt)
     scenarios_db = result.scalars().unique().all()
-    response_list = [
-        ScenarioSchema(
-            id=s.id, name=s.name, schedule=s.schedule, is_active=s.is_active,
-            nodes=_db_to_graph(s)[0], edges=_db_to_graph(s)[1],
-        ) for s in scenarios_db
-    ]
-    json_response = ORJSONResponse([item.model_dump(by_alias=True) for item in response_list])
-    await check_etag(request, response, json_response.body)
+    response_list = []
+    for s in scenarios_db:
+        nodes, edges = _db_to_graph(s)
+        response_list.append(ScenarioSchema(
+            id=s.id, name=s.name, schedule=s.schedule, is_active=s.is_active, nodes=nodes, edges=edges,
+        ))
     return response_list
 
 @router.get("/{scenario_id}", response_model=ScenarioSchema)
@@ -262,6 +272,7 @@ async def create_scenario(
     new_scenario.first_step_id = _find_start_step(node_map, scenario_data.nodes)
 
     await db.commit()
+    user_plan_cache.invalidate(current_user.id)
 
     await db.refresh(new_scenario)
     await db.refresh(new_scenario, attribute_names=["steps"])
@@ -331,6 +342,7 @@ async def update_scenario(
             db_scenario.first_step_id = new_start_step_obj.id
 
     await db.commit()
+    user_plan_cache.invalidate(current_user.id)
 
     await db.refresh(db_scenario)
     await db.refresh(db_scenario, attribute_names=["steps"])
@@ -366,4 +378,5 @@ async def delete_scenario(
     await db.flush()  # Отправляем изменение в БД до основного удаления
 
     await db.delete(db_scenario)
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+    user_plan_cache.invalidate(current_user.id)
\ No newline at end of file
@@ -2,10 +2,9 @@
 import asyncio
 import datetime
 from typing import List, Literal, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
-from fastapi_cache.decorator import cache
+from sqlalchemy import select
 from app.db.models import UserActivity
 from sqlalchemy import desc
 from app.db.session import AsyncSessionFactory, get_db, get_read_db
@@ -20,13 +19,21 @@ from app.services.vk_api import VKAPI, VKAPIError
 from app.core.security import decrypt_data
 from app.api.schemas.analytics import ProfileGrowthResponse
 from app.api.endpoints.analytics import get_profile_growth_analytics
+from app.core.response_cache import FRIENDS_ANALYTICS, get_cached_response
+from app.core.swr_cache import get_or_refresh
+from app.services.pulse_feed import read_pulse_feed
 
 router = APIRouter()
 
 @router.get("/friends-analytics", response_model=FriendsAnalyticsResponse)
-@cache(expire=3600) # Кешируем на 1 час
-async def get_friends_analytics(current_user: User = Depends(get_current_active_profile)):
-    """Возвращает гендерное распределение друзей. Результат кэшируется."""
+async def get_friends_analytics(request: Request, current_user: User = Depends(get_current_active_profile)):
+    """Возвращает гендерное распределение друзей. Результат кэшируется на 1 час."""
+    return await get_cached_response(
+        request.app.state.redis_client, FRIENDS_ANALYTICS, current_user.id,
+        lambda: _compute_friends_analytics(current_user), expire=3600,
+    )
+
+async def _compute_friends_analytics(current_user: User) -> dict:
     vk_token = decrypt_data(current_user.encrypted_vk_token)
     # Прокси для этого запроса не так важен, но можно добавить при необходимости
     vk_api = VKAPI(access_token=vk_token, proxy=None)
@@ -161,6 +168,10 @@ async def get_activity_sources(
             
     return response_data
 
+PULSE_COUNTERS_KEY = "pulse:counters:{user_id}"
+PULSE_COUNTERS_SOFT_TTL = 60
+PULSE_COUNTERS_HARD_TTL = 3600
+
 class PulseEvent(BaseModel):
     timestamp: datetime
     event_type: Literal['action', 'like', 'comment']
@@ -175,68 +186,52 @@ class PulseResponse(BaseModel):
     incoming_requests: int
     events: List[PulseEvent]
 
-@router.get("/dashboard/pulse", response_model=PulseResponse)
-async def get_dashboard_pulse(
-    current_user: User = Depends(get_current_active_profile),
-    db: AsyncSession = Depends(get_read_db)
-):
+async def _load_vk_counters(current_user: User) -> dict:
+    """Непрочитанные диалоги и входящие заявки из VK (для кэша PULSE_COUNTERS_KEY)."""
     vk_api = VKAPI(decrypt_data(current_user.encrypted_vk_token))
-
     try:
-        growth_task = get_profile_growth_analytics(days=7, current_user=current_user, db=db)
-        conv_task = vk_api.messages.getConversations(count=0, filter='unread')
-        req_task = vk_api.friends.getRequests(count=0)
-
-        event_query = text(f"""
-            (SELECT created_at as timestamp, 'action' as event_type, task_name as message, NULL as source_vk_id 
-             FROM task_history 
-             WHERE user_id = :user_id AND status = 'SUCCESS')
-            UNION ALL
-            (SELECT created_at as timestamp, 'like' as event_type, 'лайкнул(а) ваш контент' as message, source_vk_id 
-             FROM user_activities 
-             WHERE user_id = :user_id AND activity_type = 'like')
-            UNION ALL
-            (SELECT created_at as timestamp, 'comment' as event_type, 'прокомментировал(а) ваш контент' as message, source_vk_id 
-             FROM user_activities 
-             WHERE user_id = :user_id AND activity_type = 'comment')
-            ORDER BY timestamp DESC
-            LIMIT 30
-        """)
-        events_task = db.execute(event_query, {"user_id": current_user.id})
-
-        results = await asyncio.gather(growth_task, conv_task, req_task, events_task, return_exceptions=True)
+        conv_data, req_data = await asyncio.gather(
+            vk_api.messages.getConversations(count=0, filter='unread'),
+            vk_api.friends.getRequests(count=0),
+            return_exceptions=True,
+        )
     finally:
         await vk_api.close()
+    return {
+        "unread_messages": conv_data.get('count', 0) if isinstance(conv_data, dict) else 0,
+        "incoming_requests": req_data.get('count', 0) if isinstance(req_data, dict) else 0,
+    }
 
-    growth_data = results[0] if not isinstance(results[0], Exception) else ProfileGrowthResponse(data=[])
-    conv_data = results[1] if not isinstance(results[1], Exception) else {}
-    req_data = results[2] if not isinstance(results[2], Exception) else {}
-    events_raw = results[3].all() if not isinstance(results[3], Exception) else []
+@router.get("/dashboard/pulse", response_model=PulseResponse)
+async def get_dashboard_pulse(
+    request: Request,
+    current_user: User = Depends(get_current_active_profile),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Сводка для дашборда. Лента событий заранее собрана воркерами в Redis
+    (services/pulse_feed.py), счетчики VK кэшируются на PULSE_COUNTERS_SOFT_TTL секунд.
+    """
+    redis = request.app.state.redis_client
+    growth_data, counters, events = await asyncio.gather(
+        get_profile_growth_analytics(days=7, current_user=current_user, db=db),
+        get_or_refresh(
+            redis, PULSE_COUNTERS_KEY.format(user_id=current_user.id), lambda: _load_vk_counters(current_user),
+            soft_ttl=PULSE_COUNTERS_SOFT_TTL, hard_ttl=PULSE_COUNTERS_HARD_TTL, metrics_namespace="pulse_counters",
+        ),
+        read_pulse_feed(redis, current_user.id),
+        return_exceptions=True,
+    )
+    if isinstance(growth_data, Exception):
+        growth_data = ProfileGrowthResponse(data=[])
+    if isinstance(counters, Exception):
+        counters = {}
+    if isinstance(events, Exception):
+        events = []
 
-    source_vk_ids = {row.source_vk_id for row in events_raw if row.source_vk_id}
-    vk_info_map = {}
-    if source_vk_ids:
-        async with VKAPI(decrypt_data(current_user.encrypted_vk_token)) as vk_api_enrich:
-            user_infos = await vk_api_enrich.users.get(user_ids=",".join(map(str, source_vk_ids)), fields="photo_50")
-            if user_infos:
-                vk_info_map = {info['id']: info for info in user_infos}
-
-    event_list = []
-    for row in events_raw:
-        source_info = vk_info_map.get(row.source_vk_id)
-        source_name = f"{source_info['first_name']} {source_info['last_name']}" if source_info else None
-        event_list.append(PulseEvent(
-            timestamp=row.timestamp,
-            event_type=row.event_type,
-            message=row.message,
-            source_vk_id=row.source_vk_id,
-            source_name=source_name,
-            source_photo=source_info['photo_50'] if source_info else None
-        ))
-    
     return PulseResponse(
         growth_chart=growth_data,
-        unread_messages=conv_data.get('count', 0),
-        incoming_requests=req_data.get('count', 0),
-        events=event_list
-    )
\ No newline at end of file
+        unread_messages=counters.get("unread_messages", 0),
+        incoming_requests=counters.get("incoming_requests", 0),
+        events=[PulseEvent(**event) for event in events],
+    )
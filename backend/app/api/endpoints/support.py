@@ -9,15 +9,16 @@ from typing import List
 
 from app.db.session import get_db
 from app.db.models import User, SupportTicket, TicketMessage, TicketStatus
-from app.api.dependencies import get_current_active_profile
+from app.api.dependencies import get_current_active_profile, get_current_principal
 from app.api.schemas.support import SupportTicketCreate, SupportTicketRead, TicketMessageCreate, SupportTicketList
 from app.services.system_service import SystemService
+from app.core.principal_cache import Principal
 
 router = APIRouter()
 
 @router.get("", response_model=List[SupportTicketList])
 async def get_my_tickets(
-    current_user: User = Depends(get_current_active_profile),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     stmt = select(SupportTicket).where(SupportTicket.user_id == current_user.id).order_by(SupportTicket.updated_at.desc())
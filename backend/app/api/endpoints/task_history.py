@@ -9,11 +9,13 @@ from pydantic import BaseModel
 from arq.connections import ArqRedis
 
 from app.db.models import User, TaskHistory
-from app.api.dependencies import get_current_active_profile, get_arq_pool
+from app.api.dependencies import get_current_active_profile, get_current_principal, get_arq_pool
 from app.db.session import get_db
 from app.api.schemas.tasks import ActionResponse, PaginatedTasksResponse
+from app.api.pagination import apply_keyset, split_page
 from app.core.config_loader import AUTOMATIONS_CONFIG
 from app.core.enums import TaskKey
+from app.core.principal_cache import Principal
 
 from .tasks import _enqueue_task
 from app.tasks.task_maps import AnyTaskRequest, PREVIEW_SERVICE_MAP
@@ -22,24 +24,26 @@ router = APIRouter()
 
 @router.get("/history", response_model=PaginatedTasksResponse, summary="Получить историю выполненных задач")
 async def get_user_task_history(
-    current_user: User = Depends(get_current_active_profile),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
     size: int = Query(25, ge=1, le=100),
-    status: Optional[str] = Query(None, description="Фильтр по статусу (PENDING, STARTED, SUCCESS, FAILURE, CANCELLED)")
+    status: Optional[str] = Query(None, description="Фильтр по статусу (PENDING, STARTED, SUCCESS, FAILURE, CANCELLED)"),
+    include_total: bool = Query(False, description="Посчитать точное общее количество (дорого для длинной истории)")
 ):
-    offset = (page - 1) * size
     base_query = select(TaskHistory).where(TaskHistory.user_id == current_user.id)
     if status and status.strip():
         base_query = base_query.where(TaskHistory.status == status.upper())
 
-    tasks_query = base_query.order_by(TaskHistory.created_at.desc()).offset(offset).limit(size)
-    count_query = select(func.count()).select_from(base_query.subquery())
+    tasks_query = apply_keyset(base_query, TaskHistory.created_at, TaskHistory.id, cursor, size)
+    tasks, next_cursor = split_page((await db.execute(tasks_query)).scalars().all(), size)
 
-    tasks = (await db.execute(tasks_query)).scalars().all()
-    total = (await db.execute(count_query)).scalar_one()
+    total = None
+    if include_total:
+        count_query = select(func.count()).select_from(base_query.subquery())
+        total = (await db.execute(count_query)).scalar_one()
 
-    return PaginatedTasksResponse(items=tasks, total=total, page=page, size=size, has_more=(offset + len(tasks)) < total)
+    return PaginatedTasksResponse(items=tasks, size=size, has_more=next_cursor is not None, next_cursor=next_cursor, total=total)
 
 
 @router.post("/{task_history_id}/cancel", status_code=status.HTTP_202_ACCEPTED, summary="Отменить задачу")
@@ -18,6 +18,7 @@ from app.core.plans import get_plan_config, is_feature_available_for_plan
 from app.core.config_loader import AUTOMATIONS_CONFIG
 from app.core.enums import TaskKey
 from app.services.interfaces import IPreviewableTask
+from app.services.preview_targets import PREVIEW_TOKEN_PARAM, store_preview_targets
 from app.services.vk_api import VKAPIError
 from app.tasks.service_maps import TASK_CONFIG_MAP
 from app.tasks.task_maps import AnyTaskRequest, TASK_FUNC_MAP, PREVIEW_SERVICE_MAP
@@ -137,6 +138,7 @@ async def run_any_task(
         
         publish_at_str = raw_body.get("publish_at")
         defer_until = datetime.datetime.fromisoformat(publish_at_str) if publish_at_str else None
+        preview_token = raw_body.get(PREVIEW_TOKEN_PARAM)
 
     except (ValidationError, TypeError, ValueError) as e:
          raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
@@ -160,6 +162,9 @@ async def run_any_task(
     }
     if defer_until:
         job_kwargs['_defer_until'] = defer_until
+    elif isinstance(preview_token, str) and preview_token:
+        # Для отложенного запуска токен успеет истечь - такая задача ищет цели сама
+        job_kwargs[PREVIEW_TOKEN_PARAM] = preview_token
         
     # 3. Ставим задачу в очередь
     job = await arq_pool.enqueue_job(task_func_name, _queue_name='high_priority', **job_kwargs)
@@ -180,6 +185,7 @@ async def run_any_task(
 @router.post("/preview/{task_key}", response_model=PreviewResponse, summary="Предварительный подсчет аудитории для задачи")
 async def preview_task_audience(
     task_key: TaskKey,
+    request: Request,
     request_data: AnyTaskRequest = Body(...),
     current_user: User = Depends(get_current_active_profile),
     db: AsyncSession = Depends(get_db)
@@ -187,7 +193,7 @@ async def preview_task_audience(
     if task_key not in TASK_CONFIG_MAP:
         raise HTTPException(status_code=404, detail="Конфигурация для задачи не найдена.")
 
-    ServiceClass, RequestModel = TASK_CONFIG_MAP[task_key]
+    ServiceClass, _, RequestModel = TASK_CONFIG_MAP[task_key]
     
     # Проверяем, что сервис реализует интерфейс для предпросмотра
     if not issubclass(ServiceClass, IPreviewableTask):
@@ -202,7 +208,10 @@ async def preview_task_audience(
         service_instance = ServiceClass(db=db, user=current_user, emitter=None)
         
         targets = await service_instance.get_targets(validated_params)
-        return PreviewResponse(found_count=len(targets))
+        preview_token = await store_preview_targets(
+            request.app.state.redis_client, current_user.id, task_key.value, validated_params, targets
+        ) if targets else None
+        return PreviewResponse(found_count=len(targets), preview_token=preview_token)
     except VKAPIError as e:
         raise HTTPException(status_code=424, detail=f"Ошибка VK API: {e.message}")
     except Exception as e:
@@ -14,6 +14,7 @@ from app.core.plans import is_feature_available_for_plan, get_plan_config
 from app.services.vk_api import VKAPI
 from app.core.security import decrypt_data
 from app.core.enums import FeatureKey
+from app.core.principal_cache import invalidate_app_principals
 import structlog
 
 log = structlog.get_logger(__name__)
@@ -140,6 +141,7 @@ async def invite_member(
 
 @router.delete("/my-team/members/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_member(
+    request: Request,
     member_id: int,
     manager_and_team: tuple = Depends(get_team_owner),
     db: AsyncSession = Depends(get_db)
@@ -153,9 +155,11 @@ async def remove_member(
         
     await db.delete(member)
     await db.commit()
+    await invalidate_app_principals(request.app, member.user_id)
 
 @router.put("/my-team/members/{member_id}/access")
 async def update_member_access(
+    request: Request,
     member_id: int,
     access_data: List[UpdateAccessRequest],
     manager_and_team: tuple = Depends(get_team_owner),
@@ -184,4 +188,5 @@ async def update_member_access(
         db.add_all(accesses_to_add)
         
     await db.commit()
+    await invalidate_app_principals(request.app, member.user_id)
     return {"message": "Права доступа обновлены."}
\ No newline at end of file
@@ -17,9 +17,15 @@ from app.repositories.stats import StatsRepository
 from app.core.plans import get_features_for_plan, is_feature_available_for_plan
 from app.api.schemas.users import AllLimitsResponse, LimitStatus, FilterPresetCreate, FilterPresetRead, ManagedProfileRead, AnalyticsSettingsRead, AnalyticsSettingsUpdate
 from app.core.enums import PlanName, FeatureKey
+from app.core.swr_cache import get_or_refresh
 
 router = APIRouter()
 
+VK_PROFILE_FIELDS = "photo_200,status,counters"
+VK_PROFILE_CACHE_KEY = "vk_profile:{user_id}"
+VK_PROFILE_SOFT_TTL = 300
+VK_PROFILE_HARD_TTL = 24 * 3600
+
 class UserMeResponse(BaseModel):
     id: int
     vk_id: int
@@ -45,30 +51,41 @@ class UpdateDelayProfileRequest(BaseModel):
     delay_profile: DelayProfile
 
 @router.get("/me", response_model=UserMeResponse)
-async def read_users_me(current_user: User = Depends(get_current_active_profile)):
+async def read_users_me(request: Request, current_user: User = Depends(get_current_active_profile)):
     vk_token = decrypt_data(current_user.encrypted_vk_token)
     if not vk_token:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="Токен доступа недействителен. Пожалуйста, авторизуйтесь заново."
         )
-        
-    vk_api = VKAPI(access_token=vk_token)
-    
+
+    async def load_vk_profile() -> Dict[str, Any]:
+        vk_api = VKAPI(access_token=vk_token)
+        try:
+            user_info_vk_list = await vk_api.users.get(fields=VK_PROFILE_FIELDS)
+        finally:
+            await vk_api.close()
+        if not user_info_vk_list or not isinstance(user_info_vk_list, list):
+            raise LookupError("empty users.get response")
+        return user_info_vk_list[0]
+
+    # Профиль VK отдается из кэша сразу, а обновляется в фоне после VK_PROFILE_SOFT_TTL
     try:
-        user_info_vk_list = await vk_api.users.get(fields="photo_200,status,counters")
+        user_info_vk = await get_or_refresh(
+            request.app.state.redis_client,
+            VK_PROFILE_CACHE_KEY.format(user_id=current_user.id),
+            load_vk_profile,
+            soft_ttl=VK_PROFILE_SOFT_TTL,
+            hard_ttl=VK_PROFILE_HARD_TTL,
+            metrics_namespace="vk_profile",
+        )
     except VKAPIError as e:
          raise HTTPException(
              status_code=status.HTTP_424_FAILED_DEPENDENCY, 
              detail=f"Ошибка VK API: {e.message}"
         )
-    finally:
-        await vk_api.close()
-
-    if not user_info_vk_list or not isinstance(user_info_vk_list, list):
+    except LookupError:
         raise HTTPException(status_code=404, detail="Не удалось получить информацию из VK.")
-    
-    user_info_vk = user_info_vk_list[0]
 
     is_plan_active = True
     plan_name = current_user.plan.name_id
@@ -107,6 +124,7 @@ async def get_daily_limits(
 
 @router.put("/me/delay-profile", response_model=UserMeResponse)
 async def update_user_delay_profile(
+    request: Request,
     request_data: UpdateDelayProfileRequest,
     current_user: User = Depends(get_current_active_profile),
     db: AsyncSession = Depends(get_db)
@@ -117,7 +135,7 @@ async def update_user_delay_profile(
     current_user.delay_profile = request_data.delay_profile
     await db.commit()
     await db.refresh(current_user)
-    return await read_users_me(current_user)
+    return await read_users_me(request, current_user)
 
 @router.post("/me/filter-presets", response_model=FilterPresetRead, status_code=status.HTTP_201_CREATED)
 async def create_filter_preset(
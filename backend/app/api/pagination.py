@@ -0,0 +1,46 @@
+# backend/app/api/pagination.py
+"""
+Keyset-пагинация по (created_at, id) от новых к старым.
+
+Курсор - непрозрачная строка (base64 от created_at и id последней строки
+страницы). Запрос следующей страницы идет по индексу (user_id, created_at, id)
+и стоит одинаково независимо от глубины, в отличие от OFFSET.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор пагинации.")
+
+
+def apply_keyset(stmt: Select, created_column, id_column, cursor: Optional[str], size: int) -> Select:
+    """Добавляет к запросу условие курсора, сортировку и лимит (size + 1 - чтобы узнать has_more)."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(created_column, id_column) < (created_at, row_id))
+    return stmt.order_by(created_column.desc(), id_column.desc()).limit(size + 1)
+
+
+def split_page(rows: Sequence[Any], size: int) -> tuple[list, Optional[str]]:
+    """Отрезает лишнюю строку и возвращает (элементы страницы, курсор следующей или None)."""
+    items = list(rows[:size])
+    if len(rows) <= size:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
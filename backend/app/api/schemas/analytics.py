@@ -49,6 +49,15 @@ class ProfileGrowthItem(BaseModel):
 class ProfileGrowthResponse(BaseModel):
     data: List[ProfileGrowthItem]
 
+class FriendsChurnItem(BaseModel):
+    date: date
+    friends_count: int
+    added_count: int = Field(..., description="Новые друзья с предыдущего снимка")
+    removed_count: int = Field(..., description="Удалившиеся друзья с предыдущего снимка")
+
+class FriendsChurnResponse(BaseModel):
+    data: List[FriendsChurnItem]
+
 class FriendRequestConversionResponse(BaseModel):
     sent_total: int
     accepted_total: int
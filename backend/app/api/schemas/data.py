@@ -1,4 +1,5 @@
 # backend/app/api/schemas/data.py
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 class ParsingFilters(BaseModel):
@@ -10,11 +11,25 @@ class ParsingRequest(BaseModel):
 
 class GroupMembersParsingRequest(BaseModel):
     group_id: int = Field(..., gt=0)
-    count: int = Field(1000, ge=1, le=1000)
+    count: int = Field(1000, ge=1, le=100_000, description="Сколько подписчиков выгрузить; выгружаются страницами по 1000.")
+
+class GroupMembersScanRequest(BaseModel):
+    group_id: int = Field(..., gt=0)
+
+class DiscussionContactsRequest(BaseModel):
+    group_id: int = Field(..., gt=0)
+    topic_ids: List[int] = Field(..., min_length=1, max_length=50)
+
+class ResolveLinksRequest(BaseModel):
+    links: List[str] = Field(..., min_length=1, max_length=50000, description="Ссылки VK, упоминания или короткие имена.")
+
+class ConversationExportRequest(BaseModel):
+    peer_id: int
+    compression: Optional[Literal["zstd"]] = None
 
 class UserWallParsingRequest(BaseModel):
     user_id: int = Field(..., gt=0)
-    count: int = Field(100, ge=1, le=100)
+    count: int = Field(100, ge=1, le=10_000, description="Сколько постов выгрузить; выгружаются страницами по 100.")
 
 class TopUsersParsingRequest(BaseModel):
     group_id: int = Field(..., gt=0)
@@ -30,4 +45,15 @@ class UserInfo(BaseModel):
 
 class TopUserResponse(BaseModel):
     user_info: UserInfo
-    activity_score: int
\ No newline at end of file
+    activity_score: int
+class ParsingJobResponse(BaseModel):
+    message: str
+    task_history_id: int
+    task_id: str
+
+class ParsingResultResponse(BaseModel):
+    task_history_id: int
+    status: str
+    result: Optional[str] = None
+    rows: Optional[int] = None
+    fields: List[str] = Field(default_factory=list)
@@ -1,7 +1,7 @@
 # --- backend/app/api/schemas/notifications.py ---
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 class Notification(BaseModel):
     id: int
@@ -13,4 +13,5 @@ class Notification(BaseModel):
 
 class NotificationsResponse(BaseModel):
     items: List[Notification]
-    unread_count: int
\ No newline at end of file
+    unread_count: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -24,13 +24,16 @@ class TaskHistoryRead(BaseModel):
 
 class PaginatedTasksResponse(BaseModel):
     items: List[TaskHistoryRead]
-    total: int
-    page: int
     size: int
     has_more: bool
+    next_cursor: Optional[str] = None
+    # Точное количество считается только по запросу (include_total=true)
+    total: Optional[int] = None
 
 class PreviewResponse(BaseModel):
     found_count: int
+    # Передается в /tasks/run, чтобы задача взяла найденные цели, а не искала их заново
+    preview_token: Optional[str] = None
 
 class TaskField(BaseModel):
     name: str
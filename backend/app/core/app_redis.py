@@ -0,0 +1,56 @@
+# backend/app/core/app_redis.py
+"""
+Подключение к Redis приложения (db 1, значения - строки): кэши ответов и
+принципалов, счетчики непрочитанных, лента пульса, снимки друзей и т.п.
+
+API держит один клиент в app.state.redis_client, воркер - в ctx['app_redis'].
+Функции, которым клиент не передали (redis=None), берут временное подключение
+через borrow_app_redis, обертки над Redis (AppRedisStore) - через connect().
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Self
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+APP_REDIS_DB = 1
+
+
+def app_redis() -> Redis:
+    """Новый клиент Redis приложения; закрывает его тот, кто открыл."""
+    return Redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{APP_REDIS_DB}", decode_responses=True)
+
+
+@asynccontextmanager
+async def borrow_app_redis(redis: Optional[Redis]) -> AsyncIterator[Redis]:
+    """Переданный клиент как есть; без него - временное подключение, закрываемое на выходе."""
+    if redis is not None:
+        yield redis
+        return
+    client = app_redis()
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+class AppRedisStore:
+    """
+    Основа оберток над Redis приложения: экземпляр работает на переданном
+    клиенте, а connect() открывает собственное подключение, которое закрывает close().
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self._own_client = False
+
+    @classmethod
+    def connect(cls, *args, **kwargs) -> Self:
+        store = cls(app_redis(), *args, **kwargs)
+        store._own_client = True
+        return store
+
+    async def close(self):
+        if self._own_client:
+            await self.redis.aclose()
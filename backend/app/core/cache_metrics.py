@@ -0,0 +1,34 @@
+# backend/app/core/cache_metrics.py
+"""
+Счетчики попаданий/промахов кэшей, общие для всех процессов API и воркеров.
+Хранятся в одном хэше Redis: поле "<namespace>:<event>" -> количество.
+"""
+from collections import defaultdict
+
+import structlog
+from redis.asyncio import Redis
+
+log = structlog.get_logger(__name__)
+
+CACHE_STATS_KEY = "cache_stats"
+
+
+async def record_cache_event(redis: Redis, namespace: str, event: str, amount: int = 1):
+    if amount <= 0:
+        return
+    try:
+        await redis.hincrby(CACHE_STATS_KEY, f"{namespace}:{event}", amount)
+    except Exception as e:
+        # Метрики не должны влиять на обработку запроса
+        log.debug("cache_metrics.record_failed", namespace=namespace, error=str(e))
+
+
+async def get_cache_stats(redis: Redis) -> dict[str, dict[str, int]]:
+    """Возвращает {namespace: {event: count}}."""
+    raw = await redis.hgetall(CACHE_STATS_KEY)
+    stats: dict[str, dict[str, int]] = defaultdict(dict)
+    for field, value in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        namespace, _, event = field.rpartition(":")
+        stats[namespace][event] = int(value)
+    return dict(stats)
@@ -47,6 +47,8 @@ class Settings(BaseSettings):
     ADMIN_PASSWORD: str
     ADMIN_IP_WHITELIST: Optional[str] = None
     ALLOWED_ORIGINS: str
+    # Каталог результатов фоновых парсингов (общий для API и воркера)
+    PARSING_RESULTS_DIR: str = "parsing_results"
     OPENAI_API_KEY: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
 
@@ -20,4 +20,7 @@ class InvalidActionSettingsError(UserActionException):
 
 class AccountDeactivatedError(UserActionException):
     """Вызывается, если аккаунт пользователя ВКонтакте деактивирован."""
-    pass
\ No newline at end of file
+    pass
+class TaskAlreadyRunningError(UserActionException):
+    """Вызывается, если такая же задача пользователя уже выполняется."""
+    pass
@@ -0,0 +1,189 @@
+# backend/app/core/principal_cache.py
+"""
+Кэш "принципала" - минимального набора данных об авторизованном пользователе,
+нужного middleware и зависимостям: активный профиль, тариф, флаги статуса и
+подтвержденное право менеджера работать с профилем.
+
+Два уровня: словарь в памяти процесса с очень коротким TTL и Redis с TTL
+побольше. Инвалидация идет через версии в Redis: запись в кэше хранит версии
+менеджера и профиля, и после смены любой из них становится недействительной
+во всех процессах (в памяти соседних процессов - не дольше
+PRINCIPAL_MEMORY_TTL секунд).
+
+Версия - случайное значение, а не счетчик: ключ версии истекает, и INCR после
+этого начал бы снова с 1, оживив запись, помеченную старой "1" (например,
+снятый бан). Случайные версии не повторяются.
+"""
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+
+import structlog
+from redis.asyncio import Redis
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.app_redis import borrow_app_redis
+from app.db.models import ManagedProfile, Plan, TeamMember, TeamProfileAccess, User
+
+log = structlog.get_logger(__name__)
+
+PRINCIPAL_MEMORY_TTL = 5
+PRINCIPAL_REDIS_TTL = 60
+PRINCIPAL_KEY = "principal:{manager_id}:{profile_id}"
+PRINCIPAL_VERSION_KEY = "principal:ver:{user_id}"
+# Дольше жизни записи: запись, помеченная отсутствующей версией, истечет раньше ключа
+PRINCIPAL_VERSION_TTL = PRINCIPAL_REDIS_TTL * 2
+# Общая версия сбрасывает кэш всех пользователей сразу (массовые действия админки)
+PRINCIPAL_GLOBAL_VERSION_KEY = "principal:ver:all"
+
+
+class ProfileAccessDenied(Exception):
+    """Менеджер больше не имеет доступа к профилю из токена."""
+
+
+@dataclass(slots=True, frozen=True)
+class Principal:
+    id: int
+    manager_id: int
+    vk_id: int
+    plan_name_id: Optional[str]
+    plan_expires_at: Optional[datetime]
+    is_admin: bool
+    is_frozen: bool
+    is_deleted: bool
+    is_shadow_banned: bool
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["plan_expires_at"] = self.plan_expires_at.isoformat() if self.plan_expires_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Principal":
+        data = json.loads(raw)
+        if data.get("plan_expires_at"):
+            data["plan_expires_at"] = datetime.fromisoformat(data["plan_expires_at"])
+        return cls(**data)
+
+
+async def load_principal(db: AsyncSession, manager_id: int, profile_id: int) -> Optional[Principal]:
+    """
+    Читает принципала из БД одним запросом. Возвращает None, если профиль не найден,
+    и бросает ProfileAccessDenied, если менеджер потерял доступ к чужому профилю.
+    """
+    stmt = (
+        select(
+            User.id, User.vk_id, User.plan_expires_at, User.is_admin, User.is_frozen,
+            User.is_deleted, User.is_shadow_banned, Plan.name_id,
+        )
+        .outerjoin(Plan, User.plan_id == Plan.id)
+        .where(User.id == profile_id)
+    )
+    if profile_id != manager_id:
+        managed = exists().where(ManagedProfile.manager_user_id == manager_id, ManagedProfile.profile_user_id == profile_id)
+        team_access = (
+            exists()
+            .where(TeamProfileAccess.team_member_id == TeamMember.id)
+            .where(TeamMember.user_id == manager_id, TeamProfileAccess.profile_user_id == profile_id)
+        )
+        stmt = stmt.add_columns((managed | team_access).label("has_access"))
+
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    if profile_id != manager_id and not row.has_access:
+        raise ProfileAccessDenied()
+
+    return Principal(
+        id=row.id, manager_id=manager_id, vk_id=row.vk_id, plan_name_id=row.name_id,
+        plan_expires_at=row.plan_expires_at, is_admin=row.is_admin, is_frozen=row.is_frozen,
+        is_deleted=row.is_deleted, is_shadow_banned=row.is_shadow_banned,
+    )
+
+
+class PrincipalCache:
+    def __init__(self, memory_ttl: int = PRINCIPAL_MEMORY_TTL, redis_ttl: int = PRINCIPAL_REDIS_TTL):
+        self.memory_ttl = memory_ttl
+        self.redis_ttl = redis_ttl
+        self._memory: dict[tuple[int, int], tuple[float, Principal]] = {}
+
+    async def get_or_load(self, redis: Redis, db: AsyncSession, manager_id: int, profile_id: int) -> Optional[Principal]:
+        cache_key = (manager_id, profile_id)
+        cached = self._memory.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        versions = None
+        try:
+            raw, *versions = await redis.mget(
+                PRINCIPAL_KEY.format(manager_id=manager_id, profile_id=profile_id),
+                PRINCIPAL_VERSION_KEY.format(user_id=manager_id),
+                PRINCIPAL_VERSION_KEY.format(user_id=profile_id),
+                PRINCIPAL_GLOBAL_VERSION_KEY,
+            )
+            if isinstance(raw, str):
+                entry = json.loads(raw)
+                if entry["versions"] == versions:
+                    principal = Principal.from_json(entry["principal"])
+                    self._remember(cache_key, principal)
+                    return principal
+        except Exception as e:
+            # Кэш - только ускорение: при недоступном Redis идем в БД
+            log.warn("principal_cache.redis_error", error=str(e))
+
+        principal = await load_principal(db, manager_id, profile_id)
+        if principal is None:
+            return None
+        self._remember(cache_key, principal)
+        if versions is not None:
+            try:
+                await redis.set(
+                    PRINCIPAL_KEY.format(manager_id=manager_id, profile_id=profile_id),
+                    json.dumps({"versions": versions, "principal": principal.to_json()}),
+                    ex=self.redis_ttl,
+                )
+            except Exception as e:
+                log.warn("principal_cache.redis_error", error=str(e))
+        return principal
+
+    def evict_local(self, *user_ids: int):
+        if not user_ids:
+            self._memory.clear()
+            return
+        ids = set(user_ids)
+        for key in [k for k in self._memory if ids.intersection(k)]:
+            self._memory.pop(key, None)
+
+    def _remember(self, cache_key: tuple[int, int], principal: Principal):
+        self._memory[cache_key] = (time.monotonic() + self.memory_ttl, principal)
+
+
+async def invalidate_principals(redis: Optional[Redis], *user_ids: int, cache: Optional[PrincipalCache] = None):
+    """
+    Сбрасывает закэшированных принципалов для указанных пользователей
+    (без user_ids - для всех). Если redis не передан, открывается временное
+    подключение к Redis приложения (для воркеров и крон-задач).
+    """
+    if cache is not None:
+        cache.evict_local(*user_ids)
+
+    async with borrow_app_redis(redis) as redis:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                keys = [PRINCIPAL_VERSION_KEY.format(user_id=user_id) for user_id in user_ids] or [PRINCIPAL_GLOBAL_VERSION_KEY]
+                for key in keys:
+                    pipe.set(key, uuid.uuid4().hex, ex=PRINCIPAL_VERSION_TTL)
+                await pipe.execute()
+        except Exception as e:
+            log.error("principal_cache.invalidate_failed", user_ids=list(user_ids), error=str(e))
+
+
+async def invalidate_app_principals(app, *user_ids: int):
+    """Инвалидация из кода API/админки: берет Redis и локальный кэш из app.state."""
+    await invalidate_principals(
+        getattr(app.state, "redis_client", None), *user_ids, cache=getattr(app.state, "principal_cache", None)
+    )
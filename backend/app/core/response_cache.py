@@ -0,0 +1,57 @@
+# backend/app/core/response_cache.py
+"""
+Кэш ответов тяжелых аналитических эндпоинтов, раздельный по пользователям.
+
+Значение живет expire секунд и загружается одним процессом (single-flight
+из swr_cache). Задачи, меняющие исходные данные, сбрасывают записи
+пользователя через invalidate_user_responses.
+"""
+from typing import Any, Awaitable, Callable, Optional
+
+import structlog
+from redis.asyncio import Redis
+
+from app.core.app_redis import borrow_app_redis
+from app.core.swr_cache import get_or_refresh
+
+log = structlog.get_logger(__name__)
+
+RESPONSE_CACHE_KEY = "resp_cache:{namespace}:{user_id}"
+
+# Пространства имен закэшированных ответов
+FRIENDS_ANALYTICS = "friends_analytics"
+AUDIENCE_ANALYTICS = "audience_analytics"
+PROFILE_SUMMARY = "profile_summary"
+
+
+async def get_cached_response(
+    redis: Redis,
+    namespace: str,
+    user_id: int,
+    loader: Callable[[], Awaitable[Any]],
+    *,
+    expire: int,
+) -> Any:
+    """loader должен возвращать JSON-сериализуемое значение."""
+    return await get_or_refresh(
+        redis,
+        RESPONSE_CACHE_KEY.format(namespace=namespace, user_id=user_id),
+        loader,
+        soft_ttl=expire,
+        hard_ttl=expire,
+        metrics_namespace=f"response:{namespace}",
+    )
+
+
+async def invalidate_user_responses(redis: Optional[Redis], user_id: int, *namespaces: str):
+    """
+    Удаляет закэшированные ответы пользователя. Если redis не передан,
+    открывается временное подключение к Redis приложения (для воркеров).
+    """
+    if not namespaces:
+        return
+    async with borrow_app_redis(redis) as redis:
+        try:
+            await redis.delete(*[RESPONSE_CACHE_KEY.format(namespace=ns, user_id=user_id) for ns in namespaces])
+        except Exception as e:
+            log.error("response_cache.invalidate_failed", user_id=user_id, namespaces=namespaces, error=str(e))
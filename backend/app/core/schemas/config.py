@@ -4,6 +4,8 @@ from typing import List, Literal, Optional, Dict, Any
 class CronSettings(BaseModel):
     automation_job_lock_seconds: int
     humanize_online_skip_chance: float
+    fan_out_batch_size: int = Field(..., ge=1)
+    fan_out_spread_seconds: int = Field(..., ge=0)
 
 class TaskHistorySettings(BaseModel):
     retention_days_pro: int
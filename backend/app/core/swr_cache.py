@@ -0,0 +1,130 @@
+# backend/app/core/swr_cache.py
+"""
+Кэш в Redis по схеме stale-while-revalidate.
+
+Запись хранит значение и время загрузки. Пока запись моложе soft_ttl, она
+отдается как есть; после soft_ttl она все еще отдается сразу, но запускается
+фоновое обновление. Ключ живет в Redis hard_ttl секунд - это предел, сколько
+можно показывать устаревшие данные, если источник недоступен.
+
+Обновление (фоновое или при промахе) выполняется одним процессом: остальные
+видят занятую блокировку и не идут в источник повторно.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import structlog
+from redis.asyncio import Redis
+
+from app.core.cache_metrics import record_cache_event
+
+log = structlog.get_logger(__name__)
+
+SWR_LOCK_TTL = 30
+SWR_WAIT_TIMEOUT = 3.0
+SWR_WAIT_INTERVAL = 0.1
+
+# Ссылки на фоновые обновления, чтобы задачи не собрал GC до завершения
+_background_refreshes: set[asyncio.Task] = set()
+
+
+async def get_or_refresh(
+    redis: Redis,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    *,
+    soft_ttl: int,
+    hard_ttl: int,
+    metrics_namespace: Optional[str] = None,
+) -> Any:
+    """
+    Возвращает значение из кэша, при необходимости обновляя его через loader.
+    Исключения loader пробрасываются только при промахе (нечего отдать).
+    С metrics_namespace исход запроса учитывается в cache_metrics:
+    hit, stale (отдано устаревшее), coalesced (дождались чужой загрузки), miss.
+    """
+    async def record(event: str):
+        if metrics_namespace:
+            await record_cache_event(redis, metrics_namespace, event)
+
+    entry = await _read_entry(redis, key)
+    if entry is not None:
+        if time.time() - entry["fetched_at"] < soft_ttl:
+            await record("hit")
+        else:
+            await record("stale")
+            if await _acquire_refresh_lock(redis, key):
+                task = asyncio.create_task(_refresh_in_background(redis, key, loader, hard_ttl))
+                _background_refreshes.add(task)
+                task.add_done_callback(_background_refreshes.discard)
+        return entry["value"]
+
+    if not await _acquire_refresh_lock(redis, key):
+        # Кто-то уже загружает значение - ждем его результат, а не дублируем запрос
+        entry = await _wait_for_entry(redis, key)
+        if entry is not None:
+            await record("coalesced")
+            return entry["value"]
+        await record("miss")
+        return await _load_and_store(redis, key, loader, hard_ttl)
+
+    await record("miss")
+    try:
+        return await _load_and_store(redis, key, loader, hard_ttl)
+    finally:
+        await _release_refresh_lock(redis, key)
+
+
+async def _load_and_store(redis: Redis, key: str, loader: Callable[[], Awaitable[Any]], hard_ttl: int) -> Any:
+    value = await loader()
+    try:
+        await redis.set(key, json.dumps({"fetched_at": time.time(), "value": value}), ex=hard_ttl)
+    except Exception as e:
+        log.warn("swr_cache.store_failed", key=key, error=str(e))
+    return value
+
+
+async def _refresh_in_background(redis: Redis, key: str, loader: Callable[[], Awaitable[Any]], hard_ttl: int):
+    try:
+        await _load_and_store(redis, key, loader, hard_ttl)
+    except Exception as e:
+        # Устаревшее значение остается в кэше до hard_ttl
+        log.warn("swr_cache.refresh_failed", key=key, error=str(e))
+    finally:
+        await _release_refresh_lock(redis, key)
+
+
+async def _read_entry(redis: Redis, key: str) -> Optional[dict]:
+    try:
+        raw = await redis.get(key)
+        return json.loads(raw) if isinstance(raw, (str, bytes)) else None
+    except Exception as e:
+        log.warn("swr_cache.read_failed", key=key, error=str(e))
+        return None
+
+
+async def _wait_for_entry(redis: Redis, key: str) -> Optional[dict]:
+    deadline = time.monotonic() + SWR_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(SWR_WAIT_INTERVAL)
+        entry = await _read_entry(redis, key)
+        if entry is not None:
+            return entry
+    return None
+
+
+async def _acquire_refresh_lock(redis: Redis, key: str) -> bool:
+    try:
+        return bool(await redis.set(f"{key}:refreshing", "1", nx=True, ex=SWR_LOCK_TTL))
+    except Exception:
+        # Без Redis координация невозможна - загружаем сами
+        return True
+
+
+async def _release_refresh_lock(redis: Redis, key: str):
+    try:
+        await redis.delete(f"{key}:refreshing")
+    except Exception:
+        pass
@@ -3,7 +3,7 @@
 import datetime
 from sqlalchemy import (
     Column, Integer, String, DateTime, ForeignKey, BigInteger,
-    UniqueConstraint, JSON, Index, Date, Enum, text
+    UniqueConstraint, JSON, Index, Date, Enum, text, LargeBinary
 )
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -37,6 +37,12 @@ class WeeklyStats(Base):
     likes_count = Column(Integer, default=0, nullable=False)
     friends_added_count = Column(Integer, default=0, nullable=False)
     friend_requests_accepted_count = Column(Integer, default=0, nullable=False)
+    stories_viewed_count = Column(Integer, nullable=False, server_default=text('0'))
+    friends_removed_count = Column(Integer, nullable=False, server_default=text('0'))
+    messages_sent_count = Column(Integer, nullable=False, server_default=text('0'))
+    posts_created_count = Column(Integer, nullable=False, server_default=text('0'))
+    groups_joined_count = Column(Integer, nullable=False, server_default=text('0'))
+    groups_left_count = Column(Integer, nullable=False, server_default=text('0'))
     user = relationship("User")
     __table_args__ = (UniqueConstraint('user_id', 'week_identifier', name='_user_week_uc'),)
 
@@ -48,9 +54,22 @@ class MonthlyStats(Base):
     likes_count = Column(Integer, default=0, nullable=False)
     friends_added_count = Column(Integer, default=0, nullable=False)
     friend_requests_accepted_count = Column(Integer, default=0, nullable=False)
+    stories_viewed_count = Column(Integer, nullable=False, server_default=text('0'))
+    friends_removed_count = Column(Integer, nullable=False, server_default=text('0'))
+    messages_sent_count = Column(Integer, nullable=False, server_default=text('0'))
+    posts_created_count = Column(Integer, nullable=False, server_default=text('0'))
+    groups_joined_count = Column(Integer, nullable=False, server_default=text('0'))
+    groups_left_count = Column(Integer, nullable=False, server_default=text('0'))
     user = relationship("User")
     __table_args__ = (UniqueConstraint('user_id', 'month_identifier', name='_user_month_uc'),)
 
+class StatsRollupWatermark(Base):
+    """Последний день DailyStats, уже учтенный в недельных и месячных сводках."""
+    __tablename__ = "stats_rollup_watermarks"
+    rollup = Column(String, primary_key=True)
+    processed_through = Column(Date, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
 class ProfileMetric(Base):
     __tablename__ = "profile_metrics"
     id = Column(Integer, primary_key=True)
@@ -73,6 +92,19 @@ class ProfileMetric(Base):
         Index('ix_profile_metrics_user_date', 'user_id', 'date'),
     )
 
+class ProfileContentItem(Base):
+    """Лайки отдельного поста/фото профиля. Максимальный item_id по типу служит high-water mark."""
+    __tablename__ = "profile_content_items"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    item_type = Column(String, nullable=False) # 'post', 'photo'
+    item_id = Column(BigInteger, nullable=False)
+    likes_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'item_type', 'item_id', name='_user_content_item_uc'),
+    )
+
 class FriendsHistory(Base):
     __tablename__ = "friends_history"
     id = Column(Integer, primary_key=True)
@@ -85,6 +117,24 @@ class FriendsHistory(Base):
         Index('ix_friends_history_user_date', 'user_id', 'date'),
     )
 
+class FriendsSnapshot(Base):
+    """Список друзей за день (services/friend_snapshots.py): упакованные отсортированные id и изменения к предыдущему снимку."""
+    __tablename__ = "friends_snapshots"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, default=datetime.date.today, nullable=False)
+    friends_count = Column(Integer, nullable=False)
+    friend_ids = Column(LargeBinary, nullable=False)
+    # Пусто у первого снимка пользователя - сравнивать не с чем
+    added_ids = Column(LargeBinary, nullable=True)
+    removed_ids = Column(LargeBinary, nullable=True)
+    added_count = Column(Integer, nullable=False, default=0)
+    removed_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'date', name='_user_date_friends_snapshot_uc'),
+    )
+
 class PostActivityHeatmap(Base):
     __tablename__ = "post_activity_heatmaps"
     id = Column(Integer, primary_key=True)
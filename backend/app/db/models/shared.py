@@ -3,7 +3,7 @@
 import datetime
 from sqlalchemy import (
     Column, Integer, String, DateTime, ForeignKey, Text,
-    UniqueConstraint, Boolean, JSON, Enum
+    UniqueConstraint, Boolean, JSON, Enum, Index, text
 )
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -29,6 +29,11 @@ class Notification(Base):
     is_read = Column(Boolean, default=False, nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), default=datetime.datetime.utcnow, index=True)
     user = relationship("User", back_populates="notifications")
+    __table_args__ = (
+        Index('ix_notifications_user_created_id', 'user_id', 'created_at', 'id'),
+        # Для подсчета и сверки счетчиков непрочитанных (services/unread_counter.py)
+        Index('ix_notifications_user_unread', 'user_id', postgresql_where=text('is_read = false')),
+    )
 
 class FilterPreset(Base):
     __tablename__ = "filter_presets"
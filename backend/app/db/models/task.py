@@ -4,7 +4,7 @@ from datetime import datetime, UTC
 import enum
 from sqlalchemy import (
     Column, ForeignKeyConstraint, Integer, String, DateTime, ForeignKey, BigInteger,
-    UniqueConstraint, Boolean, JSON, Text, Enum, Index, Float
+    UniqueConstraint, Boolean, JSON, Text, Enum, Index, Float, text
 )
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -24,7 +24,11 @@ class TaskHistory(Base):
     finished_at = Column(DateTime(timezone=True), nullable=True)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
     user = relationship("User", back_populates="task_history")
-    __table_args__ = (Index('ix_task_history_user_status', 'user_id', 'status'),)
+    __table_args__ = (
+        # Keyset-пагинация истории: (created_at, id) в пределах пользователя и статуса
+        Index('ix_task_history_user_created_id', 'user_id', 'created_at', 'id'),
+        Index('ix_task_history_user_status_created_id', 'user_id', 'status', 'created_at', 'id'),
+    )
 
 class Automation(Base):
     __tablename__ = "automations"
@@ -34,6 +38,7 @@ class Automation(Base):
     is_active = Column(Boolean, default=False, nullable=False)
     settings = Column(JSON, nullable=True)
     last_run_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC), server_default=text('now()'), nullable=False)
     user = relationship("User", back_populates="automations")
     __table_args__ = (UniqueConstraint('user_id', 'automation_type', name='_user_automation_uc'),)
 
@@ -47,6 +52,7 @@ class Scenario(Base):
     is_active = Column(Boolean, default=False, nullable=False)
     
     first_step_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC), server_default=text('now()'), nullable=False)
 
     user = relationship("User", back_populates="scenarios")
     steps = relationship(
@@ -91,6 +97,7 @@ class ScheduledPost(Base):
     arq_job_id = Column(String, nullable=True, unique=True)
     vk_post_id = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC), server_default=text('now()'), nullable=False)
     user = relationship("User", back_populates="scheduled_posts")
 
 class SentCongratulation(Base):
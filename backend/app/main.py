@@ -4,21 +4,21 @@ from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from redis.asyncio import Redis as AsyncRedis
 from arq.connections import create_pool
-from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import JSONResponse
-from datetime import datetime, UTC
 from app.arq_config import redis_settings
 from app.core.config import settings
+from app.core.app_redis import app_redis
 from fastapi.middleware.gzip import GZipMiddleware # --- 1. ИМПОРТ ДЛЯ СЖАТИЯ ---
 from fastapi.responses import ORJSONResponse
 from app.core.logging import configure_logging
 from app.db.session import engine as main_engine, get_db as get_db_session, AsyncSessionFactory
-from app.db.models import User
 from app.admin import init_admin
 from app.services.websocket_manager import redis_listener
-from app.api.dependencies import get_current_active_profile, get_token_payload
+from app.api.dependencies import get_token_payload, resolve_principal
+from app.core.principal_cache import PrincipalCache
+from app.services.last_active_tracker import record_user_activity
 from app.api.endpoints import (
     auth_router, users_router, proxies_router, tasks_router,
     stats_router, automations_router, billing_router, analytics_router,
@@ -41,21 +41,15 @@ async def _check_user_status_and_proceed(db: AsyncSession, request: Request, cal
     """
     try:
         payload = await get_token_payload(token.split(" ")[1])
-        user = await get_current_active_profile(payload=payload, db=db)
+        user = await resolve_principal(payload, db, request)
 
         if user.is_deleted:
             return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "Аккаунт был удален."})
         if user.is_frozen:
             return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "Ваш аккаунт временно заморожен администратором."})
 
-        # Логика обновления last_active_at остается
-        activity_redis = request.app.state.activity_redis
-        last_update = await activity_redis.get(f"last_active:{user.id}")
-        now_ts = datetime.now(UTC).timestamp()
-        if not last_update or (now_ts - float(last_update)) > 60:
-            await db.execute(update(User).where(User.id == user.id).values(last_active_at=datetime.now(UTC)))
-            await db.commit() # Этот коммит теперь будет частью тестовой транзакции
-            await activity_redis.set(f"last_active:{user.id}", now_ts, ex=65)
+        # last_active_at пишется в БД периодической задачей (flush_last_active_job)
+        await record_user_activity(request.app.state.activity_redis, user.id)
 
     except HTTPException:
         # Пропускаем исключения, такие как невалидный токен. FastAPI обработает их
@@ -76,10 +70,7 @@ def create_app(db_engine: AsyncEngine | None = None) -> FastAPI:
         )
         await FastAPILimiter.init(limiter_redis)
 
-        redis_client = AsyncRedis.from_url(
-            f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/1",
-            decode_responses=True
-        )
+        redis_client = app_redis()
         app.state.redis_client = redis_client
         app.state.activity_redis = AsyncRedis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/3")
 
@@ -106,6 +97,8 @@ def create_app(db_engine: AsyncEngine | None = None) -> FastAPI:
         default_response_class=ORJSONResponse, # Используем orjson по умолчанию
     )
 
+    app.state.principal_cache = PrincipalCache()
+
     app.add_middleware(GZipMiddleware, minimum_size=1000)
 
     app.add_middleware(
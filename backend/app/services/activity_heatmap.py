@@ -0,0 +1,60 @@
+# backend/app/services/activity_heatmap.py
+"""
+Построение тепловой карты активности друзей по наблюдениям last_seen.
+
+Функции модуля чистые и работают с numpy-массивами, поэтому их можно
+выполнять в пуле процессов. Наблюдения хранятся компактно: две строки int64
+(id друга, unix-время), сериализованные через tobytes() и упорядоченные по
+(id, время) - так свежие наблюдения вливаются в накопленные слиянием за
+линейное время, без пересортировки всего окна.
+"""
+import numpy as np
+
+HOURS_IN_WEEK = 7 * 24
+# 1 января 1970 года - четверг (weekday() == 3)
+EPOCH_WEEKDAY_OFFSET_HOURS = 3 * 24
+
+
+def pack_observations(observations: np.ndarray) -> bytes:
+    return np.ascontiguousarray(observations, dtype=np.int64).tobytes()
+
+
+def unpack_observations(raw: bytes | None) -> np.ndarray:
+    if not raw:
+        return np.empty((2, 0), dtype=np.int64)
+    return np.frombuffer(raw, dtype=np.int64).reshape(2, -1)
+
+
+def bin_by_weekday_hour(timestamps: np.ndarray) -> np.ndarray:
+    """Раскладывает unix-время по ячейкам [день недели (пн=0), час] в UTC."""
+    slots = (timestamps // 3600 + EPOCH_WEEKDAY_OFFSET_HOURS) % HOURS_IN_WEEK
+    return np.bincount(slots, minlength=HOURS_IN_WEEK).reshape(7, 24)
+
+
+def normalize_heatmap(counts: np.ndarray) -> list[list[int]]:
+    max_activity = int(counts.max()) if counts.size else 0
+    if max_activity == 0:
+        return counts.astype(int).tolist()
+    return (counts * 100 // max_activity).astype(int).tolist()
+
+
+def merge_last_seen(
+    stored: bytes | None, friend_ids: np.ndarray | list[int], seen_times: np.ndarray | list[int], cutoff_ts: int
+) -> tuple[bytes, list[list[int]]]:
+    """
+    Добавляет свежие наблюдения к накопленным, отбрасывает выпавшие из окна
+    и дубли (тот же друг с тем же временем), и строит нормированную карту.
+    Возвращает (новое состояние хранилища, карту 7x24 со значениями 0..100).
+    """
+    # id друга и время (< 2**32) упаковываются в один int64: порядок ключей - порядок (id, время)
+    fresh = (np.asarray(friend_ids, dtype=np.int64) << 32) | np.asarray(seen_times, dtype=np.int64)
+    kept = unpack_observations(stored)
+    keys = np.concatenate([(kept[0] << 32) | kept[1], fresh])
+    keys = keys[(keys & 0xFFFFFFFF) >= cutoff_ts]
+    # Накопленные ключи уже упорядочены: timsort досортировывает свежие и сливает
+    # их с ними за линейное время (np.unique сортировал бы все окно заново)
+    keys = np.sort(keys, kind="stable")
+    if keys.size:
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    observations = np.stack([keys >> 32, keys & 0xFFFFFFFF])
+    return pack_observations(observations), normalize_heatmap(bin_by_weekday_hour(observations[1]))
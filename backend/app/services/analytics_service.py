@@ -1,11 +1,7 @@
 # --- backend/app/services/analytics_service.py ---
 import datetime
-import pytz
 from collections import Counter
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
 from app.services.base import BaseVKService
-from app.db.models import PostActivityHeatmap, User
 from app.services.vk_api import VKAPIError
 from app.api.schemas.analytics import AudienceAnalyticsResponse, AudienceStatItem, SexDistributionResponse
 import structlog
@@ -44,23 +40,19 @@ class AnalyticsService(BaseVKService):
         """
         await self._initialize_vk_api()
         
-        friends = await self.vk_api.get_user_friends(user_id=self.user.vk_id, fields="sex,bdate,city")
+        friends = [f for f in await self._get_friends() if not f.deactivated]
         if not friends:
             return AudienceAnalyticsResponse(city_distribution=[], age_distribution=[], sex_distribution=[])
 
         # Расчет по городам
-        city_counter = Counter(
-            friend['city']['title']
-            for friend in friends
-            if friend.get('city') and friend.get('city', {}).get('title') and not friend.get('deactivated')
-        )
+        city_counter = Counter(friend.city_title for friend in friends if friend.city_title)
         top_cities = [
             AudienceStatItem(name=city, value=count)
             for city, count in city_counter.most_common(5)
         ]
 
         # Расчет по возрасту
-        ages = [_calculate_age(friend['bdate']) for friend in friends if friend.get('bdate') and not friend.get('deactivated')]
+        ages = [_calculate_age(friend.bdate) for friend in friends if friend.bdate]
         age_groups = [_get_age_group(age) for age in ages if age is not None]
         age_counter = Counter(age_groups)
         age_distribution = [
@@ -70,8 +62,8 @@ class AnalyticsService(BaseVKService):
 
         # Расчет по полу
         sex_counter = Counter(
-            'Мужчины' if f.get('sex') == 2 else ('Женщины' if f.get('sex') == 1 else 'Не указан')
-            for f in friends if not f.get('deactivated')
+            'Мужчины' if f.sex == 2 else ('Женщины' if f.sex == 1 else 'Не указан')
+            for f in friends
         )
         sex_distribution = [SexDistributionResponse(name=k, value=v) for k, v in sex_counter.items()]
 
@@ -82,44 +74,25 @@ class AnalyticsService(BaseVKService):
         )
     # --- КОНЕЦ НОВОГО МЕТОДА ---
 
-    async def generate_post_activity_heatmap(self):
+    async def fetch_friends_last_seen(self) -> tuple[list[int], list[int]]:
+        """
+        Возвращает (id друзей, время last_seen) для тепловой карты активности.
+        Само построение карты и запись в БД выполняет фоновая задача.
+        Карта строится по всем пользователям сразу, поэтому друзья запрашиваются
+        только с last_seen и мимо дневного снимка (services/friend_snapshots.py).
+        """
         await self._initialize_vk_api()
-        
+
         try:
             friends = await self.vk_api.get_user_friends(self.user.vk_id, fields="last_seen")
         except VKAPIError as e:
             log.error("heatmap.vk_error", user_id=self.user.id, error=str(e))
-            return
-        
-        if not friends:
-            return
-
-        heatmap = [[0 for _ in range(24)] for _ in range(7)]
-        now = datetime.datetime.utcnow()
-        two_weeks_ago = now - datetime.timedelta(weeks=2)
+            return [], []
 
-        for friend in friends:
+        friend_ids, seen_times = [], []
+        for friend in (friends or {}).get("items", []):
             last_seen_data = friend.get("last_seen")
-            if not last_seen_data or not (seen_timestamp := last_seen_data.get("time")):
-                continue
-            
-            seen_time = datetime.datetime.fromtimestamp(seen_timestamp, tz=pytz.UTC)
-            
-            if seen_time > two_weeks_ago:
-                heatmap[seen_time.weekday()][seen_time.hour] += 1
-        
-        max_activity = max(max(row) for row in heatmap)
-        normalized_heatmap = heatmap
-        if max_activity > 0:
-            normalized_heatmap = [[int((count / max_activity) * 100) for count in row] for row in heatmap]
-        
-        stmt = insert(PostActivityHeatmap).values(
-            user_id=self.user.id,
-            heatmap_data={"data": normalized_heatmap},
-        ).on_conflict_do_update(
-            index_elements=['user_id'],
-            set_={"heatmap_data": {"data": normalized_heatmap}, "last_updated_at": datetime.datetime.utcnow()}
-        )
-        await self.db.execute(stmt)
-        await self.db.commit()
-        log.info("heatmap.generated", user_id=self.user.id)
\ No newline at end of file
+            if last_seen_data and (seen_timestamp := last_seen_data.get("time")):
+                friend_ids.append(friend["id"])
+                seen_times.append(seen_timestamp)
+        return friend_ids, seen_times
@@ -4,7 +4,8 @@ from sqlalchemy.dialects.postgresql import insert
 from app.services.base import BaseVKService
 from app.db.models import SentCongratulation
 from app.api.schemas.actions import BirthdayCongratulationRequest, EternalOnlineRequest
-from app.services.vk_user_filter import apply_filters_to_profiles
+from app.services.friend_snapshots import needs_live_presence
+from app.services.vk_user_filter import compile_filters
 from app.services.message_service import MessageService
 from app.services.message_humanizer import MessageHumanizer
 from typing import List, Dict, Any
@@ -13,15 +14,19 @@ from .interfaces import IExecutableTask, IPreviewableTask
 class AutomationService(BaseVKService, IExecutableTask, IPreviewableTask):
     async def get_targets(self, params: BirthdayCongratulationRequest) -> List[Dict[str, Any]]:
         await self._initialize_vk_api()
-        friends_response = await self.vk_api.get_user_friends(self.user.vk_id, fields="bdate,sex,online,last_seen,is_closed,status,city")
-        if not friends_response or not friends_response.get('items'):
+        friends = await self._get_friends(live=needs_live_presence(params.filters))
+        if not friends:
             return []
-        friends = friends_response.get('items', [])
-        today_str = f"{datetime.date.today().day}.{datetime.date.today().month}"
-        birthday_friends_raw = [f for f in friends if f.get("bdate") and f.get("bdate").startswith(today_str)]
+        # bdate - "Д.М.ГГГГ" или "Д.М" без ведущих нулей; сравниваем день и месяц целиком,
+        # иначе 1 января совпадало бы с "1.10" и "1.11"
+        today = datetime.date.today()
+        today_parts = [str(today.day), str(today.month)]
+        birthday_friends_raw = [f for f in friends if f.bdate.split('.')[:2] == today_parts]
         if not birthday_friends_raw:
             return []
-        birthday_friends_filtered = await apply_filters_to_profiles(birthday_friends_raw, params.filters)
+        birthday_friends_filtered = [
+            f.to_dict() for f in compile_filters(params.filters).apply_records(birthday_friends_raw)
+        ]
         if not birthday_friends_filtered:
             return []
         if params.only_new_dialogs or params.only_unread:
@@ -42,7 +47,7 @@ class AutomationService(BaseVKService, IExecutableTask, IPreviewableTask):
 
     async def _congratulate_friends_logic(self, params: BirthdayCongratulationRequest) -> str:
         stats = await self._get_today_stats()
-        final_targets = await self.get_targets(params)
+        final_targets = await self._get_run_targets(params)
         if not final_targets:
             return "Не осталось именинников для поздравления после применения фильтров."
         current_year = datetime.date.today().year
@@ -1,13 +1,19 @@
 # --- backend/app/services/base.py ---
 
 import random
+from typing import TypeVar
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import User, DailyStats
-from app.services.vk_api import VKAPI
+from app.services.vk_api import VKAPI, VKProfile
+from app.services.friend_snapshots import FriendSnapshotStore
 from app.services.humanizer import Humanizer
 from app.services.event_emitter import RedisEventEmitter
 from app.repositories.stats import StatsRepository
 from app.core.security import decrypt_data
+from app.core.app_redis import AppRedisStore, borrow_app_redis
+
+StoreT = TypeVar("StoreT", bound=AppRedisStore)
 
 class BaseVKService:
     def __init__(
@@ -22,6 +28,8 @@ class BaseVKService:
         self.stats_repo = StatsRepository(db)
         self.vk_api: VKAPI | None = None
         self.humanizer: Humanizer | None = None
+        # Цели, сохраненные при предпросмотре (services/preview_targets.py)
+        self.preset_targets: list[dict] | None = None
 
     async def _initialize_vk_api(self):
         """Инициализирует VKAPI клиент и Humanizer, если они еще не созданы."""
@@ -34,6 +42,42 @@ class BaseVKService:
         self.vk_api = VKAPI(access_token=vk_token, proxy=proxy_url)
         self.humanizer = Humanizer(delay_profile=self.user.delay_profile, logger_func=self.emitter.send_log)
 
+    async def _get_run_targets(self, params) -> list[dict]:
+        """Цели для выполнения: сохраненные при предпросмотре или свежая выборка через get_targets."""
+        if self.preset_targets is not None:
+            return self.preset_targets
+        return await self.get_targets(params)
+
+    def _app_redis_store(self, store_cls: type[StoreT], *args) -> StoreT:
+        """
+        Обертка над Redis приложения: в воркере эмиттер держит общий клиент
+        (counter_redis), без него обертка открывает свое подключение.
+        """
+        redis = getattr(self.emitter, "counter_redis", None)
+        return store_cls(redis, *args) if redis is not None else store_cls.connect(*args)
+
+    def _borrow_app_redis(self):
+        """Redis приложения на время операции: общий клиент эмиттера или временное подключение."""
+        return borrow_app_redis(getattr(self.emitter, "counter_redis", None))
+
+    def _friend_snapshots(self) -> FriendSnapshotStore:
+        return self._app_redis_store(FriendSnapshotStore, self.user.id)
+
+    async def _get_friends(self, live: bool = False) -> list[VKProfile]:
+        """Друзья пользователя из дневного снимка (services/friend_snapshots.py)."""
+        store = self._friend_snapshots()
+        try:
+            return await store.get_friends(self.vk_api, self.user.vk_id, live=live)
+        finally:
+            await store.close()
+
+    async def _invalidate_friends(self):
+        store = self._friend_snapshots()
+        try:
+            await store.invalidate()
+        finally:
+            await store.close()
+
     async def _get_working_proxy(self) -> str | None:
         """Выбирает случайный рабочий прокси из списка пользователя."""
         # Предполагаем, что user.proxies всегда загружены благодаря selectinload в `arq_task_runner`
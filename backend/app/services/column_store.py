@@ -0,0 +1,78 @@
+# backend/app/services/column_store.py
+"""
+Компактное колоночное хранилище для больших результатов парсинга.
+
+Каждая колонка - отдельный файл <name>.bin с сырыми значениями numpy
+фиксированного типа, схема (имя -> dtype) лежит в schema.json. Данные только
+дописываются в конец, поэтому запись идет пачками без чтения файла, а
+чтение - через memmap без загрузки колонок в память.
+"""
+import os
+from pathlib import Path
+from typing import Iterator, Mapping
+
+import numpy as np
+import orjson
+
+SCHEMA_FILE = "schema.json"
+
+
+class ColumnStore:
+    def __init__(self, directory: Path, schema: Mapping[str, str]):
+        self.directory = Path(directory)
+        self.schema = {name: np.dtype(dtype) for name, dtype in schema.items()}
+
+    @classmethod
+    def create(cls, directory: Path, schema: Mapping[str, str]) -> "ColumnStore":
+        store = cls(directory, schema)
+        store.directory.mkdir(parents=True, exist_ok=True)
+        (store.directory / SCHEMA_FILE).write_bytes(orjson.dumps(dict(schema)))
+        for name in store.schema:
+            store._path(name).touch()
+        return store
+
+    @classmethod
+    def open(cls, directory: Path) -> "ColumnStore":
+        return cls(directory, orjson.loads((Path(directory) / SCHEMA_FILE).read_bytes()))
+
+    @property
+    def fields(self) -> list[str]:
+        return list(self.schema)
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.bin"
+
+    def __len__(self) -> int:
+        # Колонки могут разойтись только при сбое посреди append - считаем по самой короткой
+        return min(self._path(name).stat().st_size // dtype.itemsize for name, dtype in self.schema.items())
+
+    def append(self, columns: Mapping[str, np.ndarray]):
+        """Дописывает строки; в columns должны быть все колонки схемы одинаковой длины."""
+        lengths = {len(columns[name]) for name in self.schema}
+        if len(lengths) != 1:
+            raise ValueError(f"Колонки разной длины: {sorted(lengths)}")
+        for name, dtype in self.schema.items():
+            with open(self._path(name), "ab") as f:
+                np.asarray(columns[name], dtype=dtype).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def truncate(self, rows: int):
+        """Обрезает все колонки до rows строк (откат недописанной пачки)."""
+        for name, dtype in self.schema.items():
+            os.truncate(self._path(name), rows * dtype.itemsize)
+
+    def column(self, name: str) -> np.ndarray:
+        """Колонка только для чтения, отображенная в память."""
+        rows = self._path(name).stat().st_size // self.schema[name].itemsize
+        if rows == 0:
+            return np.empty(0, dtype=self.schema[name])
+        return np.memmap(self._path(name), dtype=self.schema[name], mode="r", shape=(rows,))
+
+    def iter_rows(self, batch_rows: int) -> Iterator[list[dict]]:
+        """Строки в виде словарей пачками по batch_rows."""
+        total = len(self)
+        columns = {name: self.column(name) for name in self.schema}
+        for start in range(0, total, batch_rows):
+            values = [columns[name][start:start + batch_rows].tolist() for name in self.schema]
+            yield [dict(zip(self.schema, row)) for row in zip(*values)]
@@ -0,0 +1,97 @@
+# backend/app/services/contacted_set.py
+"""
+Множество пользователей VK, которым пользователь уже отправлял заявку в друзья.
+
+Хранится в Redis приложения как SET contacted:{user_id}. Рекомендации
+отсеиваются одним пайплайном (SISMEMBER маркера + SMISMEMBER кандидатов) еще
+до запросов к VK. Перед отправкой заявки id "занимается" через SADD: 0 значит,
+что заявку этому человеку уже отправила другая задача, - это заменяет
+отдельную блокировку на каждого кандидата.
+
+Множество заполняется из FriendRequestLog при первом обращении; маркер
+_SEEDED_MARKER отличает заполненное множество от созданного одиночным SADD.
+Через CONTACTED_TTL множество собирается заново из БД - это же убирает id,
+занятые задачей, которая упала до записи в лог. Если Redis недоступен,
+проверка идет одним запросом к FriendRequestLog.
+"""
+from typing import Iterable, Optional
+
+import structlog
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.app_redis import AppRedisStore
+from app.db.models import FriendRequestLog
+
+log = structlog.get_logger(__name__)
+
+CONTACTED_KEY = "contacted:{user_id}"
+CONTACTED_TTL = 30 * 24 * 3600
+SEED_CHUNK = 10_000
+# VK id всегда больше нуля, поэтому маркер не совпадет с настоящим id
+_SEEDED_MARKER = 0
+
+
+class ContactedSet(AppRedisStore):
+    def __init__(self, redis: Redis, user_id: int):
+        super().__init__(redis)
+        self.user_id = user_id
+        self.key = CONTACTED_KEY.format(user_id=user_id)
+
+    async def _contacted_in_db(self, db: AsyncSession, vk_ids: Optional[list[int]] = None) -> set[int]:
+        stmt = select(FriendRequestLog.target_vk_id).where(FriendRequestLog.user_id == self.user_id)
+        if vk_ids is not None:
+            stmt = stmt.where(FriendRequestLog.target_vk_id.in_(vk_ids))
+        return set((await db.execute(stmt)).scalars().all())
+
+    async def _seed(self, db: AsyncSession) -> set[int]:
+        contacted = await self._contacted_in_db(db)
+        ids = list(contacted)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for start in range(0, len(ids), SEED_CHUNK):
+                pipe.sadd(self.key, *ids[start:start + SEED_CHUNK])
+            pipe.sadd(self.key, _SEEDED_MARKER)
+            pipe.expire(self.key, CONTACTED_TTL)
+            await pipe.execute()
+        log.info("contacted_set.seeded", user_id=self.user_id, count=len(ids))
+        return contacted
+
+    async def filter_new(self, db: AsyncSession, vk_ids: Iterable[int]) -> list[int]:
+        """vk_ids без тех, кому заявка уже отправлялась, в исходном порядке."""
+        vk_ids = list(dict.fromkeys(vk_ids))
+        if not vk_ids:
+            return []
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.sismember(self.key, _SEEDED_MARKER)
+                pipe.smismember(self.key, vk_ids)
+                seeded, flags = await pipe.execute()
+            contacted = {vk_id for vk_id, flag in zip(vk_ids, flags) if flag}
+            if not seeded:
+                contacted |= await self._seed(db)
+        except Exception as e:
+            log.warn("contacted_set.read_failed", user_id=self.user_id, error=str(e))
+            contacted = await self._contacted_in_db(db, vk_ids)
+        return [vk_id for vk_id in vk_ids if vk_id not in contacted]
+
+    async def claim(self, vk_id: int) -> bool:
+        """Отмечает vk_id как приглашенного. False - его уже пригласила другая задача."""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.sadd(self.key, vk_id)
+                # Множество, истекшее после проверки, не должно остаться без TTL
+                pipe.expire(self.key, CONTACTED_TTL, nx=True)
+                added, _ = await pipe.execute()
+            return bool(added)
+        except Exception as e:
+            # Кандидат уже прошел filter_new, без Redis заявка все равно отправляется
+            log.warn("contacted_set.claim_failed", user_id=self.user_id, error=str(e))
+            return True
+
+    async def release(self, vk_id: int):
+        """Снимает отметку, если заявку отправить не удалось."""
+        try:
+            await self.redis.srem(self.key, vk_id)
+        except Exception as e:
+            log.warn("contacted_set.release_failed", user_id=self.user_id, error=str(e))
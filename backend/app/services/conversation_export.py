@@ -0,0 +1,160 @@
+# backend/app/services/conversation_export.py
+"""
+Выгрузка истории диалога в JSON-lines.
+
+История читается в хронологическом порядке (rev=1) страницами
+messages.getHistory, по 25 страниц в одном execute. Каждая пачка сразу
+сериализуется orjson и отдается/дописывается в файл, так что память не
+зависит от длины диалога.
+
+Фоновая выгрузка (ConversationExporter) после каждой пачки сохраняет
+чекпоинт: offset, id последнего записанного сообщения, число строк и байт.
+Повторный запуск обрезает файл до сохраненного размера и продолжает с
+небольшим перекрытием, отбрасывая сообщения с id не больше последнего -
+это же защищает от сдвига страниц при удалении сообщений.
+
+При сжатии zstd файл пишется отдельными zstd-кадрами на пачку, последовательность кадров -
+корректный zstd-поток, поэтому дописывание после возобновления безопасно.
+"""
+import asyncio
+import math
+import os
+import shutil
+from pathlib import Path
+from typing import Any, AsyncGenerator, Iterable, Optional
+
+import orjson
+import zstandard
+
+from app.services.post_activity import EXECUTE_MAX_CALLS, ProgressCallback, execute_batches
+from app.services.vk_api import VKAPI, VKAPIError
+
+HISTORY_PAGE_SIZE = 200
+ZSTD_LEVEL = 3
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def export_file_name(compression: Optional[str]) -> str:
+    return "messages.jsonl.zst" if compression == "zstd" else "messages.jsonl"
+
+
+def stream_compressor(compression: Optional[str]):
+    """Потоковый компрессор (compress/flush) для отдачи по HTTP или None без сжатия."""
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return None
+
+
+def encode_jsonl(rows: Iterable[dict[str, Any]]) -> bytes:
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+async def iter_history_batches(
+    vk_api: VKAPI, peer_id: int, start_offset: int = 0, after_id: int = 0
+) -> AsyncGenerator[tuple[int, list[dict]], None]:
+    """
+    Пачки сообщений диалога с id > after_id начиная с start_offset.
+    Отдает (offset следующей пачки, сообщения).
+    """
+    offset, last_id, total = start_offset, after_id, None
+    while True:
+        pages = EXECUTE_MAX_CALLS
+        if total is not None:
+            pages = min(pages, math.ceil((total - offset) / HISTORY_PAGE_SIZE))
+        if pages <= 0:
+            return
+        calls = [
+            {"method": "messages.getHistory", "params": {
+                "peer_id": peer_id, "count": HISTORY_PAGE_SIZE, "offset": offset + i * HISTORY_PAGE_SIZE, "rev": 1,
+            }}
+            for i in range(pages)
+        ]
+        # Страницы одного execute идут подряд - параллельные execute нарушили бы порядок записи
+        results = await execute_batches(vk_api, calls, concurrency=1)
+        messages, finished = [], False
+        for page in results:
+            if not isinstance(page, dict):
+                raise VKAPIError("Не удалось получить страницу истории диалога.", 0)
+            items = page.get("items") or []
+            total = page.get("count", total)
+            messages.extend(m for m in items if m["id"] > last_id)
+            if messages:
+                last_id = messages[-1]["id"]
+            if len(items) < HISTORY_PAGE_SIZE:
+                finished = True
+                break
+        offset += len(calls) * HISTORY_PAGE_SIZE
+        yield offset, messages
+        if finished:
+            return
+
+
+class ConversationExporter:
+    def __init__(self, vk_api: VKAPI, peer_id: int, directory: Path, compression: Optional[str] = None):
+        self.vk_api = vk_api
+        self.peer_id = peer_id
+        self.directory = Path(directory)
+        self.compression = compression
+
+    @property
+    def result_file(self) -> Path:
+        return self.directory / export_file_name(self.compression)
+
+    @property
+    def _checkpoint_path(self) -> Path:
+        return self.directory / CHECKPOINT_FILE
+
+    def _prepare(self) -> dict[str, Any]:
+        if self._checkpoint_path.exists():
+            state = orjson.loads(self._checkpoint_path.read_bytes())
+            if state["compression"] == self.compression:
+                os.truncate(self.result_file, state["bytes"])
+                return state
+            # Прерванная выгрузка в другом формате - начинаем заново
+            shutil.rmtree(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.result_file.touch()
+        state = {
+            "peer_id": self.peer_id, "compression": self.compression,
+            "offset": 0, "last_id": 0, "rows": 0, "bytes": 0, "fields": [],
+        }
+        self._save_checkpoint(state)
+        return state
+
+    def _save_checkpoint(self, state: dict[str, Any]):
+        tmp_path = self._checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_bytes(orjson.dumps(state))
+        os.replace(tmp_path, self._checkpoint_path)
+
+    def _append(self, messages: list[dict], state: dict[str, Any]):
+        data = encode_jsonl(messages)
+        if self.compression == "zstd":
+            data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        with open(self.result_file, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        fields = dict.fromkeys(state["fields"])
+        for message in messages:
+            fields.update(dict.fromkeys(message))
+        state.update(
+            rows=state["rows"] + len(messages), bytes=state["bytes"] + len(data),
+            last_id=messages[-1]["id"], fields=list(fields),
+        )
+
+    def _commit(self, messages: list[dict], state: dict[str, Any]):
+        if messages:
+            self._append(messages, state)
+        self._save_checkpoint(state)
+
+    async def run(self, on_progress: Optional[ProgressCallback] = None) -> dict[str, Any]:
+        """Выгружает историю в result_file. Возвращает итоговое состояние (rows, fields, ...)."""
+        state = await asyncio.to_thread(self._prepare)
+        # Перекрытие на страницу: удаленные за время паузы сообщения сдвигают offset назад
+        start_offset = max(state["offset"] - HISTORY_PAGE_SIZE, 0)
+        async for offset, messages in iter_history_batches(self.vk_api, self.peer_id, start_offset, state["last_id"]):
+            state["offset"] = offset
+            await asyncio.to_thread(self._commit, messages, state)
+            if on_progress:
+                await on_progress(state["rows"], None)
+        return state
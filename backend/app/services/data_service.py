@@ -1,92 +1,156 @@
 # backend/app/services/data_service.py
-import json
-import re
-from typing import List, Dict, Any, AsyncGenerator
+from pathlib import Path
+from typing import List, Dict, Any, AsyncGenerator, Optional
 from app.services.base import BaseVKService
 from app.api.schemas.data import ParsingFilters # Новая Pydantic-модель
-from collections import Counter
+from app.services.conversation_export import (
+    ConversationExporter, encode_jsonl, iter_history_batches, stream_compressor
+)
+from app.services.group_member_scan import GroupMemberScanner
+from app.services.post_activity import (
+    EXECUTE_MAX_CALLS, collect_post_activity, execute_batches, fetch_post_ids
+)
+from app.services.public_vk_cache import PublicVKCache
+from app.services.screen_names import normalize_screen_name, extract_screen_names, resolve_screen_names
+
+# users.get и groups.getMembers отдают до 1000 записей за вызов, wall.get - до 100
+USERS_GET_BATCH = 1000
+GROUP_MEMBERS_PAGE = 1000
+WALL_PAGE = 100
+RESOLVE_LINKS_CHUNK = 1000
+GROUP_MEMBER_FIELDS = "sex,bdate,city,online"
+# Комментарий считаем в 2 раза ценнее лайка
+LIKE_WEIGHT = 1
+COMMENT_WEIGHT = 2
+
+
+async def _collect(batches: AsyncGenerator[List[Dict[str, Any]], None]) -> List[Dict[str, Any]]:
+    return [row async for batch in batches for row in batch]
+
 
 class DataService(BaseVKService):
+    """
+    Парсинги данных VK. Методы iter_* отдают результат пачками (их использует
+    фоновая задача, которая сразу пишет пачки в файл), parse_* собирают тот же
+    результат в список.
 
-    async def parse_active_group_audience(self, group_id: int, filters: ParsingFilters) -> List[Dict[str, Any]]:
+    public_cache - общий кэш публичных данных VK (public_vk_cache.py); без него
+    все запросы идут в VK напрямую.
+    """
+
+    def __init__(self, *args, public_cache: Optional[PublicVKCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.public_cache = public_cache
+
+    async def close(self):
+        if self.vk_api:
+            await self.vk_api.close()
+        if self.public_cache:
+            await self.public_cache.close()
+
+    async def _report_progress(self, processed: int, total: int | None = None):
+        if self.emitter:
+            await self.emitter.send_task_progress(processed, total)
+
+    async def _iter_profiles(self, user_ids: List[int], fields: str | None = None) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        for i in range(0, len(user_ids), USERS_GET_BATCH):
+            chunk = ",".join(map(str, user_ids[i:i + USERS_GET_BATCH]))
+            profiles = await (self.vk_api.users.get(user_ids=chunk, fields=fields) if fields else self.vk_api.users.get(user_ids=chunk))
+            if profiles:
+                yield profiles
+
+    async def iter_active_group_audience(self, group_id: int, filters: ParsingFilters) -> AsyncGenerator[List[Dict[str, Any]], None]:
         """Собирает активную аудиторию (лайки/комментарии) с постов сообщества."""
         await self._initialize_vk_api()
         
-        wall_response = await self.vk_api.wall.get(owner_id=-group_id, count=filters.posts_depth)
-        if not wall_response or not wall_response.get('items'):
-            return []
-
-        active_user_ids = set()
-        for post in wall_response['items']:
-            post_id = post['id']
-            # Собираем лайкнувших
-            likes_resp = await self.vk_api.likes.getList(type='post', owner_id=-group_id, item_id=post_id)
-            if likes_resp and likes_resp.get('items'):
-                active_user_ids.update(likes_resp['items'])
-            
-            # Собираем комментаторов
-            comments_resp = await self.vk_api.wall.getComments(owner_id=-group_id, post_id=post_id)
-            if comments_resp and comments_resp.get('items'):
-                active_user_ids.update(c['from_id'] for c in comments_resp['items'])
-
-        if not active_user_ids:
-            return []
+        post_ids = await fetch_post_ids(self.vk_api, -group_id, filters.posts_depth)
+        if not post_ids:
+            return
+        activity = await collect_post_activity(
+            self.vk_api, -group_id, post_ids, on_progress=self._report_progress, cache=self.public_cache
+        )
 
         # Получаем профили собранных ID
-        profiles = await self.vk_api.users.get(user_ids=",".join(map(str, list(active_user_ids)[:1000])))
-        return profiles or []
+        async for profiles in self._iter_profiles(list(activity.user_ids())):
+            yield profiles
 
-    async def export_conversation_as_json(self, peer_id: int) -> AsyncGenerator[str, None]:
-        """Экспортирует историю диалога в виде JSON-строк."""
+    async def parse_active_group_audience(self, group_id: int, filters: ParsingFilters) -> List[Dict[str, Any]]:
+        return await _collect(self.iter_active_group_audience(group_id, filters))
+
+    async def export_conversation_jsonl(self, peer_id: int, compression: Optional[str] = None) -> AsyncGenerator[bytes, None]:
+        """Потоковая выгрузка истории диалога в JSON-lines (опционально сжатая zstd)."""
         await self._initialize_vk_api()
+        compressor = stream_compressor(compression)
+        async for _, messages in iter_history_batches(self.vk_api, peer_id):
+            chunk = encode_jsonl(messages)
+            yield compressor.compress(chunk) if compressor else chunk
+        if compressor:
+            yield compressor.flush()
+
+    async def export_conversation(self, peer_id: int, directory: Path, compression: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Выгружает историю диалога в файл каталога directory с чекпоинтом;
+        прерванная выгрузка в тот же каталог продолжается с последнего сообщения.
+        """
+        await self._initialize_vk_api()
+        exporter = ConversationExporter(self.vk_api, peer_id, directory, compression)
+        return await exporter.run(on_progress=self._report_progress)
+
+    async def iter_group_members(self, group_id: int, count: int = 1000) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Собирает подписчиков сообщества: до 25 страниц за один execute."""
+        await self._initialize_vk_api()
+
         offset = 0
-        count = 200
-        
-        yield '[\n' # Начало JSON-массива
-        
-        is_first_chunk = True
-        while True:
-            response = await self.vk_api.messages.getHistory(user_id=peer_id, count=count, offset=offset, rev=1)
-            if not response or not response.get('items'):
-                break
-
-            items = response['items']
-            for message in items:
-                if not is_first_chunk:
-                    yield ',\n'
-                yield json.dumps(message, ensure_ascii=False, indent=2)
-                is_first_chunk = False
-
-            if len(items) < count:
-                break
-            offset += count
-            
-        yield '\n]\n' # Конец JSON-массива
+        while offset < count:
+            calls = [
+                {"method": "groups.getMembers", "params": {
+                    "group_id": group_id, "fields": GROUP_MEMBER_FIELDS,
+                    "count": min(count - page_offset, GROUP_MEMBERS_PAGE), "offset": page_offset,
+                }}
+                for page_offset in range(offset, count, GROUP_MEMBERS_PAGE)[:EXECUTE_MAX_CALLS]
+            ]
+            pages = await execute_batches(self.vk_api, calls, 1)
+            for call, page in zip(calls, pages):
+                if not isinstance(page, dict) or not page.get('items'):
+                    return
+                items = page['items']
+                yield items
+                offset += len(items)
+                await self._report_progress(offset, min(count, page.get('count', count)))
+                if len(items) < call["params"]["count"]:
+                    return
 
     async def parse_group_members(self, group_id: int, count: int = 1000) -> List[Dict[str, Any]]:
-        """Собирает подписчиков сообщества."""
+        return await _collect(self.iter_group_members(group_id, count))
+
+    async def scan_group_members(self, group_id: int, directory: Path) -> int:
+        """
+        Выгружает всех подписчиков сообщества в колоночное хранилище directory.
+        Прерванная выгрузка в тот же каталог продолжается с чекпоинта.
+        """
         await self._initialize_vk_api()
-        
-        # Ограничиваем максимальное количество для одного запроса
-        fetch_count = min(count, 1000)
-        
-        members_response = await self.vk_api.groups.getMembers(group_id=group_id, count=fetch_count, fields="sex,bdate,city,online")
-        if not members_response or not members_response.get('items'):
-            return []
-            
-        return members_response['items']
+        scanner = GroupMemberScanner(self.vk_api, group_id, directory)
+        return await scanner.run(on_progress=self._report_progress)
 
-    async def parse_user_wall(self, user_id: int, count: int = 100) -> List[Dict[str, Any]]:
+    async def iter_user_wall(self, user_id: int, count: int = 100) -> AsyncGenerator[List[Dict[str, Any]], None]:
         """Собирает посты со стены указанного пользователя."""
         await self._initialize_vk_api()
         
-        fetch_count = min(count, 100)
-        
-        wall_response = await self.vk_api.wall.get(owner_id=user_id, count=fetch_count)
-        if not wall_response or not wall_response.get('items'):
-            return []
-            
-        return wall_response['items']
+        offset = 0
+        while offset < count:
+            fetch_count = min(count - offset, WALL_PAGE)
+            wall_response = await self.vk_api.wall.get(owner_id=user_id, count=fetch_count, offset=offset)
+            if not wall_response or not wall_response.get('items'):
+                return
+            items = wall_response['items']
+            yield items
+            offset += len(items)
+            await self._report_progress(offset, min(count, wall_response.get('count', count)))
+            if len(items) < fetch_count:
+                return
+
+    async def parse_user_wall(self, user_id: int, count: int = 100) -> List[Dict[str, Any]]:
+        return await _collect(self.iter_user_wall(user_id, count))
     
     async def parse_top_active_users(
         self, group_id: int, posts_depth: int, top_n: int
@@ -97,30 +161,14 @@ class DataService(BaseVKService):
         """
         await self._initialize_vk_api()
         
-        wall_response = await self.vk_api.wall.get(owner_id=-group_id, count=posts_depth)
-        if not wall_response or not wall_response.get('items'):
+        post_ids = await fetch_post_ids(self.vk_api, -group_id, posts_depth)
+        if not post_ids:
             return []
 
-        activity_scores = Counter()
-        comment_weight = 2  # Комментарий считаем в 2 раза ценнее лайка
-        like_weight = 1
-
-        for post in wall_response['items']:
-            post_id = post['id']
-            # Собираем лайкнувших
-            likes_resp = await self.vk_api.likes.getList(type='post', owner_id=-group_id, item_id=post_id)
-            if likes_resp and likes_resp.get('items'):
-                for user_id in likes_resp['items']:
-                    activity_scores[user_id] += like_weight
-            
-            # Собираем комментаторов
-            comments_resp = await self.vk_api.wall.getComments(owner_id=-group_id, post_id=post_id)
-            if comments_resp and comments_resp.get('items'):
-                for comment in comments_resp['items']:
-                    # Исключаем комментарии от самого сообщества
-                    if comment['from_id'] > 0:
-                        activity_scores[comment['from_id']] += comment_weight
-        
+        activity = await collect_post_activity(
+            self.vk_api, -group_id, post_ids, on_progress=self._report_progress, cache=self.public_cache
+        )
+        activity_scores = activity.scores(LIKE_WEIGHT, COMMENT_WEIGHT)
         if not activity_scores:
             return []
 
@@ -128,9 +176,6 @@ class DataService(BaseVKService):
         top_users_data = activity_scores.most_common(top_n)
         top_user_ids = [user_id for user_id, score in top_users_data]
 
-        if not top_user_ids:
-            return []
-
         # Получаем профили самых активных пользователей
         profiles = await self.vk_api.users.get(
             user_ids=",".join(map(str, top_user_ids)),
@@ -138,7 +183,7 @@ class DataService(BaseVKService):
         )
         
         # Собираем финальный результат
-        profiles_map = {p['id']: p for p in profiles}
+        profiles_map = {p['id']: p for p in profiles or []}
         
         result = []
         for user_id, score in top_users_data:
@@ -150,14 +195,24 @@ class DataService(BaseVKService):
                 })
         
         return result
-    
-    async def parse_contacts_from_discussions(self, group_id: int, topic_ids: List[int]) -> List[Dict[str, Any]]:
+
+    async def iter_top_active_users(
+        self, group_id: int, posts_depth: int, top_n: int
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Рейтинг считается по всем постам, поэтому результат отдается одной пачкой в конце."""
+        results = await self.parse_top_active_users(group_id, posts_depth, top_n)
+        if results:
+            yield results
+
+    async def iter_discussion_contacts(self, group_id: int, topic_ids: List[int]) -> AsyncGenerator[List[Dict[str, Any]], None]:
         """
-        Парсит комментарии в указанных обсуждениях группы и извлекает из них ID пользователей.
+        Парсит комментарии в указанных обсуждениях группы и извлекает из них
+        пользователей: авторов и упомянутых в тексте (ссылки, [id..|..], @имя).
         """
         await self._initialize_vk_api()
         
         user_ids = set()
+        screen_names = set()
         
         for topic_id in topic_ids:
             offset = 0
@@ -171,19 +226,39 @@ class DataService(BaseVKService):
                 # Собираем ID авторов комментариев
                 user_ids.update(c['from_id'] for c in comments_resp['items'] if c['from_id'] > 0)
                 
-                # Ищем ID в тексте комментариев (например, ссылки)
+                # Имена из текста комментариев разрешаются одной пачкой в конце
                 for comment in comments_resp['items']:
-                    found = re.findall(r"vk.com/(id\d+|\w+)", comment.get('text', ''))
-                    # Здесь потребуется логика преобразования screen_name в ID,
-                    # но для простоты пока оставим только ID
-                    user_ids.update(int(uid[2:]) for uid in found if uid.startswith('id'))
+                    screen_names.update(extract_screen_names(comment.get('text', '')))
 
                 if len(comments_resp['items']) < 100:
                     break
                 offset += 100
         
-        if not user_ids:
-            return []
-            
-        profiles = await self.vk_api.users.get(user_ids=",".join(map(str, list(user_ids)[:1000])))
-        return profiles or []
\ No newline at end of file
+        async with self._borrow_app_redis() as redis:
+            resolved = await resolve_screen_names(redis, self.vk_api, screen_names)
+        user_ids.update(r.object_id for r in resolved.values() if r and r.type == "user")
+
+        async for profiles in self._iter_profiles(list(user_ids)):
+            yield profiles
+
+    async def parse_contacts_from_discussions(self, group_id: int, topic_ids: List[int]) -> List[Dict[str, Any]]:
+        return await _collect(self.iter_discussion_contacts(group_id, topic_ids))
+
+    async def iter_resolved_links(self, links: List[str]) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Ссылки/упоминания/короткие имена -> тип и ID объекта VK, пачками по RESOLVE_LINKS_CHUNK."""
+        await self._initialize_vk_api()
+        # Одно подключение к Redis на всю задачу, а не на каждую пачку
+        async with self._borrow_app_redis() as redis:
+            for start in range(0, len(links), RESOLVE_LINKS_CHUNK):
+                chunk = links[start:start + RESOLVE_LINKS_CHUNK]
+                resolved = await resolve_screen_names(redis, self.vk_api, chunk)
+                rows = []
+                for link in chunk:
+                    name = normalize_screen_name(link)
+                    target = resolved.get(name) if name else None
+                    rows.append({
+                        "input": link, "screen_name": name,
+                        "type": target.type if target else None, "object_id": target.object_id if target else None,
+                    })
+                yield rows
+                await self._report_progress(start + len(chunk), len(links))
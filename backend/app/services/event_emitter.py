@@ -9,6 +9,7 @@ from typing import Literal, Dict, Any
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import Notification
+from app.services.unread_counter import adjust_unread_counts
 
 LogLevel = Literal["debug", "info", "success", "warning", "error"]
 
@@ -16,8 +17,10 @@ class RedisEventEmitter:
     """
     Отправляет события в Redis Pub/Sub для实时-обновлений в UI пользователя.
     """
-    def __init__(self, redis_client: Redis):
+    def __init__(self, redis_client: Redis, counter_redis: Redis | None = None):
         self.redis = redis_client
+        # Redis приложения для счетчика непрочитанных (без него открывается временное подключение)
+        self.counter_redis = counter_redis
         self.user_id: int | None = None
         self.task_history_id: int | None = None
 
@@ -54,6 +57,11 @@ class RedisEventEmitter:
         }
         await self._publish(f"ws:user:{self.user_id}", {"type": "task_history_update", "payload": payload})
 
+    async def send_task_progress(self, processed: int, total: int | None = None):
+        if not self.task_history_id: return
+        payload = {"task_history_id": self.task_history_id, "processed": processed, "total": total}
+        await self._publish(f"ws:user:{self.user_id}", {"type": "task_progress", "payload": payload})
+
     async def send_system_notification(self, db: AsyncSession, message: str, level: LogLevel):
         if not self.user_id: return
         
@@ -61,6 +69,7 @@ class RedisEventEmitter:
         db.add(new_notification)
         await db.flush()
         await db.refresh(new_notification)
+        await adjust_unread_counts(self.counter_redis, {self.user_id: 1})
         
         payload = { 
             "id": new_notification.id, "message": new_notification.message, "level": new_notification.level,
@@ -76,8 +85,10 @@ class SystemLogEmitter:
     Выводит логи в structlog и создает системные уведомления в БД, 
     полностью имитируя интерфейс RedisEventEmitter для совместимости.
     """
-    def __init__(self, task_name: str):
+    def __init__(self, task_name: str, counter_redis: Redis | None = None):
         self.log = structlog.get_logger(task_name)
+        # Redis приложения для счетчика непрочитанных (без него открывается временное подключение)
+        self.counter_redis = counter_redis
         self.user_id: int | None = None
         self.task_history_id: int | None = None # Для совместимости интерфейса
 
@@ -102,10 +113,17 @@ class SystemLogEmitter:
         """Обновления статуса задачи для UI не нужны, игнорируем."""
         pass
 
+    async def send_task_progress(self, *args, **kwargs):
+        """Прогресс задачи для UI не нужен, игнорируем."""
+        pass
+
     async def send_system_notification(self, db: AsyncSession, message: str, level: LogLevel):
         """Системные уведомления от фоновых задач также создаем в БД."""
         if self.user_id:
              new_notification = Notification(user_id=self.user_id, message=message, level=level)
              db.add(new_notification)
-             # Коммит будет выполнен в вызывающей функции (в сервисе или задаче)
+             # Счетчик меняем только после того, как запись принята БД;
+             # коммит будет выполнен в вызывающей функции (в сервисе или задаче)
+             await db.flush()
+             await adjust_unread_counts(self.counter_redis, {self.user_id: 1})
              self.log.info("system_notification.created", message=message, level=level)
\ No newline at end of file
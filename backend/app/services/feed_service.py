@@ -20,7 +20,7 @@ class FeedService(BaseVKService, IExecutableTask):
         filtered_author_ids = set(author_ids)
         if author_ids:
             author_profiles = await self._get_user_profiles(list(set(author_ids)))
-            filtered_authors = await apply_filters_to_profiles(author_profiles, params.filters)
+            filtered_authors = apply_filters_to_profiles(author_profiles, params.filters)
             filtered_author_ids = {a.get('id') for a in filtered_authors}
         processed_count = 0
         for item in posts:
@@ -1,25 +1,26 @@
 from typing import List, Dict, Any
 from app.services.base import BaseVKService
-from app.services.vk_user_filter import apply_filters_to_profiles
+from app.services.vk_user_filter import compile_filters
 from app.api.schemas.actions import RemoveFriendsRequest
 from .interfaces import IExecutableTask, IPreviewableTask
 
 class FriendManagementService(BaseVKService, IExecutableTask, IPreviewableTask):
     async def get_targets(self, params: RemoveFriendsRequest) -> List[Dict[str, Any]]:
         await self._initialize_vk_api()
-        response = await self.vk_api.get_user_friends(self.user.vk_id, fields="sex,online,last_seen,is_closed,deactivated")
-        if not response or not response.get('items'):
+        # Удаление необратимо: отбор по last_seen и deactivated только по свежему списку,
+        # друг мог вернуться после утреннего снимка
+        all_friends = await self._get_friends(live=True)
+        if not all_friends:
             return []
-        all_friends = response.get('items', [])
-        banned_friends = [f for f in all_friends if f.get('deactivated') in ['banned', 'deleted']] if params.filters.remove_banned else []
-        active_friends = [f for f in all_friends if not f.get('deactivated')]
-        filtered_active_friends = await apply_filters_to_profiles(active_friends, params.filters)
-        return banned_friends + filtered_active_friends
+        banned_friends = [f for f in all_friends if f.deactivated in ['banned', 'deleted']] if params.filters.remove_banned else []
+        active_friends = [f for f in all_friends if not f.deactivated]
+        filtered_active_friends = compile_filters(params.filters).apply_records(active_friends)
+        return [f.to_dict() for f in banned_friends + filtered_active_friends]
 
     async def execute(self, params: RemoveFriendsRequest) -> str:
         await self._initialize_vk_api()
         stats = await self._get_today_stats()
-        targets = await self.get_targets(params)
+        targets = await self._get_run_targets(params)
         if not targets:
             return "Друзей для удаления по заданным критериям не найдено."
         targets_to_process = targets[:params.count]
@@ -45,4 +46,6 @@ class FriendManagementService(BaseVKService, IExecutableTask, IPreviewableTask):
                 else:
                     error_msg = result.get('error_msg', 'неизвестная ошибка') if isinstance(result, dict) else 'неизвестная ошибка'
                     await self.emitter.send_log(f"Не удалось удалить друга {name}. Причина: {error_msg}", "error", target_url=url)
+        if processed_count:
+            await self._invalidate_friends()
         return f"Чистка завершена. Удалено друзей: {processed_count}."
\ No newline at end of file
@@ -0,0 +1,171 @@
+# backend/app/services/friend_snapshots.py
+"""
+Дневной снимок списка друзей, общий для всех задач пользователя.
+
+Поздравления, чистка друзей, рассылка и аналитика аудитории раньше каждая
+запрашивала в VK полный friends.get, часто несколько раз за день.
+FriendSnapshotStore.get_friends делает один запрос с объединенным набором
+полей FRIEND_FIELDS и кладет ответ в Redis до конца суток - следующие
+потребители в тот же день получают его без обращения к VK.
+
+Онлайн и время последнего визита за день устаревают, поэтому фильтры по ним
+(needs_live_presence) запрашивают друзей заново; свежий ответ заменяет
+дневной. Чистка друзей необратима и всегда берет свежий список. Задачи,
+меняющие список друзей, сбрасывают его через invalidate.
+
+Каждая загрузка из VK записывает снимок в FriendsSnapshot: отсортированные id
+друзей, упакованные pack_ids, и добавленные/удаленные относительно
+предыдущего снимка - для аналитики оттока без лишних запросов к VK.
+"""
+import base64
+import datetime
+import zlib
+from typing import Any, Optional
+
+import numpy as np
+import orjson
+import structlog
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.schemas.actions import ActionFilters
+from app.core.app_redis import AppRedisStore
+from app.core.cache_metrics import record_cache_event
+from app.db.models import FriendsSnapshot
+from app.db.session import AsyncSessionFactory
+from app.services.vk_api import VKAPI, VKProfile, parse_profiles
+
+log = structlog.get_logger(__name__)
+
+# Объединение полей, которые нужны потребителям снимка
+FRIEND_FIELDS = "sex,bdate,city,online,last_seen,is_closed,deactivated,status,photo_id"
+SNAPSHOT_PROFILES_KEY = "friends_snapshot:{user_id}:{date}"
+SNAPSHOT_PROFILES_TTL = 24 * 3600
+SNAPSHOT_NAMESPACE = "friends_snapshot"
+
+
+def pack_ids(ids: np.ndarray) -> bytes:
+    """Отсортированные уникальные id: разности соседних int64 сжимаются zlib в несколько раз лучше самих id."""
+    return zlib.compress(np.diff(ids, prepend=0).astype(np.int64).tobytes())
+
+
+def unpack_ids(raw: Optional[bytes]) -> np.ndarray:
+    if not raw:
+        return np.empty(0, dtype=np.int64)
+    return np.cumsum(np.frombuffer(zlib.decompress(raw), dtype=np.int64))
+
+
+def diff_ids(previous: np.ndarray, current: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(добавленные, удаленные) между двумя отсортированными массивами id."""
+    return (
+        np.setdiff1d(current, previous, assume_unique=True),
+        np.setdiff1d(previous, current, assume_unique=True),
+    )
+
+
+def needs_live_presence(filters: ActionFilters) -> bool:
+    """Фильтры, для которых онлайн и last_seen из утреннего снимка не годятся."""
+    return bool(filters.is_online or filters.last_seen_hours)
+
+
+def _encode(items: list[dict[str, Any]]) -> str:
+    return base64.b64encode(zlib.compress(orjson.dumps(items))).decode()
+
+
+def _decode(raw: str | bytes) -> list[dict[str, Any]]:
+    return orjson.loads(zlib.decompress(base64.b64decode(raw)))
+
+
+class FriendSnapshotStore(AppRedisStore):
+    def __init__(self, redis: Redis, user_id: int):
+        super().__init__(redis)
+        self.user_id = user_id
+
+    def _key(self, day: datetime.date) -> str:
+        return SNAPSHOT_PROFILES_KEY.format(user_id=self.user_id, date=day.isoformat())
+
+    async def get_friends(self, vk_api: VKAPI, vk_id: int, live: bool = False) -> list[VKProfile]:
+        """
+        Друзья пользователя vk_id за сегодня. live=True - всегда свежий
+        запрос в VK (он же обновляет дневной снимок).
+        """
+        today = datetime.date.today()
+        if not live:
+            items = await self._read(today)
+            if items is not None:
+                await record_cache_event(self.redis, SNAPSHOT_NAMESPACE, "hit")
+                await record_cache_event(self.redis, SNAPSHOT_NAMESPACE, "calls_saved")
+                return parse_profiles(items)
+            await record_cache_event(self.redis, SNAPSHOT_NAMESPACE, "miss")
+
+        response = await vk_api.get_user_friends(vk_id, fields=FRIEND_FIELDS)
+        # None - VK не вернул список: пустым снимком нельзя затирать друзей
+        if response is None:
+            return []
+        items = response.get('items') or []
+        await self._write(today, items)
+        await self._record(today, [item['id'] for item in items if item.get('id')])
+        return parse_profiles(items)
+
+    async def invalidate(self):
+        """Сбрасывает дневной список после изменения друзей (удаление, принятие заявок)."""
+        try:
+            await self.redis.delete(self._key(datetime.date.today()))
+        except Exception as e:
+            log.warn("friend_snapshots.invalidate_failed", user_id=self.user_id, error=str(e))
+
+    async def _read(self, day: datetime.date) -> Optional[list[dict[str, Any]]]:
+        try:
+            raw = await self.redis.get(self._key(day))
+            return _decode(raw) if raw else None
+        except Exception as e:
+            log.warn("friend_snapshots.read_failed", user_id=self.user_id, error=str(e))
+            return None
+
+    async def _write(self, day: datetime.date, items: list[dict[str, Any]]):
+        try:
+            await self.redis.set(self._key(day), _encode(items), ex=SNAPSHOT_PROFILES_TTL)
+        except Exception as e:
+            log.warn("friend_snapshots.write_failed", user_id=self.user_id, error=str(e))
+
+    async def _record(self, day: datetime.date, friend_ids: list[int]):
+        """
+        Сохраняет снимок за day и изменения к последнему снимку до него.
+        Пишется в своей сессии: снимок не должен зависеть от транзакции
+        вызывающей задачи (предпросмотр, например, ее не коммитит).
+        """
+        ids = np.unique(np.asarray(friend_ids, dtype=np.int64))
+        row = {
+            "user_id": self.user_id, "date": day, "friends_count": len(ids), "friend_ids": pack_ids(ids),
+            "added_ids": None, "removed_ids": None, "added_count": 0, "removed_count": 0,
+            "updated_at": datetime.datetime.now(datetime.UTC),
+        }
+        try:
+            async with AsyncSessionFactory() as session:
+                previous = (await session.execute(
+                    select(FriendsSnapshot.friend_ids)
+                    .where(FriendsSnapshot.user_id == self.user_id, FriendsSnapshot.date < day)
+                    .order_by(FriendsSnapshot.date.desc())
+                    .limit(1)
+                )).scalar_one_or_none()
+                if previous is not None:
+                    added, removed = diff_ids(unpack_ids(previous), ids)
+                    row.update(
+                        added_ids=pack_ids(added), removed_ids=pack_ids(removed),
+                        added_count=len(added), removed_count=len(removed),
+                    )
+                stmt = insert(FriendsSnapshot).values(**row)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['user_id', 'date'],
+                    set_={name: stmt.excluded[name] for name in row if name not in ("user_id", "date")},
+                )
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            log.warn("friend_snapshots.record_failed", user_id=self.user_id, error=str(e))
+            return
+        log.info(
+            "friend_snapshots.recorded", user_id=self.user_id, friends=row["friends_count"],
+            added=row["added_count"], removed=row["removed_count"],
+        )
@@ -26,7 +26,7 @@ class GroupManagementService(BaseVKService, IExecutableTask, IPreviewableTask):
     async def execute(self, params: LeaveGroupsRequest | JoinGroupsRequest) -> str:
         await self._initialize_vk_api()
         stats = await self._get_today_stats()
-        targets = await self.get_targets(params)
+        targets = await self._get_run_targets(params)
         if not targets:
             return "Подходящих сообществ не найдено."
         targets_to_process = targets[:params.count]
@@ -11,13 +11,13 @@ class IncomingRequestService(BaseVKService, IExecutableTask, IPreviewableTask):
         if not response or not response.get('items'):
             return []
         profiles = response.get('items', [])
-        return await apply_filters_to_profiles(profiles, params.filters)
+        return apply_filters_to_profiles(profiles, params.filters)
 
     async def execute(self, params: AcceptFriendsRequest) -> str:
         await self._initialize_vk_api()
         await self.emitter.send_log("Начинаем прием заявок в друзья...", "info")
         stats = await self._get_today_stats()
-        targets = await self.get_targets(params)
+        targets = await self._get_run_targets(params)
         if not targets:
             return "Подходящих заявок для приема не найдено."
         processed_count = 0
@@ -39,4 +39,6 @@ class IncomingRequestService(BaseVKService, IExecutableTask, IPreviewableTask):
                 else:
                     error_msg = result.get('error_msg', f'код {result}') if isinstance(result, dict) else f'код {result}'
                     await self.emitter.send_log(f"Не удалось принять заявку от {name}. Ответ VK: {error_msg}", "error", target_url=url)
+        if processed_count:
+            await self._invalidate_friends()
         return f"Завершено. Принято заявок: {processed_count}."
\ No newline at end of file
@@ -0,0 +1,74 @@
+# backend/app/services/last_active_tracker.py
+"""
+Отложенная запись users.last_active_at.
+
+В пути запроса активность только отмечается в ZSET Redis (member - id
+пользователя, score - unix-время). Периодическая задача забирает накопленное
+и одним UPDATE ... FROM (VALUES ...) на пачку переносит в БД.
+"""
+import datetime
+from typing import Optional
+
+import structlog
+from redis.asyncio import Redis
+from sqlalchemy import DateTime, Integer, column, or_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import User
+
+log = structlog.get_logger(__name__)
+
+LAST_ACTIVE_PENDING_KEY = "last_active:pending"
+# Снимок, который сейчас переносится в БД. Если прошлый перенос упал,
+# снимок остается в Redis и сливается со свежими данными при следующем запуске.
+LAST_ACTIVE_FLUSHING_KEY = "last_active:flushing"
+LAST_ACTIVE_FLUSH_CHUNK_SIZE = 5000
+
+
+async def record_user_activity(redis: Redis, user_id: int, now_ts: Optional[float] = None):
+    """Отмечает активность пользователя. GT: более старое время не перезаписывает новое."""
+    if now_ts is None:
+        now_ts = datetime.datetime.now(datetime.UTC).timestamp()
+    try:
+        await redis.zadd(LAST_ACTIVE_PENDING_KEY, {str(user_id): now_ts}, gt=True)
+    except Exception as e:
+        # Потеря отметки активности не должна ронять запрос
+        log.warn("last_active.record_failed", user_id=user_id, error=str(e))
+
+
+async def flush_last_active(session: AsyncSession, redis: Redis) -> int:
+    """
+    Переносит накопленные отметки активности в users.last_active_at.
+    Возвращает количество обработанных пользователей.
+    """
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zunionstore(LAST_ACTIVE_FLUSHING_KEY, [LAST_ACTIVE_FLUSHING_KEY, LAST_ACTIVE_PENDING_KEY], aggregate="MAX")
+        pipe.delete(LAST_ACTIVE_PENDING_KEY)
+        total, _ = await pipe.execute()
+
+    if not total:
+        return 0
+
+    entries = await redis.zrange(LAST_ACTIVE_FLUSHING_KEY, 0, -1, withscores=True)
+    rows = [
+        (int(member), datetime.datetime.fromtimestamp(score, datetime.UTC))
+        for member, score in entries
+    ]
+    for start in range(0, len(rows), LAST_ACTIVE_FLUSH_CHUNK_SIZE):
+        activity = values(
+            column("id", Integer), column("last_active_at", DateTime(timezone=True)), name="activity"
+        ).data(rows[start:start + LAST_ACTIVE_FLUSH_CHUNK_SIZE])
+        stmt = (
+            update(User)
+            .where(User.id == activity.c.id)
+            .where(or_(User.last_active_at.is_(None), User.last_active_at < activity.c.last_active_at))
+            .values(last_active_at=activity.c.last_active_at)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
+    await session.commit()
+
+    # Снимок удаляется только после коммита: при ошибке он будет перенесен повторно
+    await redis.delete(LAST_ACTIVE_FLUSHING_KEY)
+    log.info("last_active.flushed", count=len(rows))
+    return len(rows)
@@ -2,7 +2,8 @@ import random
 from typing import List, Dict, Any
 from app.services.base import BaseVKService
 from app.core.exceptions import InvalidActionSettingsError, UserLimitReachedError
-from app.services.vk_user_filter import apply_filters_to_profiles
+from app.services.friend_snapshots import needs_live_presence
+from app.services.vk_user_filter import compile_filters
 from app.api.schemas.actions import MassMessagingRequest
 from app.services.message_humanizer import MessageHumanizer
 from .interfaces import IExecutableTask, IPreviewableTask
@@ -10,11 +11,11 @@ from .interfaces import IExecutableTask, IPreviewableTask
 class MessageService(BaseVKService, IExecutableTask, IPreviewableTask):
     async def get_targets(self, params: MassMessagingRequest) -> List[Dict[str, Any]]:
         await self._initialize_vk_api()
-        response = await self.vk_api.get_user_friends(self.user.vk_id, fields="sex,online,last_seen,status,is_closed,city")
-        if not response or not response.get('items'):
+        friends = await self._get_friends(live=needs_live_presence(params.filters))
+        if not friends:
             return []
-        friends_list = [f for f in response.get('items', []) if f.get('id') != self.user.vk_id]
-        filtered_friends = await apply_filters_to_profiles(friends_list, params.filters)
+        friends_list = [f for f in friends if f.id != self.user.vk_id]
+        filtered_friends = [f.to_dict() for f in compile_filters(params.filters).apply_records(friends_list)]
         return await self.filter_targets_by_conversation_status(
             filtered_friends, params.only_new_dialogs, params.only_unread
         )
@@ -26,7 +27,7 @@ class MessageService(BaseVKService, IExecutableTask, IPreviewableTask):
         stats = await self._get_today_stats()
         if self.user.daily_message_limit <= 0:
             raise UserLimitReachedError(f"Достигнут дневной лимит сообщений ({self.user.daily_message_limit}).")
-        target_friends = await self.get_targets(params)
+        target_friends = await self._get_run_targets(params)
         if not target_friends:
             return "Не найдено подходящих получателей по заданным фильтрам."
         random.shuffle(target_friends)
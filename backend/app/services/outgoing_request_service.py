@@ -3,27 +3,36 @@ from app.services.base import BaseVKService
 from app.db.models import DailyStats, FriendRequestLog
 from sqlalchemy.dialects.postgresql import insert
 from app.core.exceptions import UserLimitReachedError
-from app.core.config import settings
-from redis.asyncio import Redis as AsyncRedis
-from app.services.vk_user_filter import apply_filters_to_profiles
+from app.services.contacted_set import ContactedSet
+from app.services.vk_api import parse_profiles
+from app.services.vk_user_filter import compile_filters
 from app.api.schemas.actions import AddFriendsRequest, LikeAfterAddConfig
 from .interfaces import IExecutableTask, IPreviewableTask
 
 class OutgoingRequestService(BaseVKService, IExecutableTask, IPreviewableTask):
+    def _contacted_set(self) -> ContactedSet:
+        return self._app_redis_store(ContactedSet, self.user.id)
+
     async def get_targets(self, params: AddFriendsRequest) -> List[Dict[str, Any]]:
         await self._initialize_vk_api()
         response = await self.vk_api.get_recommended_friends(count=params.count * 3)
         if not response or not response.get('items'):
             return []
-        return await apply_filters_to_profiles(response.get('items', []), params.filters)
+        candidates = compile_filters(params.filters).apply_records(parse_profiles(response.get('items', [])))
+        contacted = self._contacted_set()
+        try:
+            new_ids = set(await contacted.filter_new(self.db, [p.id for p in candidates]))
+        finally:
+            await contacted.close()
+        return [p.to_dict() for p in candidates if p.id in new_ids]
 
     async def execute(self, params: AddFriendsRequest) -> str:
         await self._initialize_vk_api()
         stats = await self._get_today_stats()
-        targets = await self.get_targets(params)
+        targets = await self._get_run_targets(params)
         if not targets:
             return "Подходящих пользователей для добавления не найдено."
-        redis_lock_client = AsyncRedis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/2", decode_responses=True)
+        contacted = self._contacted_set()
         try:
             processed_count = 0
             for profile in targets:
@@ -32,11 +41,14 @@ class OutgoingRequestService(BaseVKService, IExecutableTask, IPreviewableTask):
                     raise UserLimitReachedError(f"Достигнут дневной лимит заявок ({self.user.daily_add_friends_limit}).")
                 user_id = profile.get('id')
                 if not user_id: continue
-                lock_key = f"lock:add_friend:{self.user.id}:{user_id}"
-                if not await redis_lock_client.set(lock_key, "1", ex=3600, nx=True): continue
+                if not await contacted.claim(user_id): continue
                 await self.humanizer.think(action_type='add_friend')
                 message = params.message_text.replace("{name}", profile.get("first_name", "")) if params.send_message_on_add and params.message_text else None
-                result = await self.vk_api.add_friend(user_id, message)
+                try:
+                    result = await self.vk_api.add_friend(user_id, message)
+                except Exception:
+                    await contacted.release(user_id)
+                    raise
                 name, url = f"{profile.get('first_name', '')} {profile.get('last_name', '')}".strip(), f"https://vk.com/id{user_id}"
                 if result in [1, 2, 4]:
                     processed_count += 1
@@ -49,10 +61,10 @@ class OutgoingRequestService(BaseVKService, IExecutableTask, IPreviewableTask):
                     if params.like_config.enabled and not profile.get('is_closed', True):
                         await self._like_user_content(user_id, profile, params.like_config, stats)
                 else:
-                    await redis_lock_client.delete(lock_key)
+                    await contacted.release(user_id)
             return f"Завершено. Отправлено заявок: {processed_count}."
         finally:
-            await redis_lock_client.aclose()
+            await contacted.close()
 
     async def _like_user_content(self, user_id: int, profile: Dict[str, Any], config: LikeAfterAddConfig, stats: DailyStats):
         if stats.likes_count >= self.user.daily_likes_limit: return
@@ -0,0 +1,239 @@
+# backend/app/services/parsing_results.py
+"""
+Хранение результатов фоновых парсингов.
+
+Воркер дописывает строки результата в JSON-lines файл пачками по мере их
+получения из VK, поэтому ни воркер, ни API не держат весь результат в
+памяти. Файл пишется как <id>.jsonl.part и переименовывается после
+завершения вместе с метаданными (<id>.meta.json: число строк и колонки).
+API отдает готовый файл потоково как JSON-lines или CSV.
+
+Большие выгрузки (полный список подписчиков) пишутся не в JSON-lines, а в
+колоночное хранилище <id>.columns (column_store.py); API отдает их в тех же
+форматах, читая колонки пачками.
+"""
+import asyncio
+import csv
+import fcntl
+import io
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import orjson
+
+from app.core.config import settings
+from app.core.exceptions import TaskAlreadyRunningError
+from app.services.column_store import ColumnStore
+
+PARSING_RESULTS_TTL_DAYS = 7
+CSV_STREAM_BATCH_ROWS = 500
+JSONL_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _user_dir(user_id: int) -> Path:
+    return Path(settings.PARSING_RESULTS_DIR) / str(user_id)
+
+
+def result_path(user_id: int, task_history_id: int) -> Path:
+    return _user_dir(user_id) / f"{task_history_id}.jsonl"
+
+
+def _meta_path(user_id: int, task_history_id: int) -> Path:
+    return _user_dir(user_id) / f"{task_history_id}.meta.json"
+
+
+def _columns_path(user_id: int, task_history_id: int) -> Path:
+    return _user_dir(user_id) / f"{task_history_id}.columns"
+
+
+def _compressed_result_path(user_id: int, task_history_id: int) -> Path:
+    return _user_dir(user_id) / f"{task_history_id}.jsonl.zst"
+
+
+def conversation_export_path(user_id: int, peer_id: int) -> Path:
+    """Рабочий каталог выгрузки диалога; общий для повторных запусков по тому же диалогу."""
+    return _user_dir(user_id) / f"conversation_{peer_id}.export"
+
+
+@contextmanager
+def work_dir_lock(directory: Path) -> Iterator[None]:
+    """
+    Эксклюзивная блокировка рабочего каталога выгрузки на время задачи.
+    Каталог общий для повторных запусков по той же группе/диалогу, и две
+    задачи в нем перетирали бы чекпоинт друг друга. Блокировка flock
+    снимается ядром и при падении воркера, так что не залипает.
+    """
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    with open(directory.with_name(f"{directory.name}.lock"), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise TaskAlreadyRunningError("Такая выгрузка уже выполняется. Дождитесь ее завершения.")
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def publish_file(user_id: int, task_history_id: int, source: Path, rows: int, fields: list[str], compressed: bool):
+    """Делает готовый JSON-lines файл (возможно, сжатый zstd) результатом задачи."""
+    target = _compressed_result_path(user_id, task_history_id) if compressed else result_path(user_id, task_history_id)
+    os.replace(source, target)
+    _meta_path(user_id, task_history_id).write_bytes(
+        orjson.dumps({"rows": rows, "fields": fields, "format": "jsonl.zst" if compressed else "jsonl"})
+    )
+
+
+def member_scan_path(user_id: int, group_id: int) -> Path:
+    """Рабочий каталог выгрузки подписчиков; общий для повторных запусков по той же группе."""
+    return _user_dir(user_id) / f"group_{group_id}.scan"
+
+
+def publish_columns(user_id: int, task_history_id: int, directory: Path) -> int:
+    """Делает готовое колоночное хранилище результатом задачи. Возвращает число строк."""
+    target = _columns_path(user_id, task_history_id)
+    os.replace(directory, target)
+    for leftover in target.glob("checkpoint.*"):
+        leftover.unlink()
+    store = ColumnStore.open(target)
+    rows = len(store)
+    _meta_path(user_id, task_history_id).write_bytes(
+        orjson.dumps({"rows": rows, "fields": store.fields, "format": "columns"})
+    )
+    return rows
+
+
+class ParsingResultWriter:
+    """Пишет результат парсинга пачками; колонки CSV собираются по ходу записи."""
+
+    def __init__(self, user_id: int, task_history_id: int):
+        self.user_id = user_id
+        self.task_history_id = task_history_id
+        self.rows = 0
+        self.fields: dict[str, None] = {}
+        self._final_path = result_path(user_id, task_history_id)
+        self._part_path = self._final_path.with_suffix(".jsonl.part")
+        self._file = None
+
+    async def __aenter__(self) -> "ParsingResultWriter":
+        await asyncio.to_thread(self._open)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.to_thread(self._close, exc_type is None)
+        return False
+
+    async def write_rows(self, rows: Iterable[dict[str, Any]]):
+        lines = []
+        for row in rows:
+            self.fields.update(dict.fromkeys(row))
+            lines.append(orjson.dumps(row))
+        if lines:
+            await asyncio.to_thread(self._file.write, b"\n".join(lines) + b"\n")
+            self.rows += len(lines)
+
+    def _open(self):
+        self._part_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._part_path, "wb")
+
+    def _close(self, success: bool):
+        self._file.close()
+        if not success:
+            self._part_path.unlink(missing_ok=True)
+            return
+        os.replace(self._part_path, self._final_path)
+        _meta_path(self.user_id, self.task_history_id).write_bytes(
+            orjson.dumps({"rows": self.rows, "fields": list(self.fields)})
+        )
+
+
+def read_result_meta(user_id: int, task_history_id: int) -> Optional[dict[str, Any]]:
+    """Метаданные готового результата или None, если его нет (не готов или удален)."""
+    try:
+        return orjson.loads(_meta_path(user_id, task_history_id).read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+
+def _iter_column_batches(user_id: int, task_history_id: int) -> Optional[Iterator[list[dict]]]:
+    columns_dir = _columns_path(user_id, task_history_id)
+    if not columns_dir.is_dir():
+        return None
+    return ColumnStore.open(columns_dir).iter_rows(CSV_STREAM_BATCH_ROWS)
+
+
+def iter_result_jsonl(user_id: int, task_history_id: int) -> Iterator[bytes]:
+    """JSON-lines результата; сжатый результат отдается как есть (zstd)."""
+    column_batches = _iter_column_batches(user_id, task_history_id)
+    if column_batches is not None:
+        for rows in column_batches:
+            yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+        return
+    path = _compressed_result_path(user_id, task_history_id)
+    if not path.exists():
+        path = result_path(user_id, task_history_id)
+    with open(path, "rb") as f:
+        while chunk := f.read(JSONL_STREAM_CHUNK_SIZE):
+            yield chunk
+
+
+def _iter_row_batches(user_id: int, task_history_id: int) -> Iterator[list[dict]]:
+    column_batches = _iter_column_batches(user_id, task_history_id)
+    if column_batches is not None:
+        yield from column_batches
+        return
+    with open(result_path(user_id, task_history_id), "rb") as f:
+        batch = []
+        for line in f:
+            batch.append(orjson.loads(line))
+            if len(batch) == CSV_STREAM_BATCH_ROWS:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def iter_result_csv(user_id: int, task_history_id: int, fields: list[str]) -> Iterator[str]:
+    """CSV по результату; вложенные объекты записываются в ячейку как JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in _iter_row_batches(user_id, task_history_id):
+        writer.writerows([_csv_cell(row.get(field)) for field in fields] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Пустой результат - только заголовок
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return "" if value is None else value
+
+
+def remove_old_results(max_age_days: int = PARSING_RESULTS_TTL_DAYS) -> int:
+    """
+    Удаляет результаты (файлы и каталоги колонок, в том числе брошенные
+    выгрузки) старше max_age_days. Возвращает число удаленных записей.
+    """
+    root = Path(settings.PARSING_RESULTS_DIR)
+    if not root.exists():
+        return 0
+    cutoff = time.time() - max_age_days * 24 * 3600
+    removed = 0
+    for path in root.glob("*/*"):
+        if path.stat().st_mtime >= cutoff:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        removed += 1
+    return removed
@@ -0,0 +1,216 @@
+# backend/app/services/post_activity.py
+"""
+Сбор активности (лайки и комментарии) по постам стены для парсеров DataService.
+
+Вызовы likes.getList и wall.getComments по всем постам упаковываются в
+execute по EXECUTE_MAX_CALLS штук, несколько execute выполняются
+параллельно (не более concurrency). Первая страница каждого поста сообщает
+общее количество, остальные страницы ставятся в следующий раунд, так что
+читаются все лайкнувшие и комментаторы, а не только первые 1000/100.
+Страницы сразу сворачиваются в счетчики - списки id не накапливаются.
+С переданным PublicVKCache страницы открытых сообществ берутся из общего кэша.
+
+VK пропускает около VK_EXECUTE_RPS запросов в секунду с одного токена,
+поэтому execute одного клиента VKAPI запускаются через общий RpsLimiter.
+Если пачка все же упала на лимите запросов, ответы остальных пачек
+сохраняются, а ее страницы повторяются в следующем раунде.
+"""
+import asyncio
+import math
+import weakref
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+import structlog
+
+from app.services.vk_api import VKAPI
+from app.services.vk_api.base import VKFloodControlError, VKRateLimitError, VKTooManyRequestsError
+
+if TYPE_CHECKING:
+    from app.services.public_vk_cache import PublicVKCache
+
+EXECUTE_MAX_CALLS = 25
+WALL_PAGE_SIZE = 100
+LIKES_PAGE_SIZE = 1000
+COMMENTS_PAGE_SIZE = 100
+DEFAULT_EXECUTE_CONCURRENCY = 3
+VK_EXECUTE_RPS = 3
+# Окно лимитера чуть длиннее секунды: запрос доходит до VK с разбросом задержки
+VK_RPS_PERIOD = 1.1
+PAGE_MAX_ATTEMPTS = 3
+
+LIKES, COMMENTS = "likes", "comments"
+PAGE_SIZES = {LIKES: LIKES_PAGE_SIZE, COMMENTS: COMMENTS_PAGE_SIZE}
+
+ProgressCallback = Callable[[int, int], Awaitable[Any]]
+
+log = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True)
+class PostActivity:
+    """Сколько раз каждый пользователь лайкнул и прокомментировал посты."""
+    likes: Counter = field(default_factory=Counter)
+    comments: Counter = field(default_factory=Counter)
+    execute_calls: int = 0
+
+    def user_ids(self) -> set[int]:
+        return self.likes.keys() | self.comments.keys()
+
+    def scores(self, like_weight: int, comment_weight: int) -> Counter:
+        scores = Counter({user_id: count * like_weight for user_id, count in self.likes.items()})
+        for user_id, count in self.comments.items():
+            scores[user_id] += count * comment_weight
+        return scores
+
+
+class RpsLimiter:
+    """Не больше rps запусков за любую секунду; ожидающие проходят по очереди."""
+
+    def __init__(self, rps: int = VK_EXECUTE_RPS, period: float = VK_RPS_PERIOD):
+        self.period = period
+        self._starts: deque[float] = deque(maxlen=rps)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            if len(self._starts) == self._starts.maxlen:
+                delay = self._starts[0] + self.period - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._starts.append(loop.time())
+
+
+_execute_limiters: "weakref.WeakKeyDictionary[VKAPI, RpsLimiter]" = weakref.WeakKeyDictionary()
+
+
+def execute_limiter(vk_api: VKAPI) -> RpsLimiter:
+    """Общий лимитер execute для клиента VKAPI (одного токена)."""
+    limiter = _execute_limiters.get(vk_api)
+    if limiter is None:
+        limiter = _execute_limiters[vk_api] = RpsLimiter()
+    return limiter
+
+
+def _page_call(kind: str, owner_id: int, post_id: int, offset: int) -> dict:
+    if kind == LIKES:
+        return {"method": "likes.getList", "params": {
+            "type": "post", "owner_id": owner_id, "item_id": post_id,
+            "filter": "likes", "count": LIKES_PAGE_SIZE, "offset": offset,
+        }}
+    return {"method": "wall.getComments", "params": {
+        "owner_id": owner_id, "post_id": post_id,
+        "count": COMMENTS_PAGE_SIZE, "offset": offset, "thread_items_count": 0,
+    }}
+
+
+async def execute_batches(vk_api: VKAPI, calls: list[dict], concurrency: int) -> list[Any]:
+    """
+    Выполняет вызовы пачками execute; результат - по одному ответу на вызов
+    (None при ошибке вызова). Пачка, упавшая на лимите запросов VK, дает None
+    на все свои вызовы и не отменяет ответы остальных пачек.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = execute_limiter(vk_api)
+
+    async def run(batch: list[dict]) -> list[Any]:
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                results = await vk_api.execute(batch) or []
+            except (VKRateLimitError, VKFloodControlError, VKTooManyRequestsError) as e:
+                log.warn("post_activity.execute_rate_limited", calls=len(batch), error=str(e))
+                results = []
+        return results + [None] * (len(batch) - len(results))
+
+    batches = [calls[i:i + EXECUTE_MAX_CALLS] for i in range(0, len(calls), EXECUTE_MAX_CALLS)]
+    responses = await asyncio.gather(*(run(batch) for batch in batches))
+    return [result for batch_results in responses for result in batch_results]
+
+
+async def execute_batches_cached(
+    vk_api: VKAPI, calls: list[dict], concurrency: int, cache: Optional["PublicVKCache"]
+) -> list[Any]:
+    """execute_batches через общий кэш публичных данных, если он передан."""
+    if cache is None:
+        return await execute_batches(vk_api, calls, concurrency)
+    return await cache.execute_batches(vk_api, calls, concurrency)
+
+
+async def fetch_post_ids(
+    vk_api: VKAPI, owner_id: int, count: int, concurrency: int = DEFAULT_EXECUTE_CONCURRENCY
+) -> list[int]:
+    """Id последних count постов стены; страницы wall.get тоже запрашиваются через execute."""
+    pages = math.ceil(count / WALL_PAGE_SIZE)
+    calls = [
+        {"method": "wall.get", "params": {
+            "owner_id": owner_id, "offset": i * WALL_PAGE_SIZE,
+            "count": min(WALL_PAGE_SIZE, count - i * WALL_PAGE_SIZE),
+        }}
+        for i in range(pages)
+    ]
+    post_ids, seen = [], set()
+    for page in await execute_batches(vk_api, calls, concurrency):
+        if not isinstance(page, dict):
+            continue
+        for post in page.get("items") or []:
+            # Закрепленный пост может повториться на следующей странице
+            if post["id"] not in seen:
+                seen.add(post["id"])
+                post_ids.append(post["id"])
+    return post_ids
+
+
+async def collect_post_activity(
+    vk_api: VKAPI, owner_id: int, post_ids: list[int], *,
+    with_likes: bool = True, with_comments: bool = True,
+    concurrency: int = DEFAULT_EXECUTE_CONCURRENCY,
+    on_progress: Optional[ProgressCallback] = None,
+    cache: Optional["PublicVKCache"] = None,
+) -> PostActivity:
+    """
+    Считает лайки и комментарии пользователей под постами owner_id.
+    Комментарии от имени сообществ (from_id < 0) не учитываются.
+    """
+    activity = PostActivity()
+    kinds = [kind for kind, enabled in ((LIKES, with_likes), (COMMENTS, with_comments)) if enabled]
+    # Страница - (тип, id поста, offset)
+    pending = [(kind, post_id, 0) for post_id in post_ids for kind in kinds]
+    failures: Counter = Counter()
+
+    done, total = 0, len(pending)
+    while pending:
+        calls = [_page_call(kind, owner_id, post_id, offset) for kind, post_id, offset in pending]
+        results = await execute_batches_cached(vk_api, calls, concurrency, cache)
+        activity.execute_calls += math.ceil(len(calls) / EXECUTE_MAX_CALLS)
+        next_round = []
+        for page_key, page in zip(pending, results):
+            kind, post_id, offset = page_key
+            if not isinstance(page, dict):
+                # Ошибка вызова или пачка, упавшая на лимите запросов: страница повторяется в следующем раунде
+                failures[page_key] += 1
+                if failures[page_key] < PAGE_MAX_ATTEMPTS:
+                    next_round.append(page_key)
+                else:
+                    done += 1
+                continue
+            done += 1
+            items = page.get("items") or []
+            if kind == LIKES:
+                activity.likes.update(user_id for user_id in items if user_id > 0)
+            else:
+                activity.comments.update(c["from_id"] for c in items if c.get("from_id", 0) > 0)
+            # Остальные страницы известны после первой - ставим их все в следующий раунд.
+            # У комментариев count включает ответы в ветках, листаются только верхнеуровневые.
+            if offset == 0:
+                page_size = PAGE_SIZES[kind]
+                available = page.get("current_level_count", page.get("count", 0))
+                more_pages = [(kind, post_id, next_offset) for next_offset in range(page_size, available, page_size)]
+                next_round.extend(more_pages)
+                total += len(more_pages)
+        pending = next_round
+        if on_progress:
+            await on_progress(done, total)
+    return activity
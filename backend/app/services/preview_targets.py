@@ -0,0 +1,81 @@
+# backend/app/services/preview_targets.py
+"""
+Цели, найденные при предпросмотре задачи, для повторного использования при запуске.
+
+Предпросмотр сохраняет список целей (сжатый zlib JSON) в Redis под коротким
+токеном. Если пользователь запускает задачу с этим токеном и теми же
+параметрами, сервис берет список из Redis, а не повторяет выборку из VK и
+фильтрацию. Токен одноразовый и живет PREVIEW_TARGETS_TTL секунд.
+"""
+import base64
+import hashlib
+import json
+import secrets
+import zlib
+from typing import Any, Optional
+
+import structlog
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from app.core.app_redis import borrow_app_redis
+
+log = structlog.get_logger(__name__)
+
+PREVIEW_TARGETS_KEY = "preview_targets:{user_id}:{token}"
+PREVIEW_TARGETS_TTL = 600
+# Имя параметра, в котором токен передается от эндпоинта запуска до сервиса
+PREVIEW_TOKEN_PARAM = "preview_token"
+
+
+def params_fingerprint(task_key: str, params: BaseModel) -> str:
+    """Отпечаток задачи и ее параметров: список целей валиден только для них."""
+    raw = json.dumps([task_key, params.model_dump(mode="json")], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+async def store_preview_targets(
+    redis: Redis, user_id: int, task_key: str, params: BaseModel, targets: list[dict[str, Any]]
+) -> Optional[str]:
+    """Сохраняет цели и возвращает токен (None, если Redis недоступен)."""
+    token = secrets.token_urlsafe(16)
+    payload = json.dumps(
+        {"fingerprint": params_fingerprint(task_key, params), "targets": targets},
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode()
+    # Клиент Redis приложения работает со строками, поэтому сжатые байты кодируются в base64
+    compressed = base64.b64encode(zlib.compress(payload, 6)).decode()
+    try:
+        await redis.set(PREVIEW_TARGETS_KEY.format(user_id=user_id, token=token), compressed, ex=PREVIEW_TARGETS_TTL)
+    except Exception as e:
+        log.warn("preview_targets.store_failed", user_id=user_id, error=str(e))
+        return None
+    log.info("preview_targets.stored", user_id=user_id, task_key=task_key, count=len(targets), size=len(compressed))
+    return token
+
+
+async def pop_preview_targets(
+    redis: Optional[Redis], user_id: int, task_key: str, params: BaseModel, token: str
+) -> Optional[list[dict[str, Any]]]:
+    """
+    Забирает сохраненные цели по токену. Возвращает None, если токен истек,
+    уже использован или параметры задачи изменились после предпросмотра.
+    Если redis не передан, открывается временное подключение к Redis приложения.
+    """
+    async with borrow_app_redis(redis) as redis:
+        try:
+            compressed = await redis.getdel(PREVIEW_TARGETS_KEY.format(user_id=user_id, token=token))
+        except Exception as e:
+            log.warn("preview_targets.load_failed", user_id=user_id, error=str(e))
+            return None
+    if not compressed:
+        return None
+    try:
+        entry = json.loads(zlib.decompress(base64.b64decode(compressed)))
+    except (ValueError, zlib.error) as e:
+        log.warn("preview_targets.corrupted", user_id=user_id, error=str(e))
+        return None
+    if entry.get("fingerprint") != params_fingerprint(task_key, params):
+        log.info("preview_targets.params_changed", user_id=user_id, task_key=task_key)
+        return None
+    return entry.get("targets")
@@ -1,19 +1,33 @@
 # --- ЗАМЕНИТЬ ВЕСЬ ФАЙЛ ---
 import datetime
+import math
+from sqlalchemy import delete, func, select
 from sqlalchemy.dialects.postgresql import insert
 from app.services.base import BaseVKService
-from app.db.models import ProfileMetric
+from app.db.models import ProfileMetric, ProfileContentItem
 from app.services.vk_api import VKAPIError
 import structlog
 
 log = structlog.get_logger(__name__)
 
+ITEM_TYPE_POST = "post"
+ITEM_TYPE_PHOTO = "photo"
+WALL_PAGE_SIZE = 100
+PHOTOS_PAGE_SIZE = 200
+EXECUTE_MAX_CALLS = 25
+# Ограничение на количество строк в одном INSERT, чтобы не упереться в лимит параметров asyncpg
+CONTENT_UPSERT_CHUNK_SIZE = 1000
+
 class ProfileAnalyticsService(BaseVKService):
 
     async def snapshot_profile_metrics(self):
         """
         Собирает ключевые метрики профиля, включая ВСЕ и НЕДАВНИЕ лайки (раздельно),
         и сохраняет их в БД как "снимок" за текущий день.
+
+        Лайки хранятся по каждому посту/фото. За ночь запрашиваются только
+        новые элементы (выше high-water mark) и окно недавних, у которых лайки
+        ещё меняются. Вся история выкачивается только при первом снимке.
         """
         try:
             await self._initialize_vk_api()
@@ -21,21 +35,62 @@ class ProfileAnalyticsService(BaseVKService):
             log.error("snapshot_metrics.init_failed", user_id=self.user.id, error=str(e))
             return
 
-        # 1. Получаем счетчики
-        user_info_list = await self.vk_api.users.get(user_ids=str(self.user.vk_id), fields="counters")
-        counters = user_info_list[0].get('counters', {}) if user_info_list else {}
-        wall_info = await self.vk_api.wall.get(owner_id=self.user.vk_id, count=0)
-        wall_posts_count = wall_info.get('count', 0) if wall_info else 0
-
-        # 2. <<< ИЗМЕНЕНО: Используем пользовательские настройки >>>
         recent_posts_to_check = self.user.analytics_settings_posts_count
         recent_photos_to_check = self.user.analytics_settings_photos_count
-        
-        # 3. Считаем лайки
-        recent_post_likes, total_post_likes = await self._get_likes_from_wall(wall_posts_count, recent_posts_to_check)
-        recent_photo_likes, total_photo_likes = await self._get_likes_from_photos(counters.get('photos', 0), recent_photos_to_check)
+        post_watermark, photo_watermark = await self._get_high_water_marks()
+
+        # 1. Счетчики и окна недавних постов/фото - одним execute
+        wall_pages = max(math.ceil(recent_posts_to_check / WALL_PAGE_SIZE), 1)
+        photo_pages = max(math.ceil(recent_photos_to_check / PHOTOS_PAGE_SIZE), 1)
+        calls = [{"method": "users.get", "params": {"user_ids": str(self.user.vk_id), "fields": "counters"}}]
+        calls += self._build_page_calls("wall.get", WALL_PAGE_SIZE, 0, wall_pages)
+        calls += self._build_page_calls("photos.getAll", PHOTOS_PAGE_SIZE, 0, photo_pages, extended=1)
+
+        try:
+            results = await self.vk_api.execute(calls) or []
+        except VKAPIError as e:
+            log.warn("snapshot_metrics.execute_error", user_id=self.user.id, error=str(e))
+            return
+        results += [None] * (len(calls) - len(results))
+
+        user_info_list = results[0]
+        counters = user_info_list[0].get('counters', {}) if isinstance(user_info_list, list) and user_info_list else {}
+        wall_posts_count, wall_items, wall_failed = self._merge_pages(results[1:1 + wall_pages])
+        photos_total, photo_items, photos_failed = self._merge_pages(results[1 + wall_pages:])
+        if wall_failed or photos_failed:
+            # По неполному окну удаленными посчитались бы элементы с несостоявшихся страниц
+            log.warn(
+                "snapshot_metrics.page_failed", user_id=self.user.id,
+                wall_pages=wall_failed, photo_pages=photos_failed,
+            )
+            return
 
-        # 4. Сохраняем все в БД
+        # 2. Догружаем новые элементы, не поместившиеся в окно (или всю историю при первом запуске)
+        try:
+            wall_items += await self._fetch_items_above_watermark(
+                "wall.get", WALL_PAGE_SIZE, wall_pages * WALL_PAGE_SIZE, wall_posts_count, post_watermark, wall_items
+            )
+            photo_items += await self._fetch_items_above_watermark(
+                "photos.getAll", PHOTOS_PAGE_SIZE, photo_pages * PHOTOS_PAGE_SIZE, photos_total, photo_watermark, photo_items,
+                extended=1,
+            )
+        except VKAPIError as e:
+            # Без полной догрузки high-water mark сдвинулся бы через пропущенные элементы
+            log.warn("snapshot_metrics.backfill_error", user_id=self.user.id, error=str(e))
+            return
+
+        # 3. Сохраняем лайки по элементам и считаем итоги по накопленному хранилищу
+        await self._store_items(ITEM_TYPE_POST, wall_items)
+        await self._store_items(ITEM_TYPE_PHOTO, photo_items)
+        await self._prune_deleted_items(ITEM_TYPE_POST, wall_items[:wall_pages * WALL_PAGE_SIZE])
+        await self._prune_deleted_items(ITEM_TYPE_PHOTO, photo_items[:photo_pages * PHOTOS_PAGE_SIZE])
+        totals = await self._get_total_likes()
+        total_post_likes = totals.get(ITEM_TYPE_POST, 0)
+        total_photo_likes = totals.get(ITEM_TYPE_PHOTO, 0)
+        recent_post_likes = self._sum_likes(wall_items[:recent_posts_to_check])
+        recent_photo_likes = self._sum_likes(photo_items[:recent_photos_to_check])
+
+        # 4. Сохраняем снимок за день
         today = datetime.date.today()
         stmt = insert(ProfileMetric).values(
             user_id=self.user.id, date=today,
@@ -57,63 +112,123 @@ class ProfileAnalyticsService(BaseVKService):
             }
         )
         await self.db.execute(stmt)
-        log.info("snapshot_metrics.success", user_id=self.user.id, total_post_likes=total_post_likes, total_photo_likes=total_photo_likes)
-
-    async def _get_likes_from_wall(self, total_count: int, recent_count: int) -> tuple[int, int]:
-        if total_count == 0:
-            return 0, 0
-        
-        total_likes = 0
-        recent_likes = 0
-        offset = 0
-        is_first_chunk = True
-        
-        while offset < total_count:
-            try:
-                chunk = await self.vk_api.wall.get(owner_id=self.user.vk_id, count=100, offset=offset)
-                if not chunk or not chunk.get('items'):
-                    break
-                
-                chunk_likes = sum(p.get('likes', {}).get('count', 0) for p in chunk['items'])
-                total_likes += chunk_likes
-                
-                if is_first_chunk:
-                    # Лайки с первой страницы всегда считаются "недавними" (до recent_count)
-                    recent_items = chunk['items'][:recent_count]
-                    recent_likes = sum(p.get('likes', {}).get('count', 0) for p in recent_items)
-                    is_first_chunk = False
-
-                offset += 100
-            except VKAPIError as e:
-                log.warn("snapshot.wall_likes_error", user_id=self.user.id, error=str(e))
-                break
-        return recent_likes, total_likes
-
-    async def _get_likes_from_photos(self, total_count: int, recent_count: int) -> tuple[int, int]:
-        if total_count == 0:
-            return 0, 0
-
-        total_likes = 0
-        recent_likes = 0
-        offset = 0
-        is_first_chunk = True
-
-        while offset < total_count:
-            try:
-                chunk = await self.vk_api.photos.getAll(owner_id=self.user.vk_id, count=200, offset=offset)
-                if not chunk or not chunk.get('items'):
-                    break
-                
-                chunk_likes = sum(p.get('likes', {}).get('count', 0) for p in chunk['items'])
-                total_likes += chunk_likes
-
-                if is_first_chunk:
-                    recent_items = chunk['items'][:recent_count]
-                    recent_likes = sum(p.get('likes', {}).get('count', 0) for p in recent_items)
-                    is_first_chunk = False
-
-                offset += 200
-            except VKAPIError as e:
-                log.warn("snapshot.photo_likes_error", user_id=self.user.id, error=str(e))
+        log.info(
+            "snapshot_metrics.success", user_id=self.user.id,
+            total_post_likes=total_post_likes, total_photo_likes=total_photo_likes,
+            fetched_posts=len(wall_items), fetched_photos=len(photo_items),
+        )
+
+    def _build_page_calls(self, method: str, page_size: int, start_offset: int, pages: int, **extra) -> list[dict]:
+        return [
+            {"method": method, "params": {"owner_id": self.user.vk_id, "count": page_size, "offset": start_offset + i * page_size, **extra}}
+            for i in range(pages)
+        ]
+
+    @staticmethod
+    def _merge_pages(pages: list) -> tuple[int, list[dict], int]:
+        """
+        Склеивает страницы ответа в один список, отбрасывая дубли.
+        Возвращает (count, items, число страниц, на которых вызов не удался).
+        """
+        total_count, failed = 0, 0
+        items, seen_ids = [], set()
+        for page in pages:
+            if not isinstance(page, dict):
+                failed += 1
+                continue
+            total_count = max(total_count, page.get('count', 0))
+            for item in page.get('items') or []:
+                if item.get('id') is not None and item['id'] not in seen_ids:
+                    seen_ids.add(item['id'])
+                    items.append(item)
+        return total_count, items, failed
+
+    @staticmethod
+    def _oldest_item_id(items: list[dict]) -> int | None:
+        # Закрепленный пост стоит первым вне хронологии, поэтому не учитывается
+        ids = [item['id'] for item in items if not item.get('is_pinned')]
+        return min(ids) if ids else None
+
+    async def _fetch_items_above_watermark(
+        self, method: str, page_size: int, offset: int, total_count: int,
+        watermark: int | None, fetched_items: list[dict], **extra
+    ) -> list[dict]:
+        """
+        Листает ленту дальше окна недавних, пока не дойдет до уже сохраненных
+        элементов (id <= watermark). Страницы запрашиваются пачками через execute.
+        """
+        new_items = []
+        oldest_id = self._oldest_item_id(fetched_items)
+        seen_ids = {item['id'] for item in fetched_items}
+        floor = watermark or 0
+
+        while offset < total_count and oldest_id is not None and oldest_id > floor:
+            pages = min(EXECUTE_MAX_CALLS, math.ceil((total_count - offset) / page_size))
+            results = await self.vk_api.execute(self._build_page_calls(method, page_size, offset, pages, **extra)) or []
+            results += [None] * (pages - len(results))
+            _, page_items, failed = self._merge_pages(results)
+            if failed:
+                # Пропущенная страница оказалась бы ниже нового high-water mark и больше не запросилась бы
+                raise VKAPIError(f"Не удалось получить {failed} стр. {method}.", 0)
+            page_items = [item for item in page_items if item['id'] not in seen_ids]
+            if not page_items:
                 break
-        return recent_likes, total_likes
\ No newline at end of file
+            seen_ids.update(item['id'] for item in page_items)
+            new_items.extend(page_items)
+            oldest_id = self._oldest_item_id(page_items)
+            offset += pages * page_size
+        return new_items
+
+    async def _get_high_water_marks(self) -> tuple[int | None, int | None]:
+        stmt = (
+            select(ProfileContentItem.item_type, func.max(ProfileContentItem.item_id))
+            .where(ProfileContentItem.user_id == self.user.id)
+            .group_by(ProfileContentItem.item_type)
+        )
+        marks = dict((await self.db.execute(stmt)).all())
+        return marks.get(ITEM_TYPE_POST), marks.get(ITEM_TYPE_PHOTO)
+
+    async def _store_items(self, item_type: str, items: list[dict]):
+        if not items:
+            return
+        now = datetime.datetime.now(datetime.UTC)
+        rows = [
+            {
+                "user_id": self.user.id, "item_type": item_type, "item_id": item['id'],
+                "likes_count": (item.get('likes') or {}).get('count', 0), "updated_at": now,
+            }
+            for item in items
+        ]
+        for i in range(0, len(rows), CONTENT_UPSERT_CHUNK_SIZE):
+            stmt = insert(ProfileContentItem).values(rows[i:i + CONTENT_UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                constraint='_user_content_item_uc',
+                set_={'likes_count': stmt.excluded.likes_count, 'updated_at': stmt.excluded.updated_at},
+            )
+            await self.db.execute(stmt)
+
+    async def _prune_deleted_items(self, item_type: str, window_items: list[dict]):
+        """Всё, что лежит в диапазоне окна недавних, но не пришло от VK, удалено со стены/из альбомов."""
+        oldest_id = self._oldest_item_id(window_items)
+        if oldest_id is None:
+            return
+        await self.db.execute(
+            delete(ProfileContentItem).where(
+                ProfileContentItem.user_id == self.user.id,
+                ProfileContentItem.item_type == item_type,
+                ProfileContentItem.item_id >= oldest_id,
+                ProfileContentItem.item_id.not_in([item['id'] for item in window_items]),
+            )
+        )
+
+    async def _get_total_likes(self) -> dict[str, int]:
+        stmt = (
+            select(ProfileContentItem.item_type, func.coalesce(func.sum(ProfileContentItem.likes_count), 0))
+            .where(ProfileContentItem.user_id == self.user.id)
+            .group_by(ProfileContentItem.item_type)
+        )
+        return {item_type: int(total) for item_type, total in (await self.db.execute(stmt)).all()}
+
+    @staticmethod
+    def _sum_likes(items: list[dict]) -> int:
+        return sum((item.get('likes') or {}).get('count', 0) for item in items)
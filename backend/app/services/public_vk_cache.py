@@ -0,0 +1,222 @@
+# backend/app/services/public_vk_cache.py
+"""
+Общий для всех пользователей кэш публичных данных VK: информация о
+сообществах, страницы лайкнувших и комментариев к постам.
+
+Популярные сообщества парсят многие клиенты, и каждый тратил на одни и те же
+страницы свой лимит запросов. PublicVKCache.execute_batches - замена
+post_activity.execute_batches: вызовы, ответ на которые не зависит от токена,
+берутся из Redis по ключу "метод + параметры", остальные уходят в VK одним
+набором execute, ответы кэшируемых вызовов сохраняются на срок свежести метода.
+
+В кэш попадают только вызовы из PUBLIC_METHODS с разрешенными параметрами,
+полями и значениями (никаких filter=friends, is_member и т.п.), а
+страницы постов - только у открытых сообществ. Открытость проверяется через
+тот же кэш groups.getById. Перед записью из ответа удаляются ключи, зависящие
+от смотрящего (is_member, can_like, likes.user_likes...).
+
+groups.getMembers не кэшируется: парсинги запрашивают подписчиков с bdate,
+city и online, а у закрытых профилей и при настройках приватности они видны
+только друзьям - такая страница у каждого токена своя.
+
+Метрики пишутся в namespace "vk_public": hit/miss по вызовам и calls_saved -
+сколько HTTP-запросов к VK не понадобилось.
+"""
+import base64
+import math
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import orjson
+import structlog
+from redis.asyncio import Redis
+
+from app.core.app_redis import AppRedisStore
+from app.core.cache_metrics import record_cache_event
+from app.services.post_activity import EXECUTE_MAX_CALLS, execute_batches
+from app.services.vk_api import VKAPI
+
+log = structlog.get_logger(__name__)
+
+PUBLIC_CACHE_KEY = "vk_public:{method}:{params}"
+PUBLIC_CACHE_NAMESPACE = "vk_public"
+
+# Ключи ответа, значение которых зависит от того, чьим токеном он получен
+VIEWER_DEPENDENT_KEYS = frozenset({
+    "is_member", "is_admin", "admin_level", "is_advertiser", "member_status", "is_favorite",
+    "is_subscribed", "can_post", "can_see_all_posts", "can_message", "can_create_topic",
+    "can_suggest", "can_upload_doc", "can_upload_story", "can_upload_video",
+    "user_likes", "can_like", "can_publish", "can_edit", "can_delete", "can_access_closed",
+    "groups_can_post", "show_reply_button",
+})
+PUBLIC_GROUP_FIELDS = frozenset({
+    "members_count", "description", "activity", "status", "verified", "site",
+    "city", "country", "photo_50", "photo_100", "photo_200",
+})
+
+
+@dataclass(frozen=True, slots=True)
+class _Policy:
+    ttl: int
+    params: frozenset[str]
+    # Параметр с id сообщества, которое должно быть открытым (None - проверка не нужна)
+    owner_param: Optional[str] = None
+    fields: frozenset[str] = frozenset()
+    values: dict[str, frozenset[str]] = field(default_factory=dict)
+
+
+PUBLIC_METHODS = {
+    "groups.getById": _Policy(
+        ttl=24 * 3600, params=frozenset({"group_id", "group_ids", "fields"}), fields=PUBLIC_GROUP_FIELDS,
+    ),
+    "likes.getList": _Policy(
+        ttl=3600, params=frozenset({"type", "owner_id", "item_id", "filter", "offset", "count"}),
+        owner_param="owner_id",
+        values={"type": frozenset({"post"}), "filter": frozenset({"likes", "copies"})},
+    ),
+    "wall.getComments": _Policy(
+        ttl=3600, params=frozenset({"owner_id", "post_id", "offset", "count", "thread_items_count", "sort"}),
+        owner_param="owner_id",
+    ),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class _CacheSlot:
+    key: str
+    ttl: int
+    group_id: Optional[int]
+
+
+def _group_id(policy: _Policy, params: dict) -> Optional[int]:
+    try:
+        value = int(params[policy.owner_param])
+    except (KeyError, TypeError, ValueError):
+        return None
+    # Стены пользователей не кэшируем: их видимость зависит от смотрящего
+    return -value if value < 0 else None
+
+
+def cache_slot(call: dict) -> Optional[_CacheSlot]:
+    """Ключ и срок хранения для публичного вызова; None - вызов нельзя кэшировать."""
+    policy = PUBLIC_METHODS.get(call["method"])
+    params = call.get("params") or {}
+    if policy is None or not params.keys() <= policy.params:
+        return None
+    for name, allowed in policy.values.items():
+        if name in params and str(params[name]) not in allowed:
+            return None
+    normalized = dict(params)
+    if "fields" in params:
+        fields = sorted(set(filter(None, str(params["fields"]).split(","))))
+        if not set(fields) <= policy.fields:
+            return None
+        normalized["fields"] = ",".join(fields)
+    group_id = None
+    if policy.owner_param:
+        group_id = _group_id(policy, params)
+        if group_id is None:
+            return None
+    canonical = "&".join(f"{name}={normalized[name]}" for name in sorted(normalized))
+    return _CacheSlot(PUBLIC_CACHE_KEY.format(method=call["method"], params=canonical), policy.ttl, group_id)
+
+
+def _strip_viewer_keys(value: Any) -> Any:
+    """Ответ без данных, которые видны только владельцу токена."""
+    if isinstance(value, dict):
+        return {key: _strip_viewer_keys(item) for key, item in value.items() if key not in VIEWER_DEPENDENT_KEYS}
+    if isinstance(value, list):
+        return [_strip_viewer_keys(item) for item in value]
+    return value
+
+
+def _encode(value: Any) -> str:
+    # Страница комментариев - десятки КБ JSON; zlib сжимает ее в несколько раз.
+    # base64 - чтобы значение читалось и клиентом с decode_responses=True
+    return base64.b64encode(zlib.compress(orjson.dumps(value))).decode()
+
+
+def _decode(raw: str | bytes) -> Any:
+    return orjson.loads(zlib.decompress(base64.b64decode(raw)))
+
+
+def _is_open_group(info: Any) -> bool:
+    # groups.getById в новых версиях API возвращает {"groups": [...]}, в старых - список
+    groups = info.get("groups") if isinstance(info, dict) else info
+    if not isinstance(groups, list) or not groups:
+        return False
+    group = groups[0]
+    return group.get("is_closed") == 0 and not group.get("deactivated")
+
+
+class PublicVKCache(AppRedisStore):
+    def __init__(self, redis: Redis):
+        super().__init__(redis)
+        # Открытость сообществ в пределах одной задачи не перепроверяем
+        self._open_groups: dict[int, bool] = {}
+
+    async def _read(self, slots: list[_CacheSlot]) -> list[Any]:
+        if not slots:
+            return []
+        try:
+            cached = await self.redis.mget([slot.key for slot in slots])
+        except Exception as e:
+            log.warn("public_vk_cache.read_failed", error=str(e))
+            return [None] * len(slots)
+        return [None if raw is None else _decode(raw) for raw in cached]
+
+    async def _store(self, entries: list[tuple[_CacheSlot, Any]]):
+        if not entries:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for slot, value in entries:
+                    pipe.set(slot.key, _encode(value), ex=slot.ttl)
+                await pipe.execute()
+        except Exception as e:
+            log.warn("public_vk_cache.store_failed", error=str(e))
+
+    async def _check_open_groups(self, vk_api: VKAPI, group_ids: set[int], concurrency: int):
+        unknown = sorted(group_ids - self._open_groups.keys())
+        if not unknown:
+            return
+        calls = [{"method": "groups.getById", "params": {"group_id": group_id}} for group_id in unknown]
+        infos = await self.execute_batches(vk_api, calls, concurrency)
+        for group_id, info in zip(unknown, infos):
+            self._open_groups[group_id] = _is_open_group(info)
+
+    async def execute_batches(self, vk_api: VKAPI, calls: list[dict], concurrency: int) -> list[Any]:
+        """То же, что post_activity.execute_batches, но публичные ответы берутся из кэша."""
+        slots = [cache_slot(call) for call in calls]
+        group_ids = {slot.group_id for slot in slots if slot and slot.group_id is not None}
+        if group_ids:
+            await self._check_open_groups(vk_api, group_ids, concurrency)
+            slots = [
+                slot if slot and (slot.group_id is None or self._open_groups[slot.group_id]) else None
+                for slot in slots
+            ]
+
+        cacheable = [i for i, slot in enumerate(slots) if slot]
+        results: list[Any] = [None] * len(calls)
+        hits = 0
+        for i, value in zip(cacheable, await self._read([slots[i] for i in cacheable])):
+            if value is not None:
+                results[i] = value
+                hits += 1
+        missing = [i for i, slot in enumerate(slots) if not slot or results[i] is None]
+
+        fetched = await execute_batches(vk_api, [calls[i] for i in missing], concurrency) if missing else []
+        to_store = []
+        for i, value in zip(missing, fetched):
+            results[i] = value
+            # False/None - ошибка вызова, ее не кэшируем
+            if slots[i] and isinstance(value, (dict, list)):
+                to_store.append((slots[i], _strip_viewer_keys(value)))
+        await self._store(to_store)
+
+        await record_cache_event(self.redis, PUBLIC_CACHE_NAMESPACE, "hit", hits)
+        await record_cache_event(self.redis, PUBLIC_CACHE_NAMESPACE, "miss", len(cacheable) - hits)
+        saved = math.ceil(len(calls) / EXECUTE_MAX_CALLS) - math.ceil(len(missing) / EXECUTE_MAX_CALLS)
+        await record_cache_event(self.redis, PUBLIC_CACHE_NAMESPACE, "calls_saved", saved)
+        return results
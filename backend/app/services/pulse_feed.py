@@ -0,0 +1,83 @@
+# backend/app/services/pulse_feed.py
+"""
+Лента событий "пульса" на дашборде.
+
+События не собираются из БД при каждом открытии дашборда: их дописывают сами
+источники (раннер задач, обработчик уведомлений VK) в ограниченный список
+Redis на пользователя, уже с именем и аватаром автора. Эндпоинт читает
+список одним LRANGE.
+"""
+import datetime
+import json
+from typing import Iterable, Optional
+
+import structlog
+from redis.asyncio import Redis
+
+from app.core.app_redis import borrow_app_redis
+
+log = structlog.get_logger(__name__)
+
+PULSE_FEED_KEY = "pulse:{user_id}"
+PULSE_FEED_MAX_EVENTS = 30
+# Лента неактивного пользователя исчезает сама
+PULSE_FEED_TTL = 30 * 24 * 3600
+
+
+def make_pulse_event(
+    event_type: str,
+    message: str,
+    *,
+    timestamp: Optional[datetime.datetime] = None,
+    source_vk_id: Optional[int] = None,
+    source_name: Optional[str] = None,
+    source_photo: Optional[str] = None,
+) -> dict:
+    """Событие в формате PulseEvent из api/endpoints/stats.py."""
+    timestamp = timestamp or datetime.datetime.now(datetime.UTC)
+    return {
+        "timestamp": timestamp.isoformat(),
+        "event_type": event_type,
+        "message": message,
+        "source_vk_id": source_vk_id,
+        "source_name": source_name,
+        "source_photo": source_photo,
+    }
+
+
+async def push_pulse_events(redis: Optional[Redis], user_id: int, events: Iterable[dict]):
+    """
+    Дописывает события в начало ленты пользователя и обрезает ее до
+    PULSE_FEED_MAX_EVENTS. События передаются от старых к новым.
+    Если redis не передан, открывается временное подключение к Redis приложения.
+    """
+    payload = [json.dumps(event, ensure_ascii=False) for event in events]
+    if not payload:
+        return
+    key = PULSE_FEED_KEY.format(user_id=user_id)
+    async with borrow_app_redis(redis) as redis:
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.lpush(key, *payload[-PULSE_FEED_MAX_EVENTS:])
+                pipe.ltrim(key, 0, PULSE_FEED_MAX_EVENTS - 1)
+                pipe.expire(key, PULSE_FEED_TTL)
+                await pipe.execute()
+        except Exception as e:
+            # Лента - вспомогательная витрина, ее потеря не должна ронять задачу
+            log.warn("pulse_feed.push_failed", user_id=user_id, error=str(e))
+
+
+async def read_pulse_feed(redis: Redis, user_id: int, limit: int = PULSE_FEED_MAX_EVENTS) -> list[dict]:
+    """Возвращает события ленты от новых к старым."""
+    try:
+        raw_events = await redis.lrange(PULSE_FEED_KEY.format(user_id=user_id), 0, limit - 1)
+    except Exception as e:
+        log.warn("pulse_feed.read_failed", user_id=user_id, error=str(e))
+        return []
+    events = []
+    for raw in raw_events or []:
+        try:
+            events.append(json.loads(raw))
+        except (TypeError, ValueError):
+            continue
+    return events
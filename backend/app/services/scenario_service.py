@@ -4,7 +4,6 @@ import structlog
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from redis.asyncio import Redis
 
 from app.db.models import Scenario, ScenarioStep, User
 from app.services.vk_api import VKAPI
@@ -12,7 +11,7 @@ from app.core.security import decrypt_data
 # --- ИЗМЕНЕНИЕ: Импортируем обе карты из нового, безопасного места ---
 from app.tasks.service_maps import TASK_SERVICE_MAP, TASK_CONFIG_MAP
 from app.services.event_emitter import RedisEventEmitter
-from app.core.config import settings
+from app.core.app_redis import app_redis
 
 log = structlog.get_logger(__name__)
 
@@ -106,8 +105,8 @@ class ScenarioExecutionService:
                 
                 ServiceClass, method_name = task_info
                 
-                redis_client = Redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/1", decode_responses=True)
-                emitter = RedisEventEmitter(redis_client)
+                redis_client = app_redis()
+                emitter = RedisEventEmitter(redis_client, counter_redis=redis_client)
                 emitter.set_context(self.user.id)
                 
                 service_instance = ServiceClass(db=self.db, user=self.user, emitter=emitter)
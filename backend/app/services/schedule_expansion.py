@@ -0,0 +1,76 @@
+# backend/app/services/schedule_expansion.py
+"""
+Разворачивание cron-расписаний в моменты запуска для планировщика.
+
+Разворот одного выражения на окно дат кэшируется в памяти процесса по
+(выражение, часовой пояс, окно): у разных пользователей расписания часто
+совпадают ("0 9 * * *"), а окно календаря одно и то же. Поверх этого
+UserPlanCache хранит уже собранные события сценариев пользователя; запись
+привязана к версии строк scenarios, поэтому любое изменение расписаний
+пользователя делает ее недействительной.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+from zoneinfo import ZoneInfo
+
+from croniter import croniter
+
+CRON_EXPANSION_CACHE_SIZE = 4096
+# Защита от выражений вида "* * * * *" на месячном окне
+MAX_OCCURRENCES_PER_SCHEDULE = 2000
+USER_PLAN_CACHE_SIZE = 2000
+
+
+def _localize(dt: datetime, tz: Optional[ZoneInfo]) -> datetime:
+    if tz is None:
+        return dt
+    return dt.astimezone(tz) if dt.tzinfo else dt.replace(tzinfo=tz)
+
+
+@lru_cache(maxsize=CRON_EXPANSION_CACHE_SIZE)
+def _expand(expression: str, tz_name: Optional[str], start: datetime, end: datetime) -> tuple[datetime, ...]:
+    tz = ZoneInfo(tz_name) if tz_name else None
+    it = croniter(expression, _localize(start, tz))
+    local_end = _localize(end, tz)
+    occurrences = []
+    while len(occurrences) < MAX_OCCURRENCES_PER_SCHEDULE and (next_run := it.get_next(datetime)) <= local_end:
+        occurrences.append(next_run)
+    return tuple(occurrences)
+
+
+def expand_schedule(expression: str, start: datetime, end: datetime, tz_name: Optional[str] = None) -> tuple[datetime, ...]:
+    """
+    Моменты запуска по cron-выражению в полуинтервале (start, end].
+    Без tz_name работает с наивными datetime, как и сам планировщик.
+    Бросает ValueError (CroniterError) для некорректного выражения.
+    """
+    return _expand(expression, tz_name, start, end)
+
+
+class UserPlanCache:
+    """Собранные события пользователя по ключу (окно, версия источников), с вытеснением LRU."""
+
+    def __init__(self, maxsize: int = USER_PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[int, tuple[Hashable, Any]] = OrderedDict()
+
+    def get(self, user_id: int, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != key:
+            return None
+        self._entries.move_to_end(user_id)
+        return entry[1]
+
+    def put(self, user_id: int, key: Hashable, value: Any):
+        self._entries[user_id] = (key, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+
+user_plan_cache = UserPlanCache()
@@ -0,0 +1,154 @@
+# backend/app/services/screen_names.py
+"""
+Преобразование ссылок VK, упоминаний и коротких имен в ID.
+
+Имена вида id123/club123 разбираются без запросов. Остальные уникальные
+имена сначала ищутся в общем кэше Redis (данные публичные, ключ не зависит
+от пользователя), промахи разрешаются через execute по 25 вызовов
+utils.resolveScreenName. Несуществующие имена тоже кэшируются, но на
+меньший срок. Попадания/промахи пишутся в метрики кэша (namespace
+"screen_name") и видны в админке вместе с hit ratio.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import structlog
+from redis.asyncio import Redis
+
+from app.core.app_redis import borrow_app_redis
+from app.core.cache_metrics import record_cache_event
+from app.services.post_activity import execute_batches
+from app.services.vk_api import VKAPI
+
+log = structlog.get_logger(__name__)
+
+SCREEN_NAME_KEY = "vk_screen_name:{name}"
+SCREEN_NAME_TTL = 30 * 24 * 3600
+SCREEN_NAME_NOT_FOUND_TTL = 24 * 3600
+RESOLVE_EXECUTE_CONCURRENCY = 2
+# Значение кэша для несуществующего имени
+_NOT_FOUND = "-"
+
+_LINK_RE = re.compile(r"(?:https?://)?(?:m\.)?vk\.(?:com|ru)/([A-Za-z0-9_.]+)", re.IGNORECASE)
+_MENTION_RE = re.compile(r"\[((?:id|club|public|event)\d+)\|[^\]]*\]")
+_AT_RE = re.compile(r"(?<![\w.@])@([A-Za-z0-9_.]{2,32})")
+_SCREEN_NAME_RE = re.compile(r"^[a-z0-9_.]{2,32}$")
+_NUMERIC_RE = re.compile(r"^(id|club|public|event)(\d+)$")
+# Служебные разделы vk.com, которые не являются короткими именами
+_SERVICE_PATHS = frozenset({
+    "wall", "photo", "video", "audio", "doc", "album", "topic", "feed", "im", "away.php",
+    "app", "market", "search", "friends", "groups", "login", "settings", "id", "club", "public",
+})
+
+
+@dataclass(slots=True, frozen=True)
+class ResolvedName:
+    type: str  # "user", "group", "application"
+    object_id: int
+
+
+def normalize_screen_name(value: str) -> Optional[str]:
+    """Короткое имя из ссылки, упоминания или самого имени; None, если это не имя VK."""
+    value = value.strip()
+    if match := _LINK_RE.search(value):
+        value = match.group(1)
+    elif match := _MENTION_RE.search(value):
+        value = match.group(1)
+    # Точка в конце ссылки - обычно конец предложения
+    value = value.lstrip("@").rstrip(".").lower()
+    if value in _SERVICE_PATHS or not _SCREEN_NAME_RE.match(value):
+        return None
+    return value
+
+
+def extract_screen_names(text: str) -> list[str]:
+    """Все имена из ссылок vk.com/..., упоминаний [id1|...] и @name в тексте, без повторов."""
+    found = _LINK_RE.findall(text) + _MENTION_RE.findall(text) + _AT_RE.findall(text)
+    names = (normalize_screen_name(value) for value in found)
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _resolve_locally(name: str) -> Optional[ResolvedName]:
+    if match := _NUMERIC_RE.match(name):
+        return ResolvedName("user" if match.group(1) == "id" else "group", int(match.group(2)))
+    return None
+
+
+def _encode(resolved: Optional[ResolvedName]) -> str:
+    return f"{resolved.type}:{resolved.object_id}" if resolved else _NOT_FOUND
+
+
+def _decode(raw: str | bytes) -> Optional[ResolvedName]:
+    raw = raw.decode() if isinstance(raw, bytes) else raw
+    if raw == _NOT_FOUND:
+        return None
+    kind, _, object_id = raw.partition(":")
+    return ResolvedName(kind, int(object_id))
+
+
+async def _read_cache(redis: Redis, names: list[str]) -> dict[str, Optional[ResolvedName]]:
+    cached = await redis.mget([SCREEN_NAME_KEY.format(name=name) for name in names])
+    return {name: _decode(raw) for name, raw in zip(names, cached) if raw is not None}
+
+
+async def _store_cache(redis: Redis, resolved: dict[str, Optional[ResolvedName]]):
+    async with redis.pipeline(transaction=False) as pipe:
+        for name, value in resolved.items():
+            ttl = SCREEN_NAME_TTL if value else SCREEN_NAME_NOT_FOUND_TTL
+            pipe.set(SCREEN_NAME_KEY.format(name=name), _encode(value), ex=ttl)
+        await pipe.execute()
+
+
+async def _resolve_via_vk(vk_api: VKAPI, names: list[str]) -> dict[str, Optional[ResolvedName]]:
+    calls = [{"method": "utils.resolveScreenName", "params": {"screen_name": name}} for name in names]
+    results = await execute_batches(vk_api, calls, RESOLVE_EXECUTE_CONCURRENCY)
+    resolved = {}
+    for name, result in zip(names, results):
+        # Несуществующее имя - пустой список; False/None - ошибка вызова, такое имя не кэшируем
+        if isinstance(result, dict) and result.get("object_id"):
+            resolved[name] = ResolvedName(result["type"], int(result["object_id"]))
+        elif isinstance(result, (list, dict)):
+            resolved[name] = None
+    return resolved
+
+
+async def resolve_screen_names(
+    redis: Optional[Redis], vk_api: VKAPI, values: Iterable[str]
+) -> dict[str, Optional[ResolvedName]]:
+    """
+    {короткое имя: ResolvedName или None} для всех распознанных значений
+    (ссылки, упоминания, имена). Если redis не передан, открывается временное
+    подключение к Redis приложения (для воркеров).
+    """
+    names = list(dict.fromkeys(name for name in map(normalize_screen_name, values) if name))
+    result: dict[str, Optional[ResolvedName]] = {}
+    pending = []
+    for name in names:
+        if (local := _resolve_locally(name)) is not None:
+            result[name] = local
+        else:
+            pending.append(name)
+    if not pending:
+        return result
+
+    async with borrow_app_redis(redis) as redis:
+        try:
+            cached = await _read_cache(redis, pending)
+        except Exception as e:
+            log.warn("screen_names.cache_read_failed", error=str(e))
+            cached = {}
+        result.update(cached)
+        missing = [name for name in pending if name not in cached]
+        await record_cache_event(redis, "screen_name", "hit", len(cached))
+        await record_cache_event(redis, "screen_name", "miss", len(missing))
+        if not missing:
+            return result
+
+        resolved = await _resolve_via_vk(vk_api, missing)
+        result.update(resolved)
+        try:
+            await _store_cache(redis, resolved)
+        except Exception as e:
+            log.warn("screen_names.cache_store_failed", error=str(e))
+        return result
@@ -0,0 +1,118 @@
+# backend/app/services/unread_counter.py
+"""
+Счетчик непрочитанных уведомлений пользователя в Redis.
+
+Эндпоинт уведомлений отдает значение счетчика вместо COUNT(*) на каждом
+опросе. Счетчик меняется там, где меняются уведомления: +N при создании,
+-N при отметке прочитанными. Изменения применяются только к уже
+существующему счетчику - отсутствующий заполняется из БД при первом чтении.
+Расхождения (откат транзакции после INCR, гонка с заполнением) исправляет
+периодическая сверка reconcile_unread_counts.
+"""
+from typing import Mapping, Optional
+
+import structlog
+from redis.asyncio import Redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.app_redis import borrow_app_redis
+from app.db.models import Notification
+
+log = structlog.get_logger(__name__)
+
+UNREAD_NOTIFICATIONS_KEY = "notif_unread:{user_id}"
+UNREAD_NOTIFICATIONS_TTL = 24 * 3600
+RECONCILE_SCAN_COUNT = 1000
+
+# Меняет только существующие счетчики и не опускает их ниже нуля
+_ADJUST_EXISTING_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        local value = redis.call('INCRBY', key, ARGV[i])
+        if value < 0 then redis.call('SET', key, 0, 'KEEPTTL') end
+    end
+end
+return 0
+"""
+
+
+def _unread_key(user_id: int) -> str:
+    return UNREAD_NOTIFICATIONS_KEY.format(user_id=user_id)
+
+
+async def adjust_unread_counts(redis: Optional[Redis], deltas: Mapping[int, int]):
+    """
+    Применяет изменения {user_id: delta} к счетчикам. Если redis не передан,
+    открывается временное подключение к Redis приложения (для воркеров).
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    async with borrow_app_redis(redis) as redis:
+        try:
+            await redis.eval(
+                _ADJUST_EXISTING_SCRIPT, len(deltas),
+                *[_unread_key(user_id) for user_id in deltas], *deltas.values(),
+            )
+        except Exception as e:
+            # Счетчик исправит сверка, создание уведомления важнее
+            log.warn("unread_counter.adjust_failed", user_ids=list(deltas), error=str(e))
+
+
+async def _count_unread(db: AsyncSession, user_id: int) -> int:
+    stmt = select(func.count()).select_from(Notification).where(
+        Notification.user_id == user_id, Notification.is_read == False
+    )
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def get_unread_count(redis: Redis, db: AsyncSession, user_id: int) -> int:
+    """Значение счетчика; при его отсутствии - подсчет в БД с заполнением счетчика."""
+    try:
+        cached = await redis.get(_unread_key(user_id))
+        if cached is not None:
+            return max(int(cached), 0)
+    except Exception as e:
+        log.warn("unread_counter.read_failed", user_id=user_id, error=str(e))
+        return await _count_unread(db, user_id)
+
+    count = await _count_unread(db, user_id)
+    try:
+        await redis.set(_unread_key(user_id), count, ex=UNREAD_NOTIFICATIONS_TTL, nx=True)
+    except Exception as e:
+        log.warn("unread_counter.store_failed", user_id=user_id, error=str(e))
+    return count
+
+
+async def reconcile_unread_counts(session: AsyncSession, redis: Redis) -> int:
+    """
+    Сверяет все существующие счетчики с таблицей одним GROUP BY по частичному
+    индексу непрочитанных. Возвращает количество исправленных счетчиков.
+    """
+    keys = [key async for key in redis.scan_iter(match=UNREAD_NOTIFICATIONS_KEY.format(user_id="*"), count=RECONCILE_SCAN_COUNT)]
+    if not keys:
+        return 0
+
+    stmt = (
+        select(Notification.user_id, func.count())
+        .where(Notification.is_read == False)
+        .group_by(Notification.user_id)
+    )
+    actual = {user_id: count for user_id, count in (await session.execute(stmt)).all()}
+
+    cached = await redis.mget(keys)
+    fixed = 0
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, value in zip(keys, cached):
+            key = key.decode() if isinstance(key, bytes) else key
+            expected = actual.get(int(key.rsplit(":", 1)[1]), 0)
+            if value is None or int(value) != expected:
+                # XX: счетчик, истекший во время сверки, заполнится при следующем чтении
+                pipe.set(key, expected, xx=True, keepttl=True)
+                fixed += 1
+        await pipe.execute()
+
+    if fixed:
+        log.info("unread_counter.reconciled", checked=len(keys), fixed=fixed)
+    return fixed
@@ -22,6 +22,7 @@ from .stories import StoriesAPI
 from .users import UsersAPI
 from .wall import WallAPI
 from .notifications import NotificationsAPI
+from .profiles import VKProfile, parse_profiles
 
 class VKAPI:
     """
@@ -20,8 +20,10 @@ class GroupsAPI(BaseVKSection):
         params = {"group_id": group_id, "fields": fields}
         return await self._make_request("groups.getById", params=params)
     
-    async def getMembers(self, group_id: int, count: int = 1000, fields: str = "") -> Optional[Dict[str, Any]]:
+    async def getMembers(self, group_id: int, count: int = 1000, fields: str = "", offset: int = 0) -> Optional[Dict[str, Any]]:
         """Возвращает список участников сообщества."""
         params = {"group_id": group_id, "count": count, "fields": fields}
+        if offset:
+            params["offset"] = offset
         return await self._make_request("groups.getMembers", params=params)
     
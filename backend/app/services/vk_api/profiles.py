@@ -0,0 +1,84 @@
+# backend/app/services/vk_api/profiles.py
+"""
+Компактное представление профилей VK для больших выборок (друзья,
+рекомендации, именинники).
+
+Ответ VK на профиль - словарь со вложенными city/last_seen/counters, около
+1.8 КБ на профиль в памяти. VKProfile хранит только то, что нужно фильтрам и
+сервисам, в слотах: вложенные объекты разворачиваются в плоские поля,
+повторяющиеся строки (имена, города, даты рождения) интернируются - около
+350 байт (benchmarks/bench_profile_memory.py). Исходный словарь сохраняется
+в raw только по запросу (keep_raw=True).
+"""
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+
+@dataclass(slots=True)
+class VKProfile:
+    id: int
+    first_name: str = ""
+    last_name: str = ""
+    sex: int = 0
+    online: int = 0
+    # Время последнего визита (unix), 0 - неизвестно
+    last_seen: int = 0
+    # None - VK не прислал поле (в сервисах такой профиль считается закрытым)
+    is_closed: Optional[bool] = None
+    deactivated: Optional[str] = None
+    city_id: int = 0
+    city_title: str = ""
+    status: str = ""
+    bdate: str = ""
+    photo_id: Optional[str] = None
+    raw: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_vk(cls, item: Dict[str, Any], keep_raw: bool = False) -> "VKProfile":
+        city = item.get('city') or {}
+        return cls(
+            id=item['id'],
+            first_name=sys.intern(item.get('first_name') or ""),
+            last_name=sys.intern(item.get('last_name') or ""),
+            sex=item.get('sex') or 0,
+            online=item.get('online') or 0,
+            last_seen=(item.get('last_seen') or {}).get('time') or 0,
+            is_closed=item.get('is_closed'),
+            deactivated=item.get('deactivated'),
+            city_id=city.get('id') or 0,
+            city_title=sys.intern(city.get('title') or ""),
+            status=item.get('status') or "",
+            bdate=sys.intern(item.get('bdate') or ""),
+            photo_id=item.get('photo_id'),
+            raw=item if keep_raw else None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Профиль в формате ответа VK (для целей задач, предпросмотра и логов)."""
+        if self.raw is not None:
+            return self.raw
+        data: Dict[str, Any] = {"id": self.id, "first_name": self.first_name, "last_name": self.last_name}
+        if self.sex:
+            data['sex'] = self.sex
+        data['online'] = self.online
+        if self.last_seen:
+            data['last_seen'] = {"time": self.last_seen}
+        if self.is_closed is not None:
+            data['is_closed'] = self.is_closed
+        if self.deactivated:
+            data['deactivated'] = self.deactivated
+        if self.city_id or self.city_title:
+            data['city'] = {"id": self.city_id, "title": self.city_title}
+        if self.status:
+            data['status'] = self.status
+        if self.bdate:
+            data['bdate'] = self.bdate
+        if self.photo_id:
+            data['photo_id'] = self.photo_id
+        return data
+
+
+def parse_profiles(items: Iterable[Dict[str, Any]], keep_raw: bool = False) -> List[VKProfile]:
+    """Профили из items ответа VK (friends.get, friends.getSuggestions, users.get...)."""
+    return [VKProfile.from_vk(item, keep_raw) for item in items if item.get('id')]
@@ -4,8 +4,11 @@ from typing import Optional, Dict, Any
 from .base import BaseVKSection
 
 class WallAPI(BaseVKSection):
-    async def get(self, owner_id: int, count: int = 5) -> Optional[Dict[str, Any]]:
-        return await self._make_request("wall.get", params={"owner_id": owner_id, "count": count})
+    async def get(self, owner_id: int, count: int = 5, offset: int = 0) -> Optional[Dict[str, Any]]:
+        params = {"owner_id": owner_id, "count": count}
+        if offset:
+            params["offset"] = offset
+        return await self._make_request("wall.get", params=params)
 
     async def post(self, owner_id: int, message: str, attachments: str, from_group: bool = False) -> Optional[Dict[str, Any]]:
         """Публикует пост на стене. Может публиковать от имени группы."""
@@ -0,0 +1,72 @@
+# backend/app/services/vk_profile_cache.py
+"""
+Кэш кратких карточек пользователей VK (имя и аватар) в Redis.
+
+Данные публичные и одинаковы для всех наших пользователей, поэтому ключ не
+зависит от того, чьим токеном карточка была получена. В VK идут только
+промахи - одним users.get на пачку.
+"""
+import json
+from typing import Iterable, Optional
+
+import structlog
+from redis.asyncio import Redis
+
+from app.core.cache_metrics import record_cache_event
+from app.services.vk_api import VKAPI
+
+log = structlog.get_logger(__name__)
+
+VK_BRIEF_KEY = "vk_brief:{vk_id}"
+VK_BRIEF_TTL = 3 * 24 * 3600
+# users.get принимает до 1000 ID за вызов
+VK_BRIEF_FETCH_BATCH = 1000
+
+
+async def get_vk_briefs(redis: Optional[Redis], vk_api: VKAPI, vk_ids: Iterable[int]) -> dict[int, dict]:
+    """
+    Возвращает {vk_id: {"name": ..., "photo": ...}} для известных VK пользователей.
+    Ошибки Redis не мешают ответу - тогда все ID запрашиваются в VK.
+    """
+    ids = list(dict.fromkeys(vk_id for vk_id in vk_ids if vk_id and vk_id > 0))
+    if not ids:
+        return {}
+
+    briefs: dict[int, dict] = {}
+    if redis is not None:
+        try:
+            cached = await redis.mget([VK_BRIEF_KEY.format(vk_id=vk_id) for vk_id in ids])
+            for vk_id, raw in zip(ids, cached):
+                if isinstance(raw, (str, bytes)):
+                    briefs[vk_id] = json.loads(raw)
+            await record_cache_event(redis, "vk_brief", "hit", len(briefs))
+        except Exception as e:
+            log.warn("vk_brief_cache.read_failed", error=str(e))
+
+    missing = [vk_id for vk_id in ids if vk_id not in briefs]
+    if not missing:
+        return briefs
+
+    fetched: dict[int, dict] = {}
+    for start in range(0, len(missing), VK_BRIEF_FETCH_BATCH):
+        chunk = missing[start:start + VK_BRIEF_FETCH_BATCH]
+        infos = await vk_api.users.get(user_ids=",".join(map(str, chunk)), fields="photo_50")
+        for info in infos or []:
+            fetched[info["id"]] = {
+                "name": f"{info.get('first_name', '')} {info.get('last_name', '')}".strip() or None,
+                "photo": info.get("photo_50"),
+            }
+    briefs.update(fetched)
+    if redis is None:
+        return briefs
+
+    await record_cache_event(redis, "vk_brief", "miss", len(missing))
+    if fetched:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for vk_id, brief in fetched.items():
+                    pipe.set(VK_BRIEF_KEY.format(vk_id=vk_id), json.dumps(brief), ex=VK_BRIEF_TTL)
+                await pipe.execute()
+        except Exception as e:
+            log.warn("vk_brief_cache.store_failed", error=str(e))
+    return briefs
@@ -1,20 +1,127 @@
 # backend/app/services/vk_user_filter.py
-
+"""
+Фильтрация профилей VK по ActionFilters.
+
+Фильтры компилируются один раз (compile_filters): ключевое слово и город
+приводятся к нижнему регистру заранее, пороги last_seen переводятся в
+абсолютные timestamp, и на каждый включенный фильтр собирается предикат -
+замыкание над уже подготовленными значениями. Отбор проверяет предикаты по
+порядку до первого несовпадения: сначала дешевые и обычно самые отсекающие
+(онлайн, пол), строковые поиски в конце. Внешних запросов нет, поэтому
+функции синхронные.
+
+Для компактных профилей (vk_api.VKProfile) собираются такие же предикаты
+по атрибутам - apply_records.
+"""
 import datetime
-from typing import Dict, Any, List
+import math
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 from app.api.schemas.actions import ActionFilters
+from app.services.vk_api.profiles import VKProfile
+
+ProfileSelector = Callable[[Iterable[Any]], List[Any]]
+ProfilePredicate = Callable[[Any], Any]
+
+_EMPTY: dict = {}
+
+
+def _compile_selector(predicates: tuple[ProfilePredicate, ...]) -> ProfileSelector:
+    # Цепочка filter: профиль, отсеянный предикатом, до следующих не доходит
+    def select(profiles: Iterable[Any]) -> List[Any]:
+        for predicate in predicates:
+            profiles = filter(predicate, profiles)
+        return list(profiles)
+    return select
+
+
+@dataclass(slots=True, frozen=True)
+class CompiledProfileFilter:
+    # Имена включенных проверок в порядке их применения
+    conditions: tuple[str, ...]
+    _select: ProfileSelector = field(repr=False, compare=False)
+    _select_records: ProfileSelector = field(repr=False, compare=False)
 
+    def matches(self, profile: Dict[str, Any]) -> bool:
+        return bool(self._select((profile,)))
 
-async def apply_filters_to_profiles(
+    def apply(self, profiles: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Профили, прошедшие все проверки, в исходном порядке."""
+        return self._select(profiles)
+
+    def apply_records(self, profiles: Iterable[VKProfile]) -> List[VKProfile]:
+        return self._select_records(profiles)
+
+
+def compile_filters(filters: ActionFilters, now_ts: Optional[float] = None) -> CompiledProfileFilter:
+    """
+    Собирает отбор для filters. now_ts - момент, от которого считаются
+    last_seen_days/last_seen_hours (по умолчанию - текущее время).
+    """
+    if now_ts is None:
+        now_ts = datetime.datetime.now(datetime.UTC).timestamp()
+    # (имя, предикат для словаря VK, предикат для VKProfile)
+    conditions: list[tuple[str, ProfilePredicate, ProfilePredicate]] = []
+
+    if filters.is_online:
+        conditions.append(("online", lambda p: p.get('online'), attrgetter('online')))
+
+    # 0 - любой пол
+    if sex := filters.sex:
+        conditions.append(("sex", lambda p: p.get('sex') == sex, lambda p: p.sex == sex))
+
+    # "Собачки" (banned/deleted) попадают в выборку только для задач по чистке,
+    # где remove_banned намеренно выставлен
+    if not filters.remove_banned:
+        conditions.append(("not_deactivated", lambda p: not p.get('deactivated'), lambda p: not p.deactivated))
+
+    # Для лайков в ленте: только посты с фото
+    if filters.only_with_photo:
+        conditions.append(("with_photo", lambda p: p.get('photo_id'), attrgetter('photo_id')))
+
+    if filters.last_seen_days or filters.last_seen_hours:
+        # Для удаления неактивных: оставляем тех, кто НЕ заходил больше N дней;
+        # для добавления активных: тех, кто заходил в течение N часов
+        inactive_before = now_ts - filters.last_seen_days * 24 * 3600 if filters.last_seen_days else math.inf
+        active_since = now_ts - filters.last_seen_hours * 3600 if filters.last_seen_hours else 0
+
+        # Профили без даты визита при включенном фильтре по дате не проходят
+        conditions.append((
+            "last_seen",
+            lambda p: 0 < (seen := (p.get('last_seen') or _EMPTY).get('time', 0)) < inactive_before
+            and seen >= active_since,
+            lambda p: 0 < p.last_seen < inactive_before and p.last_seen >= active_since,
+        ))
+
+    if city := (filters.city or "").lower().strip():
+        conditions.append((
+            "city",
+            lambda p: city in ((p.get('city') or _EMPTY).get('title') or '').lower(),
+            lambda p: city in p.city_title.lower(),
+        ))
+
+    if status_keyword := (filters.status_keyword or "").lower().strip():
+        conditions.append((
+            "status_keyword",
+            lambda p: status_keyword in (p.get('status') or '').lower(),
+            lambda p: status_keyword in p.status.lower(),
+        ))
+
+    return CompiledProfileFilter(
+        tuple(name for name, _, _ in conditions),
+        _compile_selector(tuple(predicate for _, predicate, _ in conditions)),
+        _compile_selector(tuple(predicate for _, _, predicate in conditions)),
+    )
+
+
+def apply_filters_to_profiles(
     profiles: List[Dict[str, Any]],
     filters: ActionFilters,
 ) -> List[Dict[str, Any]]:
     """
-    Применяет различные фильтры к списку профилей VK.
-
-    Эта функция является "чистой" и не делает внешних запросов к API.
-    Она работает с уже полученными данными профилей.
+    Применяет фильтры к списку профилей VK (уже полученных, без запросов к API).
 
     Args:
         profiles: Список словарей, где каждый словарь - это профиль пользователя VK.
@@ -23,69 +130,4 @@ async def apply_filters_to_profiles(
     Returns:
         Отфильтрованный список профилей.
     """
-    filtered_profiles = []
-    # Получаем текущее время один раз для эффективности
-    now_ts = datetime.datetime.now(datetime.UTC).timestamp()
-
-    for profile in profiles:
-        # --- Обработка деактивированных ("забаненных", "удаленных") профилей ---
-        deactivated_status = profile.get('deactivated')
-        if deactivated_status:
-            # Если у профиля есть статус (banned/deleted) и фильтр `remove_banned`
-            # НЕ установлен в True, то мы пропускаем такой профиль.
-            # Это позволяет включать "собачек" в выборку только для задач
-            # по чистке, где этот флаг намеренно выставляется.
-            if not filters.remove_banned:
-                continue
-
-        # --- Стандартные фильтры, исключающие профиль из выборки ---
-
-        # Фильтр по полу (0 - любой пол, поэтому проверяем только если 1 или 2)
-        if filters.sex and profile.get('sex') != filters.sex:
-            continue
-
-        # Фильтр по статусу "онлайн"
-        if filters.is_online and not profile.get('online', 0):
-            continue
-
-        # Фильтр по последнему визиту
-        last_seen_ts = profile.get('last_seen', {}).get('time', 0)
-        if last_seen_ts > 0:  # Проверяем только если дата визита известна
-            hours_since_seen = (now_ts - last_seen_ts) / 3600
-
-            # **ЛОГИКА ДЛЯ УДАЛЕНИЯ НЕАКТИВНЫХ**
-            # Если фильтр `last_seen_days` активен, мы хотим удалить тех,
-            # кто НЕ заходил N дней. Значит, мы должны ПРОПУСТИТЬ тех,
-            # кто заходил НЕДАВНО (меньше или равно N дней назад).
-            if filters.last_seen_days and hours_since_seen <= (filters.last_seen_days * 24):
-                continue
-
-            # **ЛОГИКА ДЛЯ ДОБАВЛЕНИЯ АКТИВНЫХ**
-            # Если фильтр `last_seen_hours` активен, мы хотим добавить тех,
-            # кто заходил в течение N часов. Значит, мы должны ПРОПУСТИТЬ тех,
-            # кто НЕ заходил БОЛЬШЕ N часов.
-            if filters.last_seen_hours and hours_since_seen > filters.last_seen_hours:
-                continue
-
-        elif filters.last_seen_days or filters.last_seen_hours:
-            # Если фильтр по дате есть, а у профиля даты нет, то пропускаем его
-            continue
-
-        # Фильтр по ключевому слову в статусе
-        status_keyword = (filters.status_keyword or "").lower().strip()
-        if status_keyword and status_keyword not in profile.get('status', '').lower():
-            continue
-
-        # Фильтр по городу
-        city_filter = (filters.city or "").lower().strip()
-        if city_filter and city_filter not in profile.get('city', {}).get('title', '').lower():
-            continue
-
-        # Фильтр для лайков в ленте: только посты с фото
-        if filters.only_with_photo and not profile.get('photo_id'):
-            continue
-
-        # Если профиль прошел все проверки, добавляем его в итоговый список
-        filtered_profiles.append(profile)
-
-    return filtered_profiles
\ No newline at end of file
+    return compile_filters(filters).apply(profiles)
@@ -1,7 +1,5 @@
 import structlog
 from redis.asyncio import Redis
-from sqlalchemy import select
-from app.db.models import User
 
 from app.tasks.logic.analytics_jobs import (
     _aggregate_daily_stats_async,
@@ -9,7 +7,10 @@ from app.tasks.logic.analytics_jobs import (
     _update_friend_request_statuses_async,
     _process_user_notifications_async  # Добавляем новый обработчик
 )
-from app.tasks.logic.maintenance_jobs import _check_expired_plans_async
+from app.tasks.fan_out import fan_out_user_jobs
+from app.tasks.logic.maintenance_jobs import (
+    _check_expired_plans_async, _flush_last_active_async, _reconcile_unread_notifications_async
+)
 from app.tasks.logic.automation_jobs import _run_daily_automations_async
 from app.db.session import AsyncSessionFactory
 from app.core.config import settings
@@ -21,25 +22,12 @@ log = structlog.get_logger(__name__)
 async def aggregate_daily_stats_job(ctx):
     async with AsyncSessionFactory() as session:
         await _aggregate_daily_stats_async(session=session)
+        await session.commit()
 
 
 async def snapshot_all_users_metrics_job(ctx):
-    log.info("cron.dispatcher.snapshot_metrics.start")
     async with AsyncSessionFactory() as session:
-        active_users_ids_result = await session.execute(
-            select(User.id).where(User.is_deleted == False)
-        )
-        user_ids = active_users_ids_result.scalars().all()
-        if not user_ids:
-            log.info("cron.dispatcher.snapshot_metrics.no_users")
-            return
-        for user_id in user_ids:
-            await ctx['redis_pool'].enqueue_job(
-                "snapshot_single_user_metrics_task",
-                user_id=user_id,
-                _queue_name='low_priority'
-            )
-        log.info("cron.dispatcher.snapshot_metrics.enqueued", count=len(user_ids))
+        await fan_out_user_jobs(session, ctx['redis_pool'], "snapshot_single_user_metrics_task")
 
 
 async def check_expired_plans_job(ctx):
@@ -49,18 +37,27 @@ async def check_expired_plans_job(ctx):
 
 async def generate_all_heatmaps_job(ctx):
     async with AsyncSessionFactory() as session:
-        await _generate_all_heatmaps_async(session=session)
+        await _generate_all_heatmaps_async(session=session, app_redis=ctx.get('app_redis'))
 
 
 async def update_friend_request_statuses_job(ctx):
     async with AsyncSessionFactory() as session:
         await _update_friend_request_statuses_async(session=session)
+        await session.commit()
+
+
+async def flush_last_active_job(ctx):
+    await _flush_last_active_async()
+
+
+async def reconcile_unread_notifications_job(ctx):
+    await _reconcile_unread_notifications_async()
 
 
 # Новая крон-задача для регулярной обработки уведомлений
 async def process_user_notifications_job(ctx):
     async with AsyncSessionFactory() as session:
-        await _process_user_notifications_async(session=session)
+        await _process_user_notifications_async(session=session, redis=ctx.get('app_redis'))
 
 
 async def run_standard_automations_job(ctx):
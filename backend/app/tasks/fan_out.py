@@ -0,0 +1,73 @@
+# backend/app/tasks/fan_out.py
+import uuid
+from typing import Any, Optional, Sequence
+
+import structlog
+from arq.connections import ArqRedis
+from arq.constants import job_key_prefix
+from arq.jobs import serialize_job
+from arq.utils import timestamp_ms
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config_loader import APP_SETTINGS
+from app.db.models import User
+
+log = structlog.get_logger(__name__)
+
+
+async def fan_out_user_jobs(
+    session: AsyncSession,
+    arq_pool: ArqRedis,
+    function_name: str,
+    *,
+    filters: Optional[Sequence[Any]] = None,
+    queue_name: str = "low_priority",
+    spread_seconds: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    job_kwargs: Optional[dict] = None,
+) -> int:
+    """
+    Ставит по одной задаче `function_name(user_id=...)` на каждого пользователя.
+
+    ID пользователей читаются потоком (только колонка id), задачи пишутся в Redis
+    пачками через один pipeline на пачку. Запуск равномерно размазывается
+    через _defer_by по окну spread_seconds, чтобы ночные задачи не забивали
+    очередь разом. Возвращает количество поставленных задач.
+    """
+    filters = list(filters) if filters is not None else [User.is_deleted == False]
+    spread_seconds = APP_SETTINGS.cron.fan_out_spread_seconds if spread_seconds is None else spread_seconds
+    batch_size = batch_size or APP_SETTINGS.cron.fan_out_batch_size
+    job_kwargs = job_kwargs or {}
+
+    total = (await session.execute(select(func.count(User.id)).where(*filters))).scalar_one()
+    if not total:
+        log.info("cron.fan_out.no_users", function=function_name)
+        return 0
+
+    log.info("cron.fan_out.start", function=function_name, total=total, spread_seconds=spread_seconds)
+    spread_ms = spread_seconds * 1000
+    enqueued = 0
+
+    stream = await session.stream(
+        select(User.id).where(*filters).order_by(User.id).execution_options(yield_per=batch_size)
+    )
+    async for partition in stream.partitions(batch_size):
+        enqueue_time_ms = timestamp_ms()
+        async with arq_pool.pipeline(transaction=False) as pipe:
+            for (user_id,) in partition:
+                # Смещение растет линейно по номеру пользователя в выборке
+                defer_ms = spread_ms * enqueued // total
+                job_id = uuid.uuid4().hex
+                job = serialize_job(
+                    function_name, (), {"user_id": user_id, **job_kwargs}, None,
+                    enqueue_time_ms, serializer=arq_pool.job_serializer,
+                )
+                pipe.psetex(job_key_prefix + job_id, defer_ms + arq_pool.expires_extra_ms, job)
+                pipe.zadd(queue_name, {job_id: enqueue_time_ms + defer_ms})
+                enqueued += 1
+            await pipe.execute()
+        log.info("cron.fan_out.progress", function=function_name, enqueued=enqueued, total=total)
+
+    log.info("cron.fan_out.finished", function=function_name, enqueued=enqueued)
+    return enqueued
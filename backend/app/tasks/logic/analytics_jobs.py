@@ -1,9 +1,15 @@
+import asyncio
 import datetime
 import pytz
 import structlog
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-from sqlalchemy import func, select, update
+import numpy as np
+
+from redis.asyncio import Redis
+
+from sqlalchemy import Integer, column, func, literal_column, select, update, values
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -11,59 +17,105 @@ from sqlalchemy.orm import selectinload
 from app.db.models import (
     DailyStats, WeeklyStats, MonthlyStats, User, FriendRequestLog,
     FriendRequestStatus, ProfileMetric, UserActivity, ActionEffectivenessReport,
-    TaskHistory
+    TaskHistory, Plan, PostActivityHeatmap, StatsRollupWatermark
 )
+from app.core.app_redis import borrow_app_redis
+from app.core.config import settings
+from app.core.enums import PlanName
 from app.services.vk_api import VKAPI, VKAuthError
 from app.core.security import decrypt_data
 from app.services.analytics_service import AnalyticsService
+from app.services.activity_heatmap import merge_last_seen
 from app.services.profile_analytics_service import ProfileAnalyticsService
 from app.services.event_emitter import SystemLogEmitter
+from app.services.pulse_feed import make_pulse_event, push_pulse_events
+from app.services.vk_profile_cache import get_vk_briefs
 
 log = structlog.get_logger(__name__)
 
+# friends.areFriends принимает не более 1000 ID за вызов, execute - не более 25 вызовов
+ARE_FRIENDS_MAX_IDS = 1000
+EXECUTE_MAX_CALLS = 25
+PENDING_REQUESTS_YIELD_PER = 5000
+
+ROLLUP_WATERMARK_KEY = "daily_stats"
+ROLLUP_COUNTER_COLUMNS = [c.name for c in DailyStats.__table__.columns if c.name.endswith('_count')]
+
+# Дата последнего обработанного уведомления: следующий запуск берет только более новые
+NOTIFICATIONS_CURSOR_KEY = "notifications:last_date:{user_id}"
+NOTIFICATIONS_CURSOR_TTL = 30 * 24 * 3600
+
+PULSE_ACTIVITY_MESSAGES = {
+    'like': 'лайкнул(а) ваш контент',
+    'comment': 'прокомментировал(а) ваш контент',
+}
+
+HEATMAP_PLANS = [PlanName.PLUS.name, PlanName.PRO.name, PlanName.AGENCY.name]
+HEATMAP_CONCURRENCY = 10
+HEATMAP_PROCESS_WORKERS = 2
+HEATMAP_WINDOW = datetime.timedelta(weeks=2)
+# Накопленные наблюдения last_seen: две строки int64 (id друга, время)
+HEATMAP_STORE_KEY = "heatmap:last_seen:{user_id}"
+HEATMAP_STORE_TTL = int((HEATMAP_WINDOW + datetime.timedelta(days=1)).total_seconds())
+
 async def _aggregate_daily_stats_async(session: AsyncSession):
+    """
+    Пересчитывает недельные и месячные сводки из DailyStats.
+
+    Обрабатываются только периоды, затронутые днями после watermark (при первом
+    запуске - вся история). Каждая сводка целиком пересчитывается одним
+    INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE, поэтому повторный
+    запуск не задваивает значения.
+    """
     yesterday = datetime.date.today() - datetime.timedelta(days=1)
-    
-    stmt = select(
-        DailyStats.user_id,
-        func.sum(DailyStats.likes_count).label("likes"),
-        func.sum(DailyStats.friends_added_count).label("friends"),
-        func.sum(DailyStats.friend_requests_accepted_count).label("accepted")
-    ).where(DailyStats.date == yesterday).group_by(DailyStats.user_id)
-    
-    daily_sums = (await session.execute(stmt)).all()
-    if not daily_sums:
+
+    watermark = await session.get(StatsRollupWatermark, ROLLUP_WATERMARK_KEY)
+    if watermark:
+        first_day = watermark.processed_through + datetime.timedelta(days=1)
+    else:
+        first_day = (await session.execute(select(func.min(DailyStats.date)))).scalar_one_or_none()
+    if not first_day or first_day > yesterday:
         return
 
-    week_id, month_id = yesterday.strftime('%Y-%W'), yesterday.strftime('%Y-%m')
-
-    for stat_type, identifier in [(WeeklyStats, week_id), (MonthlyStats, month_id)]:
-        values_to_upsert = []
-        id_key = 'week_identifier' if stat_type is WeeklyStats else 'month_identifier'
-        for r in daily_sums:
-            values_to_upsert.append({
-                "user_id": r.user_id,
-                id_key: identifier,
-                "likes_count": r.likes,
-                "friends_added_count": r.friends,
-                "friend_requests_accepted_count": r.accepted
-            })
-
-        if not values_to_upsert:
-            continue
-        
-        insert_stmt = insert(stat_type).values(values_to_upsert)
-        update_dict = {
-            'likes_count': getattr(stat_type, 'likes_count') + insert_stmt.excluded.likes_count,
-            'friends_added_count': getattr(stat_type, 'friends_added_count') + insert_stmt.excluded.friends_added_count,
-            'friend_requests_accepted_count': getattr(stat_type, 'friend_requests_accepted_count') + insert_stmt.excluded.friend_requests_accepted_count
-        }
-        
-        final_stmt = insert_stmt.on_conflict_do_update(
-            index_elements=['user_id', id_key],
-            set_=update_dict
+    # Неделя '%Y-%W' начинается в понедельник, но не раньше 1 января своего года
+    week_start = max(first_day - datetime.timedelta(days=first_day.weekday()), first_day.replace(month=1, day=1))
+    month_start = first_day.replace(day=1)
+
+    await _rollup_daily_stats(session, WeeklyStats, 'week_identifier', _week_identifier(DailyStats.date), week_start, yesterday)
+    await _rollup_daily_stats(session, MonthlyStats, 'month_identifier', func.to_char(DailyStats.date, literal_column("'YYYY-MM'")), month_start, yesterday)
+
+    upsert = insert(StatsRollupWatermark).values(rollup=ROLLUP_WATERMARK_KEY, processed_through=yesterday, updated_at=datetime.datetime.now(datetime.UTC))
+    await session.execute(upsert.on_conflict_do_update(
+        index_elements=['rollup'],
+        set_={'processed_through': upsert.excluded.processed_through, 'updated_at': upsert.excluded.updated_at},
+    ))
+    log.info("analytics.rollups_recomputed", week_start=str(week_start), month_start=str(month_start), through=str(yesterday))
+
+def _week_identifier(date_column):
+    """SQL-аналог date.strftime('%Y-%W'): (день года + 7 - день недели ISO) // 7."""
+    # Константы встраиваются литералами, чтобы выражение в SELECT и GROUP BY совпадало текстуально
+    seven = literal_column("7")
+    week_number = func.floor((func.extract('doy', date_column) + seven - func.extract('isodow', date_column)) / seven)
+    return func.concat(
+        func.to_char(date_column, literal_column("'YYYY'")), literal_column("'-'"), func.to_char(week_number, literal_column("'FM00'"))
+    )
+
+async def _rollup_daily_stats(session: AsyncSession, stat_model, id_key: str, identifier, range_start: datetime.date, range_end: datetime.date):
+    identifier = identifier.label(id_key)
+    source = (
+        select(
+            DailyStats.user_id, identifier,
+            *[func.sum(getattr(DailyStats, name)).label(name) for name in ROLLUP_COUNTER_COLUMNS]
         )
-        await session.execute(final_stmt)
+        .where(DailyStats.date.between(range_start, range_end))
+        .group_by(DailyStats.user_id, identifier)
+    )
+    stmt = insert(stat_model).from_select(['user_id', id_key, *ROLLUP_COUNTER_COLUMNS], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', id_key],
+        set_={name: stmt.excluded[name] for name in ROLLUP_COUNTER_COLUMNS},
+    )
+    await session.execute(stmt)
 
 async def _snapshot_all_users_metrics_async(session: AsyncSession):
     now = datetime.datetime.now(pytz.utc)
@@ -89,126 +141,302 @@ async def _snapshot_all_users_metrics_async(session: AsyncSession):
         except Exception as e:
             log.error("snapshot_metrics_task.user_error", user_id=user.id, error=str(e), exc_info=True)
 
-async def _generate_all_heatmaps_async(session: AsyncSession):
-    users_result = await session.execute(select(User).where(User.plan.in_(['PLUS', 'PRO', 'AGENCY'])))
-    users = users_result.scalars().all()
+async def _generate_all_heatmaps_async(session: AsyncSession, app_redis: Redis | None = None):
+    """
+    Строит тепловые карты активности друзей для платных тарифов.
+
+    Друзья запрашиваются параллельно (не более HEATMAP_CONCURRENCY пользователей
+    одновременно), наблюдения last_seen копятся в Redis за окно HEATMAP_WINDOW и
+    дополняются новыми, биннинг выполняется numpy в пуле процессов. Все карты
+    записываются в БД одним upsert в конце.
+    """
+    stmt = (
+        select(User).join(Plan)
+        .where(Plan.name_id.in_(HEATMAP_PLANS), User.is_deleted == False)
+        .options(selectinload(User.proxies))
+    )
+    users = (await session.execute(stmt)).scalars().all()
     if not users: return
-    
+
     log.info("analytics.heatmap_generation_started", count=len(users))
-    for user in users:
+    cutoff_ts = int((datetime.datetime.now(datetime.UTC) - HEATMAP_WINDOW).timestamp())
+    semaphore = asyncio.Semaphore(HEATMAP_CONCURRENCY)
+    redis_client = Redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/3")
+    try:
+        with ProcessPoolExecutor(max_workers=HEATMAP_PROCESS_WORKERS) as executor:
+            results = await asyncio.gather(*[
+                _build_user_heatmap(session, user, redis_client, app_redis, executor, semaphore, cutoff_ts)
+                for user in users
+            ])
+    finally:
+        await redis_client.aclose()
+
+    now = datetime.datetime.now(datetime.UTC)
+    rows = [
+        {"user_id": user_id, "heatmap_data": {"data": heatmap}, "last_updated_at": now}
+        for user_id, heatmap in filter(None, results)
+    ]
+    if rows:
+        upsert = insert(PostActivityHeatmap)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={"heatmap_data": upsert.excluded.heatmap_data, "last_updated_at": upsert.excluded.last_updated_at},
+        )
+        await session.execute(upsert, rows)
+        await session.commit()
+    log.info("analytics.heatmap_generation_finished", generated=len(rows), total=len(users))
+
+async def _build_user_heatmap(
+    session: AsyncSession, user: User, redis_client: Redis, app_redis: Redis | None, executor: ProcessPoolExecutor,
+    semaphore: asyncio.Semaphore, cutoff_ts: int
+) -> tuple[int, list[list[int]]] | None:
+    """Собирает last_seen друзей пользователя и пересчитывает его карту. None - карту не обновлять."""
+    async with semaphore:
+        emitter = SystemLogEmitter(task_name="heatmap_generator", counter_redis=app_redis)
+        emitter.set_context(user_id=user.id)
+        service = AnalyticsService(db=session, user=user, emitter=emitter)
         try:
-            async with session.begin_nested():
-                emitter = SystemLogEmitter(task_name="heatmap_generator")
-                emitter.set_context(user_id=user.id)
-                service = AnalyticsService(db=session, user=user, emitter=emitter)
-                await service.generate_post_activity_heatmap()
+            friend_ids, seen_times = await service.fetch_friends_last_seen()
+            if not friend_ids:
+                return None
+
+            store_key = HEATMAP_STORE_KEY.format(user_id=user.id)
+            stored = await redis_client.get(store_key)
+            # Массивы numpy уходят в процесс пула одним буфером, списки - поэлементным pickle
+            state, heatmap = await asyncio.get_running_loop().run_in_executor(
+                executor, merge_last_seen, stored,
+                np.array(friend_ids, dtype=np.int64), np.array(seen_times, dtype=np.int64), cutoff_ts,
+            )
+            await redis_client.set(store_key, state, ex=HEATMAP_STORE_TTL)
+            return user.id, heatmap
         except Exception as e:
             log.error("analytics.heatmap_generation_user_error", user_id=user.id, error=str(e))
+            return None
+        finally:
+            if service.vk_api:
+                await service.vk_api.close()
 
 async def _update_friend_request_statuses_async(session: AsyncSession):
-    stmt = select(User).options(selectinload(User.friend_requests)).where(
+    """
+    Сверяет статусы исходящих заявок в друзья с VK.
+
+    Ожидающие заявки читаются потоком (yield_per), ID целей режутся на чанки
+    по лимиту friends.areFriends и отправляются пачками через execute.
+    Принятые заявки помечаются одним UPDATE ... FROM (VALUES ...) на пользователя.
+    """
+    users_stmt = select(User.id, User.encrypted_vk_token).where(
         User.friend_requests.any(FriendRequestLog.status == FriendRequestStatus.pending)
     )
-    users_with_pending_reqs_result = await session.execute(stmt)
-    users_with_pending_reqs = users_with_pending_reqs_result.scalars().unique().all()
-    
+    users_with_pending_reqs = (await session.execute(users_stmt)).all()
+
     if not users_with_pending_reqs:
         return
 
-    for user in users_with_pending_reqs:
-        pending_reqs = [req for req in user.friend_requests if req.status == FriendRequestStatus.pending]
-        if not pending_reqs:
-            continue
-
+    for user_id, encrypted_vk_token in users_with_pending_reqs:
         vk_api = None
         try:
-            vk_token = decrypt_data(user.encrypted_vk_token)
+            vk_token = decrypt_data(encrypted_vk_token)
             if not vk_token:
                 continue
 
             vk_api = VKAPI(access_token=vk_token)
-            target_ids = [str(req.target_vk_id) for req in pending_reqs]
-            friend_statuses = await vk_api.friends.areFriends(user_ids=",".join(target_ids))
-            
-            if not friend_statuses:
-                continue
+            accepted_req_ids = await _collect_accepted_friend_requests(session, vk_api, user_id)
 
-            accepted_req_ids = [
-                req.id for req, status_info in zip(pending_reqs, friend_statuses)
-                if status_info.get("friend_status") == 3
-            ]
-            
             if accepted_req_ids:
-                update_stmt = update(FriendRequestLog).where(FriendRequestLog.id.in_(accepted_req_ids)).values(
-                    status=FriendRequestStatus.accepted, 
-                    resolved_at=datetime.datetime.now(pytz.utc)
-                )
-                await session.execute(update_stmt)
+                await _mark_friend_requests_accepted(session, accepted_req_ids)
+                log.info("analytics.conversion_tracker_user_updated", user_id=user_id, accepted=len(accepted_req_ids))
 
         except Exception as e:
-            log.error("analytics.conversion_tracker_user_error", user_id=user.id, error=str(e))
+            log.error("analytics.conversion_tracker_user_error", user_id=user_id, error=str(e))
         finally:
             if vk_api:
                 await vk_api.close()
 
-async def _process_user_notifications_async(session: AsyncSession):
+async def _collect_accepted_friend_requests(session: AsyncSession, vk_api: VKAPI, user_id: int) -> list[int]:
+    """Потоково читает ожидающие заявки пользователя и возвращает ID принятых."""
+    stmt = (
+        select(FriendRequestLog.id, FriendRequestLog.target_vk_id)
+        .where(FriendRequestLog.user_id == user_id, FriendRequestLog.status == FriendRequestStatus.pending)
+        .order_by(FriendRequestLog.id)
+        .execution_options(yield_per=PENDING_REQUESTS_YIELD_PER)
+    )
+    batch_capacity = ARE_FRIENDS_MAX_IDS * EXECUTE_MAX_CALLS
+    accepted_req_ids: list[int] = []
+    batch: list[tuple[int, int]] = []
+
+    stream = await session.stream(stmt)
+    async for partition in stream.partitions():
+        for req_id, target_vk_id in partition:
+            batch.append((req_id, target_vk_id))
+            if len(batch) >= batch_capacity:
+                accepted_req_ids.extend(await _check_friend_statuses_batch(vk_api, batch))
+                batch = []
+
+    if batch:
+        accepted_req_ids.extend(await _check_friend_statuses_batch(vk_api, batch))
+    return accepted_req_ids
+
+async def _check_friend_statuses_batch(vk_api: VKAPI, pending: list[tuple[int, int]]) -> list[int]:
+    """Проверяет до 25 чанков заявок одним вызовом execute."""
+    chunks = [pending[i:i + ARE_FRIENDS_MAX_IDS] for i in range(0, len(pending), ARE_FRIENDS_MAX_IDS)]
+    calls = [
+        {"method": "friends.areFriends", "params": {"user_ids": ",".join(str(target_vk_id) for _, target_vk_id in chunk)}}
+        for chunk in chunks
+    ]
+    results = await vk_api.execute(calls)
+    if not results:
+        return []
+
+    accepted_req_ids = []
+    for chunk, statuses in zip(chunks, results):
+        # Упавший внутри execute вызов возвращает false вместо списка
+        if not isinstance(statuses, list):
+            continue
+        status_by_vk_id = {
+            item.get("user_id"): item.get("friend_status")
+            for item in statuses if isinstance(item, dict)
+        }
+        accepted_req_ids.extend(
+            req_id for req_id, target_vk_id in chunk if status_by_vk_id.get(target_vk_id) == 3
+        )
+    return accepted_req_ids
+
+async def _mark_friend_requests_accepted(session: AsyncSession, request_ids: list[int]):
+    accepted_requests = values(
+        column("id", Integer), name="accepted_requests"
+    ).data([(req_id,) for req_id in request_ids])
+
+    stmt = (
+        update(FriendRequestLog)
+        .where(
+            FriendRequestLog.id == accepted_requests.c.id,
+            FriendRequestLog.status == FriendRequestStatus.pending
+        )
+        .values(status=FriendRequestStatus.accepted, resolved_at=datetime.datetime.now(pytz.utc))
+    )
+    await session.execute(stmt)
+
+async def _process_user_notifications_async(session: AsyncSession, redis: Redis | None = None):
     users_result = await session.execute(select(User))
     users = users_result.scalars().all()
     if not users:
         return
 
-    for user in users:
-        vk_api = None
-        try:
-            vk_token = decrypt_data(user.encrypted_vk_token)
-            if not vk_token: continue
-            
-            vk_api = VKAPI(access_token=vk_token)
-            notifications_response = await vk_api.notifications.get(count=100)
-            
-            if not notifications_response or not notifications_response.get('items'):
-                continue
-            
-            items = notifications_response.get('items', [])
-            like_counter, comment_counter, accepted_friend_requests = Counter(), Counter(), []
-
-            for item in items:
-                event_type, feedback = item.get('type'), item.get('feedback')
-                if not event_type or not feedback: continue
-
-                source_ids = []
-                if isinstance(feedback, list):
-                    source_ids = [fb.get('from_id') for fb in feedback if fb.get('from_id', 0) > 0]
-                elif isinstance(feedback, dict) and feedback.get('from_id', 0) > 0:
-                    source_ids = [feedback.get('from_id')]
-
-                for from_id in source_ids:
-                    if 'like_' in event_type:
-                        like_counter[from_id] += 1
-                    elif 'comment_' in event_type or 'reply_' in event_type:
-                        comment_counter[from_id] += 1
-                    elif event_type == 'friend_accepted':
-                        accepted_friend_requests.append(from_id)
+    async with borrow_app_redis(redis) as redis:
+        for user in users:
+            await _process_single_user_notifications(session, redis, user)
 
-            async with session.begin_nested():
-                if like_counter:
-                    await _upsert_activity(session, user.id, 'like', like_counter)
-                if comment_counter:
-                    await _upsert_activity(session, user.id, 'comment', comment_counter)
-                if accepted_friend_requests:
-                    stmt = update(FriendRequestLog).where(
-                        FriendRequestLog.user_id == user.id,
-                        FriendRequestLog.target_vk_id.in_(accepted_friend_requests),
-                        FriendRequestLog.status == FriendRequestStatus.pending
-                    ).values(status=FriendRequestStatus.accepted, resolved_at=datetime.datetime.now(pytz.utc))
-                    await session.execute(stmt)
-            
-            await vk_api.notifications.markAsViewed()
-        except Exception as e:
-            log.error("analytics.notifications_processor.user_error", user_id=user.id, error=str(e), exc_info=True)
-        finally:
-            if vk_api:
-                await vk_api.close()
+async def _process_single_user_notifications(session: AsyncSession, redis: Redis, user: User):
+    vk_api = None
+    try:
+        vk_token = decrypt_data(user.encrypted_vk_token)
+        if not vk_token: return
+        
+        vk_api = VKAPI(access_token=vk_token)
+        # Без start_time VK каждый раз отдает уведомления за последние сутки, и
+        # задача, идущая раз в 10 минут, учитывала бы одни и те же события снова
+        last_date = await _read_notifications_cursor(redis, user.id)
+        notifications_response = await vk_api.notifications.get(
+            count=100, start_time=last_date + 1 if last_date else None
+        )
+
+        if not notifications_response or not notifications_response.get('items'):
+            return
+
+        items = [
+            item for item in notifications_response.get('items', [])
+            if isinstance(item.get('date'), int) and item['date'] > last_date
+        ]
+        if not items:
+            return
+        like_counter, comment_counter, accepted_friend_requests = Counter(), Counter(), []
+        # Время последнего лайка/комментария от каждого автора - для ленты пульса
+        latest_at: dict[tuple[str, int], int] = {}
+
+        for item in items:
+            event_type, feedback = item.get('type'), item.get('feedback')
+            if not event_type or not feedback: continue
+
+            source_ids = []
+            if isinstance(feedback, list):
+                source_ids = [fb.get('from_id') for fb in feedback if fb.get('from_id', 0) > 0]
+            elif isinstance(feedback, dict) and feedback.get('from_id', 0) > 0:
+                source_ids = [feedback.get('from_id')]
+
+            for from_id in source_ids:
+                if 'like_' in event_type:
+                    like_counter[from_id] += 1
+                    _remember_latest(latest_at, 'like', from_id, item.get('date'))
+                elif 'comment_' in event_type or 'reply_' in event_type:
+                    comment_counter[from_id] += 1
+                    _remember_latest(latest_at, 'comment', from_id, item.get('date'))
+                elif event_type == 'friend_accepted':
+                    accepted_friend_requests.append(from_id)
+
+        async with session.begin_nested():
+            if like_counter:
+                await _upsert_activity(session, user.id, 'like', like_counter)
+            if comment_counter:
+                await _upsert_activity(session, user.id, 'comment', comment_counter)
+            if accepted_friend_requests:
+                stmt = update(FriendRequestLog).where(
+                    FriendRequestLog.user_id == user.id,
+                    FriendRequestLog.target_vk_id.in_(accepted_friend_requests),
+                    FriendRequestLog.status == FriendRequestStatus.pending
+                ).values(status=FriendRequestStatus.accepted, resolved_at=datetime.datetime.now(pytz.utc))
+                await session.execute(stmt)
+        # Курсор двигается только вместе с записанной активностью
+        await session.commit()
+        await _save_notifications_cursor(redis, user.id, max(item['date'] for item in items))
+
+        await vk_api.notifications.markAsViewed()
+        if latest_at:
+            await _push_activity_pulse(redis, vk_api, user.id, latest_at)
+    except Exception as e:
+        log.error("analytics.notifications_processor.user_error", user_id=user.id, error=str(e), exc_info=True)
+    finally:
+        if vk_api:
+            await vk_api.close()
+
+async def _read_notifications_cursor(redis: Redis, user_id: int) -> int:
+    try:
+        raw = await redis.get(NOTIFICATIONS_CURSOR_KEY.format(user_id=user_id))
+        return int(raw) if raw else 0
+    except Exception as e:
+        log.warn("analytics.notifications_processor.cursor_read_failed", user_id=user_id, error=str(e))
+        return 0
+
+async def _save_notifications_cursor(redis: Redis, user_id: int, last_date: int):
+    try:
+        await redis.set(NOTIFICATIONS_CURSOR_KEY.format(user_id=user_id), last_date, ex=NOTIFICATIONS_CURSOR_TTL)
+    except Exception as e:
+        log.warn("analytics.notifications_processor.cursor_save_failed", user_id=user_id, error=str(e))
+
+def _remember_latest(latest_at: dict, activity_type: str, from_id: int, date):
+    key = (activity_type, from_id)
+    if isinstance(date, int) and date > latest_at.get(key, 0):
+        latest_at[key] = date
+    else:
+        latest_at.setdefault(key, 0)
+
+async def _push_activity_pulse(redis: Redis, vk_api: VKAPI, user_id: int, latest_at: dict):
+    """Дописывает лайки и комментарии в ленту пульса, подставляя имена из кэша карточек VK."""
+    try:
+        briefs = await get_vk_briefs(redis, vk_api, {from_id for _, from_id in latest_at})
+    except Exception as e:
+        log.warn("analytics.notifications_processor.briefs_failed", user_id=user_id, error=str(e))
+        briefs = {}
+    now = datetime.datetime.now(datetime.UTC)
+    events = []
+    # В ленту идем от старых к новым, чтобы свежие оказались в начале
+    for (activity_type, from_id), date in sorted(latest_at.items(), key=lambda kv: kv[1]):
+        brief = briefs.get(from_id, {})
+        events.append(make_pulse_event(
+            activity_type, PULSE_ACTIVITY_MESSAGES[activity_type],
+            timestamp=datetime.datetime.fromtimestamp(date, datetime.UTC) if date else now,
+            source_vk_id=from_id, source_name=brief.get("name"), source_photo=brief.get("photo"),
+        ))
+    await push_pulse_events(redis, user_id, events)
 
 async def _upsert_activity(session: AsyncSession, user_id: int, activity_type: str, counter: Counter):
     if not counter: return
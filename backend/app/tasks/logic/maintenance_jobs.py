@@ -5,11 +5,17 @@ from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import selectinload
+from redis.asyncio import Redis
 from app.db.session import AsyncSessionFactory
 from app.db.models import TaskHistory, User, Automation, Notification
 from app.core.plans import get_limits_for_plan
 from app.core.enums import PlanName
 from app.core.constants import CronSettings
+from app.core.principal_cache import invalidate_principals
+from app.core.config import settings
+from app.core.app_redis import app_redis
+from app.services.last_active_tracker import flush_last_active
+from app.services.unread_counter import adjust_unread_counts, reconcile_unread_counts
 from app.db.models.payment import Plan
 
 
@@ -102,4 +108,21 @@ async def _check_expired_plans_async(session: AsyncSession | None = None):
         if not session:
             await db_session.commit()
         else:
-            await db_session.flush()
\ No newline at end of file
+            await db_session.flush()
+        async with app_redis() as redis:
+            await invalidate_principals(redis, *user_ids_to_deactivate)
+            await adjust_unread_counts(redis, {user_id: 1 for user_id in user_ids_to_deactivate})
+
+async def _flush_last_active_async(session: AsyncSession | None = None):
+    """Переносит отметки активности пользователей из Redis в users.last_active_at."""
+    activity_redis = Redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/3")
+    try:
+        async with get_session(session) as db_session:
+            await flush_last_active(db_session, activity_redis)
+    finally:
+        await activity_redis.aclose()
+
+async def _reconcile_unread_notifications_async(session: AsyncSession | None = None):
+    """Сверяет счетчики непрочитанных уведомлений в Redis с таблицей notifications."""
+    async with app_redis() as redis, get_session(session) as db_session:
+        await reconcile_unread_counts(db_session, redis)
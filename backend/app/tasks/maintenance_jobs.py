@@ -1,6 +1,10 @@
 # --- backend/app/tasks/maintenance_jobs.py ---
+import asyncio
+
+from app.services.parsing_results import remove_old_results
 from app.tasks.logic.maintenance_jobs import _clear_old_task_history_async
 
 async def clear_old_task_history_job(ctx):
-    """ARQ-задача для очистки старой истории задач."""
-    await _clear_old_task_history_async()
\ No newline at end of file
+    """ARQ-задача для очистки старой истории задач и файлов результатов парсинга."""
+    await _clear_old_task_history_async()
+    await asyncio.to_thread(remove_old_results)
\ No newline at end of file
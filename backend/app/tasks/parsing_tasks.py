@@ -0,0 +1,117 @@
+# backend/app/tasks/parsing_tasks.py
+"""
+Фоновые парсинги из api/endpoints/data.py.
+
+Эндпоинт создает TaskHistory с параметрами {"kind": ..., "request": {...}}
+и ставит parse_data_task в очередь. Задача читает результат из DataService
+пачками и сразу пишет их в файл (services/parsing_results.py); id записи
+TaskHistory служит ссылкой на результат.
+
+Полная выгрузка подписчиков идет отдельной задачей scan_group_members_task:
+она пишет колонки (services/group_member_scan.py) и продолжает прерванную
+выгрузку той же группы с чекпоинта. Так же устроена выгрузка диалога
+export_conversation_task (services/conversation_export.py).
+
+Парсинги публичных данных получают общий кэш (services/public_vk_cache.py),
+выгрузка подписчиков и диалога - нет: профили с bdate/city/online и
+переписка зависят от токена.
+"""
+import asyncio
+import shutil
+from typing import Any, AsyncGenerator, Callable
+
+from pydantic import BaseModel
+
+from app.api.schemas.data import (
+    ConversationExportRequest, DiscussionContactsRequest, GroupMembersParsingRequest, GroupMembersScanRequest,
+    ParsingRequest, ResolveLinksRequest, TopUsersParsingRequest, UserWallParsingRequest
+)
+from app.services.conversation_export import export_file_name
+from app.services.data_service import DataService
+from app.services.parsing_results import (
+    ParsingResultWriter, conversation_export_path, member_scan_path, publish_columns, publish_file, work_dir_lock
+)
+from app.services.public_vk_cache import PublicVKCache
+from app.tasks.standard_tasks import arq_task_runner
+
+BatchIterator = Callable[[DataService, Any], AsyncGenerator[list[dict], None]]
+
+# kind -> (название задачи, модель параметров, источник пачек)
+PARSING_JOBS: dict[str, tuple[str, type[BaseModel], BatchIterator]] = {
+    "group_activity": (
+        "Парсинг активной аудитории", ParsingRequest,
+        lambda service, req: service.iter_active_group_audience(req.group_id, req.filters),
+    ),
+    "group_members": (
+        "Парсинг подписчиков сообщества", GroupMembersParsingRequest,
+        lambda service, req: service.iter_group_members(req.group_id, req.count),
+    ),
+    "user_wall": (
+        "Парсинг стены пользователя", UserWallParsingRequest,
+        lambda service, req: service.iter_user_wall(req.user_id, req.count),
+    ),
+    "group_top_active": (
+        "Парсинг самых активных пользователей", TopUsersParsingRequest,
+        lambda service, req: service.iter_top_active_users(req.group_id, req.posts_depth, req.top_n),
+    ),
+    "discussion_contacts": (
+        "Парсинг участников обсуждений", DiscussionContactsRequest,
+        lambda service, req: service.iter_discussion_contacts(req.group_id, req.topic_ids),
+    ),
+    "resolve_links": (
+        "Определение ID по ссылкам", ResolveLinksRequest,
+        lambda service, req: service.iter_resolved_links(req.links),
+    ),
+}
+
+MEMBER_SCAN_KIND = "group_members_scan"
+MEMBER_SCAN_TASK_NAME = "Полная выгрузка подписчиков сообщества"
+CONVERSATION_EXPORT_KIND = "conversation_export"
+CONVERSATION_EXPORT_TASK_NAME = "Выгрузка истории диалога"
+
+
+@arq_task_runner
+async def parse_data_task(session, user, params, emitter):
+    _, RequestModel, iterate = PARSING_JOBS[params["kind"]]
+    request = RequestModel(**params["request"])
+    service = DataService(db=session, user=user, emitter=emitter, public_cache=PublicVKCache.connect())
+    try:
+        async with ParsingResultWriter(user.id, emitter.task_history_id) as writer:
+            async for batch in iterate(service, request):
+                await writer.write_rows(batch)
+                await emitter.send_log(f"Собрано записей: {writer.rows}", "info")
+    finally:
+        await service.close()
+    return f"Парсинг завершен. Собрано записей: {writer.rows}."
+
+
+@arq_task_runner
+async def scan_group_members_task(session, user, params, emitter):
+    request = GroupMembersScanRequest(**params["request"])
+    service = DataService(db=session, user=user, emitter=emitter)
+    scan_dir = member_scan_path(user.id, request.group_id)
+    try:
+        with work_dir_lock(scan_dir):
+            rows = await service.scan_group_members(request.group_id, scan_dir)
+            await asyncio.to_thread(publish_columns, user.id, emitter.task_history_id, scan_dir)
+    finally:
+        await service.close()
+    return f"Выгрузка подписчиков завершена. Собрано записей: {rows}."
+
+
+@arq_task_runner
+async def export_conversation_task(session, user, params, emitter):
+    request = ConversationExportRequest(**params["request"])
+    service = DataService(db=session, user=user, emitter=emitter)
+    work_dir = conversation_export_path(user.id, request.peer_id)
+    try:
+        with work_dir_lock(work_dir):
+            state = await service.export_conversation(request.peer_id, work_dir, request.compression)
+            await asyncio.to_thread(
+                publish_file, user.id, emitter.task_history_id, work_dir / export_file_name(request.compression),
+                state["rows"], state["fields"], request.compression is not None,
+            )
+            await asyncio.to_thread(shutil.rmtree, work_dir, True)
+    finally:
+        await service.close()
+    return f"Выгрузка диалога завершена. Сообщений: {state['rows']}."
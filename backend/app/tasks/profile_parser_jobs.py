@@ -6,6 +6,7 @@ from app.db.models import User
 from app.services.profile_analytics_service import ProfileAnalyticsService
 from app.services.event_emitter import SystemLogEmitter
 from app.services.vk_api import VKAuthError
+from app.core.response_cache import PROFILE_SUMMARY, invalidate_user_responses
 
 log = structlog.get_logger(__name__)
 
@@ -19,7 +20,7 @@ async def snapshot_single_user_metrics_task(ctx, user_id: int):
             if not user or user.is_deleted:
                 return
 
-            emitter = SystemLogEmitter("snapshot_metrics")
+            emitter = SystemLogEmitter("snapshot_metrics", counter_redis=ctx.get('app_redis'))
             emitter.set_context(user.id)
             
             # Используем вложенную транзакцию, чтобы ошибка у одного пользователя
@@ -30,6 +31,7 @@ async def snapshot_single_user_metrics_task(ctx, user_id: int):
             
             # Основной коммит для этой задачи
             await session.commit()
+            await invalidate_user_responses(None, user_id, PROFILE_SUMMARY)
 
         except VKAuthError:
             log.warn("snapshot_single_user.auth_error", user_id=user_id)
@@ -12,15 +12,25 @@ from app.core.exceptions import UserActionException
 from app.services.vk_api import VKAPIError, VKAuthError
 from app.core.enums import TaskKey 
 from app.tasks.task_maps import TASK_CONFIG_MAP
+from app.core.response_cache import AUDIENCE_ANALYTICS, FRIENDS_ANALYTICS, invalidate_user_responses
+from app.services.pulse_feed import make_pulse_event, push_pulse_events
+from app.services.preview_targets import PREVIEW_TOKEN_PARAM, pop_preview_targets
 from contextlib import asynccontextmanager
 
 log = structlog.get_logger(__name__)
 
+# Какие закэшированные ответы API устаревают после задачи (по имени функции задачи)
+RESPONSE_CACHE_INVALIDATIONS = {
+    "accept_friend_requests_task": (FRIENDS_ANALYTICS, AUDIENCE_ANALYTICS),
+    "remove_friends_by_criteria_task": (FRIENDS_ANALYTICS, AUDIENCE_ANALYTICS),
+}
+
 def arq_task_runner(func):
     @functools.wraps(func)
     async def wrapper(ctx, task_history_id: int, **kwargs):
         session_for_test = kwargs.pop("session_for_test", None)
         emitter_for_test = kwargs.pop("emitter_for_test", None)
+        preview_token = kwargs.pop(PREVIEW_TOKEN_PARAM, None)
 
         @asynccontextmanager
         async def get_session_context():
@@ -44,7 +54,7 @@ def arq_task_runner(func):
                     log.error("task.runner.not_found_final", task_history_id=task_history_id)
                     return
                 user = task_history.user
-                emitter = emitter_for_test or RedisEventEmitter(ctx['redis_pool'])
+                emitter = emitter_for_test or RedisEventEmitter(ctx['redis_pool'], counter_redis=ctx.get('app_redis'))
                 emitter.set_context(user.id, task_history_id)
                 task_history.status = "STARTED"
                 task_history.started_at = datetime.now(UTC)
@@ -53,6 +63,8 @@ def arq_task_runner(func):
                 if user.is_shadow_banned:
                     raise UserActionException("Действие отменено (теневой бан).")
                 task_params = task_history.parameters or {}
+                if preview_token:
+                    task_params = {**task_params, PREVIEW_TOKEN_PARAM: preview_token}
                 summary_result = await func(session, user, task_params, emitter)
                 task_history.status = "SUCCESS"
                 task_history.result = summary_result if isinstance(summary_result, str) else "Задача успешно выполнена."
@@ -94,6 +106,13 @@ def arq_task_runner(func):
                         leave_groups=LimitStatus(used=today_stats.groups_left_count, limit=user.daily_leave_groups_limit),
                     )
                     await emitter.send_stats_update(all_limits.model_dump())
+                    # Инвалидируем и после ошибки: задача могла успеть изменить данные
+                    app_redis = ctx.get('app_redis')
+                    await invalidate_user_responses(app_redis, user.id, *RESPONSE_CACHE_INVALIDATIONS.get(func.__name__, ()))
+                    if task_history.status == "SUCCESS":
+                        await push_pulse_events(app_redis, user.id, [
+                            make_pulse_event("action", task_history.task_name, timestamp=task_history.finished_at)
+                        ])
                     if task_history.status == "SUCCESS" and task_history.task_name == "Добавление друзей":
                         await ctx['redis_pool'].enqueue_job(
                             "generate_effectiveness_report_task",
@@ -105,8 +124,16 @@ def arq_task_runner(func):
 
 async def _run_service_method(session, user, params, emitter, task_key: TaskKey):
     ServiceClass, ParamsModel = TASK_CONFIG_MAP[task_key]
+    params = dict(params)
+    preview_token = params.pop(PREVIEW_TOKEN_PARAM, None)
     validated_params = ParamsModel(**params)
     service_instance = ServiceClass(db=session, user=user, emitter=emitter)
+    if preview_token:
+        # Эмиттер воркера держит общий клиент Redis приложения (ctx['app_redis'])
+        app_redis = getattr(emitter, "counter_redis", None)
+        service_instance.preset_targets = await pop_preview_targets(app_redis, user.id, task_key.value, validated_params, preview_token)
+        if service_instance.preset_targets is not None:
+            log.info("task.runner.preview_targets_reused", user_id=user.id, task_key=task_key.value, count=len(service_instance.preset_targets))
     return await service_instance.execute(validated_params)
 
 @arq_task_runner
@@ -43,7 +43,7 @@ async def publish_scheduled_post_task(ctx, post_id: int, db_session_for_test: Se
             return
 
         user = post.user
-        emitter = RedisEventEmitter(ctx['redis_pool'])
+        emitter = RedisEventEmitter(ctx['redis_pool'], counter_redis=ctx.get('app_redis'))
         emitter.set_context(user.id)
 
         if not user:
@@ -1,10 +1,12 @@
 from arq import cron
 from app.arq_config import redis_settings
+from app.core.app_redis import app_redis
 
 from app.tasks.cron_jobs import (
     aggregate_daily_stats_job, snapshot_all_users_metrics_job, check_expired_plans_job,
     generate_all_heatmaps_job, update_friend_request_statuses_job, process_user_notifications_job,
-    run_standard_automations_job, run_online_automations_job
+    run_standard_automations_job, run_online_automations_job, flush_last_active_job,
+    reconcile_unread_notifications_job
 )
 from app.tasks.logic.analytics_jobs import _generate_effectiveness_report_async
 from app.tasks.maintenance_jobs import clear_old_task_history_job
@@ -16,6 +18,7 @@ from app.tasks.standard_tasks import (
     join_groups_by_criteria_task
 )
 from app.tasks.system_tasks import publish_scheduled_post_task, run_scenario_from_scheduler_task
+from app.tasks.parsing_tasks import export_conversation_task, parse_data_task, scan_group_members_task
 
 functions = [
     like_feed_task, add_recommended_friends_task, accept_friend_requests_task,
@@ -24,6 +27,9 @@ functions = [
     join_groups_by_criteria_task,
     publish_scheduled_post_task, run_scenario_from_scheduler_task,
     snapshot_single_user_metrics_task,
+    parse_data_task,
+    scan_group_members_task,
+    export_conversation_task,
     _generate_effectiveness_report_async.func,
 ]
 
@@ -34,6 +40,8 @@ cron_jobs = [
     cron(update_friend_request_statuses_job, hour={0, 4, 8, 12, 16, 20}, minute=0),
     cron(generate_all_heatmaps_job, hour=5),
     cron(check_expired_plans_job, minute={0, 15, 30, 45}),
+    cron(flush_last_active_job, minute=set(range(60)), second=30),
+    cron(reconcile_unread_notifications_job, minute={7, 22, 37, 52}),
     cron(process_user_notifications_job, minute=set(range(0, 60, 10))),
     cron(run_standard_automations_job, minute=set(range(0, 60, 5))),
     cron(run_online_automations_job, minute={0, 10, 20, 30, 40, 50}),
@@ -42,10 +50,13 @@ cron_jobs = [
 async def startup(ctx):
     from arq.connections import create_pool
     ctx['redis_pool'] = await create_pool(redis_settings)
+    # Redis приложения (кэши, лента пульса) - общий на все задачи воркера
+    ctx['app_redis'] = app_redis()
     print("Воркер ARQ запущен и готов к работе.")
 
 async def shutdown(ctx):
     if 'redis_pool' in ctx: await ctx['redis_pool'].close()
+    if 'app_redis' in ctx: await ctx['app_redis'].aclose()
     print("Воркер ARQ остановлен.")
 
 class WorkerSettings:
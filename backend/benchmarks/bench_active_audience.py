@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_active_audience.py
+"""
+Бенчмарк сбора активной аудитории сообщества против фейкового VK API
+(локальный aiohttp-сервер с задержкой на запрос и на каждый вызов внутри execute).
+
+Сравниваются:
+  sequential - как было: likes.getList и wall.getComments по очереди на каждый
+               пост, только первая страница (на первых --baseline постах);
+  execute    - post_activity.collect_post_activity: execute по 25 вызовов,
+               несколько execute параллельно, все страницы.
+
+Фейковый сервер, как и VK, отвечает ошибкой 6 при превышении ~3 запросов в
+секунду на токен, поэтому время определяется скорее числом запросов; оба
+пути выдерживают лимит через RpsLimiter, колонка "error 6" должна быть 0.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_active_audience --posts 1000
+"""
+import argparse
+import asyncio
+import random
+import time
+from functools import lru_cache
+
+from app.services.post_activity import DEFAULT_EXECUTE_CONCURRENCY, RpsLimiter, collect_post_activity, fetch_post_ids
+from app.services.vk_api import VKAPI
+from benchmarks.fake_vk import FakeVKServer
+
+AUDIENCE_SIZE = 300_000
+
+
+@lru_cache(maxsize=None)
+def _post_activity(post_id: int) -> tuple[list[int], list[int]]:
+    """Лайкнувшие и авторы комментариев поста; у 10% постов активность на порядок выше."""
+    rnd = random.Random(post_id)
+    viral = rnd.random() < 0.1
+    likes = rnd.randint(1000, 6000) if viral else rnd.randint(20, 600)
+    comments = rnd.randint(100, 400) if viral else rnd.randint(0, 60)
+    return rnd.sample(range(1, AUDIENCE_SIZE), likes), [rnd.randrange(1, AUDIENCE_SIZE) for _ in range(comments)]
+
+
+def _respond(posts: int):
+    def respond(method: str, params: dict):
+        offset, count = int(params.get("offset", 0)), int(params.get("count", 100))
+        if method == "wall.get":
+            ids = range(posts - offset, max(posts - offset - count, 0), -1)
+            return {"count": posts, "items": [{"id": post_id} for post_id in ids]}
+        likers, commenters = _post_activity(int(params.get("item_id") or params.get("post_id")))
+        if method == "likes.getList":
+            return {"count": len(likers), "items": likers[offset:offset + count]}
+        return {
+            "count": len(commenters), "current_level_count": len(commenters),
+            "items": [{"from_id": from_id} for from_id in commenters[offset:offset + count]],
+        }
+    return respond
+
+
+async def run_sequential(vk_api: VKAPI, owner_id: int, posts: int) -> set[int]:
+    limiter = RpsLimiter()
+    post_ids = []
+    for offset in range(0, posts, 100):
+        await limiter.acquire()
+        page = await vk_api.wall.get(owner_id=owner_id, count=min(100, posts - offset), offset=offset)
+        post_ids += [post["id"] for post in page["items"]]
+    users = set()
+    for post_id in post_ids:
+        await limiter.acquire()
+        likes = await vk_api.likes.getList(type="post", owner_id=owner_id, item_id=post_id)
+        users.update(likes["items"])
+        await limiter.acquire()
+        comments = await vk_api.wall.getComments(owner_id=owner_id, post_id=post_id)
+        users.update(c["from_id"] for c in comments["items"])
+    return users
+
+
+async def run_execute(vk_api: VKAPI, owner_id: int, posts: int, concurrency: int) -> set[int]:
+    post_ids = await fetch_post_ids(vk_api, owner_id, posts, concurrency)
+    activity = await collect_post_activity(vk_api, owner_id, post_ids, concurrency=concurrency)
+    return activity.user_ids()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--baseline", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--call-cost-ms", type=float, default=2)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_EXECUTE_CONCURRENCY)
+    args = parser.parse_args()
+
+    total_likes = sum(len(_post_activity(post_id)[0]) for post_id in range(1, args.posts + 1))
+    print(f"posts={args.posts} total likes={total_likes:,} latency={args.latency_ms}ms call cost={args.call_cost_ms}ms")
+    print(f"{'path':<12} {'posts':>6} {'seconds':>8} {'requests':>9} {'error 6':>8} {'users':>9}")
+    async with FakeVKServer(_respond(args.posts), args.latency_ms / 1000, args.call_cost_ms / 1000) as server:
+        baseline = min(args.baseline, args.posts)
+        for name, posts, run in (
+            ("sequential", baseline, lambda api: run_sequential(api, -1, baseline)),
+            ("execute", args.posts, lambda api: run_execute(api, -1, args.posts, args.concurrency)),
+        ):
+            vk_api = server.client()
+            server.reset()
+            started = time.perf_counter()
+            try:
+                users = await run(vk_api)
+            finally:
+                await vk_api.close()
+            elapsed = time.perf_counter() - started
+            print(
+                f"{name:<12} {posts:>6} {elapsed:>8.2f} {server.requests:>9} "
+                f"{server.rate_limited:>8} {len(users):>9,}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
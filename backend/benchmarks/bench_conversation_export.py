@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_conversation_export.py
+"""
+Бенчмарк фоновой выгрузки диалога (ConversationExporter) против фейкового
+VK API: время, HTTP-запросы, размер файла и пик памяти Python (tracemalloc)
+для диалогов разной длины - пик не должен расти вместе с длиной.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_conversation_export --messages 20000 100000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.services.conversation_export import ConversationExporter
+from benchmarks.fake_vk import FakeVKServer
+
+
+def _respond(messages: int):
+    def respond(method: str, params: dict):
+        offset, count = int(params["offset"]), int(params["count"])
+        return {"count": messages, "items": [
+            {
+                "id": i + 1, "date": 1_700_000_000 + i * 60, "from_id": 1 if i % 2 else 2, "peer_id": 2,
+                "text": f"Сообщение номер {i} " * (1 + i % 4), "attachments": [], "fwd_messages": [],
+            }
+            for i in range(offset, min(offset + count, messages))
+        ]}
+    return respond
+
+
+async def run_export(messages: int, compression: str | None, latency: float) -> tuple[float, int, int, int]:
+    async with FakeVKServer(_respond(messages), latency, 0.002) as server:
+        vk_api = server.client()
+        with tempfile.TemporaryDirectory() as tmp:
+            exporter = ConversationExporter(vk_api, 2, Path(tmp) / "export", compression)
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                state = await exporter.run()
+            finally:
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                await vk_api.close()
+            assert state["rows"] == messages
+            return elapsed, server.requests, exporter.result_file.stat().st_size, peak
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, nargs="+", default=[20_000, 100_000])
+    parser.add_argument("--latency-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    compressions = [None, "zstd"]
+    print(f"{'messages':>9} {'compression':<12} {'seconds':>8} {'requests':>9} {'file MB':>8} {'peak MB':>8}")
+    for messages in args.messages:
+        for compression in compressions:
+            elapsed, requests, size, peak = await run_export(messages, compression, args.latency_ms / 1000)
+            print(
+                f"{messages:>9,} {compression or 'none':<12} {elapsed:>8.2f} {requests:>9} "
+                f"{size / 2**20:>8.1f} {peak / 2**20:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_group_member_scan.py
+"""
+Бенчмарк полной выгрузки подписчиков сообщества (GroupMemberScanner) против
+фейкового VK API: подписчиков в секунду, HTTP-запросы, размер колонок на
+диске и прирост пикового RSS процесса (должен не зависеть от размера группы).
+
+Для сравнения последовательный постраничный groups.getMembers (как
+DataService.iter_group_members) прогоняется на первых --baseline подписчиках.
+Фейковый сервер отвечает ошибкой 6 сверх ~3 запросов в секунду; оба пути
+выдерживают лимит, колонка "error 6" должна быть 0.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_group_member_scan --members 1000000
+"""
+import argparse
+import asyncio
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.column_store import ColumnStore
+from app.services.group_member_scan import DEFAULT_SCAN_CONCURRENCY, MEMBER_SCAN_FIELDS, GroupMemberScanner
+from app.services.post_activity import RpsLimiter
+from benchmarks.fake_vk import FakeVKServer
+
+
+def _respond(members: int):
+    def respond(method: str, params: dict):
+        offset, count = int(params.get("offset", 0)), int(params.get("count", 1000))
+        # id растут с пропусками, как у реальных сообществ
+        return {"count": members, "items": [
+            {
+                "id": 1000 + i * 7, "sex": i % 3, "online": i % 5 == 0,
+                "bdate": f"{i % 28 + 1}.{i % 12 + 1}" + (f".{1960 + i % 45}" if i % 3 else ""),
+                **({"city": {"id": i % 500, "title": "Город"}} if i % 4 else {}),
+                **({"deactivated": "deleted"} if i % 97 == 0 else {}),
+            }
+            for i in range(offset, min(offset + count, members))
+        ]}
+    return respond
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_sequential(server: FakeVKServer, members: int) -> int:
+    vk_api = server.client()
+    limiter = RpsLimiter()
+    fetched = 0
+    try:
+        while fetched < members:
+            await limiter.acquire()
+            page = await vk_api.groups.getMembers(group_id=1, count=1000, offset=fetched, fields=MEMBER_SCAN_FIELDS)
+            fetched += len(page["items"])
+    finally:
+        await vk_api.close()
+    return fetched
+
+
+async def run_scan(server: FakeVKServer, directory: Path, concurrency: int) -> int:
+    vk_api = server.client()
+    try:
+        return await GroupMemberScanner(vk_api, 1, directory, concurrency=concurrency).run()
+    finally:
+        await vk_api.close()
+
+
+def _report(name: str, rows: int, elapsed: float, server: FakeVKServer):
+    print(
+        f"{name:<12} {rows:>10,} {elapsed:>8.2f} {rows / elapsed:>12,.0f} "
+        f"{server.requests:>9} {server.rate_limited:>8}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=1_000_000)
+    parser.add_argument("--baseline", type=int, default=50_000)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--call-cost-ms", type=float, default=2)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_SCAN_CONCURRENCY)
+    args = parser.parse_args()
+
+    print(f"members={args.members:,} latency={args.latency_ms}ms call cost={args.call_cost_ms}ms")
+    print(f"{'path':<12} {'members':>10} {'seconds':>8} {'members/s':>12} {'requests':>9} {'error 6':>8}")
+    async with FakeVKServer(_respond(args.members), args.latency_ms / 1000, args.call_cost_ms / 1000) as server:
+        started = time.perf_counter()
+        rows = await run_sequential(server, min(args.baseline, args.members))
+        _report("sequential", rows, time.perf_counter() - started, server)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            rss_before = _peak_rss_mb()
+            server.reset()
+            started = time.perf_counter()
+            rows = await run_scan(server, Path(tmp) / "scan", args.concurrency)
+            _report("scan", rows, time.perf_counter() - started, server)
+
+            store = ColumnStore.open(Path(tmp) / "scan")
+            disk = sum((Path(tmp) / "scan" / f"{name}.bin").stat().st_size for name in store.fields)
+            print(f"columns on disk: {disk / 2**20:.1f} MB ({disk / rows:.1f} B/member)")
+            print(f"peak RSS growth during scan: {_peak_rss_mb() - rss_before:.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,200 @@
+# backend/benchmarks/bench_heatmaps.py
+"""
+Бенчмарк построения тепловых карт: задача _generate_all_heatmaps_async целиком
+(friends.get у фейкового VK API, слияние наблюдений в Redis, биннинг в пуле
+процессов и upsert карт в БД) на USERS пользователях по FRIENDS друзей.
+Два прогона: первичный (хранилище наблюдений пустое) и инкрементальный, в
+котором треть друзей заходила снова.
+
+Нужны база с примененными миграциями и Redis из настроек. Задача обрабатывает
+всех пользователей с тарифами HEATMAP_PLANS, поэтому запускать на базе без
+реальных пользователей. Скрипт создает временных пользователей (и тариф, если
+его нет) и удаляет все за собой. Хранилище наблюдений занимает в Redis около
+16 байт на друга: 10 000 x 5 000 - около 800 МБ.
+
+С --merge-only прогоняется только merge_last_seen в пуле процессов (без VK,
+БД и Redis).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_heatmaps --users 10000 --friends 5000
+    python -m benchmarks.bench_heatmaps --merge-only --users 10000 --friends 5000 --workers 4
+"""
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+from redis.asyncio import Redis
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.security import encrypt_data
+from app.db.models import Plan, PostActivityHeatmap, User
+from app.services.activity_heatmap import merge_last_seen
+from app.services.vk_api import VKAPI
+from app.tasks.logic.analytics_jobs import (
+    HEATMAP_PLANS, HEATMAP_STORE_KEY, HEATMAP_WINDOW, _generate_all_heatmaps_async
+)
+from benchmarks.fake_vk import FakeVKServer
+
+DAY = 24 * 3600
+WINDOW_SECONDS = int(HEATMAP_WINDOW.total_seconds())
+# vk_id временных пользователей отрицательные, чтобы не пересечься с настоящими
+BENCH_VK_ID_BASE = -10**12
+
+
+def _friends_response(friends: int, state: dict):
+    def respond(method: str, params: dict):
+        user_id = int(params["user_id"])
+        rnd = random.Random(user_id)
+        now = int(time.time())
+        items = []
+        for i in range(friends):
+            seen = now - rnd.randint(0, 30 * DAY)
+            if state["returned"] and i % 3 == 0:
+                seen = now - rnd.randint(0, DAY)
+            items.append({"id": abs(user_id) % 10**6 * friends + i, "last_seen": {"time": seen, "platform": 7}})
+        return {"count": friends, "items": items}
+    return respond
+
+
+def _redirected_vk_api(base_url: str) -> type[VKAPI]:
+    class BenchVKAPI(VKAPI):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.base_url = base_url
+    return BenchVKAPI
+
+
+async def _seed(session_factory, users: int) -> tuple[list[int], int | None]:
+    """Создает пользователей на тарифе с картой; возвращает их id и id созданного тарифа."""
+    async with session_factory() as session:
+        plan_id = (await session.execute(select(Plan.id).where(Plan.name_id.in_(HEATMAP_PLANS)))).scalars().first()
+        created_plan = None
+        if plan_id is None:
+            plan = Plan(name_id=HEATMAP_PLANS[0], display_name="bench", description="bench", limits={}, available_features=[])
+            session.add(plan)
+            await session.flush()
+            plan_id = created_plan = plan.id
+        rows = [
+            {"vk_id": BENCH_VK_ID_BASE - i, "encrypted_vk_token": encrypt_data(f"bench-{i}"), "plan_id": plan_id}
+            for i in range(users)
+        ]
+        user_ids = (await session.execute(User.__table__.insert().returning(User.id), rows)).scalars().all()
+        await session.commit()
+    return list(user_ids), created_plan
+
+
+async def _cleanup(session_factory, user_ids: list[int], plan_id: int | None):
+    redis = Redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/3")
+    try:
+        for i in range(0, len(user_ids), 1000):
+            await redis.delete(*[HEATMAP_STORE_KEY.format(user_id=user_id) for user_id in user_ids[i:i + 1000]])
+    finally:
+        await redis.aclose()
+    async with session_factory() as session:
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        if plan_id is not None:
+            await session.execute(delete(Plan).where(Plan.id == plan_id))
+        await session.commit()
+
+
+async def run_job(args):
+    engine = create_async_engine(args.dsn, connect_args={"statement_cache_size": 0})
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    state = {"returned": False}
+    started = time.perf_counter()
+    user_ids, plan_id = await _seed(session_factory, args.users)
+    print(f"seeded {args.users:,} users in {time.perf_counter() - started:.1f}s")
+    try:
+        async with FakeVKServer(_friends_response(args.friends, state), args.latency, 0) as server:
+            with patch("app.services.base.VKAPI", _redirected_vk_api(server.base_url)):
+                print(f"users={args.users} friends={args.friends} latency={args.latency}s")
+                for label in ("first run", "incremental run"):
+                    server.reset()
+                    started = time.perf_counter()
+                    async with session_factory() as session:
+                        await _generate_all_heatmaps_async(session)
+                    elapsed = time.perf_counter() - started
+                    async with session_factory() as session:
+                        heatmaps = (await session.execute(
+                            select(func.count()).select_from(PostActivityHeatmap).where(PostActivityHeatmap.user_id.in_(user_ids))
+                        )).scalar_one()
+                    print(
+                        f"{label + ':':17}{elapsed:8.2f}s  ({args.users / elapsed:,.0f} users/s, "
+                        f"{server.requests} requests, error 6: {server.rate_limited}, heatmaps: {heatmaps})"
+                    )
+                    state["returned"] = True
+    finally:
+        await _cleanup(session_factory, user_ids, plan_id)
+        await engine.dispose()
+
+
+def _fake_last_seen(friends: int, now_ts: int) -> tuple[list[int], list[int]]:
+    friend_ids = random.sample(range(1, 500_000_000), friends)
+    seen_times = [now_ts - random.randint(0, 30 * DAY) for _ in range(friends)]
+    return friend_ids, seen_times
+
+
+def _run_merge(
+    executor: ProcessPoolExecutor, users: list, stored: list, cutoff_ts: int, keep_states: bool = False
+) -> tuple[float, list]:
+    started = time.perf_counter()
+    # Как в задаче: списки из ответа VK переводятся в массивы перед отправкой в пул
+    futures = [
+        executor.submit(
+            merge_last_seen, stored[i],
+            np.array(friend_ids, dtype=np.int64), np.array(seen_times, dtype=np.int64), cutoff_ts,
+        )
+        for i, (friend_ids, seen_times) in enumerate(users)
+    ]
+    # Задача отправляет состояния в Redis и не держит их в памяти; здесь они нужны только после первого прогона
+    states = [future.result()[0] if keep_states else None for future in futures]
+    return time.perf_counter() - started, states
+
+
+def run_merge(args):
+    now_ts = int(time.time())
+    cutoff_ts = now_ts - WINDOW_SECONDS
+    samples = [_fake_last_seen(args.friends, now_ts) for _ in range(min(args.distinct_users, args.users))]
+    users = [samples[i % len(samples)] for i in range(args.users)]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        first_run, stored = _run_merge(executor, users, [None] * args.users, cutoff_ts, keep_states=True)
+        # Сутки спустя: часть друзей заходила снова
+        next_ts = now_ts + DAY
+        users = [(ids, [t + DAY if i % 3 == 0 else t for i, t in enumerate(times)]) for ids, times in users]
+        incremental_run, _ = _run_merge(executor, users, stored, next_ts - WINDOW_SECONDS)
+        # Те же данные без накопленного хранилища: слияние не должно быть медленнее пересчета
+        recompute_run, _ = _run_merge(executor, users, [None] * args.users, next_ts - WINDOW_SECONDS)
+
+    total = args.users * args.friends
+    print(f"merge only: users={args.users} friends={args.friends} workers={args.workers}")
+    print(f"first run:       {first_run:8.2f}s  ({total / first_run:,.0f} observations/s)")
+    print(f"incremental run: {incremental_run:8.2f}s  ({total / incremental_run:,.0f} observations/s)")
+    print(f"recompute:       {recompute_run:8.2f}s  ({total / recompute_run:,.0f} observations/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--friends", type=int, default=5_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Задержка ответа фейкового VK, с")
+    parser.add_argument("--dsn", default=settings.database_url)
+    parser.add_argument("--merge-only", action="store_true")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--distinct-users", type=int, default=200, help="Сколько разных наборов друзей сгенерировать (--merge-only)")
+    args = parser.parse_args()
+
+    if args.merge_only:
+        run_merge(args)
+    else:
+        asyncio.run(run_job(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_keyset_pagination.py
+"""
+Бенчмарк пагинации истории задач: OFFSET + COUNT(*) против keyset по
+(created_at, id) на одном пользователе с ROWS записями.
+
+Нужна база с примененными миграциями (индексы ix_task_history_user_*).
+Скрипт создает временного пользователя, заполняет историю через
+generate_series и удаляет все за собой.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_keyset_pagination --rows 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.pagination import apply_keyset, split_page
+from app.core.config import settings
+from app.db.models import TaskHistory, User
+
+PAGE_SIZE = 25
+DEPTHS = (1, 100, 1_000, 10_000, 39_999)
+REPEATS = 5
+
+
+async def _timed(conn, stmt) -> tuple[float, list]:
+    samples, rows = [], []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        rows = (await conn.execute(stmt)).all()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, rows
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dsn", default=settings.database_url)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.dsn, connect_args={"statement_cache_size": 0})
+    async with engine.begin() as conn:
+        user_id = (await conn.execute(
+            User.__table__.insert().values(vk_id=-int(time.time()), encrypted_vk_token="bench").returning(User.id)
+        )).scalar_one()
+        started = time.perf_counter()
+        await conn.execute(text("""
+            INSERT INTO task_history (user_id, task_name, status, created_at, updated_at)
+            SELECT :user_id, 'bench', (ARRAY['SUCCESS', 'FAILURE', 'CANCELLED'])[1 + i % 3],
+                   now() - make_interval(secs => i), now()
+            FROM generate_series(1, :rows) AS i
+        """), {"user_id": user_id, "rows": args.rows})
+        await conn.execute(text("ANALYZE task_history"))
+        print(f"seeded {args.rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    try:
+        async with engine.connect() as conn:
+            base = select(TaskHistory.id, TaskHistory.created_at).where(TaskHistory.user_id == user_id)
+            count_ms, _ = await _timed(conn, select(func.count()).select_from(base.subquery()))
+            print(f"COUNT(*): {count_ms:8.2f} ms")
+            print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+
+            # Курсоры на нужных глубинах получаем заранее, проходя страницы keyset-запросами
+            cursors, cursor = {1: None}, None
+            for page in range(1, max(DEPTHS)):
+                rows = (await conn.execute(apply_keyset(base, TaskHistory.created_at, TaskHistory.id, cursor, PAGE_SIZE))).all()
+                _, cursor = split_page(rows, PAGE_SIZE)
+                if page + 1 in DEPTHS:
+                    cursors[page + 1] = cursor
+                if cursor is None or page + 1 >= args.rows // PAGE_SIZE:
+                    break
+
+            for depth in DEPTHS:
+                if depth not in cursors:
+                    continue
+                offset_stmt = base.order_by(TaskHistory.created_at.desc()).offset((depth - 1) * PAGE_SIZE).limit(PAGE_SIZE)
+                keyset_stmt = apply_keyset(base, TaskHistory.created_at, TaskHistory.id, cursors[depth], PAGE_SIZE)
+                offset_ms, offset_rows = await _timed(conn, offset_stmt)
+                keyset_ms, keyset_rows = await _timed(conn, keyset_stmt)
+                assert [r.id for r in offset_rows] == [r.id for r in keyset_rows[:PAGE_SIZE]]
+                print(f"{depth:>8} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(delete(TaskHistory).where(TaskHistory.user_id == user_id))
+            await conn.execute(delete(User).where(User.id == user_id))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
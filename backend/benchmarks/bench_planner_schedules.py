@@ -0,0 +1,117 @@
+# backend/benchmarks/bench_planner_schedules.py
+"""
+Бенчмарк сборки событий сценариев для /planner/master-plan: SCHEDULES
+расписаний на пользователя, месячное окно.
+
+Сравниваются три пути:
+  croniter    - разворот каждого расписания заново (как было до кэша);
+  expansion   - общий кэш разворотов, события собираются заново;
+  plan cache  - попадание в UserPlanCache (версия расписаний не менялась).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_planner_schedules --users 200 --schedules 300
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from croniter import croniter
+
+from app.api.schemas.planner import PlannerEvent
+from app.services.schedule_expansion import UserPlanCache, _expand, expand_schedule
+
+# Реальные расписания в основном из небольшого набора "каждый день в HH:MM" и "по будням"
+HOURS = range(7, 23)
+MINUTES = (0, 15, 30, 45)
+
+
+def _random_schedule() -> str:
+    kind = random.random()
+    if kind < 0.6:
+        return f"{random.choice(MINUTES)} {random.choice(HOURS)} * * *"
+    if kind < 0.9:
+        return f"{random.choice(MINUTES)} {random.choice(HOURS)} * * 1-5"
+    return f"{random.choice(MINUTES)} */{random.choice((2, 3, 4, 6))} * * *"
+
+
+def _events(scenarios, occurrences_for) -> list[PlannerEvent]:
+    events = []
+    for scenario_id, schedule in scenarios:
+        events.extend(
+            PlannerEvent(id=f"scenario_{scenario_id}_{run.timestamp()}", type="scenario", title="Сценарий", start_time=run)
+            for run in occurrences_for(schedule)
+        )
+    events.sort(key=lambda x: x.start_time)
+    return events
+
+
+def _timed(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--schedules", type=int, default=300)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    start = datetime.combine(datetime.now().date(), datetime.min.time())
+    end = start + timedelta(days=args.days) - timedelta(microseconds=1)
+    users = [
+        [(u * args.schedules + i, _random_schedule()) for i in range(args.schedules)]
+        for u in range(args.users)
+    ]
+
+    def raw_croniter(schedule):
+        it, runs = croniter(schedule, start), []
+        while (run := it.get_next(datetime)) <= end:
+            runs.append(run)
+        return runs
+
+    def run_croniter():
+        for scenarios in users:
+            _events(scenarios, raw_croniter)
+
+    def run_expansion():
+        for scenarios in users:
+            _events(scenarios, lambda schedule: expand_schedule(schedule, start, end))
+
+    plan_cache = UserPlanCache(maxsize=args.users)
+    for user_id, scenarios in enumerate(users):
+        plan_cache.put(user_id, (start, end), _events(scenarios, lambda schedule: expand_schedule(schedule, start, end)))
+
+    def run_plan_cache():
+        for user_id in range(args.users):
+            plan_cache.get(user_id, (start, end))
+
+    croniter_ms = _timed(run_croniter, args.repeats)
+    _expand.cache_clear()
+    cold_expansion_ms = _timed(run_expansion, 1)
+    expansion_ms = _timed(run_expansion, args.repeats)
+    plan_cache_ms = _timed(run_plan_cache, args.repeats)
+
+    events = sum(len(plan_cache.get(u, (start, end))) for u in range(args.users))
+    info = _expand.cache_info()
+    print(f"users={args.users} schedules/user={args.schedules} days={args.days} events={events:,}")
+    print(f"distinct expansions: {info.currsize}")
+    print(f"{'path':<22} {'total ms':>10} {'per user ms':>12}")
+    for name, ms in (
+        ("croniter", croniter_ms),
+        ("expansion (cold)", cold_expansion_ms),
+        ("expansion (warm)", expansion_ms),
+        ("plan cache hit", plan_cache_ms),
+    ):
+        print(f"{name:<22} {ms:>10.1f} {ms / args.users:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_profile_memory.py
+"""
+Бенчмарк памяти на профили VK: словари из ответа API против компактных
+VKProfile (services/vk_api/profiles.py).
+
+Профили генерируются как ответ friends.get с полями, которые запрашивают
+сервисы, и разбираются из JSON, как в клиенте - у каждого профиля свои
+объекты строк. Память считается tracemalloc относительно состояния до
+загрузки, после того как исходные словари освобождены. На 100k профилей
+(CPython 3.11): словари ~172 МБ (1.8 КБ на профиль), VKProfile ~34 МБ (350 байт).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_profile_memory --profiles 100000
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+
+import orjson
+
+from app.services.vk_api import parse_profiles
+
+FIRST_NAMES = ["Александр", "Анна", "Дмитрий", "Екатерина", "Максим", "Мария", "Сергей", "Ольга", "Иван", "Юлия"]
+CITIES = [(1, "Москва"), (2, "Санкт-Петербург"), (60, "Казань"), (99, "Новосибирск"), (49, "Екатеринбург")]
+STATUSES = ["", "", "", "Ищу работу", "Люблю путешествия", "Все будет хорошо"]
+
+
+def make_response(count: int) -> bytes:
+    rnd = random.Random(48)
+    items = []
+    for i in range(count):
+        city_id, city_title = rnd.choice(CITIES)
+        items.append({
+            "id": 100_000 + i, "first_name": rnd.choice(FIRST_NAMES), "last_name": f"Фамилия{rnd.randint(1, 5000)}",
+            "can_access_closed": True, "is_closed": rnd.random() < 0.3, "sex": rnd.choice((1, 2)),
+            "online": int(rnd.random() < 0.15), "last_seen": {"platform": 7, "time": 1_700_000_000 - rnd.randint(0, 10**7)},
+            "city": {"id": city_id, "title": city_title}, "status": rnd.choice(STATUSES),
+            "bdate": f"{rnd.randint(1, 28)}.{rnd.randint(1, 12)}.{rnd.randint(1960, 2006)}",
+            "photo_id": f"{100_000 + i}_{rnd.randint(1, 10**9)}", "track_code": f"{rnd.getrandbits(64):x}",
+            "counters": {"friends": rnd.randint(0, 5000), "followers": rnd.randint(0, 500)},
+        })
+    return orjson.dumps({"count": count, "items": items})
+
+
+def _traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure(payload: bytes, mode: str) -> int:
+    """Байт в памяти на весь список профилей после разбора."""
+    baseline = _traced()
+    items = orjson.loads(payload)["items"]
+    if mode == "dicts":
+        profiles = items
+    else:
+        profiles = parse_profiles(items, keep_raw=mode == "records+raw")
+    del items
+    used = _traced() - baseline
+    del profiles
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=100_000)
+    args = parser.parse_args()
+
+    payload = make_response(args.profiles)
+    tracemalloc.start()
+    print(f"profiles={args.profiles:,}")
+    print(f"{'representation':<14} {'MB':>8} {'bytes/profile':>14}")
+    for mode in ("dicts", "records", "records+raw"):
+        used = measure(payload, mode)
+        print(f"{mode:<14} {used / 2**20:>8.1f} {used / args.profiles:>14,.0f}")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/benchmarks/fake_vk.py
+"""
+Фейковый VK API для бенчмарков: локальный aiohttp-сервер, который отвечает
+на /method/<name> и /method/execute функцией respond(method, params) с
+задержкой latency на запрос и call_cost на каждый вызов внутри execute.
+Как и VK, отвечает ошибкой 6, если запросов с одного токена больше
+VK_RATE_LIMIT_RPS в секунду.
+"""
+import asyncio
+import json
+import re
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable
+
+from aiohttp import web
+
+from app.services.vk_api import VKAPI
+
+VK_RATE_LIMIT_RPS = 3
+_CALL_RE = re.compile(r"API\.([\w.]+)\(")
+
+
+def parse_execute_code(code: str) -> list[tuple[str, dict]]:
+    """Разбирает код, который собирает VKAPI.execute: return [API.m({...}),...];"""
+    calls, decoder, pos = [], json.JSONDecoder(), 0
+    while match := _CALL_RE.search(code, pos):
+        params, pos = decoder.raw_decode(code, match.end())
+        calls.append((match.group(1), params))
+    return calls
+
+
+class FakeVKServer:
+    def __init__(self, respond: Callable[[str, dict], Any], latency: float, call_cost: float):
+        self.respond = respond
+        self.latency = latency
+        self.call_cost = call_cost
+        self.requests = 0
+        self.rate_limited = 0
+        self._accepted: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=VK_RATE_LIMIT_RPS))
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    def reset(self):
+        """Обнуляет счетчики и окно лимита перед следующим прогоном."""
+        self.requests = self.rate_limited = 0
+        self._accepted.clear()
+
+    def _over_rate_limit(self, token: str) -> bool:
+        now, accepted = time.monotonic(), self._accepted[token]
+        if len(accepted) == VK_RATE_LIMIT_RPS and now - accepted[0] < 1:
+            self.rate_limited += 1
+            return True
+        accepted.append(now)
+        return False
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        data = dict(await request.post())
+        if self._over_rate_limit(data.get("access_token", "")):
+            return web.json_response({"error": {"error_code": 6, "error_msg": "Too many requests per second"}})
+        method = request.match_info["method"]
+        if method == "execute":
+            calls = parse_execute_code(data["code"])
+            await asyncio.sleep(self.latency + self.call_cost * len(calls))
+            return web.json_response({"response": [self.respond(m, p) for m, p in calls]})
+        await asyncio.sleep(self.latency + self.call_cost)
+        return web.json_response({"response": self.respond(method, data)})
+
+    async def __aenter__(self) -> "FakeVKServer":
+        app = web.Application(client_max_size=0)
+        app.router.add_post("/method/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/method/"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+    def client(self) -> VKAPI:
+        vk_api = VKAPI(access_token="bench")
+        vk_api.base_url = self.base_url
+        return vk_api
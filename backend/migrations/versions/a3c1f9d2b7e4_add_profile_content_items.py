@@ -0,0 +1,38 @@
+"""Add profile content items
+
+Revision ID: a3c1f9d2b7e4
+Revises: 6faf6a91f250
+Create Date: 2026-10-19 10:12:31.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1f9d2b7e4'
+down_revision: Union[str, Sequence[str], None] = '6faf6a91f250'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('profile_content_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('item_type', sa.String(), nullable=False),
+    sa.Column('item_id', sa.BigInteger(), nullable=False),
+    sa.Column('likes_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_profile_content_items_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_profile_content_items')),
+    sa.UniqueConstraint('user_id', 'item_type', 'item_id', name='_user_content_item_uc')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('profile_content_items')
@@ -0,0 +1,45 @@
+"""Recompute stats rollups from daily stats
+
+Revision ID: b7e2d4c8a915
+Revises: a3c1f9d2b7e4
+Create Date: 2026-10-19 11:02:47.530114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4c8a915'
+down_revision: Union[str, Sequence[str], None] = 'a3c1f9d2b7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_TABLES = ('weekly_stats', 'monthly_stats')
+NEW_COUNTER_COLUMNS = (
+    'stories_viewed_count', 'friends_removed_count', 'messages_sent_count',
+    'posts_created_count', 'groups_joined_count', 'groups_left_count',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ROLLUP_TABLES:
+        for column in NEW_COUNTER_COLUMNS:
+            op.add_column(table, sa.Column(column, sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.create_table('stats_rollup_watermarks',
+    sa.Column('rollup', sa.String(), nullable=False),
+    sa.Column('processed_through', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('rollup', name=op.f('pk_stats_rollup_watermarks'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stats_rollup_watermarks')
+    for table in ROLLUP_TABLES:
+        for column in NEW_COUNTER_COLUMNS:
+            op.drop_column(table, column)
@@ -0,0 +1,32 @@
+"""Add updated_at to scenarios, automations and scheduled posts
+
+Revision ID: c4d8e1f2a6b3
+Revises: b7e2d4c8a915
+Create Date: 2026-10-19 12:41:09.218473
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e1f2a6b3'
+down_revision: Union[str, Sequence[str], None] = 'b7e2d4c8a915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('scenarios', 'automations', 'scheduled_posts')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, 'updated_at')
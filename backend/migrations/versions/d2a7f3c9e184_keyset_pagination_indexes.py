@@ -0,0 +1,38 @@
+"""Keyset pagination indexes for task history and notifications
+
+Revision ID: d2a7f3c9e184
+Revises: c4d8e1f2a6b3
+Create Date: 2026-10-19 13:27:52.604318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7f3c9e184'
+down_revision: Union[str, Sequence[str], None] = 'c4d8e1f2a6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблицы большие: индексы строятся без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_history_user_created_id', 'task_history', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_task_history_user_status_created_id', 'task_history', ['user_id', 'status', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        # Покрывается префиксом ix_task_history_user_status_created_id (в части баз его нет - схема
+        # создавалась через create_all)
+        op.drop_index('ix_task_history_user_status', table_name='task_history', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_history_user_status', 'task_history', ['user_id', 'status'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_notifications_user_created_id', table_name='notifications', postgresql_concurrently=True)
+        op.drop_index('ix_task_history_user_status_created_id', table_name='task_history', postgresql_concurrently=True)
+        op.drop_index('ix_task_history_user_created_id', table_name='task_history', postgresql_concurrently=True)
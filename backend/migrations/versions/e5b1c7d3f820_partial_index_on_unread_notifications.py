@@ -0,0 +1,33 @@
+"""Partial index on unread notifications
+
+Revision ID: e5b1c7d3f820
+Revises: d2a7f3c9e184
+Create Date: 2026-10-19 15:02:11.318420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1c7d3f820'
+down_revision: Union[str, Sequence[str], None] = 'd2a7f3c9e184'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_user_unread', 'notifications', ['user_id'], unique=False,
+            postgresql_where=sa.text('is_read = false'), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notifications_user_unread', table_name='notifications', postgresql_concurrently=True)
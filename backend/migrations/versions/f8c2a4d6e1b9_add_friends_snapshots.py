@@ -0,0 +1,42 @@
+"""Add friends snapshots
+
+Revision ID: f8c2a4d6e1b9
+Revises: e5b1c7d3f820
+Create Date: 2026-10-19 16:40:12.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8c2a4d6e1b9'
+down_revision: Union[str, Sequence[str], None] = 'e5b1c7d3f820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('friends_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('friends_count', sa.Integer(), nullable=False),
+    sa.Column('friend_ids', sa.LargeBinary(), nullable=False),
+    sa.Column('added_ids', sa.LargeBinary(), nullable=True),
+    sa.Column('removed_ids', sa.LargeBinary(), nullable=True),
+    sa.Column('added_count', sa.Integer(), nullable=False),
+    sa.Column('removed_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_friends_snapshots_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_friends_snapshots')),
+    sa.UniqueConstraint('user_id', 'date', name='_user_date_friends_snapshot_uc')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('friends_snapshots')
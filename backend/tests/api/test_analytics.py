@@ -2,11 +2,14 @@
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, timedelta
+from unittest.mock import AsyncMock
 
-from app.db.models import User, ProfileMetric, FriendRequestLog, PostActivityHeatmap
+from app.db.models import User, ProfileMetric, FriendRequestLog, PostActivityHeatmap, FriendsSnapshot
 from app.core.enums import FriendRequestStatus
+from app.services.friend_snapshots import FriendSnapshotStore, unpack_ids
 
 # Инициализируем кеш для тестов, чтобы избежать ошибки AssertionError
 from fastapi_cache import FastAPICache
@@ -62,6 +65,58 @@ async def test_get_profile_growth_analytics(async_client: AsyncClient, auth_head
     assert data[1]["total_photo_likes"] == 510
 
 
+async def test_get_friends_churn(async_client: AsyncClient, auth_headers: dict, test_user: User, db_session: AsyncSession):
+    """Тест притока/оттока друзей по дневным снимкам."""
+    today = date.today()
+    db_session.add_all([
+        FriendsSnapshot(user_id=test_user.id, date=today - timedelta(days=40), friends_count=90, friend_ids=b""),
+        FriendsSnapshot(user_id=test_user.id, date=today - timedelta(days=2), friends_count=100, friend_ids=b""),
+        FriendsSnapshot(
+            user_id=test_user.id, date=today, friends_count=103, friend_ids=b"", added_count=5, removed_count=2
+        ),
+    ])
+    await db_session.commit()
+
+    response = await async_client.get("/api/v1/analytics/friends-churn?days=7", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [item["friends_count"] for item in data] == [100, 103]
+    assert data[1]["added_count"] == 5
+    assert data[1]["removed_count"] == 2
+
+
+async def test_friend_snapshot_records_diff_against_previous_day(
+    test_user: User, db_session: AsyncSession, mocker
+):
+    """Тест: снимок хранит добавленных/удаленных к прошлому дню, повторная запись за день сравнивает с ним же."""
+    # Своя сессия снимка работает на соединении теста и откатывается вместе с ним
+    mocker.patch(
+        "app.services.friend_snapshots.AsyncSessionFactory",
+        lambda: AsyncSession(bind=db_session.bind, expire_on_commit=False),
+    )
+    store = FriendSnapshotStore(AsyncMock(), user_id=test_user.id)
+    today = date.today()
+
+    await store._record(today - timedelta(days=1), [10, 20, 30])
+    await store._record(today, [30, 20, 40, 50])
+    await store._record(today, [50, 20, 40, 60])
+
+    yesterday_row, today_row = (await db_session.execute(
+        select(FriendsSnapshot)
+        .where(FriendsSnapshot.user_id == test_user.id)
+        .order_by(FriendsSnapshot.date)
+        .execution_options(populate_existing=True)
+    )).scalars().all()
+    assert yesterday_row.friends_count == 3
+    assert yesterday_row.added_ids is None and yesterday_row.added_count == 0
+    assert today_row.friends_count == 4
+    assert unpack_ids(today_row.friend_ids).tolist() == [20, 40, 50, 60]
+    assert unpack_ids(today_row.added_ids).tolist() == [40, 50, 60]
+    assert unpack_ids(today_row.removed_ids).tolist() == [10, 30]
+    assert (today_row.added_count, today_row.removed_count) == (3, 2)
+
+
 async def test_get_friend_request_conversion_stats(async_client: AsyncClient, auth_headers: dict, test_user: User, db_session: AsyncSession):
     """Тест статистики по конверсии заявок в друзья."""
     requests = []
@@ -3,6 +3,10 @@
 import pytest
 from httpx import AsyncClient
 from unittest.mock import AsyncMock
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import TaskHistory, User
+from app.services.parsing_results import ParsingResultWriter
 
 pytestmark = pytest.mark.anyio
 
@@ -14,85 +18,98 @@ def mock_data_service(mocker):
     """
     mock_service_class = mocker.patch("app.api.endpoints.data.DataService")
     mock_instance = mock_service_class.return_value
-    # Настраиваем моки для всех методов, которые будут вызываться
-    mock_instance.parse_active_group_audience = AsyncMock(return_value=[{"id": 1, "first_name": "Активный"}])
-    mock_instance.parse_group_members = AsyncMock(return_value=[{"id": 2, "first_name": "Подписчик"}])
-    mock_instance.parse_user_wall = AsyncMock(return_value=[{"id": 101, "text": "Мой пост"}])
-    mock_instance.parse_top_active_users = AsyncMock(return_value=[{"user_info": {"id": 4}, "activity_score": 10}])
     
     # Мок для стриминга
     async def mock_stream_generator(*args, **kwargs):
-        yield '{"message": "hello"}'
-    mock_instance.export_conversation_as_json = mock_stream_generator
+        yield b'{"message": "hello"}\n'
+    mock_instance.export_conversation_jsonl = mock_stream_generator
     
     # Важно: мокаем __aenter__ и __aexit__ для async with
     mock_instance.vk_api = AsyncMock()
     mock_instance.vk_api.close = AsyncMock()
+    mock_instance.close = AsyncMock()
 
     return mock_instance
 
 class TestDataApiEndpoints:
 
-    async def test_parse_group_activity(
-        self, async_client: AsyncClient, auth_headers: dict, mock_data_service: AsyncMock
+    @pytest.mark.parametrize("path, payload, kind, job_function", [
+        ("parse/group-activity", {"group_id": 123, "filters": {"posts_depth": 5}}, "group_activity", "parse_data_task"),
+        ("parse/group-members", {"group_id": 456, "count": 100}, "group_members", "parse_data_task"),
+        ("parse/group-members/full", {"group_id": 456}, "group_members_scan", "scan_group_members_task"),
+        ("parse/user-wall", {"user_id": 789, "count": 50}, "user_wall", "parse_data_task"),
+        ("export/conversation", {"peer_id": 2000000001}, "conversation_export", "export_conversation_task"),
+        ("parse/discussion-contacts", {"group_id": 1, "topic_ids": [5]}, "discussion_contacts", "parse_data_task"),
+        ("parse/resolve-links", {"links": ["https://vk.com/durov"]}, "resolve_links", "parse_data_task"),
+        ("parse/group-top-active", {"group_id": 111, "posts_depth": 10, "top_n": 5}, "group_top_active", "parse_data_task"),
+    ])
+    async def test_parse_endpoints_enqueue_background_job(
+        self, async_client: AsyncClient, auth_headers: dict, mock_arq_pool: AsyncMock,
+        db_session: AsyncSession, path: str, payload: dict, kind: str, job_function: str
     ):
-        """Тест эндпоинта для парсинга активной аудитории сообщества."""
-        response = await async_client.post(
-            "/api/v1/data/parse/group-activity",
-            headers=auth_headers,
-            json={"group_id": 123, "filters": {"posts_depth": 5}}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert len(data) == 1
-        assert data[0]["first_name"] == "Активный"
-        mock_data_service.parse_active_group_audience.assert_awaited_once()
+        """Тест: парсинг не выполняется в запросе, а ставится в очередь с записью в истории."""
+        response = await async_client.post(f"/api/v1/data/{path}", headers=auth_headers, json=payload)
 
-    async def test_parse_group_members(
-        self, async_client: AsyncClient, auth_headers: dict, mock_data_service: AsyncMock
-    ):
-        """Тест эндпоинта для парсинга подписчиков сообщества."""
-        response = await async_client.post(
-            "/api/v1/data/parse/group-members",
-            headers=auth_headers,
-            json={"group_id": 456, "count": 100}
-        )
-        
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = response.json()
-        assert data[0]["first_name"] == "Подписчик"
-        mock_data_service.parse_group_members.assert_awaited_once_with(456, 100)
+        mock_arq_pool.enqueue_job.assert_awaited_once()
+        assert mock_arq_pool.enqueue_job.await_args.args[0] == job_function
+        task_history = await db_session.get(TaskHistory, data["task_history_id"])
+        assert task_history.status == "PENDING"
+        assert task_history.parameters["kind"] == kind
+        assert task_history.parameters["request"] == {**payload, **task_history.parameters["request"]}
 
-    async def test_parse_user_wall(
-        self, async_client: AsyncClient, auth_headers: dict, mock_data_service: AsyncMock
+    @pytest.mark.parametrize("path, key", [
+        ("parse/group-members/full", "group_id"),
+        ("export/conversation", "peer_id"),
+    ])
+    async def test_resumable_export_rejects_duplicate_while_running(
+        self, async_client: AsyncClient, auth_headers: dict, mock_arq_pool: AsyncMock, db_session: AsyncSession,
+        path: str, key: str
     ):
-        """Тест эндпоинта для парсинга стены пользователя."""
-        response = await async_client.post(
-            "/api/v1/data/parse/user-wall",
-            headers=auth_headers,
-            json={"user_id": 789, "count": 50}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data[0]["text"] == "Мой пост"
-        mock_data_service.parse_user_wall.assert_awaited_once_with(789, 50)
+        """Тест: повторная выгрузка того же объекта не ставится, пока первая не завершилась."""
+        url = f"/api/v1/data/{path}"
+        first = await async_client.post(url, headers=auth_headers, json={key: 456})
+        duplicate = await async_client.post(url, headers=auth_headers, json={key: 456})
+        other = await async_client.post(url, headers=auth_headers, json={key: 457})
 
-    async def test_parse_top_active_users(
-        self, async_client: AsyncClient, auth_headers: dict, mock_data_service: AsyncMock
+        task_history = await db_session.get(TaskHistory, first.json()["task_history_id"])
+        task_history.status = "SUCCESS"
+        await db_session.commit()
+        after_finish = await async_client.post(url, headers=auth_headers, json={key: 456})
+
+        assert first.status_code == 202
+        assert duplicate.status_code == 409
+        assert other.status_code == 202
+        assert after_finish.status_code == 202
+        assert mock_arq_pool.enqueue_job.await_count == 3
+
+    async def test_download_parsing_result_streams_csv_and_jsonl(
+        self, async_client: AsyncClient, auth_headers: dict, db_session: AsyncSession,
+        test_user: User, tmp_path, mocker
     ):
-        """Тест эндпоинта для парсинга топа активных пользователей."""
-        response = await async_client.post(
-            "/api/v1/data/parse/group-top-active",
-            headers=auth_headers,
-            json={"group_id": 111, "posts_depth": 10, "top_n": 5}
+        """Тест: готовый результат отдается потоково в обоих форматах."""
+        # Arrange
+        mocker.patch("app.services.parsing_results.settings.PARSING_RESULTS_DIR", str(tmp_path))
+        task_history = TaskHistory(
+            user_id=test_user.id, task_name="Парсинг подписчиков сообщества", status="SUCCESS",
+            parameters={"kind": "group_members", "request": {"group_id": 1, "count": 2}}
         )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data[0]["activity_score"] == 10
-        mock_data_service.parse_top_active_users.assert_awaited_once_with(111, 10, 5)
+        db_session.add(task_history)
+        await db_session.flush()
+        async with ParsingResultWriter(test_user.id, task_history.id) as writer:
+            await writer.write_rows([{"id": 1, "first_name": "Анна"}, {"id": 2, "city": {"id": 1}}])
+
+        # Act
+        jsonl = await async_client.get(f"/api/v1/data/results/{task_history.id}/download", headers=auth_headers)
+        csv = await async_client.get(f"/api/v1/data/results/{task_history.id}/download?format=csv", headers=auth_headers)
+        status_response = await async_client.get(f"/api/v1/data/results/{task_history.id}", headers=auth_headers)
+
+        # Assert
+        assert jsonl.status_code == 200
+        assert len(jsonl.text.splitlines()) == 2
+        assert csv.text.splitlines() == ["id,first_name,city", "1,Анна,", '2,,"{""id"":1}"']
+        assert status_response.json()["rows"] == 2
 
     async def test_export_conversation(
         self, async_client: AsyncClient, auth_headers: dict, mock_data_service: AsyncMock
@@ -106,6 +123,7 @@ class TestDataApiEndpoints:
         
         assert response.status_code == 200
         # Проверяем, что тело ответа соответствует тому, что вернул мок-генератор
-        assert response.text == '{"message": "hello"}'
-        # Проверяем, что был вызван правильный метод сервиса
-        # assert mock_data_service.export_conversation_as_json.call_count == 1
\ No newline at end of file
+        assert response.text == '{"message": "hello"}\n'
+        assert response.headers["content-type"] == "application/x-ndjson"
+        # Клиент VK сервиса закрывается после отдачи потока
+        mock_data_service.close.assert_awaited_once()
@@ -135,4 +135,34 @@ async def test_get_another_user_scenario_not_found(
     response = await async_client.get(f"/api/v1/scenarios/{other_scenario.id}", headers=auth_headers)
 
     # Assert
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+async def test_scenarios_list_etag_changes_only_after_modification(
+    async_client: AsyncClient, auth_headers: dict, test_user: User
+):
+    """
+    Тест: повторный запрос с If-None-Match получает 304, а после изменения
+    графа сценария ETag меняется.
+    """
+    # Arrange
+    create_resp = await async_client.post(
+        "/api/v1/scenarios", headers=auth_headers,
+        json={"name": "ETag", "schedule": "0 12 * * *", "is_active": False, **VALID_GRAPH_DATA},
+    )
+    scenario_id = create_resp.json()["id"]
+    first = await async_client.get("/api/v1/scenarios", headers=auth_headers)
+    etag = first.headers["ETag"]
+
+    # Act
+    not_modified = await async_client.get("/api/v1/scenarios", headers={**auth_headers, "If-None-Match": etag})
+    await async_client.put(
+        f"/api/v1/scenarios/{scenario_id}", headers=auth_headers,
+        json={"nodes": VALID_GRAPH_DATA["nodes"][:1], "edges": []},
+    )
+    modified = await async_client.get("/api/v1/scenarios", headers={**auth_headers, "If-None-Match": etag})
+
+    # Assert
+    assert not_modified.status_code == 304
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+    assert len(modified.json()[0]["nodes"]) == 1
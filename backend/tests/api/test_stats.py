@@ -3,13 +3,8 @@
 import pytest
 from unittest.mock import AsyncMock
 
-# 1. Инициализируем кеш, так как тестируемая функция им декорирована.
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
-FastAPICache.init(InMemoryBackend())
-
-# 2. Импортируем тестируемую функцию и модель напрямую для юнит-теста
-from app.api.endpoints.stats import get_friends_analytics
+# Импортируем тестируемую функцию и модель напрямую для юнит-теста
+from app.api.endpoints.stats import _compute_friends_analytics
 from app.db.models import User
 
 pytestmark = pytest.mark.anyio
@@ -39,7 +34,32 @@ async def test_friends_analytics_logic(
     mock_instance.close = AsyncMock()
 
     # Act: Вызываем саму функцию
-    result = await get_friends_analytics(current_user=test_user)
+    result = await _compute_friends_analytics(current_user=test_user)
 
     # Assert: Сравниваем результат (словарь) с ожидаемым словарем
-    assert result == expected_result
\ No newline at end of file
+    assert result == expected_result
+
+class FakePulseVKAPI:
+    """Клиент без поддержки async with - как настоящий VKAPI."""
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.messages = AsyncMock()
+        self.messages.getConversations.return_value = {"count": 3, "items": []}
+        self.friends = AsyncMock()
+        self.friends.getRequests.return_value = {"count": 7, "items": []}
+        self.close = AsyncMock()
+        FakePulseVKAPI.instances.append(self)
+
+
+async def test_dashboard_pulse_returns_vk_counters(async_client, auth_headers, mocker):
+    mocker.patch('app.api.endpoints.stats.VKAPI', FakePulseVKAPI)
+    FakePulseVKAPI.instances.clear()
+
+    response = await async_client.get("/api/v1/stats/dashboard/pulse", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["unread_messages"] == 3
+    assert data["incoming_requests"] == 7
+    FakePulseVKAPI.instances[0].close.assert_awaited_once()
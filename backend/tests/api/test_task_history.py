@@ -1,4 +1,5 @@
 # tests/api/test_task_history.py
+import datetime
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -92,4 +93,43 @@ async def test_cancel_completed_task(
     response = await async_client.post(f"/api/v1/tasks/{failed_task.id}/cancel", headers=auth_headers)
     
     assert response.status_code == 400
-    assert "Отменить можно только задачи в очереди или в процессе выполнения" in response.json()["detail"]
\ No newline at end of file
+    assert "Отменить можно только задачи в очереди или в процессе выполнения" in response.json()["detail"]
+
+async def test_history_keyset_pagination_walks_all_pages(
+    async_client: AsyncClient, auth_headers: dict, db_session: AsyncSession, test_user: User
+):
+    """
+    Тест: страницы по курсору идут от новых к старым без пропусков и дублей,
+    в том числе для записей с одинаковым created_at.
+    """
+    # Arrange
+    same_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    db_session.add_all([
+        TaskHistory(user_id=test_user.id, task_name=f"task {i}", status="SUCCESS",
+                    created_at=same_time if i < 3 else same_time + datetime.timedelta(minutes=i))
+        for i in range(5)
+    ])
+    await db_session.commit()
+
+    # Act
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"size": 2, **({"cursor": cursor} if cursor else {})}
+        data = (await async_client.get("/api/v1/tasks/history", headers=auth_headers, params=params)).json()
+        seen.extend(item["task_name"] for item in data["items"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if not data["has_more"]:
+            break
+
+    # Assert
+    assert pages == 3
+    assert seen[:2] == ["task 4", "task 3"]
+    assert sorted(seen) == [f"task {i}" for i in range(5)]
+    assert data["total"] is None
+
+
+async def test_history_rejects_malformed_cursor(async_client: AsyncClient, auth_headers: dict):
+    response = await async_client.get("/api/v1/tasks/history", headers=auth_headers, params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
@@ -96,13 +96,14 @@ async def test_preview_task_audience(
         "filters": {"sex": 1}
     }
     mocker.patch(
-        "app.services.message_service.MessageService.get_mass_messaging_targets",
+        "app.services.message_service.MessageService.get_targets",
         return_value=[{"id": 1}, {"id": 2}, {"id": 3}]
     )
     mocker.patch("app.services.vk_api.VKAPI.close")
     response = await async_client.post(f"/api/v1/tasks/preview/{task_key.value}", headers=auth_headers, json=preview_params)
     assert response.status_code == 200
-    assert response.json() == {"found_count": 3}
+    assert response.json()["found_count"] == 3
+    assert response.json()["preview_token"]
 
 async def test_run_task_with_expired_plan(
     async_client: AsyncClient, test_user: User, db_session: AsyncSession, get_auth_headers_for
@@ -121,6 +121,126 @@ async def mock_redis() -> AsyncMock:
     mock.set.return_value = True
     return mock
 
+
+class FakePipeline:
+    """Pipeline для FakeRedis: копит команды и выполняет их по очереди в execute()."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+        return queue
+
+    async def execute(self):
+        self.redis.pipelines += 1
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+
+
+class FakeRedis:
+    """
+    Redis приложения в памяти (decode_responses=True): строки, хэши, списки,
+    множества и pipeline - те команды, которыми пользуются кэши и счетчики.
+    TTL только запоминаются в ttls, ключи не истекают.
+    """
+
+    def __init__(self):
+        self.store: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, int]] = {}
+        self.lists: dict[str, list] = {}
+        self.sets: dict[str, set[str]] = {}
+        self.ttls: dict[str, int] = {}
+        self.pipelines = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False, xx=False, keepttl=False):
+        if (nx and key in self.store) or (xx and key not in self.store):
+            return None
+        self.store[key] = value if isinstance(value, str) else str(value)
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    async def getdel(self, key):
+        return self.store.pop(key, None)
+
+    async def delete(self, *keys):
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    async def expire(self, key, seconds, nx=False):
+        if not (nx and key in self.ttls):
+            self.ttls[key] = seconds
+        return True
+
+    async def scan_iter(self, match=None, count=None):
+        prefix = match.rstrip("*") if match else ""
+        for key in list(self.store):
+            if key.startswith(prefix):
+                yield key
+
+    async def hincrby(self, key, field, amount=1):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+        return fields[field]
+
+    async def hgetall(self, key):
+        return {field: str(value) for field, value in self.hashes.get(key, {}).items()}
+
+    async def lpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        for value in values:
+            items.insert(0, value)
+        return len(items)
+
+    async def ltrim(self, key, start, end):
+        self.lists[key] = await self.lrange(key, start, end)
+        return True
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        # Как в Redis: end включительно, -1 - до конца списка
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    async def sadd(self, key, *values):
+        members = self.sets.setdefault(key, set())
+        added = {str(value) for value in values} - members
+        members |= added
+        return len(added)
+
+    async def srem(self, key, *values):
+        members = self.sets.get(key, set())
+        removed = {str(value) for value in values} & members
+        members -= removed
+        return len(removed)
+
+    async def sismember(self, key, value):
+        return int(str(value) in self.sets.get(key, set()))
+
+    async def smismember(self, key, values):
+        return [int(str(value) in self.sets.get(key, set())) for value in values]
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    """Пустой Redis приложения в памяти для тестов кэшей и счетчиков."""
+    return FakeRedis()
+
 # ▼▼▼ ШАГ 2: ЗАМЕНИТЕ ВАШУ ФИКСТУРУ test_app НА ЭТУ ▼▼▼
 @pytest.fixture(scope="function")
 def test_app(
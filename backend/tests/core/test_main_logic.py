@@ -5,6 +5,7 @@ from unittest.mock import AsyncMock, MagicMock
 
 from app.main import _check_user_status_and_proceed
 from app.api.dependencies import get_request_identifier
+from app.services.last_active_tracker import LAST_ACTIVE_PENDING_KEY
 
 pytestmark = pytest.mark.anyio
 
@@ -17,56 +18,49 @@ class TestUserActivityMiddleware:
         request.app.state.activity_redis = mock_redis
         return request
 
-    async def test_updates_activity_if_redis_cache_is_missing(
+    async def test_records_activity_in_redis_without_db_writes(
         self, db_session, test_user, mock_request_with_redis, mocker
     ):
         """
-        Тест: если в Redis нет записи о последней активности,
-        функция должна обновить `last_active_at` в БД и создать запись в Redis.
+        Тест: активность отмечается только в ZSET Redis, а в пути запроса
+        нет ни UPDATE, ни коммита - их делает периодическая задача.
         """
         # Arrange
         mock_redis = mock_request_with_redis.app.state.activity_redis
-        mock_redis.get.return_value = None # Redis ничего не знает об активности
-        
         mock_db_execute = mocker.patch.object(db_session, "execute", new_callable=AsyncMock)
         mock_db_commit = mocker.patch.object(db_session, "commit", new_callable=AsyncMock)
-        
-        mock_get_payload = mocker.patch("app.main.get_token_payload", return_value={})
-        mocker.patch("app.main.get_current_active_profile", return_value=test_user)
+
+        mocker.patch("app.main.get_token_payload", return_value={})
+        mocker.patch("app.main.resolve_principal", return_value=test_user)
 
         # Act
         await _check_user_status_and_proceed(db_session, mock_request_with_redis, AsyncMock(), "Bearer token")
 
         # Assert
-        mock_db_execute.assert_awaited_once() # Был вызов для UPDATE User ...
-        mock_db_commit.assert_awaited_once()
-        mock_redis.set.assert_awaited_once() # Была создана запись в Redis
+        mock_db_execute.assert_not_awaited()
+        mock_db_commit.assert_not_awaited()
+        mock_redis.zadd.assert_awaited_once()
+        key, mapping = mock_redis.zadd.await_args.args
+        assert key == LAST_ACTIVE_PENDING_KEY
+        assert list(mapping) == [str(test_user.id)]
 
-    async def test_skips_activity_update_if_redis_cache_is_fresh(
+    async def test_redis_failure_does_not_break_request(
         self, db_session, test_user, mock_request_with_redis, mocker
     ):
-        """
-        Тест: если в Redis есть "свежая" запись об активности (меньше 60 сек),
-        функция НЕ должна обращаться к БД и обновлять Redis.
-        """
+        """Тест: недоступный Redis не мешает обработке запроса."""
         # Arrange
-        import time
         mock_redis = mock_request_with_redis.app.state.activity_redis
-        mock_redis.get.return_value = time.time() - 30 # Активность была 30 секунд назад
+        mock_redis.zadd.side_effect = ConnectionError("redis down")
+        call_next = AsyncMock()
 
-        mock_db_execute = mocker.patch.object(db_session, "execute", new_callable=AsyncMock)
-        mock_db_commit = mocker.patch.object(db_session, "commit", new_callable=AsyncMock)
-        
         mocker.patch("app.main.get_token_payload", return_value={})
-        mocker.patch("app.main.get_current_active_profile", return_value=test_user)
+        mocker.patch("app.main.resolve_principal", return_value=test_user)
 
         # Act
-        await _check_user_status_and_proceed(db_session, mock_request_with_redis, AsyncMock(), "Bearer token")
+        await _check_user_status_and_proceed(db_session, mock_request_with_redis, call_next, "Bearer token")
 
         # Assert
-        mock_db_execute.assert_not_awaited()
-        mock_db_commit.assert_not_awaited()
-        mock_redis.set.assert_not_awaited()
+        call_next.assert_awaited_once()
 
 class TestRateLimiterIdentifier:
 
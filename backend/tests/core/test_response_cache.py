@@ -0,0 +1,40 @@
+# tests/core/test_response_cache.py
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core.cache_metrics import get_cache_stats
+from app.core.response_cache import get_cached_response, invalidate_user_responses
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_responses_are_cached_per_user_and_counted(fake_redis):
+    """Тест: ответ кэшируется отдельно для каждого пользователя, попадания учитываются."""
+    # Arrange
+    loader_a = AsyncMock(return_value={"user": "a"})
+    loader_b = AsyncMock(return_value={"user": "b"})
+
+    # Act
+    first_a = await get_cached_response(fake_redis, "audience_analytics", 1, loader_a, expire=60)
+    second_a = await get_cached_response(fake_redis, "audience_analytics", 1, loader_a, expire=60)
+    first_b = await get_cached_response(fake_redis, "audience_analytics", 2, loader_b, expire=60)
+
+    # Assert
+    assert first_a == second_a == {"user": "a"}
+    assert first_b == {"user": "b"}
+    loader_a.assert_awaited_once()
+    stats = await get_cache_stats(fake_redis)
+    assert stats["response:audience_analytics"] == {"miss": 2, "hit": 1}
+
+
+async def test_invalidation_forces_reload_for_that_user_only(fake_redis):
+    await get_cached_response(fake_redis, "friends_analytics", 1, AsyncMock(return_value={"v": 1}), expire=60)
+    await get_cached_response(fake_redis, "friends_analytics", 2, AsyncMock(return_value={"v": 1}), expire=60)
+
+    await invalidate_user_responses(fake_redis, 1, "friends_analytics")
+    reloaded = await get_cached_response(fake_redis, "friends_analytics", 1, AsyncMock(return_value={"v": 2}), expire=60)
+    untouched = await get_cached_response(fake_redis, "friends_analytics", 2, AsyncMock(return_value={"v": 2}), expire=60)
+
+    assert reloaded == {"v": 2}
+    assert untouched == {"v": 1}
@@ -0,0 +1,72 @@
+# tests/core/test_swr_cache.py
+
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core.swr_cache import get_or_refresh
+
+pytestmark = pytest.mark.anyio
+
+
+def _put(redis, key: str, value, age: float):
+    redis.store[key] = json.dumps({"fetched_at": time.time() - age, "value": value})
+
+
+async def test_fresh_entry_is_served_without_loading(fake_redis):
+    _put(fake_redis, "k", {"name": "old"}, age=10)
+    loader = AsyncMock(return_value={"name": "new"})
+
+    value = await get_or_refresh(fake_redis, "k", loader, soft_ttl=60, hard_ttl=3600)
+
+    assert value == {"name": "old"}
+    loader.assert_not_awaited()
+
+
+async def test_stale_entry_is_served_and_refreshed_in_background(fake_redis):
+    """Тест: устаревшая запись отдается сразу, а обновление идет в фоне."""
+    # Arrange
+    _put(fake_redis, "k", {"name": "old"}, age=120)
+    loader = AsyncMock(return_value={"name": "new"})
+
+    # Act
+    value = await get_or_refresh(fake_redis, "k", loader, soft_ttl=60, hard_ttl=3600)
+    await asyncio.sleep(0.01)
+
+    # Assert
+    assert value == {"name": "old"}
+    loader.assert_awaited_once()
+    assert json.loads(fake_redis.store["k"])["value"] == {"name": "new"}
+    assert "k:refreshing" not in fake_redis.store
+
+
+async def test_failed_refresh_keeps_stale_entry(fake_redis):
+    _put(fake_redis, "k", {"name": "old"}, age=120)
+    loader = AsyncMock(side_effect=RuntimeError("vk down"))
+
+    value = await get_or_refresh(fake_redis, "k", loader, soft_ttl=60, hard_ttl=3600)
+    await asyncio.sleep(0.01)
+
+    assert value == {"name": "old"}
+    assert json.loads(fake_redis.store["k"])["value"] == {"name": "old"}
+
+
+async def test_concurrent_misses_load_once(fake_redis):
+    """Тест (single-flight): пачка одновременных запросов вызывает загрузку один раз."""
+    # Arrange
+    async def slow_loader():
+        await asyncio.sleep(0.2)
+        return {"name": "loaded"}
+
+    loader = AsyncMock(side_effect=slow_loader)
+
+    # Act
+    values = await asyncio.gather(*[
+        get_or_refresh(fake_redis, "k", loader, soft_ttl=60, hard_ttl=3600) for _ in range(5)
+    ])
+
+    # Assert
+    assert values == [{"name": "loaded"}] * 5
+    loader.assert_awaited_once()
@@ -55,7 +55,8 @@ async def test_task_cancellation_e2e(
     # Act (Phase 3): Запрашиваем историю задач
     response_history = await async_client.get(
         "/api/v1/tasks/history",
-        headers=auth_headers
+        headers=auth_headers,
+        params={"include_total": True}
     )
     assert response_history.status_code == 200
 
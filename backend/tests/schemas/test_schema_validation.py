@@ -4,6 +4,7 @@ import pytest
 from pydantic import ValidationError
 
 from app.api.schemas.actions import DaySchedule
+from app.api.schemas.data import GroupMembersParsingRequest, UserWallParsingRequest
 
 class TestSchemaValidation:
 
@@ -34,4 +35,11 @@ class TestSchemaValidation:
         with pytest.raises(ValidationError) as exc_info:
             DaySchedule(is_active=True, start_time=start_time, end_time=end_time)
         
-        assert error_message in str(exc_info.value)
\ No newline at end of file
+        assert error_message in str(exc_info.value)
+
+    def test_parsing_counts_allow_more_than_one_page(self):
+        """Тест: выгрузка подписчиков и стены не ограничена одной страницей VK."""
+        assert GroupMembersParsingRequest(group_id=1, count=5000).count == 5000
+        assert UserWallParsingRequest(user_id=1, count=500).count == 500
+        with pytest.raises(ValidationError):
+            UserWallParsingRequest(user_id=1, count=0)
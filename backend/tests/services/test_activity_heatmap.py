@@ -0,0 +1,36 @@
+# tests/services/test_activity_heatmap.py
+
+import datetime
+
+from app.services.activity_heatmap import merge_last_seen, unpack_observations
+
+
+def _ts(day: int, hour: int) -> int:
+    # 2024-01-01 - понедельник
+    return int(datetime.datetime(2024, 1, day, hour, 30, tzinfo=datetime.UTC).timestamp())
+
+
+def test_merge_last_seen_bins_by_weekday_and_hour():
+    """Тест: наблюдения раскладываются по [день недели][час] в UTC и нормируются к 100."""
+    cutoff = _ts(1, 0)
+    state, heatmap = merge_last_seen(None, [1, 2, 3], [_ts(1, 10), _ts(1, 10), _ts(3, 22)], cutoff)
+
+    assert heatmap[0][10] == 100
+    assert heatmap[2][22] == 50
+    assert sum(map(sum, heatmap)) == 150
+    assert unpack_observations(state).shape == (2, 3)
+
+
+def test_merge_last_seen_keeps_history_and_drops_stale():
+    """
+    Тест: повторное наблюдение того же времени не дублируется, новое время
+    друга добавляется к накопленным, а выпавшие из окна отбрасываются.
+    """
+    state, _ = merge_last_seen(None, [1, 2], [_ts(1, 10), _ts(2, 8)], _ts(1, 0))
+
+    state, heatmap = merge_last_seen(state, [1, 2], [_ts(1, 10), _ts(4, 8)], _ts(2, 0))
+
+    observations = unpack_observations(state)
+    assert sorted(observations[1].tolist()) == [_ts(2, 8), _ts(4, 8)]
+    assert heatmap[1][8] == 100 and heatmap[3][8] == 100
+    assert heatmap[0][10] == 0
@@ -53,8 +53,7 @@ class TestAIMessageServiceContextBuilding:
 
 class TestVKUserFilterEdgeCases:
 
-    @pytest.mark.asyncio
-    async def test_filter_by_last_seen_hours(self):
+    def test_filter_by_last_seen_hours(self):
         """Проверяет фильтр 'заходил не позднее N часов назад'."""
         now_ts = datetime.now(timezone.utc).timestamp()
         profiles = [
@@ -66,13 +65,12 @@ class TestVKUserFilterEdgeCases:
         
         # Оставить тех, кто был онлайн в течение последних 2 часов
         filters = ActionFilters(last_seen_hours=2)
-        result = await apply_filters_to_profiles(profiles, filters)
+        result = apply_filters_to_profiles(profiles, filters)
         
         assert len(result) == 1
         assert result[0]["id"] == 1
 
-    @pytest.mark.asyncio
-    async def test_filter_by_last_seen_days(self):
+    def test_filter_by_last_seen_days(self):
         """Проверяет фильтр 'не заходил более N дней' (для удаления неактивных)."""
         now_ts = datetime.now(timezone.utc).timestamp()
         one_day = 86400
@@ -84,13 +82,12 @@ class TestVKUserFilterEdgeCases:
         
         # Оставить тех, кто НЕ был онлайн более 10 дней
         filters = ActionFilters(last_seen_days=10)
-        result = await apply_filters_to_profiles(profiles, filters)
+        result = apply_filters_to_profiles(profiles, filters)
         
         assert len(result) == 2
         assert {p["id"] for p in result} == {2, 3}
 
-    @pytest.mark.asyncio
-    async def test_filter_remove_banned_logic(self):
+    def test_filter_remove_banned_logic(self):
         """Проверяет, что `remove_banned=False` исключает 'собачек' из выборки."""
         profiles = [
             {"id": 1, "deactivated": "banned"},
@@ -100,7 +97,7 @@ class TestVKUserFilterEdgeCases:
         
         # remove_banned=False означает, что мы НЕ ХОТИМ видеть "собачек"
         filters = ActionFilters(remove_banned=False)
-        result = await apply_filters_to_profiles(profiles, filters)
+        result = apply_filters_to_profiles(profiles, filters)
         
         assert len(result) == 1
         assert result[0]['id'] == 2
\ No newline at end of file
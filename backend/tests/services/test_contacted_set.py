@@ -0,0 +1,51 @@
+# tests/services/test_contacted_set.py
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.contacted_set import CONTACTED_KEY, CONTACTED_TTL, ContactedSet
+
+pytestmark = pytest.mark.anyio
+
+
+def db_with_log(vk_ids):
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(vk_ids)
+    db.execute.return_value = result
+    return db
+
+
+async def test_filter_new_seeds_from_log_once(fake_redis):
+    db = db_with_log([2, 4])
+    contacted = ContactedSet(fake_redis, user_id=7)
+
+    assert await contacted.filter_new(db, [5, 4, 3, 2, 1, 5]) == [5, 3, 1]
+    assert await contacted.filter_new(db, [4, 6]) == [6]
+
+    key = CONTACTED_KEY.format(user_id=7)
+    assert fake_redis.sets[key] == {"0", "2", "4"}
+    assert fake_redis.ttls[key] == CONTACTED_TTL
+    db.execute.assert_awaited_once()
+
+
+async def test_claim_is_exclusive_and_release_frees_id(fake_redis):
+    contacted = ContactedSet(fake_redis, user_id=7)
+    await contacted.filter_new(db_with_log([]), [1])
+
+    assert await contacted.claim(10) is True
+    assert await contacted.claim(10) is False
+    assert await contacted.filter_new(db_with_log([]), [10, 11]) == [11]
+
+    await contacted.release(10)
+    assert await contacted.claim(10) is True
+
+
+async def test_filter_new_falls_back_to_db_without_redis():
+    redis = MagicMock()
+    redis.pipeline.side_effect = ConnectionError("redis down")
+    db = db_with_log([2])
+    contacted = ContactedSet(redis, user_id=7)
+
+    assert await contacted.filter_new(db, [1, 2, 3]) == [1, 3]
+    assert await contacted.claim(3) is True
@@ -0,0 +1,79 @@
+# tests/services/test_conversation_export.py
+
+from unittest.mock import AsyncMock
+
+import orjson
+import pytest
+import zstandard
+
+from app.services.conversation_export import HISTORY_PAGE_SIZE, ConversationExporter
+from app.services.vk_api import VKAPIError
+
+pytestmark = pytest.mark.anyio
+
+DIALOG_SIZE = 25 * HISTORY_PAGE_SIZE + 700  # полный execute и неполный второй
+
+
+def _history_page(offset: int, count: int) -> dict:
+    ids = range(offset + 1, min(offset + count, DIALOG_SIZE) + 1)
+    return {"count": DIALOG_SIZE, "items": [{"id": message_id, "text": f"m{message_id}"} for message_id in ids]}
+
+
+@pytest.fixture
+def vk_api():
+    api = AsyncMock()
+
+    async def execute(calls):
+        return [_history_page(call["params"]["offset"], call["params"]["count"]) for call in calls]
+
+    api.execute.side_effect = execute
+    return api
+
+
+def _read_ids(path) -> list[int]:
+    return [orjson.loads(line)["id"] for line in path.read_bytes().splitlines()]
+
+
+async def test_export_writes_all_messages_in_order(vk_api, tmp_path):
+    exporter = ConversationExporter(vk_api, 5, tmp_path / "export")
+
+    state = await exporter.run()
+
+    assert state["rows"] == DIALOG_SIZE
+    assert state["fields"] == ["id", "text"]
+    assert _read_ids(exporter.result_file) == list(range(1, DIALOG_SIZE + 1))
+    assert vk_api.execute.await_count == 2
+
+
+async def test_export_resumes_after_last_message_id(vk_api, tmp_path):
+    """Тест: после сбоя выгрузка продолжается с чекпоинта без потерь и повторов."""
+    calls_made = 0
+    execute = vk_api.execute.side_effect
+
+    async def failing_second_call(calls):
+        nonlocal calls_made
+        calls_made += 1
+        if calls_made == 2:
+            raise VKAPIError("Сетевая ошибка", 0)
+        return await execute(calls)
+
+    vk_api.execute.side_effect = failing_second_call
+    exporter = ConversationExporter(vk_api, 5, tmp_path / "export")
+    with pytest.raises(VKAPIError):
+        await exporter.run()
+    assert len(_read_ids(exporter.result_file)) == 25 * HISTORY_PAGE_SIZE
+
+    state = await exporter.run()
+
+    assert state["rows"] == DIALOG_SIZE
+    assert _read_ids(exporter.result_file) == list(range(1, DIALOG_SIZE + 1))
+
+
+async def test_zstd_export_is_a_valid_stream_after_resume(vk_api, tmp_path):
+    exporter = ConversationExporter(vk_api, 5, tmp_path / "export", compression="zstd")
+
+    await exporter.run()
+
+    with zstandard.ZstdDecompressor().stream_reader(exporter.result_file.open("rb"), read_across_frames=True) as reader:
+        lines = reader.read().splitlines()
+    assert len(lines) == DIALOG_SIZE
@@ -1,7 +1,7 @@
 # tests/services/test_data_service_isolated.py
 
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from collections import Counter
 
 from app.services.data_service import DataService
@@ -22,6 +22,13 @@ class TestDataServiceIsolated:
         service.vk_api = mock_vk_api
         return service
 
+    @staticmethod
+    def _fake_execute(responses: dict):
+        """Ответ execute: для каждого вызова - ответ по имени метода из responses."""
+        async def execute(calls):
+            return [responses.get(call["method"]) for call in calls]
+        return execute
+
     async def test_parse_top_active_users_logic(self, data_service: DataService, mock_vk_api: AsyncMock):
         """
         Тест логики подсчета очков активности и сортировки пользователей.
@@ -30,14 +37,17 @@ class TestDataServiceIsolated:
         # Arrange
         group_id = -123
         # Настраиваем моки ответов от VK API
-        mock_vk_api.wall.get.return_value = {"items": [{"id": 1}]}
-        mock_vk_api.likes.getList.return_value = {"items": [101, 102]} # User 101, 102 лайкнули
-        mock_vk_api.wall.getComments.return_value = {
-            "items": [
-                {"from_id": 102}, # User 102 прокомментировал
-                {"from_id": 103}  # User 103 прокомментировал
-            ]
-        }
+        mock_vk_api.execute.side_effect = self._fake_execute({
+            "wall.get": {"count": 1, "items": [{"id": 1}]},
+            "likes.getList": {"count": 2, "items": [101, 102]}, # User 101, 102 лайкнули
+            "wall.getComments": {
+                "count": 2,
+                "items": [
+                    {"from_id": 102}, # User 102 прокомментировал
+                    {"from_id": 103}  # User 103 прокомментировал
+                ]
+            },
+        })
         mock_vk_api.users.get.return_value = [
             {"id": 103, "first_name": "Самый", "last_name": "Активный"},
             {"id": 102, "first_name": "Средне", "last_name": "Активный"},
@@ -63,37 +73,71 @@ class TestDataServiceIsolated:
     async def test_parse_group_activity_handles_empty_responses(self, data_service: DataService, mock_vk_api: AsyncMock):
         """Тест проверяет, что парсер активной аудитории не падает на пустых ответах."""
         # Arrange
-        mock_vk_api.wall.get.return_value = {"items": [{"id": 1}]}
-        mock_vk_api.likes.getList.return_value = None # Лайков нет
-        mock_vk_api.wall.getComments.return_value = {"items": []} # Комментариев нет
+        mock_vk_api.execute.side_effect = self._fake_execute({
+            "wall.get": {"count": 1, "items": [{"id": 1}]},
+            "likes.getList": None, # Лайков нет
+            "wall.getComments": {"count": 0, "items": []}, # Комментариев нет
+        })
         
         # Act
-        results = await data_service.parse_active_group_audience(1, AsyncMock())
+        results = await data_service.parse_active_group_audience(1, MagicMock(posts_depth=1))
 
         # Assert
         assert results == []
         mock_vk_api.users.get.assert_not_called() # Проверяем, что не было лишнего запроса за профилями
 
     async def test_export_conversation_stream(self, data_service: DataService, mock_vk_api: AsyncMock):
-        """Тест проверяет корректность JSON-стриминга при экспорте диалога."""
+        """Тест проверяет корректность JSON-lines стриминга при экспорте диалога."""
         # Arrange
-        mock_vk_api.messages.getHistory.side_effect = [
-            {"items": [{"id": 1, "text": "a"}, {"id": 2, "text": "b"}]},
-            {"items": [{"id": 3, "text": "c"}]},
-            None # Конец истории
-        ]
+        mock_vk_api.execute.side_effect = self._fake_execute({
+            "messages.getHistory": {"count": 3, "items": [{"id": 1, "text": "a"}, {"id": 2, "text": "b"}, {"id": 3, "text": "c"}]},
+        })
 
         # Act
         # Собираем все части стрима в одну строку
-        json_stream_parts = [part async for part in data_service.export_conversation_as_json(123)]
-        full_json_string = "".join(json_stream_parts)
+        stream_parts = [part async for part in data_service.export_conversation_jsonl(123)]
+        lines = b"".join(stream_parts).splitlines()
 
         # Assert
-        assert mock_vk_api.messages.getHistory.call_count == 3
+        assert mock_vk_api.execute.await_count == 1
         
-        # Проверяем, что итоговая строка является валидным JSON-массивом из 3х объектов
+        # Проверяем, что каждая строка - отдельное сообщение в хронологическом порядке
         import json
-        data = json.loads(full_json_string)
-        assert isinstance(data, list)
+        data = [json.loads(line) for line in lines]
         assert len(data) == 3
-        assert data[2]['id'] == 3
\ No newline at end of file
+        assert data[2]['id'] == 3
+
+    async def test_iter_group_members_pages_through_offsets(self, data_service: DataService, mock_vk_api: AsyncMock):
+        """Тест: подписчики выгружаются страницами по offset до нужного количества."""
+        # Arrange
+        mock_vk_api.execute.return_value = [
+            {"count": 2500, "items": [{"id": i} for i in range(1000)]},
+            {"count": 2500, "items": [{"id": i} for i in range(1000, 1500)]},
+        ]
+
+        # Act
+        batches = [batch async for batch in data_service.iter_group_members(1, count=1500)]
+
+        # Assert
+        assert [len(batch) for batch in batches] == [1000, 500]
+        calls = mock_vk_api.execute.await_args.args[0]
+        assert mock_vk_api.execute.await_count == 1
+        assert calls[1]["params"]["offset"] == 1000
+        assert calls[1]["params"]["count"] == 500
+
+    async def test_iter_resolved_links_opens_app_redis_once(self, data_service: DataService, mocker):
+        """Тест: все пачки ссылок разрешаются через одно подключение к Redis приложения."""
+        # Arrange
+        redis = AsyncMock()
+        connect = mocker.patch("app.core.app_redis.app_redis", return_value=redis)
+        resolve = mocker.patch("app.services.data_service.resolve_screen_names", AsyncMock(return_value={}))
+        links = [f"vk.com/name{i}" for i in range(2500)]
+
+        # Act
+        batches = [batch async for batch in data_service.iter_resolved_links(links)]
+
+        # Assert
+        assert [len(batch) for batch in batches] == [1000, 1000, 500]
+        connect.assert_called_once()
+        assert [call.args[0] for call in resolve.await_args_list] == [redis] * 3
+        redis.aclose.assert_awaited_once()
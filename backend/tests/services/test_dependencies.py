@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
 from app.api.dependencies import get_current_active_profile
-from app.db.models import User
+from app.db.models import ManagedProfile, User
 
 pytestmark = pytest.mark.anyio
 
@@ -32,6 +32,8 @@ async def test_get_active_profile_with_valid_profile_id(
     именно этот профиль.
     """
     # Arrange
+    db_session.add(ManagedProfile(manager_user_id=manager_user.id, profile_user_id=managed_profile_user.id))
+    await db_session.commit()
     payload = {
         "sub": str(manager_user.id),
         "profile_id": str(managed_profile_user.id)
@@ -63,4 +65,23 @@ async def test_get_active_profile_with_non_existent_profile_id(
         await get_current_active_profile(payload=payload, db=db_session)
     
     assert exc_info.value.status_code == 404
-    assert "Активный профиль не найден" in exc_info.value.detail
\ No newline at end of file
+    assert "Активный профиль не найден" in exc_info.value.detail
+
+async def test_get_active_profile_without_access_is_forbidden(
+    db_session: AsyncSession, manager_user: User, managed_profile_user: User
+):
+    """
+    Тест (безопасность): если связь менеджера с профилем удалена, старый
+    токен с этим 'profile_id' больше не дает к нему доступа.
+    """
+    # Arrange
+    payload = {
+        "sub": str(manager_user.id),
+        "profile_id": str(managed_profile_user.id)
+    }
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_active_profile(payload=payload, db=db_session)
+
+    assert exc_info.value.status_code == 403
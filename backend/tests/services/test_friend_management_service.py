@@ -23,10 +23,11 @@ MOCK_FRIENDS_DATA = {
 }
 
 @pytest.fixture
-def mock_emitter(mocker) -> RedisEventEmitter:
+def mock_emitter(mocker, fake_redis) -> RedisEventEmitter:
     """Фикстура для мока эмиттера событий."""
     mock_redis = AsyncMock()
-    emitter = RedisEventEmitter(mock_redis)
+    # Снимок друзей пишется в свой Redis на каждый тест, а не в общий
+    emitter = RedisEventEmitter(mock_redis, counter_redis=fake_redis)
     # Мокаем методы, чтобы они ничего не делали, но их можно было проверить
     emitter.send_log = mocker.AsyncMock()
     return emitter
@@ -63,4 +64,25 @@ async def test_get_remove_friends_targets_logic(
     
     # Проверяем, что забаненные идут первыми в списке на удаление
     assert targets[0]["id"] == 1
-    assert targets[1]["id"] == 2
\ No newline at end of file
+    assert targets[1]["id"] == 2
+
+async def test_remove_targets_ignore_stale_daily_snapshot(
+    db_session: AsyncSession, test_user: User, mock_emitter: RedisEventEmitter
+):
+    """Тест: кандидаты на удаление отбираются по свежему списку, а не по утреннему снимку."""
+    service = FriendManagementService(db=db_session, user=test_user, emitter=mock_emitter)
+    service.vk_api = AsyncMock()
+    service.vk_api.get_user_friends.return_value = MOCK_FRIENDS_DATA
+    await service._get_friends()
+
+    # Друг 4 зашел в VK после снимка
+    returned = {"id": 4, "first_name": "Inactive", "last_name": "User", "last_seen": {"time": 9999999999}}
+    service.vk_api.get_user_friends.return_value = {
+        "count": 5, "items": [returned if f["id"] == 4 else f for f in MOCK_FRIENDS_DATA["items"]]
+    }
+    targets = await service.get_targets(
+        RemoveFriendsRequest(count=10, filters=ActionFilters(remove_banned=True, last_seen_days=30))
+    )
+
+    assert {t["id"] for t in targets} == {1, 2}
+    assert service.vk_api.get_user_friends.await_count == 2
@@ -0,0 +1,76 @@
+# tests/services/test_friend_snapshots.py
+
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+
+from app.api.schemas.actions import ActionFilters
+from app.core.cache_metrics import CACHE_STATS_KEY
+from app.services.friend_snapshots import (
+    FRIEND_FIELDS, FriendSnapshotStore, diff_ids, needs_live_presence, pack_ids, unpack_ids
+)
+
+pytestmark = pytest.mark.anyio
+
+FRIENDS = {"count": 3, "items": [
+    {"id": 30, "first_name": "Анна", "bdate": "1.1.1990", "online": 1},
+    {"id": 10, "first_name": "Иван", "deactivated": "banned"},
+    {"id": 20, "first_name": "Олег", "last_seen": {"time": 1_700_000_000}},
+]}
+
+
+@pytest.fixture
+def store(mocker, fake_redis):
+    store = FriendSnapshotStore(fake_redis, user_id=7)
+    mocker.patch.object(store, "_record", AsyncMock())
+    return store
+
+
+@pytest.fixture
+def vk_api():
+    api = AsyncMock()
+    api.get_user_friends.return_value = FRIENDS
+    return api
+
+
+def test_pack_ids_roundtrip_and_diff():
+    previous = np.array([5, 900_000_001, 900_000_002], dtype=np.int64)
+    current = np.array([5, 900_000_002, 900_000_003], dtype=np.int64)
+
+    assert unpack_ids(pack_ids(current)).tolist() == current.tolist()
+    assert unpack_ids(pack_ids(np.empty(0, dtype=np.int64))).tolist() == []
+    added, removed = diff_ids(previous, current)
+    assert added.tolist() == [900_000_003]
+    assert removed.tolist() == [900_000_001]
+
+
+async def test_same_day_consumers_share_one_fetch(store, vk_api):
+    first = await store.get_friends(vk_api, vk_id=1)
+    second = await store.get_friends(vk_api, vk_id=1)
+
+    assert [f.id for f in second] == [f.id for f in first] == [30, 10, 20]
+    assert second[0].bdate == "1.1.1990" and second[2].last_seen == 1_700_000_000
+    vk_api.get_user_friends.assert_awaited_once_with(1, fields=FRIEND_FIELDS)
+    store._record.assert_awaited_once()
+    assert sorted(store._record.await_args.args[1]) == [10, 20, 30]
+    assert store.redis.hashes[CACHE_STATS_KEY] == {"friends_snapshot:miss": 1, "friends_snapshot:hit": 1, "friends_snapshot:calls_saved": 1}
+
+
+async def test_live_presence_and_invalidate_refetch(store, vk_api):
+    await store.get_friends(vk_api, vk_id=1)
+    await store.get_friends(vk_api, vk_id=1, live=True)
+    await store.invalidate()
+    await store.get_friends(vk_api, vk_id=1)
+
+    assert vk_api.get_user_friends.await_count == 3
+    assert needs_live_presence(ActionFilters(is_online=True))
+    assert needs_live_presence(ActionFilters(last_seen_hours=6))
+    assert not needs_live_presence(ActionFilters(last_seen_days=30, sex=1))
+
+
+async def test_vk_failure_does_not_record_empty_snapshot(store, vk_api):
+    vk_api.get_user_friends.return_value = None
+
+    assert await store.get_friends(vk_api, vk_id=1) == []
+    store._record.assert_not_awaited()
+    assert store.redis.store == {}
@@ -0,0 +1,107 @@
+# tests/services/test_group_member_scan.py
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services import parsing_results
+from app.services.column_store import ColumnStore
+from app.services.group_member_scan import MEMBERS_PAGE_SIZE, GroupMemberScanner
+from app.services.parsing_results import iter_result_csv, publish_columns, read_result_meta
+from app.services.vk_api import VKAPIError, VKFloodControlError
+
+pytestmark = pytest.mark.anyio
+
+GROUP_SIZE = 2 * 25 * MEMBERS_PAGE_SIZE + 1500  # два полных раунда и неполный третий
+
+
+def _members_page(offset: int, count: int) -> dict:
+    ids = range(offset * 2 + 2, min(offset + count, GROUP_SIZE) * 2 + 2, 2)
+    return {"count": GROUP_SIZE, "items": [
+        {"id": member_id, "sex": 2, "bdate": "5.11.1990", "city": {"id": 1}, "online": 1} for member_id in ids
+    ]}
+
+
+@pytest.fixture
+def vk_api():
+    api = AsyncMock()
+
+    async def execute(calls):
+        return [_members_page(call["params"]["offset"], call["params"]["count"]) for call in calls]
+
+    api.execute.side_effect = execute
+    return api
+
+
+async def test_scan_stores_all_members_in_columns(vk_api, tmp_path):
+    progress = AsyncMock()
+
+    rows = await GroupMemberScanner(vk_api, 1, tmp_path / "scan", concurrency=1).run(on_progress=progress)
+
+    store = ColumnStore.open(tmp_path / "scan")
+    assert rows == len(store) == GROUP_SIZE
+    assert store.column("id")[-1] == GROUP_SIZE * 2
+    assert store.column("birth_year")[0] == 1990 and store.column("birth_month")[0] == 11
+    assert progress.await_args_list[-1].args == (GROUP_SIZE, GROUP_SIZE)
+
+
+async def test_scan_resumes_from_checkpoint_after_failure(vk_api, tmp_path):
+    """Тест: после ошибки на втором раунде повторный запуск дочитывает группу без потерь и дублей."""
+    calls_made = 0
+    execute = vk_api.execute.side_effect
+
+    async def failing_execute(calls):
+        nonlocal calls_made
+        calls_made += 1
+        if calls_made == 2:
+            return [None] * len(calls)
+        return await execute(calls)
+
+    vk_api.execute.side_effect = failing_execute
+    scanner = GroupMemberScanner(vk_api, 1, tmp_path / "scan", concurrency=1)
+    with pytest.raises(VKAPIError):
+        await scanner.run()
+    assert len(ColumnStore.open(tmp_path / "scan")) == 25 * MEMBERS_PAGE_SIZE
+
+    rows = await scanner.run()
+
+    ids = ColumnStore.open(tmp_path / "scan").column("id")
+    assert rows == len(ids) == GROUP_SIZE
+    assert (ids[1:] > ids[:-1]).all()
+
+
+async def test_scan_keeps_batches_before_rate_limited_one(vk_api, tmp_path):
+    """Тест: пачка, упавшая на flood control, не теряет уже прочитанные страницы раунда."""
+    calls_made = 0
+    execute = vk_api.execute.side_effect
+
+    async def flaky_execute(calls):
+        nonlocal calls_made
+        calls_made += 1
+        if calls_made == 2:
+            raise VKFloodControlError("Flood control", 9)
+        return await execute(calls)
+
+    vk_api.execute.side_effect = flaky_execute
+    scanner = GroupMemberScanner(vk_api, 1, tmp_path / "scan", concurrency=3)
+    with pytest.raises(VKAPIError):
+        await scanner.run()
+    assert len(ColumnStore.open(tmp_path / "scan")) == 25 * MEMBERS_PAGE_SIZE
+
+    assert await scanner.run() == GROUP_SIZE
+
+
+async def test_published_columns_are_served_as_csv(vk_api, tmp_path, monkeypatch):
+    monkeypatch.setattr(parsing_results.settings, "PARSING_RESULTS_DIR", str(tmp_path))
+    scan_dir = parsing_results.member_scan_path(7, 1)
+    await GroupMemberScanner(vk_api, 1, scan_dir).run()
+
+    publish_columns(7, 42, scan_dir)
+
+    meta = read_result_meta(7, 42)
+    assert meta["rows"] == GROUP_SIZE and meta["format"] == "columns"
+    lines = "".join(iter_result_csv(7, 42, meta["fields"])).splitlines()
+    assert lines[0] == "id,sex,city_id,birth_day,birth_month,birth_year,online,deactivated"
+    assert lines[1] == "2,2,1,5,11,1990,1,0"
+    assert len(lines) == GROUP_SIZE + 1
+    assert not scan_dir.exists()
@@ -0,0 +1,60 @@
+# tests/services/test_last_active_tracker.py
+
+import datetime
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock
+
+from app.db.models import User
+from app.services.last_active_tracker import LAST_ACTIVE_FLUSHING_KEY, flush_last_active
+
+pytestmark = pytest.mark.anyio
+
+
+def _make_redis(entries: list[tuple[bytes, float]]):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[len(entries), 1])
+    redis = MagicMock()
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    redis.zrange = AsyncMock(return_value=entries)
+    redis.delete = AsyncMock()
+    return redis
+
+
+async def test_flush_writes_latest_activity_in_bulk(db_session: AsyncSession, test_user: User):
+    """
+    Тест: накопленные отметки переносятся в last_active_at, более старая
+    отметка не затирает уже записанное время, снимок удаляется после коммита.
+    """
+    # Arrange
+    now = datetime.datetime.now(datetime.UTC).replace(microsecond=0)
+    other = User(vk_id=900010, encrypted_vk_token="t", last_active_at=now)
+    db_session.add(other)
+    await db_session.commit()
+    redis = _make_redis([
+        (str(test_user.id).encode(), now.timestamp()),
+        (str(other.id).encode(), (now - datetime.timedelta(hours=1)).timestamp()),
+    ])
+
+    # Act
+    flushed = await flush_last_active(db_session, redis)
+
+    # Assert
+    assert flushed == 2
+    await db_session.refresh(test_user)
+    await db_session.refresh(other)
+    assert test_user.last_active_at == now
+    assert other.last_active_at == now
+    redis.delete.assert_awaited_once_with(LAST_ACTIVE_FLUSHING_KEY)
+
+
+async def test_flush_without_activity_skips_db(db_session: AsyncSession):
+    redis = _make_redis([])
+    db_session.execute = AsyncMock()
+
+    flushed = await flush_last_active(db_session, redis)
+
+    assert flushed == 0
+    db_session.execute.assert_not_awaited()
+    redis.zrange.assert_not_awaited()
@@ -0,0 +1,66 @@
+# tests/services/test_parsing_results.py
+
+import pytest
+
+from app.core.exceptions import TaskAlreadyRunningError
+from app.services import parsing_results
+from app.services.parsing_results import (
+    ParsingResultWriter, iter_result_csv, iter_result_jsonl, member_scan_path, read_result_meta, result_path,
+    work_dir_lock
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def results_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(parsing_results.settings, "PARSING_RESULTS_DIR", str(tmp_path))
+    return tmp_path
+
+
+async def test_writer_appends_batches_and_publishes_on_success():
+    """Тест: пачки дописываются в файл, результат появляется только после завершения."""
+    async with ParsingResultWriter(1, 10) as writer:
+        await writer.write_rows([{"id": 1}, {"id": 2}])
+        assert read_result_meta(1, 10) is None
+        await writer.write_rows([{"id": 3, "name": "x"}])
+
+    assert read_result_meta(1, 10) == {"rows": 3, "fields": ["id", "name"]}
+    assert b"".join(iter_result_jsonl(1, 10)).count(b"\n") == 3
+
+
+async def test_writer_discards_partial_file_on_error():
+    with pytest.raises(RuntimeError):
+        async with ParsingResultWriter(1, 11) as writer:
+            await writer.write_rows([{"id": 1}])
+            raise RuntimeError("VK недоступен")
+
+    assert read_result_meta(1, 11) is None
+    assert not result_path(1, 11).exists()
+    assert not result_path(1, 11).with_suffix(".jsonl.part").exists()
+
+
+async def test_csv_stream_is_chunked(monkeypatch):
+    monkeypatch.setattr(parsing_results, "CSV_STREAM_BATCH_ROWS", 2)
+    async with ParsingResultWriter(1, 12) as writer:
+        await writer.write_rows([{"id": i} for i in range(5)])
+
+    chunks = list(iter_result_csv(1, 12, ["id"]))
+
+    assert len(chunks) == 3
+    assert "".join(chunks).splitlines() == ["id", "0", "1", "2", "3", "4"]
+
+
+def test_work_dir_lock_rejects_second_task_until_released():
+    """Тест: вторая выгрузка в тот же каталог не стартует, пока первая держит блокировку."""
+    scan_dir = member_scan_path(1, 456)
+
+    with work_dir_lock(scan_dir):
+        with pytest.raises(TaskAlreadyRunningError):
+            with work_dir_lock(scan_dir):
+                pass
+        with work_dir_lock(member_scan_path(1, 457)):
+            pass
+
+    with work_dir_lock(scan_dir):
+        pass
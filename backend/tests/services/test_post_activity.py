@@ -0,0 +1,106 @@
+# tests/services/test_post_activity.py
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.post_activity import EXECUTE_MAX_CALLS, RpsLimiter, collect_post_activity, fetch_post_ids
+from app.services.vk_api import VKFloodControlError
+
+pytestmark = pytest.mark.anyio
+
+LIKERS_PER_POST = 2500
+COMMENTS_PER_POST = 150
+
+
+def _page(call: dict):
+    """Ответ фейкового VK: у каждого поста LIKERS_PER_POST лайков и COMMENTS_PER_POST комментариев."""
+    params = call["params"]
+    offset, count = params["offset"], params["count"]
+    if call["method"] == "wall.get":
+        return {"count": 250, "items": [{"id": 1000 - i} for i in range(offset, min(offset + count, 250))]}
+    if call["method"] == "likes.getList":
+        return {"count": LIKERS_PER_POST, "items": list(range(offset + 1, min(offset + count, LIKERS_PER_POST) + 1))}
+    return {
+        "count": COMMENTS_PER_POST + 40, "current_level_count": COMMENTS_PER_POST,
+        "items": [{"from_id": i + 1} for i in range(offset, min(offset + count, COMMENTS_PER_POST))],
+    }
+
+
+@pytest.fixture
+def vk_api():
+    api = AsyncMock()
+
+    async def execute(calls):
+        assert len(calls) <= EXECUTE_MAX_CALLS
+        return [_page(call) for call in calls]
+
+    api.execute.side_effect = execute
+    return api
+
+
+async def test_collect_pages_through_all_likers_and_commenters(vk_api):
+    """Тест: дочитываются все страницы лайков и комментариев, а не только первая."""
+    progress = AsyncMock()
+
+    activity = await collect_post_activity(vk_api, -1, [10, 20], on_progress=progress)
+
+    assert len(activity.likes) == LIKERS_PER_POST
+    assert set(activity.likes.values()) == {2}
+    assert len(activity.comments) == COMMENTS_PER_POST
+    # 4 первые страницы + 2 * (2 доп. страницы лайков + 1 доп. страница комментариев)
+    assert progress.await_args_list[-1].args == (10, 10)
+    assert activity.execute_calls == 2
+
+
+async def test_scores_weight_comments_and_skip_community_authors(vk_api):
+    vk_api.execute.side_effect = None
+    vk_api.execute.return_value = [
+        {"count": 2, "items": [1, 2]},
+        {"count": 2, "items": [{"from_id": 2}, {"from_id": -5}]},
+    ]
+
+    activity = await collect_post_activity(vk_api, -1, [10])
+
+    assert activity.scores(like_weight=1, comment_weight=2) == {1: 1, 2: 3}
+
+
+async def test_fetch_post_ids_pages_wall_through_execute(vk_api):
+    post_ids = await fetch_post_ids(vk_api, -1, 230)
+
+    assert len(post_ids) == 230
+    assert post_ids[:2] == [1000, 999]
+    assert vk_api.execute.await_count == 1
+
+
+async def test_rate_limited_batch_is_retried_without_losing_other_batches(vk_api):
+    """Тест: пачка, упавшая на flood control, не отменяет остальные и дочитывается в следующем раунде."""
+    execute = vk_api.execute.side_effect
+    calls_made = 0
+
+    async def flaky_execute(calls):
+        nonlocal calls_made
+        calls_made += 1
+        if calls_made == 2:
+            raise VKFloodControlError("Flood control", 9)
+        return await execute(calls)
+
+    vk_api.execute.side_effect = flaky_execute
+
+    activity = await collect_post_activity(vk_api, -1, list(range(1, 31)), with_comments=False)
+
+    assert len(activity.likes) == LIKERS_PER_POST
+    assert set(activity.likes.values()) == {30}
+
+
+async def test_rps_limiter_spaces_out_starts():
+    limiter = RpsLimiter(rps=3, period=0.2)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    for _ in range(7):
+        await limiter.acquire()
+
+    # 3 запуска сразу, следующие 3 - через период, седьмой - через два
+    assert loop.time() - started >= 0.4
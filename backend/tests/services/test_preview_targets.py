@@ -0,0 +1,36 @@
+# tests/services/test_preview_targets.py
+
+import pytest
+
+from app.api.schemas.actions import AddFriendsRequest
+from app.services.preview_targets import pop_preview_targets, store_preview_targets
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_preview_targets_are_reused_once_with_same_params(fake_redis):
+    """Тест: цели из предпросмотра возвращаются при тех же параметрах и только один раз."""
+    # Arrange
+    params = AddFriendsRequest(count=10)
+    targets = [{"id": i, "first_name": "Имя", "is_closed": False} for i in range(200)]
+
+    # Act
+    token = await store_preview_targets(fake_redis, 1, "add_recommended", params, targets)
+    first = await pop_preview_targets(fake_redis, 1, "add_recommended", AddFriendsRequest(count=10), token)
+    second = await pop_preview_targets(fake_redis, 1, "add_recommended", params, token)
+
+    # Assert
+    assert first == targets
+    assert second is None
+
+
+async def test_preview_targets_ignored_when_params_changed(fake_redis):
+    token = await store_preview_targets(fake_redis, 1, "add_recommended", AddFriendsRequest(count=10), [{"id": 1}])
+
+    assert await pop_preview_targets(fake_redis, 1, "add_recommended", AddFriendsRequest(count=50), token) is None
+
+
+async def test_preview_token_is_bound_to_user(fake_redis):
+    token = await store_preview_targets(fake_redis, 1, "add_recommended", AddFriendsRequest(), [{"id": 1}])
+
+    assert await pop_preview_targets(fake_redis, 2, "add_recommended", AddFriendsRequest(), token) is None
@@ -0,0 +1,91 @@
+# tests/services/test_principal_cache.py
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.principal_cache import PRINCIPAL_VERSION_KEY, Principal, PrincipalCache, invalidate_principals
+from app.db.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+def _make_redis():
+    """Минимальная in-memory замена Redis для MGET/SET."""
+    store: dict[str, str] = {}
+    redis = MagicMock()
+    redis.mget = AsyncMock(side_effect=lambda *keys: [store.get(k) for k in keys])
+    redis.set = AsyncMock(side_effect=lambda key, value, ex=None: store.__setitem__(key, value))
+    return redis, store
+
+
+async def test_principal_is_served_from_cache_without_queries(db_session: AsyncSession, test_user: User):
+    """
+    Тест: первый запрос читает принципала из БД, повторные (в том же процессе
+    или в соседнем через Redis) обходятся без обращения к БД.
+    """
+    # Arrange
+    redis, store = _make_redis()
+    cache = PrincipalCache()
+    db_session.execute = AsyncMock(wraps=db_session.execute)
+
+    # Act
+    first = await cache.get_or_load(redis, db_session, test_user.id, test_user.id)
+    second = await cache.get_or_load(redis, db_session, test_user.id, test_user.id)
+    from_other_process = await PrincipalCache().get_or_load(redis, db_session, test_user.id, test_user.id)
+
+    # Assert
+    assert isinstance(first, Principal) and first.id == test_user.id
+    assert first == second == from_other_process
+    assert db_session.execute.await_count == 1
+    assert len(store) == 1
+
+
+async def test_version_bump_invalidates_cached_principal(db_session: AsyncSession, test_user: User):
+    """Тест: после инкремента версии пользователя кэш в Redis перестает использоваться."""
+    # Arrange
+    redis, store = _make_redis()
+    await PrincipalCache().get_or_load(redis, db_session, test_user.id, test_user.id)
+    test_user.is_frozen = True
+    await db_session.commit()
+
+    # Act
+    store[f"principal:ver:{test_user.id}"] = "1"
+    principal = await PrincipalCache().get_or_load(redis, db_session, test_user.id, test_user.id)
+
+    # Assert
+    assert principal.is_frozen is True
+
+
+class _FakePipeline:
+    def __init__(self, store):
+        self.store = store
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def execute(self):
+        return []
+
+
+async def test_versions_never_repeat_after_key_expiry():
+    """Тест: после истечения ключа версии новая версия не совпадает со старой."""
+    # Arrange
+    store: dict[str, str] = {}
+    redis = MagicMock()
+    redis.pipeline = MagicMock(side_effect=lambda transaction=True: _FakePipeline(store))
+    key = PRINCIPAL_VERSION_KEY.format(user_id=1)
+
+    # Act
+    await invalidate_principals(redis, 1)
+    first = store.pop(key)  # ключ истек
+    await invalidate_principals(redis, 1)
+
+    # Assert
+    assert store[key] != first
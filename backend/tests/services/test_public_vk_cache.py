@@ -0,0 +1,98 @@
+# tests/services/test_public_vk_cache.py
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core.cache_metrics import CACHE_STATS_KEY
+from app.services.public_vk_cache import PublicVKCache, cache_slot
+
+pytestmark = pytest.mark.anyio
+
+
+def _likes_call(owner_id, post_id, **extra):
+    return {"method": "likes.getList", "params": {
+        "type": "post", "owner_id": owner_id, "item_id": post_id, "count": 1000, "offset": 0, **extra,
+    }}
+
+
+def _vk_api(closed_groups=()):
+    api = AsyncMock()
+
+    def respond(call):
+        method, params = call["method"], call["params"]
+        if method == "groups.getById":
+            return {"groups": [{"id": params["group_id"], "is_closed": int(params["group_id"] in closed_groups)}]}
+        if method == "likes.getList":
+            return {"count": 1, "items": [params["item_id"] * 10]}
+        if method == "groups.getMembers" and params["group_id"] == 1:
+            # Токен первого арендатора - друг закрытого профиля и видит его дату рождения
+            return {"count": 1, "items": [{"id": 2, "sex": 2, "is_closed": True, "bdate": "1.1.1990"}]}
+        if method == "wall.getComments":
+            return {"count": 1, "can_post": 1, "items": [
+                {"id": 3, "from_id": 5, "text": "+", "likes": {"count": 4, "user_likes": 1, "can_like": 0}},
+            ]}
+        return False
+
+    async def execute(calls):
+        return [respond(call) for call in calls]
+
+    api.execute.side_effect = execute
+    return api
+
+
+def test_cache_slot_accepts_only_public_calls():
+    group = {"method": "groups.getById", "params": {"group_id": 1, "fields": "status,members_count"}}
+
+    assert cache_slot(group).key == cache_slot(
+        {"method": "groups.getById", "params": {"fields": "members_count,status", "group_id": 1}}
+    ).key
+    assert cache_slot(_likes_call(-1, 5)).group_id == 1
+    # Ответ зависит от токена или это стена пользователя
+    assert cache_slot(_likes_call(-1, 5, filter="likes", friends_only=1)) is None
+    assert cache_slot(_likes_call(7, 5)) is None
+    assert cache_slot({"method": "groups.getById", "params": {"group_id": 1, "fields": "is_member"}}) is None
+    # Профили подписчиков с bdate/city/online у каждого токена свои
+    assert cache_slot({"method": "groups.getMembers", "params": {"group_id": 1, "fields": "sex,bdate,city,online"}}) is None
+    assert cache_slot({"method": "messages.getHistory", "params": {"peer_id": 1}}) is None
+
+
+async def test_second_tenant_reads_pages_from_cache(fake_redis):
+    calls = [_likes_call(-1, post_id) for post_id in range(1, 31)]
+
+    first_api, second_api = _vk_api(), _vk_api()
+    first = await PublicVKCache(fake_redis).execute_batches(first_api, calls, concurrency=2)
+    second = await PublicVKCache(fake_redis).execute_batches(second_api, calls, concurrency=2)
+
+    assert first == second
+    assert second[0] == {"count": 1, "items": [10]}
+    # Первый: groups.getById + 2 execute со страницами; второй - ничего
+    assert first_api.execute.await_count == 3
+    second_api.execute.assert_not_awaited()
+    assert fake_redis.hashes[CACHE_STATS_KEY] == {"vk_public:miss": 31, "vk_public:hit": 31, "vk_public:calls_saved": 3}
+
+
+async def test_closed_groups_and_failed_calls_are_not_cached(fake_redis):
+    calls = [_likes_call(-2, 1), {"method": "wall.getComments", "params": {"owner_id": -3, "post_id": 1}}]
+
+    results = await PublicVKCache(fake_redis).execute_batches(_vk_api(closed_groups={2}), calls, concurrency=1)
+
+    assert results == [{"count": 1, "items": [10]}, {"count": 1, "can_post": 1, "items": [
+        {"id": 3, "from_id": 5, "text": "+", "likes": {"count": 4, "user_likes": 1, "can_like": 0}},
+    ]}]
+    # Закрытое сообщество 2 не кэшируется, открытое 3 - да
+    assert sorted(key.split(":")[1] for key in fake_redis.store) == ["groups.getById", "groups.getById", "wall.getComments"]
+
+
+async def test_second_tenant_never_sees_viewer_private_data(fake_redis):
+    members = {"method": "groups.getMembers", "params": {"group_id": 1, "fields": "sex,bdate,city,online"}}
+    comments = {"method": "wall.getComments", "params": {"owner_id": -1, "post_id": 7}}
+
+    await PublicVKCache(fake_redis).execute_batches(_vk_api(), [members, comments], concurrency=1)
+    second_api = _vk_api()
+    page, thread = await PublicVKCache(fake_redis).execute_batches(second_api, [members, comments], concurrency=1)
+
+    assert thread == {"count": 1, "items": [{"id": 3, "from_id": 5, "text": "+", "likes": {"count": 4}}]}
+    assert not any(key.startswith("vk_public:groups.getMembers") for key in fake_redis.store)
+    # Страница подписчиков не кэшируется - второй арендатор получает ее своим токеном
+    assert [call["method"] for call in second_api.execute.await_args.args[0]] == ["groups.getMembers"]
+    assert page["items"][0]["bdate"] == "1.1.1990"
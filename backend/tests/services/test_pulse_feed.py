@@ -0,0 +1,51 @@
+# tests/services/test_pulse_feed.py
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.pulse_feed import (
+    PULSE_FEED_KEY, PULSE_FEED_MAX_EVENTS, make_pulse_event, push_pulse_events, read_pulse_feed
+)
+from app.services.vk_profile_cache import VK_BRIEF_KEY, get_vk_briefs
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_feed_keeps_newest_events_first_and_is_capped(fake_redis):
+    """Тест: новые события оказываются в начале, лента не растет больше лимита."""
+    # Arrange
+    events = [make_pulse_event("action", f"Задача {i}") for i in range(PULSE_FEED_MAX_EVENTS + 5)]
+
+    # Act
+    await push_pulse_events(fake_redis, 1, events[:10])
+    await push_pulse_events(fake_redis, 1, events[10:])
+    feed = await read_pulse_feed(fake_redis, 1)
+
+    # Assert
+    assert len(fake_redis.lists[PULSE_FEED_KEY.format(user_id=1)]) == PULSE_FEED_MAX_EVENTS
+    assert feed[0]["message"] == f"Задача {PULSE_FEED_MAX_EVENTS + 4}"
+    assert feed[-1]["message"] == "Задача 5"
+
+
+async def test_read_feed_survives_redis_errors():
+    redis = MagicMock()
+    redis.lrange = AsyncMock(side_effect=ConnectionError("down"))
+
+    assert await read_pulse_feed(redis, 1) == []
+
+
+async def test_vk_briefs_fetch_only_cache_misses(fake_redis):
+    """Тест: в VK запрашиваются только отсутствующие в кэше карточки, и они кэшируются."""
+    # Arrange
+    fake_redis.store[VK_BRIEF_KEY.format(vk_id=10)] = json.dumps({"name": "Иван Иванов", "photo": "p10"})
+    vk_api = MagicMock()
+    vk_api.users.get = AsyncMock(return_value=[{"id": 20, "first_name": "Анна", "last_name": "Петрова", "photo_50": "p20"}])
+
+    # Act
+    briefs = await get_vk_briefs(fake_redis, vk_api, [10, 20, 20])
+
+    # Assert
+    vk_api.users.get.assert_awaited_once_with(user_ids="20", fields="photo_50")
+    assert briefs == {10: {"name": "Иван Иванов", "photo": "p10"}, 20: {"name": "Анна Петрова", "photo": "p20"}}
+    assert json.loads(fake_redis.store[VK_BRIEF_KEY.format(vk_id=20)])["name"] == "Анна Петрова"
@@ -0,0 +1,52 @@
+# tests/services/test_schedule_expansion.py
+
+import pytest
+from datetime import datetime
+
+from app.services.schedule_expansion import UserPlanCache, _expand, expand_schedule
+
+
+def test_expand_schedule_lists_runs_within_window_and_memoizes():
+    """Тест: разворот возвращает запуски в окне, повторный вызов берется из кэша."""
+    # Arrange
+    _expand.cache_clear()
+    start, end = datetime(2025, 1, 1), datetime(2025, 1, 3, 23, 59)
+
+    # Act
+    runs = expand_schedule("0 9 * * *", start, end)
+    expand_schedule("0 9 * * *", start, end)
+
+    # Assert
+    assert runs == (datetime(2025, 1, 1, 9), datetime(2025, 1, 2, 9), datetime(2025, 1, 3, 9))
+    assert _expand.cache_info().hits == 1
+
+
+def test_expand_schedule_respects_timezone():
+    runs = expand_schedule("0 9 * * *", datetime(2025, 1, 1), datetime(2025, 1, 1, 23, 59), tz_name="Europe/Moscow")
+
+    assert [run.utcoffset().total_seconds() for run in runs] == [3 * 3600]
+
+
+def test_expand_schedule_rejects_invalid_expression():
+    with pytest.raises(ValueError):
+        expand_schedule("not a cron", datetime(2025, 1, 1), datetime(2025, 1, 2))
+
+
+def test_user_plan_cache_misses_after_version_change():
+    """Тест: запись плана недействительна, если изменилась версия расписаний."""
+    cache = UserPlanCache(maxsize=2)
+    cache.put(1, ("window", 3), ["event"])
+
+    assert cache.get(1, ("window", 3)) == ["event"]
+    assert cache.get(1, ("window", 4)) is None
+
+
+def test_user_plan_cache_evicts_least_recently_used():
+    cache = UserPlanCache(maxsize=2)
+    cache.put(1, "k", "a")
+    cache.put(2, "k", "b")
+    cache.get(1, "k")
+    cache.put(3, "k", "c")
+
+    assert cache.get(2, "k") is None
+    assert cache.get(1, "k") == "a"
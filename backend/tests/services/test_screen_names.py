@@ -0,0 +1,65 @@
+# tests/services/test_screen_names.py
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.core.cache_metrics import CACHE_STATS_KEY
+from app.services.screen_names import (
+    SCREEN_NAME_KEY, ResolvedName, extract_screen_names, normalize_screen_name, resolve_screen_names
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def vk_api():
+    api = AsyncMock()
+    known = {"durov": {"type": "user", "object_id": 1}, "apiclub": {"type": "group", "object_id": 2}}
+
+    async def execute(calls):
+        assert len(calls) <= 25
+        return [known.get(call["params"]["screen_name"], []) for call in calls]
+
+    api.execute.side_effect = execute
+    return api
+
+
+def test_extract_screen_names_from_links_and_mentions():
+    text = "Пишите https://vk.com/Durov. или [id42|Ивану], @apiclub и vk.com/wall-1_2; почта a@mail.ru"
+
+    assert extract_screen_names(text) == ["durov", "id42", "apiclub"]
+    assert normalize_screen_name("m.vk.com/club7") == "club7"
+    assert normalize_screen_name("просто текст") is None
+
+
+async def test_resolve_dedupes_and_caches_misses(fake_redis, vk_api):
+    result = await resolve_screen_names(fake_redis, vk_api, ["vk.com/durov", "@durov", "id5", "apiclub", "nobody_here"])
+
+    assert result == {
+        "durov": ResolvedName("user", 1), "id5": ResolvedName("user", 5),
+        "apiclub": ResolvedName("group", 2), "nobody_here": None,
+    }
+    assert len(vk_api.execute.await_args.args[0]) == 3
+    assert fake_redis.store[SCREEN_NAME_KEY.format(name="durov")] == "user:1"
+    assert fake_redis.ttls[SCREEN_NAME_KEY.format(name="nobody_here")] < fake_redis.ttls[SCREEN_NAME_KEY.format(name="durov")]
+    assert fake_redis.hashes[CACHE_STATS_KEY] == {"screen_name:miss": 3}
+
+
+async def test_cached_names_skip_vk(fake_redis, vk_api):
+    fake_redis.store.update({SCREEN_NAME_KEY.format(name="durov"): "user:1", SCREEN_NAME_KEY.format(name="ghost"): "-"})
+
+    result = await resolve_screen_names(fake_redis, vk_api, ["durov", "ghost"])
+
+    assert result == {"durov": ResolvedName("user", 1), "ghost": None}
+    vk_api.execute.assert_not_awaited()
+    assert fake_redis.hashes[CACHE_STATS_KEY] == {"screen_name:hit": 2}
+
+
+async def test_failed_calls_are_not_cached(fake_redis, vk_api):
+    vk_api.execute.side_effect = None
+    vk_api.execute.return_value = [False]
+
+    result = await resolve_screen_names(fake_redis, vk_api, ["durov"])
+
+    assert result == {}
+    assert fake_redis.store == {}
@@ -75,4 +75,21 @@ class TestSystemLogEmitter:
         assert notification is not None
         assert notification.user_id == 123
         assert notification.message == "Test Notification"
-        assert notification.level == "success"
\ No newline at end of file
+        assert notification.level == "success"
+    async def test_send_system_notification_counts_after_flush(self, mocker):
+        """Тест: счетчик непрочитанных меняется через общий Redis и только после flush."""
+        calls = []
+        db = MagicMock()
+        db.flush = AsyncMock(side_effect=lambda: calls.append("flush"))
+        adjust = mocker.patch(
+            'app.services.event_emitter.adjust_unread_counts',
+            AsyncMock(side_effect=lambda *args: calls.append("adjust")),
+        )
+        counter_redis = object()
+        emitter = SystemLogEmitter(task_name="test_task", counter_redis=counter_redis)
+        emitter.set_context(user_id=123)
+
+        await emitter.send_system_notification(db, "Test Notification", "success")
+
+        assert calls == ["flush", "adjust"]
+        adjust.assert_awaited_once_with(counter_redis, {123: 1})
@@ -11,6 +11,7 @@ from app.services.event_emitter import RedisEventEmitter
 from app.core.exceptions import UserLimitReachedError
 from app.services.vk_api import VKAccessDeniedError
 from redis.asyncio import Redis as AsyncRedis
+from app.services.contacted_set import CONTACTED_KEY
 from app.core.config import settings
 
 pytestmark = pytest.mark.asyncio
@@ -88,8 +89,8 @@ async def test_add_friends_redis_lock_prevents_duplicates(
     service.humanizer = AsyncMock()
     
     # Очистим тестовый Redis перед запуском.
-    redis_client = AsyncRedis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/2")
-    await redis_client.flushdb()
+    redis_client = AsyncRedis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/1")
+    await redis_client.delete(CONTACTED_KEY.format(user_id=test_user.id))
     await redis_client.aclose()
 
     # Act
@@ -115,7 +116,7 @@ async def test_add_friends_with_liking_closed_profile(
     mock_vk_api.add_friend.return_value = 1
     service.vk_api = mock_vk_api
     service.humanizer = AsyncMock()
-    mocker.patch('app.services.outgoing_request_service.AsyncRedis.from_url').return_value = AsyncMock()
+    mocker.patch('app.core.app_redis.app_redis', return_value=AsyncMock())
 
     request_params = AddFriendsRequest(count=1, like_config=LikeAfterAddConfig(enabled=True))
 
@@ -154,7 +155,7 @@ async def test_add_friends_with_message_limit_reached_mid_task(
     mock_vk_api.add_friend.return_value = 1
     service.vk_api = mock_vk_api
     service.humanizer = AsyncMock()
-    mocker.patch('app.services.outgoing_request_service.AsyncRedis.from_url').return_value = AsyncMock()
+    mocker.patch('app.core.app_redis.app_redis', return_value=AsyncMock())
 
     request_params = AddFriendsRequest(count=2, send_message_on_add=True, message_text="Привет, {name}!")
 
@@ -61,10 +61,13 @@ class TestProfileAnalyticsServiceRobustness:
         service = ProfileAnalyticsService(db=db_session, user=test_user, emitter=mock_emitter)
         mock_vk_api = AsyncMock()
         # Мокаем ответы VK API, имитируя "пустой" аккаунт
-        mock_vk_api.users.get.return_value = [{"id": test_user.vk_id}] # нет поля 'counters'
-        mock_vk_api.wall.get.return_value = {"count": 0} # нет поля 'items'
-        mock_vk_api.photos.getAll.return_value = None # API может вернуть None
+        mock_vk_api.execute.return_value = [
+            [{"id": test_user.vk_id}], # нет поля 'counters'
+            {"count": 0}, # нет поля 'items'
+            {"count": 0, "items": []},
+        ]
         service.vk_api = mock_vk_api
+        mocker.patch.object(service, "_initialize_vk_api", AsyncMock())
         
         # Act & Assert
         # Мы ожидаем, что метод выполнится без ошибок
@@ -73,8 +76,45 @@ class TestProfileAnalyticsServiceRobustness:
         except Exception as e:
             pytest.fail(f"snapshot_profile_metrics failed unexpectedly on empty data: {e}")
 
-        # Проверяем, что методы для подсчета лайков были вызваны, но вернули 0
-        total_post_likes = await service._get_likes_from_wall(0, 100)
-        assert total_post_likes == (0, 0)
-        total_photo_likes = await service._get_likes_from_photos(0, 200)
-        assert total_photo_likes == (0, 0)
\ No newline at end of file
+        # Пустой аккаунт не требует догрузки истории
+        mock_vk_api.execute.assert_awaited_once()
+        assert await service._get_total_likes() == {}
+    @pytest.mark.parametrize("failing_execute", [1, 2], ids=["recent_window", "backfill"])
+    async def test_snapshot_aborts_when_a_page_fails(
+        self, test_user, db_session, mock_emitter, mocker, failing_execute
+    ):
+        """
+        Тест: если одна из страниц execute не пришла (False), снимок не
+        сохраняется - ни окно (иначе его элементы удалились бы как удаленные),
+        ни догрузка (иначе high-water mark перескочил бы пропущенную страницу).
+        """
+        test_user.analytics_settings_posts_count = 100
+        test_user.analytics_settings_photos_count = 200
+        service = ProfileAnalyticsService(db=db_session, user=test_user, emitter=mock_emitter)
+        mocker.patch.object(service, "_initialize_vk_api", AsyncMock())
+        store_items = mocker.patch.object(service, "_store_items", AsyncMock())
+        prune = mocker.patch.object(service, "_prune_deleted_items", AsyncMock())
+
+        def wall_page(offset):
+            return {"count": 1000, "items": [{"id": 1000 - offset - i, "likes": {"count": 1}} for i in range(100)]}
+
+        calls_made = 0
+
+        async def execute(calls):
+            nonlocal calls_made
+            calls_made += 1
+            pages = [wall_page(call["params"]["offset"]) for call in calls if call["method"] == "wall.get"]
+            if calls_made == failing_execute:
+                pages[-1] = False
+            if calls_made == 1:
+                return [[{"id": test_user.vk_id}], *pages, {"count": 0, "items": []}]
+            return pages
+
+        service.vk_api = AsyncMock()
+        service.vk_api.execute.side_effect = execute
+
+        await service.snapshot_profile_metrics()
+
+        assert service.vk_api.execute.await_count == failing_execute
+        store_items.assert_not_awaited()
+        prune.assert_not_awaited()
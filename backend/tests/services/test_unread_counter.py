@@ -0,0 +1,58 @@
+# tests/services/test_unread_counter.py
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.unread_counter import adjust_unread_counts, get_unread_count, reconcile_unread_counts
+
+pytestmark = pytest.mark.anyio
+
+
+def _db_returning(value):
+    db = MagicMock()
+    result = MagicMock()
+    result.scalar_one.return_value = value
+    result.all.return_value = value
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+async def test_cached_counter_is_returned_without_query(fake_redis):
+    fake_redis.store.update({"notif_unread:1": "4"})
+    db = _db_returning(99)
+
+    assert await get_unread_count(fake_redis, db, 1) == 4
+    db.execute.assert_not_awaited()
+
+
+async def test_missing_counter_is_filled_from_db(fake_redis):
+    """Тест: при отсутствии счетчика он считается в БД и сохраняется."""
+    db = _db_returning(3)
+
+    assert await get_unread_count(fake_redis, db, 1) == 3
+    assert fake_redis.store["notif_unread:1"] == "3"
+
+
+async def test_adjust_sends_deltas_for_existing_counters_only():
+    redis = MagicMock()
+    redis.eval = AsyncMock()
+
+    await adjust_unread_counts(redis, {1: 1, 2: 0, 3: -5})
+
+    _, numkeys, *args = redis.eval.await_args.args
+    assert numkeys == 2
+    assert args == ["notif_unread:1", "notif_unread:3", 1, -5]
+
+
+async def test_reconcile_fixes_drifted_counters(fake_redis):
+    """Тест: сверка выставляет фактические значения, у пользователей без непрочитанных - 0."""
+    # Arrange
+    fake_redis.store.update({"notif_unread:1": "7", "notif_unread:2": "2", "notif_unread:3": "1"})
+    db = _db_returning([(1, 5), (2, 2)])
+
+    # Act
+    fixed = await reconcile_unread_counts(db, fake_redis)
+
+    # Assert
+    assert fixed == 2
+    assert fake_redis.store == {"notif_unread:1": "5", "notif_unread:2": "2", "notif_unread:3": "0"}
@@ -1,10 +1,7 @@
 # tests/services/test_vk_user_filter.py
-import pytest
-from app.services.vk_user_filter import apply_filters_to_profiles
+from app.services.vk_user_filter import apply_filters_to_profiles, compile_filters
 from app.api.schemas.actions import ActionFilters
 
-pytestmark = pytest.mark.asyncio
-
 # Пример данных, которые мог бы вернуть VK API
 mock_profiles = [
     {"id": 1, "sex": 2, "online": 1, "city": {"title": "Москва"}}, # Мужчина, онлайн, Москва
@@ -14,34 +11,54 @@ mock_profiles = [
     {"id": 5, "deactivated": "banned"}, # Забаненный
 ]
 
-async def test_filter_by_sex():
+def test_filter_by_sex():
     filters = ActionFilters(sex=1) # Только женщины
-    result = await apply_filters_to_profiles(mock_profiles, filters)
+    result = apply_filters_to_profiles(mock_profiles, filters)
     assert len(result) == 2
     assert {p["id"] for p in result} == {2, 4}
 
-async def test_filter_by_online():
+def test_filter_by_online():
     filters = ActionFilters(is_online=True)
-    result = await apply_filters_to_profiles(mock_profiles, filters)
+    result = apply_filters_to_profiles(mock_profiles, filters)
     assert len(result) == 3
     assert {p["id"] for p in result} == {1, 3, 4}
 
-async def test_filter_by_city():
+def test_filter_by_city():
     filters = ActionFilters(city="Москва")
-    result = await apply_filters_to_profiles(mock_profiles, filters)
+    result = apply_filters_to_profiles(mock_profiles, filters)
     assert len(result) == 3
     assert {p["id"] for p in result} == {1, 2, 4}
 
-async def test_complex_filter():
+def test_complex_filter():
     # Женщины, онлайн, из Москвы
     filters = ActionFilters(sex=1, is_online=True, city="Москва")
-    result = await apply_filters_to_profiles(mock_profiles, filters)
+    result = apply_filters_to_profiles(mock_profiles, filters)
     assert len(result) == 1
     assert result[0]["id"] == 4
 
-async def test_remove_banned_filter():
+def test_remove_banned_filter():
     # Фильтр на удаление забаненных
     filters = ActionFilters(remove_banned=True)
-    result = await apply_filters_to_profiles(mock_profiles, filters)
+    result = apply_filters_to_profiles(mock_profiles, filters)
     # Забаненный должен остаться в списке, так как фильтр remove_banned не исключает, а является условием для действия
-    assert len(result) == 5
\ No newline at end of file
+    assert len(result) == 5
+
+def test_compiled_filter_normalizes_once_and_uses_fixed_now():
+    now_ts = 1_700_000_000
+    profiles = [
+        {"id": 1, "status": "Ищу РАБОТУ", "city": {"title": "Москва"}, "last_seen": {"time": now_ts - 1800}},
+        {"id": 2, "status": "работа мечты", "city": {"title": "Москва"}, "last_seen": {"time": now_ts - 7200}},
+        {"id": 3, "status": None, "city": None, "last_seen": None},
+    ]
+    compiled = compile_filters(
+        ActionFilters(status_keyword="  Работ ", city=" МОСКВА", last_seen_hours=1), now_ts=now_ts
+    )
+
+    assert [p["id"] for p in compiled.apply(profiles)] == [1]
+    assert compiled.matches(profiles[0]) and not compiled.matches(profiles[2])
+
+def test_compiled_filter_without_active_filters_keeps_everything():
+    compiled = compile_filters(ActionFilters())
+
+    assert compiled.conditions == ()
+    assert compiled.apply(iter(mock_profiles)) == mock_profiles
@@ -0,0 +1,49 @@
+# tests/services/vk_api/test_profiles.py
+
+from app.api.schemas.actions import ActionFilters
+from app.services.vk_api import VKProfile, parse_profiles
+from app.services.vk_user_filter import compile_filters
+
+VK_ITEMS = [
+    {
+        "id": 1, "first_name": "Анна", "last_name": "Иванова", "sex": 1, "online": 1,
+        "last_seen": {"time": 1_700_000_000, "platform": 7}, "is_closed": False, "can_access_closed": True,
+        "city": {"id": 1, "title": "Москва"}, "status": "Ищу работу", "bdate": "3.4.1995",
+        "photo_id": "1_456", "counters": {"friends": 120},
+    },
+    {"id": 2, "first_name": "DELETED", "last_name": "", "deactivated": "deleted"},
+    {"first_name": "Без id"},
+]
+
+
+def test_parse_profiles_flattens_vk_items():
+    anna, deleted = parse_profiles(VK_ITEMS)
+
+    assert anna == VKProfile(
+        id=1, first_name="Анна", last_name="Иванова", sex=1, online=1, last_seen=1_700_000_000,
+        is_closed=False, city_id=1, city_title="Москва", status="Ищу работу", bdate="3.4.1995", photo_id="1_456",
+    )
+    assert deleted.deactivated == "deleted" and deleted.is_closed is None and deleted.raw is None
+    assert not hasattr(anna, "__dict__")
+
+
+def test_to_dict_keeps_fields_services_read():
+    anna, deleted = parse_profiles(VK_ITEMS)
+
+    assert anna.to_dict() == {
+        "id": 1, "first_name": "Анна", "last_name": "Иванова", "sex": 1, "online": 1,
+        "last_seen": {"time": 1_700_000_000}, "is_closed": False, "city": {"id": 1, "title": "Москва"},
+        "status": "Ищу работу", "bdate": "3.4.1995", "photo_id": "1_456",
+    }
+    assert deleted.to_dict() == {"id": 2, "first_name": "DELETED", "last_name": "", "online": 0, "deactivated": "deleted"}
+    assert parse_profiles(VK_ITEMS, keep_raw=True)[0].to_dict() is VK_ITEMS[0]
+
+
+def test_records_filter_like_dicts():
+    items = VK_ITEMS[:2] + [{"id": 3, "sex": 1, "online": 1, "city": {"title": "Москва"}, "status": "работа"}]
+    filters = ActionFilters(sex=1, is_online=True, city="москва", status_keyword="работ", remove_banned=False)
+    compiled = compile_filters(filters)
+
+    from_records = [p.id for p in compiled.apply_records(parse_profiles(items))]
+
+    assert from_records == [p["id"] for p in compiled.apply(items)] == [1, 3]
@@ -2,16 +2,19 @@
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
-from unittest.mock import AsyncMock, patch
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.db.models import User, ProfileMetric, FriendRequestLog
+from app.db.models import User, ProfileMetric, FriendRequestLog, ProfileContentItem
 from app.core.enums import FriendRequestStatus
 from app.db.models import Plan # Добавьте эту строку
 from app.core.enums import PlanName # Добавьте эту строку
 from sqlalchemy import select # Добавьте эту строку
 from app.tasks.profile_parser import _snapshot_all_users_metrics_async
 # А _update... остается в analytics_jobs.py
-from app.tasks.logic.analytics_jobs import _update_friend_request_statuses_async
+from app.tasks.logic.analytics_jobs import (
+    NOTIFICATIONS_CURSOR_KEY, _process_single_user_notifications, _update_friend_request_statuses_async
+)
 
 
 pytestmark = pytest.mark.anyio
@@ -29,12 +32,12 @@ async def test_snapshot_uses_user_custom_settings(
     await db_session.commit()
 
     mock_api = MockVKAPI.return_value
-    mock_api.users.get = AsyncMock(return_value=[{"counters": {"photos": 0}}])
-    mock_api.wall.get = AsyncMock(side_effect=[
-        {"count": 80},
-        {"items": [{"likes": {"count": 1}} for _ in range(80)]}
+    # Один execute: users.get + страница стены + страница фото
+    mock_api.execute = AsyncMock(return_value=[
+        [{"counters": {"photos": 0}}],
+        {"count": 80, "items": [{"id": i, "likes": {"count": 1}} for i in range(80, 0, -1)]},
+        {"count": 0, "items": []},
     ])
-    mock_api.photos.getAll = AsyncMock(return_value={"count": 0, "items": []})
     mock_api.close = AsyncMock()
     
     # Act: Вызываем _snapshot_all_users_metrics_async, который теперь импортирован правильно
@@ -46,6 +49,44 @@ async def test_snapshot_uses_user_custom_settings(
     assert metric is not None
     assert metric.recent_post_likes == 55
     assert metric.total_post_likes == 80
+    mock_api.execute.assert_awaited_once()
+
+
+@patch('app.services.base.VKAPI')
+async def test_snapshot_fetches_only_items_above_watermark(
+    MockVKAPI, db_session: AsyncSession, test_user: User
+):
+    """
+    Тест: Повторный снимок запрашивает только окно недавних постов и
+    считает итоги по сохраненным лайкам, не выкачивая старую стену заново.
+    """
+    # Arrange: посты 1..30 уже сохранены с 1 лайком
+    test_user.analytics_settings_posts_count = 10
+    db_session.add_all([
+        ProfileContentItem(user_id=test_user.id, item_type="post", item_id=i, likes_count=1)
+        for i in range(1, 31)
+    ])
+    await db_session.commit()
+
+    mock_api = MockVKAPI.return_value
+    # Появились посты 31, 32; в окне 23..32 у каждого теперь по 2 лайка
+    mock_api.execute = AsyncMock(return_value=[
+        [{"counters": {"photos": 0}}],
+        {"count": 32, "items": [{"id": i, "likes": {"count": 2}} for i in range(32, 22, -1)]},
+        {"count": 0, "items": []},
+    ])
+    mock_api.close = AsyncMock()
+
+    # Act
+    await _snapshot_all_users_metrics_async(session=db_session)
+
+    # Assert
+    metric = (await db_session.execute(
+        select(ProfileMetric).where(ProfileMetric.user_id == test_user.id)
+    )).scalar_one()
+    assert metric.recent_post_likes == 20
+    assert metric.total_post_likes == 20 + 22
+    mock_api.execute.assert_awaited_once()
 
 
 @patch('app.tasks.logic.analytics_jobs.VKAPI')
@@ -71,7 +112,7 @@ async def test_update_friend_requests_logic(
 
     mock_api = MockVKAPI.return_value
     # Делаем метод асинхронным и сразу задаем возвращаемое значение
-    mock_api.get_user_friends = AsyncMock(return_value={"items": [2, 3, 4]})
+    mock_api.execute = AsyncMock(return_value=[[{"user_id": 2, "friend_status": 3}]])
     mock_api.close = AsyncMock()
 
     # Act: Вызываем _update_friend_request_statuses_async
@@ -81,4 +122,84 @@ async def test_update_friend_requests_logic(
     await db_session.refresh(req1)
     await db_session.refresh(req2)
     assert req1.status == FriendRequestStatus.pending
-    assert req2.status == FriendRequestStatus.accepted
\ No newline at end of file
+    assert req2.status == FriendRequestStatus.accepted
+
+
+@patch('app.tasks.logic.analytics_jobs.ARE_FRIENDS_MAX_IDS', 2)
+@patch('app.tasks.logic.analytics_jobs.VKAPI')
+@patch('app.tasks.logic.analytics_jobs.decrypt_data', return_value="vk_token")
+async def test_update_friend_requests_chunks_ids_into_execute(
+    mock_decrypt, MockVKAPI, db_session: AsyncSession
+):
+    """
+    Тест: ID целей режутся на чанки по лимиту areFriends и уходят одним execute,
+    а статусы сопоставляются по user_id, а не по порядку ответа.
+    """
+    pro_plan = (await db_session.execute(select(Plan).where(Plan.name_id == PlanName.PRO.name))).scalar_one()
+    user = User(vk_id=333, encrypted_vk_token="valid_token", plan_id=pro_plan.id)
+    requests = [FriendRequestLog(user=user, target_vk_id=vk_id, status=FriendRequestStatus.pending) for vk_id in range(10, 15)]
+    db_session.add_all([user, *requests])
+    await db_session.commit()
+
+    mock_api = MockVKAPI.return_value
+    mock_api.execute = AsyncMock(return_value=[
+        [{"user_id": 11, "friend_status": 3}, {"user_id": 10, "friend_status": 1}],
+        [{"user_id": 12, "friend_status": 0}, {"user_id": 13, "friend_status": 3}],
+        False,
+    ])
+    mock_api.close = AsyncMock()
+
+    await _update_friend_request_statuses_async(session=db_session)
+
+    calls = mock_api.execute.await_args.args[0]
+    assert mock_api.execute.await_count == 1
+    assert [c["params"]["user_ids"] for c in calls] == ["10,11", "12,13", "14"]
+
+    for req in requests:
+        await db_session.refresh(req)
+    accepted = {req.target_vk_id for req in requests if req.status == FriendRequestStatus.accepted}
+    assert accepted == {11, 13}
+
+
+@asynccontextmanager
+async def savepoint():
+    yield
+
+
+class CursorRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = str(value)
+
+
+@patch('app.tasks.logic.analytics_jobs._push_activity_pulse', new_callable=AsyncMock)
+@patch('app.tasks.logic.analytics_jobs.VKAPI')
+@patch('app.tasks.logic.analytics_jobs.decrypt_data', return_value="vk_token")
+async def test_notifications_are_processed_once(mock_decrypt, MockVKAPI, mock_push):
+    """
+    Тест: повторный запуск запрашивает уведомления начиная с последнего
+    обработанного, и те же события не попадают в ленту пульса второй раз.
+    """
+    like = {"type": "like_post", "date": 1_700_000_100, "feedback": [{"from_id": 5}]}
+    mock_api = MockVKAPI.return_value
+    # VK включает start_time в выборку, поэтому второй ответ снова содержит старое событие
+    mock_api.notifications.get = AsyncMock(return_value={"items": [like]})
+    mock_api.notifications.markAsViewed = AsyncMock()
+    mock_api.close = AsyncMock()
+
+    session = AsyncMock()
+    session.begin_nested = MagicMock(side_effect=savepoint)
+    redis, user = CursorRedis(), MagicMock(id=1, encrypted_vk_token="t")
+
+    await _process_single_user_notifications(session, redis, user)
+    await _process_single_user_notifications(session, redis, user)
+
+    assert mock_api.notifications.get.await_args_list[0].kwargs["start_time"] is None
+    assert mock_api.notifications.get.await_args_list[1].kwargs["start_time"] == 1_700_000_101
+    assert redis.store[NOTIFICATIONS_CURSOR_KEY.format(user_id=1)] == "1700000100"
+    mock_push.assert_awaited_once()
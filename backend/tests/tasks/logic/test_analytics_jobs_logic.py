@@ -2,10 +2,10 @@
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
 from datetime import date, timedelta
 
-from app.db.models import User, DailyStats, WeeklyStats, MonthlyStats
+from app.db.models import User, DailyStats, WeeklyStats, MonthlyStats, StatsRollupWatermark
 from app.tasks.logic.analytics_jobs import _aggregate_daily_stats_async
 
 pytestmark = pytest.mark.anyio
@@ -22,8 +22,8 @@ async def users_with_stats(db_session: AsyncSession):
     
     stats1 = DailyStats(user_id=user1.id, date=yesterday, likes_count=10, friends_added_count=2)
     stats2 = DailyStats(user_id=user2.id, date=yesterday, likes_count=20, friends_added_count=3)
-    # Статистика за позавчера, которая не должна учитываться
-    stats3 = DailyStats(user_id=user1.id, date=yesterday - timedelta(days=1), likes_count=100)
+    # Статистика за другой период, которая не должна попасть в текущие неделю и месяц
+    stats3 = DailyStats(user_id=user1.id, date=yesterday - timedelta(days=400), likes_count=100)
     
     db_session.add_all([stats1, stats2, stats3])
     await db_session.commit()
@@ -42,14 +42,43 @@ async def test_aggregate_daily_stats_creates_new_records(db_session: AsyncSessio
 
     # Assert
     # Проверяем недельную статистику
-    week_stat1 = (await db_session.execute(select(WeeklyStats).where(WeeklyStats.user_id == user1.id))).scalar_one()
-    week_stat2 = (await db_session.execute(select(WeeklyStats).where(WeeklyStats.user_id == user2.id))).scalar_one()
+    week_stat1 = (await db_session.execute(select(WeeklyStats).where(WeeklyStats.user_id == user1.id, WeeklyStats.week_identifier == week_id))).scalar_one()
+    week_stat2 = (await db_session.execute(select(WeeklyStats).where(WeeklyStats.user_id == user2.id, WeeklyStats.week_identifier == week_id))).scalar_one()
     
     assert week_stat1.likes_count == 10
     assert week_stat1.friends_added_count == 2
     assert week_stat2.likes_count == 20
 
     # Проверяем месячную статистику
-    month_stat1 = (await db_session.execute(select(MonthlyStats).where(MonthlyStats.user_id == user1.id))).scalar_one()
+    month_stat1 = (await db_session.execute(select(MonthlyStats).where(MonthlyStats.user_id == user1.id, MonthlyStats.month_identifier == month_id))).scalar_one()
     assert month_stat1.likes_count == 10
-    assert month_stat1.friends_added_count == 2
\ No newline at end of file
+    assert month_stat1.friends_added_count == 2
+
+
+async def test_aggregate_daily_stats_is_idempotent(db_session: AsyncSession, users_with_stats):
+    """
+    Тест: повторный запуск (в т.ч. после сброса watermark) не задваивает значения,
+    а сводки учитывают все счетчики DailyStats.
+    """
+    # Arrange
+    user1, _ = users_with_stats
+    yesterday = date.today() - timedelta(days=1)
+    daily = (await db_session.execute(
+        select(DailyStats).where(DailyStats.user_id == user1.id, DailyStats.date == yesterday)
+    )).scalar_one()
+    daily.messages_sent_count = 7
+    await db_session.commit()
+
+    # Act
+    await _aggregate_daily_stats_async(session=db_session)
+    await db_session.execute(delete(StatsRollupWatermark))
+    await _aggregate_daily_stats_async(session=db_session)
+
+    # Assert
+    week_stat = (await db_session.execute(select(WeeklyStats).where(
+        WeeklyStats.user_id == user1.id, WeeklyStats.week_identifier == yesterday.strftime('%Y-%W')
+    ))).scalar_one()
+    assert week_stat.likes_count == 10
+    assert week_stat.messages_sent_count == 7
+    watermark = await db_session.get(StatsRollupWatermark, "daily_stats")
+    assert watermark.processed_through == yesterday
@@ -0,0 +1,58 @@
+# tests/tasks/test_fan_out.py
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock
+
+from app.db.models import User
+from app.tasks.fan_out import fan_out_user_jobs
+
+pytestmark = pytest.mark.anyio
+
+
+def _make_arq_pool():
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    pool = MagicMock()
+    pool.job_serializer = None
+    pool.expires_extra_ms = 86_400_000
+    pool.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    pool.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    return pool, pipe
+
+
+async def test_fan_out_enqueues_in_batches_spread_over_window(db_session: AsyncSession, test_user: User):
+    """
+    Тест: задачи ставятся пачками (один pipeline на пачку), удаленные
+    пользователи пропускаются, а запуск размазывается по окну.
+    """
+    # Arrange
+    db_session.add_all([
+        User(vk_id=900001, encrypted_vk_token="t"),
+        User(vk_id=900002, encrypted_vk_token="t"),
+        User(vk_id=900003, encrypted_vk_token="t", is_deleted=True),
+    ])
+    await db_session.commit()
+    pool, pipe = _make_arq_pool()
+
+    # Act
+    enqueued = await fan_out_user_jobs(
+        db_session, pool, "snapshot_single_user_metrics_task", spread_seconds=300, batch_size=2
+    )
+
+    # Assert
+    assert enqueued == 3
+    assert pipe.execute.await_count == 2
+    scores = [next(iter(call.args[1].values())) for call in pipe.zadd.call_args_list]
+    assert all(call.args[0] == "low_priority" for call in pipe.zadd.call_args_list)
+    assert scores == sorted(scores)
+    assert scores[-1] - scores[0] >= 200_000
+
+
+async def test_fan_out_without_users_does_nothing(db_session: AsyncSession):
+    pool, pipe = _make_arq_pool()
+
+    enqueued = await fan_out_user_jobs(db_session, pool, "snapshot_single_user_metrics_task")
+
+    assert enqueued == 0
+    pool.pipeline.assert_not_called()
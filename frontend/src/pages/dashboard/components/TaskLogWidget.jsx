@@ -256,11 +256,11 @@ export default function TaskLogWidget() {
     status,
   } = useInfiniteQuery({
     queryKey: ['task_history', statusFilter],
-    queryFn: ({ pageParam = 1 }) =>
+    queryFn: ({ pageParam = null }) =>
       fetchTaskHistory({ pageParam }, { status: statusFilter || undefined }),
     getNextPageParam: (lastPage) =>
-      lastPage.has_more ? lastPage.page + 1 : undefined,
-    initialPageParam: 1,
+      lastPage.has_more ? lastPage.next_cursor : undefined,
+    initialPageParam: null,
   });
 
   const observer = useRef();
@@ -5,8 +5,9 @@ export const runTask = (taskKey, params) =>
     .post(`/api/v1/tasks/run/${taskKey}`, params)
     .then((res) => res.data);
 
-export const fetchTaskHistory = ({ pageParam = 1 }, filters) => {
-  const params = new URLSearchParams({ page: pageParam, size: 25 });
+export const fetchTaskHistory = ({ pageParam = null }, filters) => {
+  const params = new URLSearchParams({ size: 25 });
+  if (pageParam) params.append('cursor', pageParam);
   if (filters.status) params.append('status', filters.status);
   return apiClient
     .get(`/api/v1/tasks/history?${params.toString()}`)